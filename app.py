@@ -2,28 +2,195 @@
 HOPE Adaptive Messaging Script
 A volunteer recruitment message generator for HOPE Tutoring
 https://www.hopetutoring.org/
+
+Use ``create_app()`` to build an application; ``python app.py`` runs the local
+development server and ``wsgi.py`` is the production entry point.
 """
 
 import os
 import io
+import math
 import csv
 import zipfile
 import webbrowser
 import threading
-from flask import Flask, render_template, request, jsonify, send_file
+import time
+import uuid
+import mimetypes
+from datetime import datetime
+from functools import wraps
+from flask import Blueprint, Flask, Response, abort, current_app, render_template, request, jsonify, send_file, send_from_directory, url_for
 from werkzeug.utils import secure_filename
+from utils import metrics, memory_profiler
+from utils.assets import AssetManifest
+from utils.compression import DecompressRequestMiddleware, compress_response
+from utils.json_provider import FastJSONProvider
+from utils.admission import AdmissionLimiter, AdmissionRejected, weight_for_bytes, weight_for_rows
+from utils.backends import registry as backend_registry
+from utils.warmup import warmup
 from utils.file_parser import FileParser
 from utils.message_generator import MessageGenerator
+from utils.template_catalog import get_catalog
+from utils.roster_store import RosterStore
+from utils.dedup import DuplicateFinder
+from utils.search_index import SEARCH_FIELDS
+from utils.tracking_events import EventBufferFull, TrackingEventLog
+from utils.shard_export import SHARD_BASENAME, SHARD_FORMATS, csv_row, iter_csv, iter_sharded, iter_text_zip, text_file
+from config import load_config
 
-app = Flask(__name__)
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-app.config['UPLOAD_FOLDER'] = 'uploads'
+bp = Blueprint('main', __name__)
 
-# Allowed file extensions
-ALLOWED_EXTENSIONS = {'csv', 'docx', 'pdf'}
+# Allowed file extensions (the parser still sniffs the actual format from content)
+ALLOWED_EXTENSIONS = backend_registry.extensions()
 
-# Ensure upload folder exists
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+# JSON bytes per row, for weighing /generate and export bodies before they are decoded
+# (typical rows are ~270 bytes per volunteer and ~1.5 KB per message; smaller means heavier)
+VOLUNTEER_ROW_BYTES = 256
+MESSAGE_ROW_BYTES = 1024
+
+
+def create_app(config: dict = None, background: bool = True) -> Flask:
+    """
+    Build and configure a Flask application.
+    
+    Args:
+        config: Overrides applied on top of the HSRM_* environment settings
+        background: Set up the mailer, send store, tracking-event writer and warm-up
+            (False for processes that only handle stateless requests)
+        
+    Returns:
+        Configured Flask application
+    """
+    app = Flask(__name__)
+    app.config.update(load_config())
+    if config:
+        app.config.update(config)
+    
+    # orjson-backed jsonify/request.json, and gzip-encoded request bodies (bounded by the upload limit)
+    app.json = FastJSONProvider(app)
+    app.wsgi_app = DecompressRequestMiddleware(app.wsgi_app, max_size=app.config['MAX_CONTENT_LENGTH'])
+    
+    # Rendered pages that don't change between requests (skipped in debug so template edits show up)
+    app.extensions['hsrm_page_cache'] = {}
+    
+    # Fingerprinted CSS/JS from build_assets.py (raw static files when not built or disabled)
+    assets = AssetManifest(os.path.join(app.static_folder, 'dist'))
+    if app.config['USE_BUILT_ASSETS']:
+        assets.load()
+    app.extensions['hsrm_assets'] = assets
+    app.jinja_env.globals['asset_url'] = asset_url
+    
+    # Per-pool admission limits for heavy endpoints
+    app.extensions['hsrm_admission'] = {
+        'upload': AdmissionLimiter(
+            'upload',
+            capacity=app.config['UPLOAD_CAPACITY_MB'],
+            max_queue=app.config['UPLOAD_QUEUE'],
+            queue_timeout=app.config['ADMISSION_TIMEOUT'],
+            retry_after=app.config['ADMISSION_RETRY_AFTER']
+        ),
+        'generate': AdmissionLimiter(
+            'generate',
+            capacity=weight_for_rows(app.config['GENERATE_CAPACITY_ROWS']) if app.config['GENERATE_CAPACITY_ROWS'] > 0 else 0,
+            max_queue=app.config['GENERATE_QUEUE'],
+            queue_timeout=app.config['ADMISSION_TIMEOUT'],
+            retry_after=app.config['ADMISSION_RETRY_AFTER']
+        )
+    }
+    
+    # Recently generated rosters, searchable server-side
+    app.extensions['hsrm_rosters'] = RosterStore(
+        max_rosters=app.config['ROSTER_MAX'],
+        ttl=app.config['ROSTER_TTL_HOURS'] * 3600
+    )
+    
+    # Outbound email; the mailer's sender threads start with the first job
+    app.extensions['hsrm_mailer'] = None
+    app.extensions['hsrm_delivery_log'] = None
+    app.extensions['hsrm_send_store'] = None
+    app.extensions['hsrm_mailer_disabled'] = None
+    if app.config['SMTP_HOST'] and app.config['WORKERS'] > 1:
+        # A send and its status polls would land on workers that don't hold the roster or job
+        app.extensions['hsrm_mailer_disabled'] = (
+            f"Email sending needs a single worker process (HSRM_WORKERS is {app.config['WORKERS']})"
+        )
+        app.logger.warning(app.extensions['hsrm_mailer_disabled'])
+    elif app.config['SMTP_HOST'] and background:
+        _setup_mailer(app)
+    
+    # Batched tracking events; the writer thread starts with the first batch
+    app.extensions['hsrm_tracking_events'] = None
+    if background:
+        app.extensions['hsrm_tracking_events'] = TrackingEventLog(
+            app.config['DELIVERY_DB'],
+            apply_statuses=lambda statuses: _apply_event_statuses(app, statuses),
+            batch_size=app.config['TRACKING_EVENT_BATCH'],
+            flush_interval=app.config['TRACKING_EVENT_FLUSH_SECONDS'],
+            max_pending=app.config['TRACKING_EVENT_MAX_PENDING']
+        )
+    
+    # Ensure upload folder exists
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    
+    # Opt-in memory profiling; MEMORY_PROFILE_TOP sets allocation sites reported per stage
+    if app.config['MEMORY_PROFILE']:
+        memory_profiler.enable(top_n=app.config['MEMORY_PROFILE_TOP'])
+    
+    app.register_blueprint(bp)
+    
+    # Optional background warm-up; WARMUP_BACKENDS limits which formats are pre-imported
+    if app.config['WARMUP'] and background:
+        warmup.start(app, app.config['WARMUP_BACKENDS'])
+    
+    return app
+
+
+def create_worker_app() -> Flask:
+    """
+    App for the ASGI bridge's heavy worker processes (HSRM_HEAVY_EXECUTOR=process).
+    
+    They only parse uploads and build exports, so they get no mailer, send
+    store or tracking-event writer: a worker must never claim and resend
+    orphaned send jobs, and only the serving process may send.
+    """
+    return create_app(background=False)
+
+
+def _setup_mailer(app):
+    """Create the SMTP mailer, its scheduler and the delivery log/queue from the SMTP_* and SEND_* settings."""
+    # Imported here so apps without SMTP configured don't load the email packages
+    from utils.delivery_log import DeliveryLog
+    from utils.mailer import Mailer
+    from utils.send_scheduler import SendScheduler, SendStore
+    
+    config = app.config
+    scheduler = SendScheduler(
+        rate_per_minute=config['SEND_RATE_PER_MINUTE'],
+        domain_rates=config['SEND_DOMAIN_RATES'],
+        default_domain_rate=config['SEND_DEFAULT_DOMAIN_RATE'],
+        burst=config['SEND_BURST']
+    )
+    app.extensions['hsrm_mailer'] = Mailer(
+        host=config['SMTP_HOST'],
+        port=config['SMTP_PORT'],
+        sender=config['SMTP_SENDER'],
+        username=config['SMTP_USERNAME'],
+        password=config['SMTP_PASSWORD'],
+        security=config['SMTP_SECURITY'],
+        timeout=config['SMTP_TIMEOUT'],
+        reply_to=config['SMTP_REPLY_TO'],
+        connections=config['SMTP_CONNECTIONS'],
+        messages_per_connection=config['SMTP_MESSAGES_PER_CONNECTION'],
+        max_attempts=config['SMTP_MAX_ATTEMPTS'],
+        retry_backoff=config['SMTP_RETRY_BACKOFF'],
+        scheduler=scheduler
+    )
+    app.extensions['hsrm_delivery_log'] = DeliveryLog(config['DELIVERY_DB'])
+    store = SendStore(config['DELIVERY_DB'], lease=config['SEND_LEASE_SECONDS'])
+    app.extensions['hsrm_send_store'] = store
+    
+    # Resume sends queued by a process that stopped (now, and whenever one stops later)
+    store.start(lambda jobs: _resume_deliveries(app, jobs))
 
 
 def allowed_file(filename):
@@ -31,15 +198,157 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-@app.route('/')
+def asset_url(path):
+    """URL for a static asset, preferring its built, fingerprinted bundle."""
+    return current_app.extensions['hsrm_assets'].url(path) or url_for('static', filename=path)
+
+
+def admitted(pool, weigh):
+    """
+    Run the view only once the named admission pool has room for it.
+    
+    The slot is held until the response is finished: for streamed responses
+    (exports built as they are sent) that is when the body has been sent.
+    
+    Args:
+        pool: Admission pool name ('upload' or 'generate')
+        weigh: Callable returning the request's weight; it must not read the
+            body, which would use the memory admission is there to bound
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = current_app.extensions['hsrm_admission'][pool]
+            weight = weigh()
+            with metrics.stage(f'admission.{pool}'):
+                taken = limiter.acquire(weight)
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+            except BaseException:
+                limiter.release(taken)
+                raise
+            # Files from send_file are already built (and werkzeug doesn't run close callbacks for them)
+            if response.is_streamed and not response.direct_passthrough:
+                response.call_on_close(lambda: limiter.release(taken))
+            else:
+                limiter.release(taken)
+            return response
+        return wrapper
+    return decorator
+
+
+def _upload_weight():
+    """Weigh an upload by its size in MB."""
+    return weight_for_bytes(request.content_length)
+
+
+def _rows_weight(row_bytes):
+    """Weigh a JSON request by its rows, estimated from its size at ``row_bytes`` per row."""
+    def weigh():
+        return weight_for_rows(math.ceil((request.content_length or 0) / row_bytes))
+    return weigh
+
+
+def _request_json() -> dict:
+    """The request's JSON object ({} if it isn't one), decoded once admitted."""
+    with metrics.stage('request.decode'):
+        data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else {}
+
+
+@bp.before_app_request
+def start_request_timer():
+    """Start the timing record for this request."""
+    metrics.start_request(request.method, request.path)
+
+
+@bp.after_app_request
+def finish_request_timer(response):
+    """Report request duration, status and bytes transferred."""
+    record = metrics.current_record()
+    if record is not None:
+        metrics.finish_request(
+            record,
+            response.status_code,
+            endpoint=request.url_rule.rule if request.url_rule else None,
+            request_bytes=request.content_length,
+            response_bytes=response.content_length
+        )
+    return response
+
+
+@bp.after_app_request
+def compress_large_response(response):
+    """gzip/brotli-compress large JSON and text responses (runs before the timer hook)."""
+    min_size = current_app.config['COMPRESS_MIN_BYTES']
+    if min_size > 0:
+        with metrics.stage('response.compress'):
+            compress_response(response, request.accept_encodings, min_size)
+    return response
+
+
+@bp.teardown_app_request
+def close_request_timer(error=None):
+    """Close records for requests that ended in an unhandled exception."""
+    record = metrics.current_record()
+    if record is not None:
+        metrics.finish_request(record, 500, endpoint=request.url_rule.rule if request.url_rule else None)
+
+
+@bp.app_errorhandler(AdmissionRejected)
+def admission_rejected(error):
+    """Tell clients to back off when a heavy pool is saturated."""
+    response = jsonify({'error': f'The server is busy right now. Please try again in {error.retry_after} seconds.'})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, error.status
+
+
+@bp.route('/')
 def index():
     """Render the main page."""
-    templates = MessageGenerator.get_available_templates()
-    categories = MessageGenerator.get_template_categories()
-    return render_template('index.html', templates=templates, categories=categories)
+    page_cache = current_app.extensions['hsrm_page_cache']
+    html = page_cache.get('index')
+    if html is None:
+        # Cards only need metadata; bodies are fetched from /templates/<id> when previewed
+        catalog = get_catalog()
+        html = render_template(
+            'index.html',
+            templates=catalog.listing,
+            categories=catalog.categories,
+            template_version=catalog.version,
+            sending_enabled=current_app.extensions['hsrm_mailer'] is not None,
+            ingest_enabled=bool(current_app.config['INGEST_MAILBOXES'])
+        )
+        if not current_app.debug:
+            page_cache['index'] = html
+    return html
 
 
-@app.route('/upload', methods=['POST'])
+@bp.route('/assets/<path:filename>')
+def built_asset(filename):
+    """Serve a fingerprinted bundle, precompressed when the client accepts it."""
+    assets = current_app.extensions['hsrm_assets']
+    served, encoding = assets.resolve(filename, request.accept_encodings)
+    if served is None:
+        abort(404)
+    
+    response = send_from_directory(
+        assets.dist_dir,
+        served,
+        mimetype=mimetypes.guess_type(filename)[0],
+        max_age=31536000
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    # The file name changes whenever the content does, so it never needs revalidating
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@bp.route('/upload', methods=['POST'])
+@admitted('upload', _upload_weight)
 def upload_file():
     """Handle file upload and extract volunteer data with recovery mode."""
     if 'file' not in request.files:
@@ -55,12 +364,14 @@ def upload_file():
     
     filepath = None
     try:
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # Prefix with a unique id so concurrent uploads of the same filename don't collide
+        filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
+        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+        with metrics.stage('upload.save'):
+            file.save(filepath)
         
         # Parse the file
-        parser = FileParser()
+        parser = FileParser(current_app.config['PHONE_COUNTRY_CODE'])
         data = parser.parse(filepath)
         
         # Clean up uploaded file
@@ -70,11 +381,16 @@ def upload_file():
         if not data:
             return jsonify({'error': 'Could not extract any volunteer data from the file. Please ensure your file contains names and email addresses.'}), 400
         
-        return jsonify({
-            'success': True,
-            'data': data,
-            'count': len(data)
-        })
+        with metrics.stage('upload.dedup'):
+            duplicates = _duplicate_finder().find(data)
+        
+        with metrics.stage('upload.serialize'):
+            return jsonify({
+                'success': True,
+                'data': data,
+                'count': len(data),
+                'duplicates': duplicates
+            })
     
     except Exception as e:
         # Clean up file on error
@@ -99,7 +415,42 @@ def upload_file():
         return jsonify({'error': f'Error processing file: {error_msg}'}), 500
 
 
-@app.route('/download/sample', methods=['GET'])
+@bp.route('/dedup', methods=['POST'])
+def dedup_contacts():
+    """
+    Merge duplicate contacts (volunteers or tracked contacts).
+    
+    Body: {records: [...], threshold?}. Records that are the same person (email
+    case or Gmail variants, or the same phone or email name with a matching name)
+    are merged into the first of them. Returns the merged records in order and
+    the groups found, with indexes into the given records.
+    """
+    data = request.get_json(silent=True) or {}
+    records = data.get('records')
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        return jsonify({'error': 'records must be a list of objects'}), 400
+    threshold = data.get('threshold')
+    if threshold is not None and (not isinstance(threshold, (int, float)) or not 0 < threshold <= 1):
+        return jsonify({'error': 'threshold must be a number between 0 and 1'}), 400
+    
+    finder = _duplicate_finder(threshold)
+    with metrics.stage('dedup.find'):
+        groups = finder.find(records)
+    with metrics.stage('dedup.merge'):
+        merged = finder.merge(records, groups)
+    return jsonify({'records': merged, 'groups': groups, 'removed': len(records) - len(merged)})
+
+
+def _duplicate_finder(threshold: float = None) -> DuplicateFinder:
+    """DuplicateFinder with the DEDUP_THRESHOLD and PHONE_COUNTRY_CODE settings."""
+    config = current_app.config
+    return DuplicateFinder(
+        threshold=threshold or config['DEDUP_THRESHOLD'],
+        country_code=config['PHONE_COUNTRY_CODE']
+    )
+
+
+@bp.route('/download/sample', methods=['GET'])
 def download_sample():
     """Download a sample CSV template file."""
     sample_path = os.path.join(os.path.dirname(__file__), 'Admin Templates', 'Volunteer_Template_DEMO.csv')
@@ -119,11 +470,12 @@ Jane,Smith,jane.smith@example.com,817-555-0102,"456 Oak Ave, Arlington, TX 76011
     )
 
 
-@app.route('/generate', methods=['POST'])
+@bp.route('/generate', methods=['POST'])
+@admitted('generate', _rows_weight(VOLUNTEER_ROW_BYTES))
 def generate_messages():
     """Generate personalized recruitment emails."""
     try:
-        data = request.json
+        data = _request_json()
         volunteers = data.get('volunteers', [])
         template_id = data.get('template_id', 'general')
         custom_subject = data.get('custom_subject', '')
@@ -140,73 +492,96 @@ def generate_messages():
             custom_body=custom_body if custom_body else None
         )
         
-        return jsonify({
+        result = {
             'success': True,
             'messages': messages,
             'count': len(messages)
-        })
+        }
+        
+        # Optionally keep the roster server-side for search and sync (record id = message position)
+        if data.get('index_roster'):
+            generation = {
+                'template_id': template_id,
+                'custom_subject': custom_subject or None,
+                'custom_body': custom_body or None
+            }
+            with metrics.stage('roster.create'):
+                roster = current_app.extensions['hsrm_rosters'].create(volunteers, data.get('statuses'), generation)
+            result['roster_id'] = roster.id
+            result['roster_version'] = roster.version
+            result['message_version'] = roster.message_version
+            result['message_set'] = roster.message_set
+        
+        with metrics.stage('generate.serialize'):
+            return jsonify(result)
     
     except Exception as e:
         return jsonify({'error': f'Error generating messages: {str(e)}'}), 500
 
 
-@app.route('/download/csv', methods=['POST'])
+@bp.route('/download/csv', methods=['POST'])
+@admitted('generate', _rows_weight(MESSAGE_ROW_BYTES))
 def download_csv():
-    """Download all generated emails as CSV."""
+    """Download all generated emails as CSV (split into a ZIP of parts with max_rows/max_bytes)."""
     try:
-        data = request.json
+        data = _request_json()
         messages = data.get('messages', [])
         
         if not messages:
             return jsonify({'error': 'No messages to download'}), 400
         
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['Name', 'Email', 'Subject', 'Body'])
+        max_rows, max_bytes = _shard_limits(data)
+        if max_rows or max_bytes:
+            return _sharded_response('csv', messages, max_rows, max_bytes)
         
-        for msg in messages:
-            writer.writerow([
-                msg.get('name', ''),
-                msg.get('email', ''),
-                msg.get('subject', ''),
-                msg.get('body', '').replace('\n', '\\n')
-            ])
-        
-        output.seek(0)
+        # Create CSV in memory, encoding straight into the byte buffer (no str copy)
+        with metrics.stage('export.csv'):
+            output = io.BytesIO()
+            text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+            writer = csv.writer(text)
+            writer.writerow(['Name', 'Email', 'Subject', 'Body'])
+            
+            for msg in messages:
+                writer.writerow(csv_row(msg))
+            
+            text.flush()
+            text.detach()
+            output.seek(0)
         
         return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
+            output,
             mimetype='text/csv',
             as_attachment=True,
             download_name='hope_recruitment_emails.csv'
         )
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Error creating CSV: {str(e)}'}), 500
 
 
-@app.route('/download/zip', methods=['POST'])
+@bp.route('/download/zip', methods=['POST'])
+@admitted('generate', _rows_weight(MESSAGE_ROW_BYTES))
 def download_zip():
-    """Download all generated emails as individual text files in a ZIP."""
+    """Download all generated emails as individual text files in a ZIP (split into parts with max_rows/max_bytes)."""
     try:
-        data = request.json
+        data = _request_json()
         messages = data.get('messages', [])
         
         if not messages:
             return jsonify({'error': 'No messages to download'}), 400
         
+        max_rows, max_bytes = _shard_limits(data)
+        if max_rows or max_bytes:
+            return _sharded_response('zip', messages, max_rows, max_bytes)
+        
         # Create ZIP in memory
         zip_buffer = io.BytesIO()
         
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        with metrics.stage('export.zip'), zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
             for i, msg in enumerate(messages, 1):
-                name = msg.get('name', f'Volunteer_{i}').replace(' ', '_')
-                content = f"To: {msg.get('email', '')}\n"
-                content += f"Subject: {msg.get('subject', '')}\n\n"
-                content += msg.get('body', '')
-                
-                zip_file.writestr(f"{name}_email.txt", content)
+                zip_file.writestr(*text_file(i, msg))
         
         zip_buffer.seek(0)
         
@@ -217,15 +592,655 @@ def download_zip():
             download_name='hope_recruitment_emails.zip'
         )
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Error creating ZIP: {str(e)}'}), 500
 
 
-@app.route('/templates', methods=['GET'])
+@bp.route('/download/<any(mbox, eml):export_format>', methods=['POST'])
+@admitted('generate', _rows_weight(MESSAGE_ROW_BYTES))
+def download_mail(export_format):
+    """Download all generated emails as an mbox file or a ZIP of .eml files, for mail clients."""
+    data = _request_json()
+    messages = data.get('messages', [])
+    
+    if not messages:
+        return jsonify({'error': 'No messages to download'}), 400
+    
+    return _mail_export_response(export_format, messages, [message.get('email') for message in messages])
+
+
+@bp.route('/rosters/<roster_id>/download/<any(csv, zip, mbox, eml):export_format>', methods=['GET'])
+def download_roster(roster_id, export_format):
+    """
+    Stream a roster's emails, generating each one as it is written.
+    
+    CSV and ZIP accept ?max_rows= and ?max_bytes= to split the export into parts.
+    """
+    roster = current_app.extensions['hsrm_rosters'].get(roster_id)
+    if roster is None:
+        return _roster_not_found()
+    if not roster.generation or not roster.volunteers:
+        return jsonify({'error': 'Generate messages for this roster before downloading'}), 409
+    
+    messages = _iter_roster_messages(roster)
+    if export_format not in SHARD_FORMATS:
+        return _mail_export_response(export_format, messages, [volunteer.get('email') for volunteer in roster.volunteers])
+    
+    try:
+        max_rows, max_bytes = _shard_limits(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if max_rows or max_bytes:
+        return _sharded_response(export_format, messages, max_rows, max_bytes)
+    
+    _, mimetype, filename = SHARD_FORMATS[export_format]
+    response = Response(iter_csv(messages) if export_format == 'csv' else iter_text_zip(messages), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+def _shard_limits(source) -> tuple:
+    """(max_rows, max_bytes) from a request's JSON or query args, defaulting to EXPORT_SHARD_*."""
+    config = current_app.config
+    limits = []
+    for key, default in (('max_rows', config['EXPORT_SHARD_ROWS']), ('max_bytes', config['EXPORT_SHARD_BYTES'])):
+        value = source.get(key)
+        try:
+            value = default if value in (None, '') else int(value)
+        except (TypeError, ValueError):
+            value = -1
+        if value < 0:
+            raise ValueError(f'{key} must be a whole number (0 for no limit)')
+        limits.append(value)
+    return tuple(limits)
+
+
+def _sharded_response(export_format: str, messages, max_rows: int, max_bytes: int):
+    """Streamed ZIP of ``export_format`` parts plus manifest.json."""
+    response = Response(iter_sharded(export_format, messages, max_rows, max_bytes), mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename={SHARD_BASENAME}_{export_format}_parts.zip'
+    return response
+
+
+def _mail_export_response(export_format: str, messages, addresses: list):
+    """
+    Streamed attachment of ``messages`` (any iterable) in an EXPORT_FORMATS format.
+    
+    ``addresses`` are the messages' recipients, checked up front so the number of
+    messages left out (bad addresses) can go in the X-Skipped-Messages header.
+    """
+    # Imported here so the email packages only load when mail is exported or sent
+    from utils.mail_export import EXPORT_FORMATS, MailExporter
+    
+    exporter = MailExporter(current_app.config['SMTP_SENDER'], current_app.config['SMTP_REPLY_TO'])
+    mimetype, filename = EXPORT_FORMATS[export_format]
+    skipped = exporter.skipped_positions(addresses)
+    chunks = exporter.iter_mbox(messages) if export_format == 'mbox' else exporter.iter_eml_zip(messages)
+    response = Response(chunks, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['X-Skipped-Messages'] = str(len(skipped))
+    return response
+
+
+@bp.route('/templates', methods=['GET'])
 def get_templates():
-    """Get all available email templates."""
-    templates = MessageGenerator.get_available_templates()
-    return jsonify({'templates': templates})
+    """List template metadata; full subjects and bodies come from /templates/<id>."""
+    catalog = get_catalog()
+    return _cached_json(catalog.listing_json, catalog.version)
+
+
+@bp.route('/templates/<template_id>', methods=['GET'])
+def get_template(template_id):
+    """Get one template, including its subject and body."""
+    catalog = get_catalog()
+    entry = catalog.detail_json(template_id)
+    if entry is None:
+        return jsonify({'error': f'Unknown template: {template_id}'}), 404
+    
+    body, etag = entry
+    # URLs carrying the current catalog version never change, so browsers may keep them
+    return _cached_json(body, etag, immutable=request.args.get('v') == catalog.version)
+
+
+def _cached_json(body: bytes, etag: str, immutable: bool = False):
+    """Serve pre-serialized JSON with an ETag, answering If-None-Match with 304."""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@bp.route('/rosters', methods=['POST'])
+@admitted('generate', _rows_weight(VOLUNTEER_ROW_BYTES))
+def create_roster():
+    """Store a roster for server-side search; body: {volunteers, statuses?}."""
+    data = _request_json()
+    volunteers = data.get('volunteers', [])
+    if not volunteers:
+        return jsonify({'error': 'No volunteer data provided'}), 400
+    
+    with metrics.stage('roster.create'):
+        roster = current_app.extensions['hsrm_rosters'].create(volunteers, data.get('statuses'))
+    return jsonify(roster.summary()), 201
+
+
+@bp.route('/rosters/<roster_id>', methods=['GET'])
+def get_roster(roster_id):
+    """Roster id, version and record count."""
+    roster = current_app.extensions['hsrm_rosters'].get(roster_id)
+    if roster is None:
+        return _roster_not_found()
+    return jsonify(roster.summary())
+
+
+@bp.route('/rosters/<roster_id>/search', methods=['GET'])
+def search_roster(roster_id):
+    """
+    Search, filter, sort and page through a roster.
+    
+    Query parameters: q, mode (substring|prefix), fields, status (comma-separated),
+    sort (id|name|email|site|status), order (asc|desc), offset, limit (0 = all ids),
+    records (0 to return ids only).
+    """
+    roster = current_app.extensions['hsrm_rosters'].get(roster_id)
+    if roster is None:
+        return _roster_not_found()
+    
+    args = request.args
+    limit = max(args.get('limit', 50, type=int), 0)
+    include_records = args.get('records', '1') != '0' and limit > 0
+    if include_records:
+        limit = min(limit, 1000)
+    
+    try:
+        with metrics.stage('roster.search'):
+            result = roster.index.search(
+                query=args.get('q', ''),
+                mode=args.get('mode', 'substring'),
+                fields=_csv_arg(args.get('fields')) or list(SEARCH_FIELDS),
+                statuses=_csv_arg(args.get('status')),
+                sort=args.get('sort', 'id'),
+                descending=args.get('order', 'asc') == 'desc',
+                offset=max(args.get('offset', 0, type=int), 0),
+                limit=limit
+            )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    result['roster_id'] = roster.id
+    result['version'] = roster.version
+    if include_records:
+        result['records'] = [roster.index.get(record_id) for record_id in result['ids']]
+    return jsonify(result)
+
+
+@bp.route('/rosters/<roster_id>/records', methods=['PATCH'])
+def update_roster_records(roster_id):
+    """Edit records (e.g. status changes); body: {updates: [{id, field: value, ...}]}."""
+    roster = current_app.extensions['hsrm_rosters'].get(roster_id)
+    if roster is None:
+        return _roster_not_found()
+    
+    updates = (request.get_json(silent=True) or {}).get('updates', [])
+    if not isinstance(updates, list) or not updates:
+        return jsonify({'error': 'No updates provided'}), 400
+    
+    try:
+        version = roster.update_records(updates)
+    except KeyError as e:
+        return jsonify({'error': f'Unknown record: {e.args[0]}'}), 400
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'roster_id': roster.id, 'version': version, 'message_version': roster.message_version})
+
+
+@bp.route('/rosters/<roster_id>/sync', methods=['GET'])
+def sync_roster(roster_id):
+    """
+    Bring a client's cached roster up to date.
+    
+    Query parameters: version and message_version (the client's cached versions) and
+    message_set (the template settings its messages were generated with). Returns an
+    empty 304 when nothing changed, otherwise only the changed records and messages.
+    """
+    roster = current_app.extensions['hsrm_rosters'].get(roster_id)
+    if roster is None:
+        return _roster_not_found()
+    
+    version = request.args.get('version', 0, type=int)
+    message_version = request.args.get('message_version', 0, type=int)
+    if version > roster.version:
+        version = 0
+    # Messages generated with other settings are all stale
+    if roster.message_set and request.args.get('message_set') != roster.message_set:
+        message_version = 0
+    
+    if version == roster.version and message_version >= roster.message_version:
+        response = current_app.response_class(status=304)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    
+    with metrics.stage('roster.sync'):
+        records, message_ids = roster.changes_since(version, message_version)
+        messages = _regenerate_messages(roster, message_ids)
+    
+    response = jsonify({
+        'roster_id': roster.id,
+        'version': roster.version,
+        'message_version': roster.message_version,
+        'message_set': roster.message_set,
+        'records': records,
+        'messages': messages
+    })
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@bp.route('/tracking/events', methods=['POST'])
+def tracking_events():
+    """
+    Record a batch of tracking events: status changes, opens and clicks.
+    
+    Body: {events: [{id, type, roster_id, record_id, status?, url?, email?, at?}, ...]}.
+    Events are buffered and written in batches, so the 202 comes before they're
+    stored. An event id that was already received is ignored, so a batch can be
+    sent again safely. Invalid events are rejected one by one.
+    """
+    events = (request.get_json(silent=True) or {}).get('events')
+    if not isinstance(events, list) or not events:
+        return jsonify({'error': 'No events provided'}), 400
+    
+    try:
+        with metrics.stage('events.buffer'):
+            result = current_app.extensions['hsrm_tracking_events'].add(events)
+    except EventBufferFull as error:
+        response = jsonify({'error': f'Too many events are waiting to be written. Please try again in {error.retry_after} seconds.'})
+        response.headers['Retry-After'] = str(error.retry_after)
+        return response, 503
+    return jsonify(result), 202
+
+
+@bp.route('/rosters/<roster_id>/engagement', methods=['GET'])
+def roster_engagement(roster_id):
+    """Open and click counts per record, from tracking events."""
+    roster = current_app.extensions['hsrm_rosters'].get(roster_id)
+    if roster is None:
+        return _roster_not_found()
+    
+    with metrics.stage('events.engagement'):
+        records = current_app.extensions['hsrm_tracking_events'].engagement(roster.id)
+    return jsonify({'roster_id': roster.id, 'records': records})
+
+
+def _apply_event_statuses(app, statuses: dict):
+    """Apply the latest status of records from tracking events, one version per roster."""
+    for roster_id, records in statuses.items():
+        roster = app.extensions['hsrm_rosters'].get(roster_id)
+        if roster is None:
+            continue
+        updates = []
+        for record_id, status in records.items():
+            record = roster.index.get(record_id)
+            if record is not None and record['status'] != status:
+                updates.append({'id': record_id, 'status': status})
+        if updates:
+            roster.update_records(updates)
+
+
+@bp.route('/rosters/<roster_id>/send', methods=['POST'])
+def send_roster(roster_id):
+    """
+    Email a roster's messages over SMTP in the background.
+    
+    Body: {ids?, statuses?, resend?, priority?, send_at?}. By default every
+    record not yet sent is emailed; ``ids`` and ``statuses`` narrow that down and
+    ``resend`` includes records that were already sent. ``priority`` is 'urgent'
+    or 'normal' (default: urgent for SEND_URGENT_TEMPLATES) and ``send_at`` a
+    Unix time or ISO 8601 time to start at. Returns the job (202) to poll at
+    /send-jobs/<id>.
+    """
+    mailer = current_app.extensions['hsrm_mailer']
+    if mailer is None:
+        reason = current_app.extensions['hsrm_mailer_disabled'] or 'Email sending is not configured (set HSRM_SMTP_HOST)'
+        return jsonify({'error': reason}), 503
+    roster = current_app.extensions['hsrm_rosters'].get(roster_id)
+    if roster is None:
+        return _roster_not_found()
+    if not roster.generation or not roster.volunteers:
+        return jsonify({'error': 'Generate messages for this roster before sending'}), 409
+    
+    current = mailer.job(roster.delivery_job) if roster.delivery_job else None
+    if current is not None and not current.done:
+        return jsonify({'error': 'This roster is already being sent', **current.to_dict()}), 409
+    
+    from utils.send_scheduler import PRIORITY_NORMAL, PRIORITY_URGENT
+    
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    statuses = set(data.get('statuses') or [])
+    resend = bool(data.get('resend'))
+    try:
+        candidates = range(len(roster.volunteers)) if ids is None else [int(record_id) for record_id in ids]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'ids must be a list of record ids'}), 400
+    try:
+        send_at = _parse_send_at(data.get('send_at'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'send_at must be a Unix time or an ISO 8601 date and time'}), 400
+    
+    priority = data.get('priority')
+    if priority is None:
+        urgent = roster.generation.get('template_id') in current_app.config['SEND_URGENT_TEMPLATES']
+        priority = 'urgent' if urgent else 'normal'
+    if priority not in ('urgent', 'normal'):
+        return jsonify({'error': "priority must be 'urgent' or 'normal'"}), 400
+    
+    keys = []
+    for record_id in candidates:
+        record = roster.index.get(record_id)
+        if record is None or not record.get('email'):
+            continue
+        if statuses and record['status'] not in statuses:
+            continue
+        if not resend and record.get('delivery') == 'sent':
+            continue
+        keys.append(record_id)
+    if not keys:
+        return jsonify({'error': 'No messages to send'}), 400
+    
+    job = _submit_delivery(roster, keys, PRIORITY_URGENT if priority == 'urgent' else PRIORITY_NORMAL, send_at)
+    return jsonify(job.to_dict()), 202
+
+
+def _parse_send_at(value):
+    """Unix time or ISO 8601 string (local time when it has no offset) -> Unix time; None for now."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _submit_delivery(roster, record_ids: list, priority: int, send_at: float = None):
+    """Queue (and save) a roster's messages, writing each outcome back to the roster and the delivery log."""
+    extensions = current_app.extensions
+    generator = MessageGenerator()
+    
+    def render(record_id):
+        # Generated when sent, so edits made while the job is queued are included
+        return generator.generate_single(roster.volunteers[record_id], **roster.generation)
+    
+    # Saved with the source volunteers, so another process can regenerate them if this one stops
+    job_id = uuid.uuid4().hex
+    info = {'roster_id': roster.id, 'generation': roster.generation, 'priority': priority, 'send_at': send_at,
+            'total': len(record_ids), 'created_at': time.time()}
+    extensions['hsrm_send_store'].add_job(job_id, info, [(record_id, roster.volunteers[record_id]) for record_id in record_ids])
+    
+    roster.set_delivery({record_id: 'queued' for record_id in record_ids})
+    on_result, on_done = _delivery_callbacks(extensions, roster)
+    job = extensions['hsrm_mailer'].submit(
+        [(record_id, roster.index.get(record_id)['email']) for record_id in record_ids],
+        render, on_result, on_done,
+        details={'roster_id': roster.id},
+        priority=priority,
+        send_at=send_at,
+        job_id=job_id
+    )
+    roster.delivery_job = job.id
+    return job
+
+
+def _resume_deliveries(app, jobs: list):
+    """Queue sends claimed from a stopped process; their rosters are gone, so outcomes only go to the log."""
+    generator = MessageGenerator()
+    for saved in jobs:
+        info = saved['info']
+        volunteers = dict(saved['items'])
+        
+        def render(key, volunteers=volunteers, generation=info['generation']):
+            return generator.generate_single(volunteers[key], **generation)
+        
+        on_result, on_done = _delivery_callbacks(app.extensions)
+        app.extensions['hsrm_mailer'].submit(
+            [(key, volunteer.get('email', '')) for key, volunteer in saved['items']],
+            render, on_result, on_done,
+            details={'roster_id': info.get('roster_id'), 'resumed': True},
+            priority=info['priority'],
+            send_at=info['send_at'],
+            job_id=saved['job_id'],
+            paused=saved['paused']
+        )
+
+
+def _delivery_callbacks(extensions, roster=None) -> tuple:
+    """(on_result, on_done) that record outcomes in the roster (if any), delivery log and send queue."""
+    log = extensions['hsrm_delivery_log']
+    store = extensions['hsrm_send_store']
+    
+    def on_result(job, key, result):
+        if roster is not None:
+            roster.set_delivery({key: result['status']})
+        log.record(job.id, key, result, job.details.get('roster_id'))
+        store.finished(job.id, key)
+    
+    def on_done(job):
+        log.flush()
+        store.remove_job(job.id)
+    
+    return on_result, on_done
+
+
+@bp.route('/send-jobs', methods=['GET'])
+def list_send_jobs():
+    """Recent and running delivery jobs of this process, including resumed ones."""
+    mailer = current_app.extensions['hsrm_mailer']
+    if mailer is None:
+        return jsonify({'jobs': []})
+    return jsonify({'jobs': mailer.jobs()})
+
+
+@bp.route('/send-jobs/<job_id>', methods=['GET'])
+def get_send_job(job_id):
+    """Progress of a delivery job: counts per state and a sample of errors."""
+    mailer = current_app.extensions['hsrm_mailer']
+    job = mailer.job(job_id) if mailer is not None else None
+    if job is not None:
+        return jsonify(job.to_dict())
+    # Not (or no longer) in this process, e.g. after a restart: answer from the shared database
+    status = _stored_job_status(job_id) if mailer is not None else None
+    if status is None:
+        return jsonify({'error': 'Send job not found'}), 404
+    return jsonify(status)
+
+
+def _stored_job_status(job_id: str):
+    """A job's status from the send queue and delivery log (same shape as DeliveryJob.to_dict)."""
+    saved = current_app.extensions['hsrm_send_store'].job_status(job_id)
+    logged = current_app.extensions['hsrm_delivery_log'].job_summary(job_id)
+    if saved is None and logged is None:
+        return None
+    counts = logged['counts'] if logged else {}
+    finished = {state: counts.get(state, 0) for state in ('sent', 'failed', 'cancelled')}
+    if saved is not None:
+        info = saved['info']
+        queued = saved['queued']
+        # Queued but not in this process: its owner is sending it, or stopped and it awaits resuming
+        status = 'paused' if saved['paused'] else 'sending'
+        if status == 'sending' and (info.get('send_at') or 0) > time.time():
+            status = 'scheduled'
+    else:
+        info = {}
+        queued = 0
+        status = 'cancelled' if finished['cancelled'] else 'done'
+    return {
+        'job_id': job_id,
+        'status': status,
+        'total': info.get('total', queued + sum(finished.values())),
+        'priority': info.get('priority'),
+        'send_at': info.get('send_at'),
+        'queued': queued,
+        **finished,
+        'errors': logged['errors'] if logged else [],
+        'created_at': info.get('created_at'),
+        'finished_at': logged['updated_at'] if logged and saved is None else None,
+        'roster_id': info.get('roster_id')
+    }
+
+
+@bp.route('/send-jobs/<job_id>/<action>', methods=['POST'])
+def control_send_job(job_id, action):
+    """Pause, resume or cancel a delivery job; messages already handed to the server stay sent."""
+    mailer = current_app.extensions['hsrm_mailer']
+    if action not in ('pause', 'resume', 'cancel'):
+        abort(404)
+    if mailer is None or not getattr(mailer, action)(job_id):
+        return jsonify({'error': 'Send job not found'}), 404
+    if action != 'cancel':
+        current_app.extensions['hsrm_send_store'].set_paused(job_id, action == 'pause')
+    return jsonify(mailer.job(job_id).to_dict())
+
+
+@bp.route('/ingest/mail', methods=['POST'])
+def ingest_mail():
+    """
+    Read replies and bounces from the INGEST_MAILBOXES and apply them to contacts.
+    
+    Body: {emails?, full?}. Replies are matched to sent messages by Message-ID
+    (through the delivery log), then by sender address among the server's
+    rosters and the given tracked ``emails``. Only mail that arrived since the
+    last run is read unless ``full`` is set. Returns the contact changes (for
+    the browser's tracking data) and counts per mailbox.
+    """
+    from utils.delivery_log import DeliveryLog
+    from utils.mail_ingest import IngestBusy, MailIngester
+    
+    config = current_app.config
+    if not config['INGEST_MAILBOXES']:
+        return jsonify({'error': 'Mail ingestion is not configured (set HSRM_INGEST_MAILBOXES)'}), 503
+    missing = [mailbox for mailbox in config['INGEST_MAILBOXES'] if not os.path.exists(mailbox)]
+    if missing:
+        return jsonify({'error': f"Mailbox not found: {', '.join(missing)}"}), 500
+    
+    data = request.get_json(silent=True) or {}
+    ingester = MailIngester(config['DELIVERY_DB'])
+    log = current_app.extensions['hsrm_delivery_log'] or DeliveryLog(config['DELIVERY_DB'])
+    try:
+        # The lease lives next to the watermarks, so it holds across worker processes too
+        with ingester.exclusive():
+            contacts = _roster_contacts()
+            known = set(contacts) | {str(email).lower() for email in data.get('emails') or []}
+            with metrics.stage('ingest.read'):
+                run = ingester.run(config['INGEST_MAILBOXES'], log.recipients, known, full=bool(data.get('full')))
+            with metrics.stage('ingest.apply'):
+                updated = _apply_contact_changes(contacts, run.changes)
+            run.commit()
+    except IngestBusy as exc:
+        return jsonify({'error': str(exc)}), 409
+    finally:
+        if log is not current_app.extensions['hsrm_delivery_log']:
+            log.close()
+    return jsonify({'mailboxes': run.mailboxes, 'changes': list(run.changes.values()), 'roster_records': updated})
+
+
+def _roster_contacts() -> dict:
+    """{email (lowercased): [(roster, record id), ...]} across the live rosters."""
+    contacts = {}
+    for roster in current_app.extensions['hsrm_rosters'].all():
+        for record_id in roster.index.ids():
+            record = roster.index.get(record_id)
+            if record is not None and record.get('email'):
+                contacts.setdefault(record['email'].lower(), []).append((roster, record_id))
+    return contacts
+
+
+def _apply_contact_changes(contacts: dict, changes: dict) -> int:
+    """Apply ingested status/delivery changes to roster records, one version per roster; returns records changed."""
+    from utils.mail_ingest import STATUS_UPGRADES
+    
+    edits = {}
+    for email, change in changes.items():
+        for roster, record_id in contacts.get(email, ()):
+            status_updates, delivery = edits.setdefault(roster, ([], {}))
+            status = change.get('status')
+            if status and roster.index.get(record_id)['status'] in STATUS_UPGRADES[status]:
+                status_updates.append({'id': record_id, 'status': status})
+            if change.get('delivery'):
+                delivery[record_id] = change['delivery']
+    
+    updated = 0
+    for roster, (status_updates, delivery) in edits.items():
+        if status_updates:
+            roster.update_records(status_updates)
+        if delivery:
+            roster.set_delivery(delivery)
+        updated += len({update['id'] for update in status_updates} | set(delivery))
+    return updated
+
+
+def _regenerate_messages(roster, record_ids: list) -> list:
+    """Messages for the given records, as generated for the roster (id = record id)."""
+    if not roster.generation or not roster.volunteers or not record_ids:
+        return []
+    
+    generator = MessageGenerator()
+    messages = []
+    for record_id in record_ids:
+        message = generator.generate_single(roster.volunteers[record_id], **roster.generation)
+        messages.append({'id': record_id, **message})
+    return messages
+
+
+def _iter_roster_messages(roster):
+    """Generate a roster's messages one at a time, in record order (id = record id)."""
+    generator = MessageGenerator()
+    generation = roster.generation
+    for record_id, volunteer in enumerate(roster.volunteers):
+        yield {'id': record_id, **generator.generate_single(volunteer, **generation)}
+
+
+def _roster_not_found():
+    return jsonify({'error': 'Roster not found or expired'}), 404
+
+
+def _csv_arg(value):
+    """Split a comma-separated query parameter into a list (None when absent)."""
+    if not value:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expose request and stage timings in Prometheus text format."""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+@bp.route('/diagnostics/requests', methods=['GET'])
+def get_request_diagnostics():
+    """Recent request timing records, including per-stage memory when profiling is on."""
+    limit = request.args.get('limit', 50, type=int)
+    records = metrics.recent_requests()[-limit:] if limit > 0 else []
+    mailer = current_app.extensions['hsrm_mailer']
+    return jsonify({
+        'memory_profiling': memory_profiler.status(),
+        'admission': {name: limiter.status() for name, limiter in current_app.extensions['hsrm_admission'].items()},
+        'mailer': mailer.status() if mailer is not None else None,
+        'requests': [record.to_dict() for record in reversed(records)]
+    })
+
+
+@bp.route('/ready', methods=['GET'])
+def readiness():
+    """Readiness probe: 503 until the startup warm-up has finished."""
+    status = warmup.status()
+    return jsonify(status), 200 if status['ready'] else 503
 
 
 def open_browser():
@@ -234,6 +1249,10 @@ def open_browser():
 
 
 if __name__ == '__main__':
+    # Local development server; use wsgi.py / serve.py for production.
+    # Raw static files are linked so JS/CSS edits show up without rebuilding.
+    app = create_app({'USE_BUILT_ASSETS': False})
+    
     # Open browser automatically after 1.5 seconds
     threading.Timer(1.5, open_browser).start()
     print("\n🚀 Starting HOPE Messaging Tool...")
@@ -0,0 +1,24 @@
+"""
+ASGI entry point for asyncio servers.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000 --workers 4
+
+Request bodies and responses are handled on the event loop; parsing, message
+generation and exports run in a bounded "heavy" thread pool while pages,
+templates and metrics use a separate "light" pool. Set HSRM_HEAVY_EXECUTOR=process
+to run heavy requests in worker processes, outside this process's GIL.
+"""
+
+from app import create_app
+from utils.asgi_bridge import WsgiToAsgi
+
+flask_app = create_app()
+
+app = WsgiToAsgi(
+    flask_app,
+    heavy_workers=flask_app.config['HEAVY_WORKERS'],
+    light_workers=flask_app.config['LIGHT_WORKERS'],
+    max_body_size=flask_app.config['MAX_CONTENT_LENGTH'],
+    heavy_executor=flask_app.config['HEAVY_EXECUTOR'],
+    app_factory='app:create_worker_app'
+)
@@ -0,0 +1,60 @@
+"""
+Import-Time Benchmark for the HOPE Messaging Tool
+Measures cold-import cost of the app and utils in fresh interpreters, and how
+much of it the lazy format backends defer until the first upload of each type.
+
+Example:
+    python bench_imports.py --runs 7
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+# name -> Python snippet timed in a fresh interpreter
+SCENARIOS = [
+    ('import MessageGenerator', 'from utils.message_generator import MessageGenerator'),
+    ('import utils', 'import utils'),
+    ('import app', 'import app'),
+    ('eager backends (before)', 'import pandas, pdfplumber, docx; import utils'),
+    ('load csv backend', "import utils; from utils.backends import registry; registry.load('csv')"),
+    ('load all backends', "import utils; from utils.backends import registry; [registry.load(n) for n in registry.names()]"),
+]
+
+TIMER = """
+import time
+_start = time.perf_counter()
+{snippet}
+print(time.perf_counter() - _start)
+"""
+
+
+def time_snippet(snippet: str, runs: int) -> list:
+    """Run a snippet in ``runs`` fresh interpreters and return the timings in seconds."""
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', TIMER.format(snippet=snippet)],
+            capture_output=True, text=True, check=True
+        )
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark cold import times.')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per scenario (default: 5)')
+    args = parser.parse_args(argv)
+
+    print(f"\n⏱️  Cold import times (median of {args.runs} runs)\n")
+    print(f"   {'Scenario':<28} {'Median ms':>10} {'Min ms':>10}")
+    for name, snippet in SCENARIOS:
+        timings = time_snippet(snippet, args.runs)
+        print(f"   {name:<28} {statistics.median(timings) * 1000:>10.1f} {min(timings) * 1000:>10.1f}")
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Static asset build for the HOPE Messaging Tool
+Minifies the CSS/JS bundles, fingerprints them with a content hash, writes gzip
+and brotli copies next to them and records everything in a manifest that the
+app uses to link the current files.
+
+    python build_assets.py
+    python build_assets.py --no-minify --output static/dist
+
+Minification uses rjsmin/rcssmin and brotli output uses the brotli package when
+they are installed; without them the files are still hashed and gzipped.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(HERE, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+
+# Bundles to build, relative to static/
+ASSETS = ['css/style.css', 'js/app.js', 'js/worker.js']
+
+# Skip compressed copies that don't save at least this fraction
+MIN_SAVING = 0.1
+
+
+def minify(path: str, source: str) -> str:
+    """Minify CSS or JS source when the matching minifier is installed."""
+    if path.endswith('.js') and rjsmin is not None:
+        return rjsmin.jsmin(source)
+    if path.endswith('.css') and rcssmin is not None:
+        return rcssmin.cssmin(source)
+    return source
+
+
+def fingerprint(path: str, content: bytes) -> str:
+    """``js/app.js`` -> ``js/app.<hash>.js``"""
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{digest}{ext}"
+
+
+def build(static_dir: str = STATIC_DIR, output_dir: str = DIST_DIR, assets: list = None,
+          do_minify: bool = True, quiet: bool = False) -> dict:
+    """
+    Build every asset and write the manifest.
+
+    Args:
+        static_dir: Folder the source assets live in
+        output_dir: Folder for built files and manifest.json
+        assets: Source paths relative to static_dir (default: ASSETS)
+        do_minify: Minify before hashing
+        quiet: Don't print a summary
+
+    Returns:
+        The manifest written to output_dir/manifest.json
+    """
+    manifest = {}
+    keep = {MANIFEST_NAME}
+
+    for path in assets or ASSETS:
+        with open(os.path.join(static_dir, path), encoding='utf-8') as f:
+            source = f.read()
+        content = (minify(path, source) if do_minify else source).encode('utf-8')
+
+        built = fingerprint(path, content)
+        entry = {'file': built, 'size': len(content), 'source_size': len(source.encode('utf-8')), 'encodings': {}}
+        _write(output_dir, built, content)
+        keep.add(built)
+
+        compressed = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed['br'] = brotli.compress(content, quality=11)
+        for encoding, data in compressed.items():
+            if len(data) > len(content) * (1 - MIN_SAVING):
+                continue
+            name = f"{built}.{'gz' if encoding == 'gzip' else 'br'}"
+            _write(output_dir, name, data)
+            keep.add(name)
+            entry['encodings'][encoding] = {'file': name, 'size': len(data)}
+
+        manifest[path] = entry
+
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    _remove_stale(output_dir, keep)
+
+    if not quiet:
+        _print_summary(manifest)
+    return manifest
+
+
+def _write(output_dir: str, name: str, data: bytes):
+    target = os.path.join(output_dir, name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Write through a temp file so a running server never sees a half-written asset
+    tmp = f"{target}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, target)
+
+
+def _remove_stale(output_dir: str, keep: set):
+    """Delete files from earlier builds."""
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            rel = os.path.relpath(os.path.join(root, name), output_dir).replace(os.sep, '/')
+            if rel not in keep:
+                os.remove(os.path.join(root, name))
+
+
+def _print_summary(manifest: dict):
+    print(f"\n{'Asset':<16}{'Source':>10}{'Built':>10}{'gzip':>10}{'br':>10}  File")
+    for path, entry in manifest.items():
+        sizes = [entry['encodings'].get(enc, {}).get('size', '-') for enc in ('gzip', 'br')]
+        print(f"{path:<16}{entry['source_size']:>10}{entry['size']:>10}{sizes[0]:>10}{sizes[1]:>10}  {entry['file']}")
+    missing = [name for name, module in (('rjsmin', rjsmin), ('rcssmin', rcssmin), ('brotli', brotli)) if module is None]
+    if missing:
+        print(f"\n(not installed: {', '.join(missing)})")
+    print()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Minify, fingerprint and precompress static assets.')
+    parser.add_argument('--output', '-o', default=DIST_DIR, help='Output folder (default: static/dist)')
+    parser.add_argument('--no-minify', action='store_true', help='Hash and compress without minifying')
+    parser.add_argument('--quiet', '-q', action='store_true', help="Don't print a summary")
+    args = parser.parse_args(argv)
+
+    build(output_dir=args.output, do_minify=not args.no_minify, quiet=args.quiet)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+HOPE Messaging Tool Configuration
+Application settings read from HSRM_* environment variables.
+"""
+
+import os
+
+
+def _as_bool(value) -> bool:
+    return str(value or '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _as_list(value) -> list:
+    return [item.strip() for item in str(value or '').split(',') if item.strip()]
+
+
+def _as_rates(value) -> dict:
+    """'gmail.com=600,edu=120' -> {'gmail.com': 600.0, 'edu': 120.0}"""
+    rates = {}
+    for item in _as_list(value):
+        key, _, rate = item.partition('=')
+        if key.strip() and rate.strip():
+            rates[key.strip().lower().lstrip('.')] = float(rate)
+    return rates
+
+
+def load_config(environ=None) -> dict:
+    """
+    Build Flask config values from the environment.
+
+    Args:
+        environ: Mapping to read from (defaults to os.environ)
+
+    Returns:
+        Dictionary suitable for ``app.config.update``
+    """
+    env = os.environ if environ is None else environ
+
+    return {
+        # Uploads
+        'MAX_CONTENT_LENGTH': int(env.get('HSRM_MAX_UPLOAD_MB', 16)) * 1024 * 1024,
+        'UPLOAD_FOLDER': env.get('HSRM_UPLOAD_FOLDER', 'uploads'),
+
+        # gzip/brotli for JSON and text responses at least this large (0 disables)
+        'COMPRESS_MIN_BYTES': int(env.get('HSRM_COMPRESS_MIN_BYTES', 1024)),
+
+        # Default split of CSV/ZIP downloads into parts for mail-merge import limits (0 = one file)
+        'EXPORT_SHARD_ROWS': int(env.get('HSRM_EXPORT_SHARD_ROWS', 0)),
+        'EXPORT_SHARD_BYTES': int(env.get('HSRM_EXPORT_SHARD_BYTES', 0)),
+
+        # Serve the fingerprinted bundles from build_assets.py when a manifest exists
+        'USE_BUILT_ASSETS': _as_bool(env.get('HSRM_USE_BUILT_ASSETS', '1')),
+
+        # Admission control: weight units in flight and queue length per pool
+        # (uploads are weighed in MB, generate/downloads in rows; capacity 0 disables)
+        'UPLOAD_CAPACITY_MB': int(env.get('HSRM_UPLOAD_CAPACITY_MB', 64)),
+        'UPLOAD_QUEUE': int(env.get('HSRM_UPLOAD_QUEUE', 16)),
+        'GENERATE_CAPACITY_ROWS': int(env.get('HSRM_GENERATE_CAPACITY_ROWS', 50000)),
+        'GENERATE_QUEUE': int(env.get('HSRM_GENERATE_QUEUE', 16)),
+        'ADMISSION_TIMEOUT': float(env.get('HSRM_ADMISSION_TIMEOUT', 10)),
+        'ADMISSION_RETRY_AFTER': int(env.get('HSRM_ADMISSION_RETRY_AFTER', 5)),
+
+        # Server-side roster search (rosters are kept in memory per process)
+        'ROSTER_MAX': int(env.get('HSRM_ROSTER_MAX', 16)),
+        'ROSTER_TTL_HOURS': float(env.get('HSRM_ROSTER_TTL_HOURS', 4)),
+
+        # Outbound email over SMTP (sending is disabled while SMTP_HOST is empty)
+        'SMTP_HOST': env.get('HSRM_SMTP_HOST', ''),
+        'SMTP_PORT': int(env.get('HSRM_SMTP_PORT', 587)),
+        'SMTP_SECURITY': env.get('HSRM_SMTP_SECURITY', 'starttls'),
+        'SMTP_USERNAME': env.get('HSRM_SMTP_USERNAME') or None,
+        'SMTP_PASSWORD': env.get('HSRM_SMTP_PASSWORD') or None,
+        'SMTP_SENDER': env.get('HSRM_SMTP_SENDER', 'HOPE Tutoring <volunteer@hopetutoring.org>'),
+        'SMTP_REPLY_TO': env.get('HSRM_SMTP_REPLY_TO') or None,
+        'SMTP_TIMEOUT': float(env.get('HSRM_SMTP_TIMEOUT', 30)),
+        # Concurrent connections, messages per connection before reconnecting, and retries
+        'SMTP_CONNECTIONS': int(env.get('HSRM_SMTP_CONNECTIONS', 4)),
+        'SMTP_MESSAGES_PER_CONNECTION': int(env.get('HSRM_SMTP_MESSAGES_PER_CONNECTION', 100)),
+        'SMTP_MAX_ATTEMPTS': int(env.get('HSRM_SMTP_MAX_ATTEMPTS', 4)),
+        'SMTP_RETRY_BACKOFF': float(env.get('HSRM_SMTP_RETRY_BACKOFF', 2)),
+        'DELIVERY_DB': env.get('HSRM_DELIVERY_DB', os.path.join('data', 'delivery.db')),
+        # Server processes running the app (set by gunicorn.conf.py; set it yourself for
+        # uvicorn --workers). Sending is refused with more than one: rosters and send jobs
+        # live in the process that created them
+        'WORKERS': int(env.get('HSRM_WORKERS', 1)),
+        # Maildir folders / mbox files read by POST /ingest/mail for replies and bounces
+        'INGEST_MAILBOXES': _as_list(env.get('HSRM_INGEST_MAILBOXES')),
+        # Send rate limits per minute (0 = none): the SMTP account overall, and each recipient
+        # domain (rules match domain suffixes, e.g. "gmail.com=600,edu=120")
+        'SEND_RATE_PER_MINUTE': float(env.get('HSRM_SEND_RATE_PER_MINUTE', 0)),
+        'SEND_DOMAIN_RATES': _as_rates(env.get('HSRM_SEND_DOMAIN_RATES')),
+        'SEND_DEFAULT_DOMAIN_RATE': float(env.get('HSRM_SEND_DEFAULT_DOMAIN_RATE', 0)),
+        'SEND_BURST': int(env.get('HSRM_SEND_BURST', 1)),
+        # Templates whose sends jump the queue
+        'SEND_URGENT_TEMPLATES': _as_list(env.get('HSRM_SEND_URGENT_TEMPLATES', 'followup_urgent,followup_lastchance')),
+        # Seconds before another process resumes the queued sends of one that stopped
+        'SEND_LEASE_SECONDS': float(env.get('HSRM_SEND_LEASE_SECONDS', 60)),
+        # POST /tracking/events: events are written in batches of this many or after this many
+        # seconds, and refused (503) while this many are still waiting to be written
+        'TRACKING_EVENT_BATCH': int(env.get('HSRM_TRACKING_EVENT_BATCH', 1000)),
+        'TRACKING_EVENT_FLUSH_SECONDS': float(env.get('HSRM_TRACKING_EVENT_FLUSH_SECONDS', 1)),
+        'TRACKING_EVENT_MAX_PENDING': int(env.get('HSRM_TRACKING_EVENT_MAX_PENDING', 50000)),
+        # Duplicate contacts: pair score (0-1) from which records are merged
+        'DEDUP_THRESHOLD': float(env.get('HSRM_DEDUP_THRESHOLD', 0.6)),
+        # Country code assumed for phone numbers written without one (E.164 normalization)
+        'PHONE_COUNTRY_CODE': env.get('HSRM_PHONE_COUNTRY_CODE', '1'),
+
+        # Diagnostics
+        'MEMORY_PROFILE': _as_bool(env.get('HSRM_MEMORY_PROFILE')),
+        'MEMORY_PROFILE_TOP': int(env.get('HSRM_MEMORY_PROFILE_TOP', 5)),
+
+        # ASGI serving (asgi.py): threads for heavy (parse/generate/export) and light requests
+        'HEAVY_WORKERS': int(env.get('HSRM_HEAVY_WORKERS', os.cpu_count() or 1)),
+        'LIGHT_WORKERS': int(env.get('HSRM_LIGHT_WORKERS', 8)),
+        'HEAVY_EXECUTOR': env.get('HSRM_HEAVY_EXECUTOR', 'thread'),
+
+        # Startup warm-up
+        'WARMUP': _as_bool(env.get('HSRM_WARMUP')),
+        'WARMUP_BACKENDS': _as_list(env.get('HSRM_WARMUP_BACKENDS')),
+    }
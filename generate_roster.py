@@ -0,0 +1,328 @@
+"""
+Synthetic Roster Generator for HOPE Tutoring
+Creates seeded volunteer rosters of any size in the HOPE form layout (CSV, DOCX, PDF)
+for load testing and performance work.
+
+Examples:
+    python generate_roster.py --rows 1000000 --output fixtures/roster_1m.csv
+    python generate_roster.py --pages 500 --output fixtures/roster_500p.pdf
+    python generate_roster.py --rows 2000 --output fixtures/messy.pdf --layout two-part --shuffle-columns --missing-email-rate 0.1
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+from docx import Document
+from docx.shared import Inches, Pt, RGBColor
+from docx.enum.section import WD_ORIENT
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle
+from generate_templates import HEADERS, SHORT_HEADERS, set_cell_shading
+
+# Name, address and session pools used to build realistic-looking rows
+FIRST_NAMES = [
+    'Sarah', 'Michael', 'Emily', 'David', 'Jessica', 'Antonio', 'Priya', 'Christopher',
+    'Isabella', 'Daniel', 'Jasmine', 'Patrick', 'Lisa', 'Marcus', 'Sofia', 'James',
+    'Hannah', 'William', 'Emma', 'Noah', 'Olivia', 'Liam', 'Ava', 'Mateo', 'Mia',
+    'Ethan', 'Aaliyah', 'Lucas', 'Zoe', 'Jamal', 'Mei', 'Carlos', 'Fatima', 'Tuan',
+    'Grace', 'Andre', 'Chloe', 'Ravi', 'Nadia', 'Samuel'
+]
+LAST_NAMES = [
+    'Johnson', 'Chen', 'Rodriguez', 'Thompson', 'Williams', 'Garcia', 'Patel', 'Brown',
+    'Martinez', 'Kim', 'Washington', "O'Brien", 'Nguyen', 'Foster', 'Ramirez', 'Anderson',
+    'Lee', 'Cooper', 'Taylor', 'Okafor', 'Hernandez', 'Singh', 'Davis', 'Lopez', 'Wilson',
+    'Moore', 'Jackson', 'Martin', 'Tran', 'Clark', 'Lewis', 'Walker', 'Hall', 'Young',
+    'De La Cruz', 'Van Dyke', 'McAllister', 'Abernathy', 'Ibrahim', 'Kowalski'
+]
+STREETS = [
+    'Oak St', 'Elm Ave', 'Pine Rd', 'Maple Ln', 'Cedar Ct', 'Birch Dr', 'Willow Way',
+    'Spruce St', 'Sunset Blvd', 'Heritage Lane', 'Campus Way', 'Commerce St',
+    'Garden View', 'College Ave', 'Collins St', 'Cooper St', 'Abram St', 'Division St'
+]
+CITIES = [
+    ('Arlington', '76010'), ('Arlington', '76011'), ('Arlington', '76013'), ('Arlington', '76019'),
+    ('Fort Worth', '76102'), ('Fort Worth', '76104'), ('Grand Prairie', '75050'),
+    ('Mansfield', '76063'), ('Dallas', '75201')
+]
+EMAIL_DOMAINS = [
+    'email.com', 'example.com', 'gmail.com', 'outlook.com', 'yahoo.com', 'mavs.uta.edu',
+    'company.org', 'webmail.com', 'inbox.com'
+]
+SITES = [
+    'Monday Evening - UTA', 'Tuesday Afternoon - Library', 'Wednesday Evening',
+    'Thursday Afternoon', 'Saturday Morning', ''
+]
+REFERRALS = [
+    'Social Media', 'Friend/Family', 'Church', 'HOPE Website', 'Volunteer Match',
+    'School/University', 'Employer', 'LinkedIn', 'Instagram', 'Community Event', ''
+]
+
+# PDF layout constants (landscape letter, points)
+PDF_MARGIN = 20
+PDF_ROW_HEIGHT = 14
+PDF_FONT_SIZE = 6
+PDF_COL_WIDTHS = [58, 58, 128, 62, 150, 118, 28, 86, 64]
+PDF_TEXT_LINE_HEIGHT = 11
+
+# Part 1 / Part 2 column split used by the two-part layout (same as the demo PDFs)
+PART1_COLUMNS = range(0, 5)
+PART2_COLUMNS = range(5, 9)
+
+
+class RosterGenerator:
+    """Produce deterministic synthetic volunteer rows in the HOPE form layout."""
+
+    def __init__(self, seed: int = 42, missing_email_rate: float = 0.0, shuffle_columns: bool = False):
+        self.seed = seed
+        self.missing_email_rate = missing_email_rate
+
+        # Column order is fixed for a given seed so every pass over the roster agrees
+        self.column_order = list(range(len(HEADERS)))
+        if shuffle_columns:
+            random.Random(seed ^ 0x5EED).shuffle(self.column_order)
+
+    @property
+    def headers(self) -> list:
+        """Full headers in output column order."""
+        return [HEADERS[i] for i in self.column_order]
+
+    @property
+    def short_headers(self) -> list:
+        """Short display headers in output column order."""
+        return [SHORT_HEADERS[i] for i in self.column_order]
+
+    def rows(self, count: int):
+        """
+        Yield ``count`` rows without materializing the roster.
+
+        Re-calling with the same seed yields the same rows, which lets multi-pass
+        writers (e.g. the two-part PDF layout) regenerate data instead of storing it.
+        """
+        rng = random.Random(self.seed)
+
+        for n in range(count):
+            first = rng.choice(FIRST_NAMES)
+            last = rng.choice(LAST_NAMES)
+            city, zip_code = rng.choice(CITIES)
+            local = f"{first}.{last}".lower().replace(' ', '').replace("'", '')
+
+            email = f"{local}{n}@{rng.choice(EMAIL_DOMAINS)}"
+            if self.missing_email_rate and rng.random() < self.missing_email_rate:
+                email = ''
+
+            row = [
+                last,
+                first,
+                email,
+                f"817-555-{n % 10000:04d}",
+                f"{rng.randint(100, 9999)} {rng.choice(STREETS)}, {city}, TX {zip_code}",
+                f"{rng.choice(FIRST_NAMES)} {last}, 817-555-{rng.randint(0, 9999):04d}",
+                'Yes',
+                rng.choice(SITES),
+                rng.choice(REFERRALS)
+            ]
+            yield [row[i] for i in self.column_order]
+
+
+def write_csv(generator: RosterGenerator, filepath: str, count: int) -> str:
+    """Stream a roster to CSV one row at a time."""
+    with open(filepath, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(generator.headers)
+        for row in generator.rows(count):
+            writer.writerow(row)
+    return filepath
+
+
+def write_docx(generator: RosterGenerator, filepath: str, count: int, layout: str = 'table') -> str:
+    """
+    Write a roster to DOCX.
+
+    python-docx keeps the whole document tree in memory until save, so this is
+    meant for rosters in the thousands rather than the millions.
+    """
+    doc = Document()
+
+    section = doc.sections[0]
+    section.orientation = WD_ORIENT.LANDSCAPE
+    section.page_width, section.page_height = section.page_height, section.page_width
+    section.left_margin = Inches(0.5)
+    section.right_margin = Inches(0.5)
+
+    doc.add_heading('HOPE Tutoring - Volunteer Data (Synthetic)', 0)
+
+    if layout == 'text':
+        for row in generator.rows(count):
+            doc.add_paragraph(_row_to_text(generator, row))
+        doc.save(filepath)
+        return filepath
+
+    table = doc.add_table(rows=1, cols=len(HEADERS))
+    table.style = 'Table Grid'
+
+    for i, header in enumerate(generator.short_headers):
+        cell = table.rows[0].cells[i]
+        cell.text = header
+        set_cell_shading(cell, '1a8b8d')
+        for run in cell.paragraphs[0].runs:
+            run.bold = True
+            run.font.size = Pt(9)
+            run.font.color.rgb = RGBColor(255, 255, 255)
+
+    for row in generator.rows(count):
+        cells = table.add_row().cells
+        for col_idx, value in enumerate(row):
+            cells[col_idx].text = value
+
+    doc.save(filepath)
+    return filepath
+
+
+def write_pdf(generator: RosterGenerator, filepath: str, count: int, layout: str = 'table') -> str:
+    """
+    Write a roster to PDF one page at a time.
+
+    Each page is built as its own reportlab flowable and drawn onto the canvas,
+    so rows are never all held as Python objects. The canvas itself still keeps
+    every finished page until save(), so the output size grows with the page count.
+
+    Layouts:
+        table    - one table with every column, split across pages (header repeated)
+        two-part - Part 1 (personal info) pages followed by Part 2 (additional info) pages
+        text     - no tables, one "Name - email - phone" line per volunteer
+    """
+    page_width, page_height = landscape(letter)
+    pdf = canvas.Canvas(filepath, pagesize=(page_width, page_height))
+
+    if layout == 'text':
+        lines_per_page = int((page_height - 2 * PDF_MARGIN) // PDF_TEXT_LINE_HEIGHT)
+        for page_rows in _chunked(generator.rows(count), lines_per_page):
+            pdf.setFont('Helvetica', 8)
+            y = page_height - PDF_MARGIN
+            for row in page_rows:
+                y -= PDF_TEXT_LINE_HEIGHT
+                pdf.drawString(PDF_MARGIN, y, _row_to_text(generator, row))
+            pdf.showPage()
+        pdf.save()
+        return filepath
+
+    style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a8b8d')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTSIZE', (0, 0), (-1, -1), PDF_FONT_SIZE),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#cccccc')),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ])
+    rows_per_page = int((page_height - 2 * PDF_MARGIN) // PDF_ROW_HEIGHT) - 1
+
+    if layout == 'two-part':
+        # Two passes over the same seeded rows, mirroring the demo Part 1 / Part 2 split
+        passes = [list(PART1_COLUMNS), list(PART2_COLUMNS)]
+    else:
+        passes = [list(range(len(HEADERS)))]
+
+    for columns in passes:
+        header = [generator.short_headers[i] for i in columns]
+        widths = [PDF_COL_WIDTHS[generator.column_order[i]] for i in columns]
+
+        for page_rows in _chunked(generator.rows(count), rows_per_page):
+            data = [header] + [[row[i] for i in columns] for row in page_rows]
+            table = Table(data, colWidths=widths, rowHeights=PDF_ROW_HEIGHT)
+            table.setStyle(style)
+            _, table_height = table.wrapOn(pdf, page_width, page_height)
+            table.drawOn(pdf, PDF_MARGIN, page_height - PDF_MARGIN - table_height)
+            pdf.showPage()
+
+    pdf.save()
+    return filepath
+
+
+def rows_for_pages(pages: int, layout: str) -> int:
+    """Number of rows needed to fill ``pages`` PDF pages in the given layout (even for two-part)."""
+    page_height = landscape(letter)[1]
+    if layout == 'text':
+        return pages * int((page_height - 2 * PDF_MARGIN) // PDF_TEXT_LINE_HEIGHT)
+
+    rows_per_page = int((page_height - 2 * PDF_MARGIN) // PDF_ROW_HEIGHT) - 1
+    if layout == 'two-part':
+        # Each row appears on a Part 1 and a Part 2 page
+        return pages // 2 * rows_per_page
+    return pages * rows_per_page
+
+
+def _row_to_text(generator: RosterGenerator, row: list) -> str:
+    """Render a row as a free-text contact line for text-only layouts."""
+    values = dict(zip(generator.column_order, row))
+    # HEADERS order: 0 last, 1 first, 2 email, 3 phone
+    parts = [f"{values[1]} {values[0]}", values[2], values[3]]
+    return ' - '.join(part for part in parts if part)
+
+
+def _chunked(iterable, size: int):
+    """Yield lists of up to ``size`` items from an iterable."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Generate synthetic HOPE volunteer rosters for load testing.')
+    parser.add_argument('--output', '-o', required=True, help='Output file (.csv, .docx or .pdf)')
+    parser.add_argument('--format', choices=['csv', 'docx', 'pdf'], help='Output format (default: from --output extension)')
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('--rows', type=int, default=100, help='Number of volunteers (default: 100)')
+    size.add_argument('--pages', type=int, help='PDF only: number of pages to fill')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('--layout', choices=['table', 'two-part', 'text'], default='table',
+                        help='DOCX/PDF layout (default: table)')
+    parser.add_argument('--shuffle-columns', action='store_true', help='Reorder columns (seeded)')
+    parser.add_argument('--missing-email-rate', type=float, default=0.0,
+                        help='Fraction of rows with a blank email (0.0-1.0)')
+    args = parser.parse_args(argv)
+
+    fmt = args.format or args.output.rsplit('.', 1)[-1].lower()
+    if fmt not in ('csv', 'docx', 'pdf'):
+        parser.error(f"Cannot infer format from '{args.output}', pass --format")
+    if args.pages is not None and fmt != 'pdf':
+        parser.error('--pages is only supported for PDF output')
+    if args.layout == 'two-part' and fmt != 'pdf':
+        parser.error('--layout two-part is only supported for PDF output')
+    if args.layout == 'two-part' and args.pages is not None and args.pages % 2:
+        parser.error('--pages must be even with --layout two-part (Part 1 and Part 2 get half each)')
+
+    count = rows_for_pages(args.pages, args.layout) if args.pages is not None else args.rows
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    generator = RosterGenerator(
+        seed=args.seed,
+        missing_email_rate=args.missing_email_rate,
+        shuffle_columns=args.shuffle_columns
+    )
+
+    print(f"\n📋 Generating {count:,} synthetic volunteers ({fmt.upper()}, layout: {args.layout})...")
+
+    if fmt == 'csv':
+        write_csv(generator, args.output, count)
+    elif fmt == 'docx':
+        write_docx(generator, args.output, count, args.layout)
+    else:
+        write_pdf(generator, args.output, count, args.layout)
+
+    print(f"   ✓ Created: {args.output} ({os.path.getsize(args.output):,} bytes)\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
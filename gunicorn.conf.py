@@ -0,0 +1,38 @@
+"""
+Gunicorn settings for the HOPE Messaging Tool
+Values can be overridden with HSRM_* environment variables.
+
+Graceful restart (reload code, finish in-flight requests): kill -HUP <master pid>
+Add/remove a worker at runtime:                            kill -TTIN / -TTOU <master pid>
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('HSRM_BIND', '0.0.0.0:8000')
+
+# Email sending keeps its rosters and jobs in one process, so it needs a single worker
+sending = bool(os.environ.get('HSRM_SMTP_HOST'))
+
+# One process per core; threads let a worker keep serving while another request waits on I/O
+workers = int(os.environ.get('HSRM_WORKERS', 1 if sending else multiprocessing.cpu_count()))
+# Workers inherit this, so the app knows whether it is one of several
+os.environ['HSRM_WORKERS'] = str(workers)
+threads = int(os.environ.get('HSRM_THREADS', 4))
+worker_class = 'gthread'
+
+# Large PDFs can take a while to parse
+timeout = int(os.environ.get('HSRM_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('HSRM_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth from large uploads
+# (not while sending: a recycled worker would stop its sends until another process resumes them)
+max_requests = int(os.environ.get('HSRM_MAX_REQUESTS', 0 if sending else 1000))
+max_requests_jitter = max_requests // 10
+
+# Build the app in each worker (not the master) so nothing is shared and HUP picks up new code
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
@@ -0,0 +1,467 @@
+"""
+HOPE Messaging Tool Load Tester
+Drives the Flask endpoints with concurrent simulated staff sessions and reports
+throughput, latency percentiles, error rates and server memory over time.
+
+Examples:
+    python loadtest.py --concurrency 8 --duration 30
+    python loadtest.py --url http://localhost:5000 --server-pid 12345 --ramp 1,2,4,8,16
+    python loadtest.py --mix upload=1,generate=1 --rows 50,5000 --json results.json
+"""
+
+import argparse
+import csv
+import http.client
+import io
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+from generate_roster import RosterGenerator
+
+try:
+    import psutil
+except ImportError:  # psutil is optional; fall back to /proc or getrusage
+    psutil = None
+
+# Default share of traffic per endpoint (roughly one staff session: upload, pick a
+# template, generate, download, plus template browsing)
+DEFAULT_MIX = {
+    'upload': 3,
+    'generate': 3,
+    'csv': 1,
+    'zip': 1,
+    'templates': 2
+}
+
+DEFAULT_ROW_SIZES = [25, 250, 2500]
+
+TEMPLATE_IDS = ['general', 'student_focused', 'professional', 'community']
+
+
+# ============================================
+# TRANSPORTS
+# ============================================
+class InProcessTransport:
+    """Send requests through the Flask test client (one client per thread)."""
+
+    name = 'in-process'
+
+    def __init__(self, flask_app):
+        self.app = flask_app
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body: bytes = None, headers: dict = None) -> tuple:
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+
+        response = client.open(path, method=method, data=body, headers=headers or {})
+        size = len(response.get_data())
+        response.close()
+        return response.status_code, size
+
+    def server_pid(self):
+        return os.getpid()
+
+
+class HttpTransport:
+    """Send requests to a running server over keep-alive HTTP connections."""
+
+    name = 'http'
+
+    def __init__(self, base_url: str, pid: int = None):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 80
+        self.pid = pid
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body: bytes = None, headers: dict = None) -> tuple:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=120)
+
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            size = len(response.read())
+            return response.status, size
+        except (http.client.HTTPException, OSError):
+            # Drop the broken connection so the next request reconnects
+            conn.close()
+            self._local.conn = None
+            raise
+
+    def server_pid(self):
+        return self.pid
+
+
+# ============================================
+# PAYLOADS
+# ============================================
+class PayloadFactory:
+    """Pre-build realistic request bodies so payload construction isn't measured."""
+
+    def __init__(self, row_sizes: list, seed: int = 42):
+        self.uploads = []
+        self.volunteer_sets = []
+        self.message_sets = []
+
+        for rows in row_sizes:
+            generator = RosterGenerator(seed=seed + rows)
+
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(generator.headers)
+            volunteers = []
+            for row in generator.rows(rows):
+                writer.writerow(row)
+                volunteers.append(_row_to_volunteer(row))
+
+            self.uploads.append((f"roster_{rows}.csv", buffer.getvalue().encode('utf-8')))
+            self.volunteer_sets.append(volunteers)
+            self.message_sets.append(_volunteers_to_messages(volunteers))
+
+    def upload(self, rng: random.Random) -> tuple:
+        filename, content = rng.choice(self.uploads)
+        return _multipart_body('file', filename, content, 'text/csv')
+
+    def generate(self, rng: random.Random) -> tuple:
+        body = {
+            'volunteers': rng.choice(self.volunteer_sets),
+            'template_id': rng.choice(TEMPLATE_IDS),
+            'custom_subject': '',
+            'custom_body': ''
+        }
+        return _json_body(body)
+
+    def download(self, rng: random.Random) -> tuple:
+        return _json_body({'messages': rng.choice(self.message_sets)})
+
+
+def _row_to_volunteer(row: list) -> dict:
+    """Shape a generated row the way FileParser returns it."""
+    return {
+        'name': f"{row[1]} {row[0]}",
+        'email': row[2],
+        'first_name': row[1],
+        'last_name': row[0],
+        'phone': row[3],
+        'interests': row[7],
+        'location': row[4],
+        'referral': row[8]
+    }
+
+
+def _volunteers_to_messages(volunteers: list) -> list:
+    """Build download payloads without touching the server."""
+    from utils.message_generator import MessageGenerator
+    return MessageGenerator().generate_batch(volunteers, 'general')
+
+
+def _json_body(payload: dict) -> tuple:
+    return json.dumps(payload).encode('utf-8'), {'Content-Type': 'application/json'}
+
+
+def _multipart_body(field: str, filename: str, content: bytes, content_type: str) -> tuple:
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode('utf-8')
+    tail = f"\r\n--{boundary}--\r\n".encode('utf-8')
+    return head + content + tail, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+# ============================================
+# RSS SAMPLING
+# ============================================
+def read_rss(pid: int):
+    """Resident set size of ``pid`` in bytes, or None if it can't be read."""
+    if pid is None:
+        return None
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if pid == os.getpid():
+        # Peak (not current) RSS, but better than nothing on macOS/BSD
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss * 1024
+    return None
+
+
+class RssSampler(threading.Thread):
+    """Background thread recording (elapsed_seconds, rss_bytes) samples."""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        start = time.perf_counter()
+        while not self._stop_event.is_set():
+            rss = read_rss(self.pid)
+            if rss is not None:
+                self.samples.append((round(time.perf_counter() - start, 2), rss))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# ============================================
+# LOAD RUNNER
+# ============================================
+class LoadRunner:
+    """Run a weighted endpoint mix at a fixed concurrency and collect results."""
+
+    def __init__(self, transport, payloads: PayloadFactory, mix: dict, seed: int = 42):
+        self.transport = transport
+        self.payloads = payloads
+        self.mix = mix
+        self.seed = seed
+
+    def run(self, concurrency: int, duration: float = None, total_requests: int = None) -> dict:
+        results = []
+        results_lock = threading.Lock()
+        counter = {'issued': 0}
+        deadline = time.perf_counter() + duration if duration else None
+
+        def next_slot() -> bool:
+            with results_lock:
+                if total_requests is not None and counter['issued'] >= total_requests:
+                    return False
+                counter['issued'] += 1
+                return True
+
+        def worker(worker_id: int):
+            rng = random.Random(self.seed * 1000 + worker_id)
+            endpoints = list(self.mix)
+            weights = [self.mix[e] for e in endpoints]
+            local_results = []
+
+            while (deadline is None or time.perf_counter() < deadline) and next_slot():
+                endpoint = rng.choices(endpoints, weights)[0]
+                method, path, body, headers = self._build_request(endpoint, rng)
+
+                start = time.perf_counter()
+                try:
+                    status, size = self.transport.request(method, path, body, headers)
+                    error = None
+                except Exception as e:
+                    status, size, error = 0, 0, type(e).__name__
+                local_results.append((endpoint, time.perf_counter() - start, status, size, error))
+
+            with results_lock:
+                results.extend(local_results)
+
+        sampler = RssSampler(self.transport.server_pid())
+        sampler.start()
+        started = time.perf_counter()
+
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+
+        return summarize(results, elapsed, concurrency, sampler.samples)
+
+    def _build_request(self, endpoint: str, rng: random.Random) -> tuple:
+        if endpoint == 'upload':
+            body, headers = self.payloads.upload(rng)
+            return 'POST', '/upload', body, headers
+        if endpoint == 'generate':
+            body, headers = self.payloads.generate(rng)
+            return 'POST', '/generate', body, headers
+        if endpoint == 'csv':
+            body, headers = self.payloads.download(rng)
+            return 'POST', '/download/csv', body, headers
+        if endpoint == 'zip':
+            body, headers = self.payloads.download(rng)
+            return 'POST', '/download/zip', body, headers
+        if endpoint == 'templates':
+            return 'GET', '/templates', None, None
+        raise ValueError(f"Unknown endpoint in mix: {endpoint}")
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def _latency_stats(latencies: list, errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'throughput_rps': round(count / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0
+    }
+
+
+def summarize(results: list, elapsed: float, concurrency: int, rss_samples: list) -> dict:
+    """Aggregate raw (endpoint, latency, status, size, error) tuples into a report."""
+    per_endpoint = {}
+    for endpoint, latency, status, size, error in results:
+        entry = per_endpoint.setdefault(endpoint, {'latencies': [], 'errors': 0, 'bytes': 0, 'statuses': {}})
+        entry['latencies'].append(latency)
+        entry['bytes'] += size
+        entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+        if error or status >= 400:
+            entry['errors'] += 1
+
+    report = {
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 2),
+        'overall': _latency_stats(
+            [r[1] for r in results],
+            sum(e['errors'] for e in per_endpoint.values()),
+            elapsed
+        ),
+        'endpoints': {},
+        'rss': {
+            'samples': rss_samples,
+            'start_bytes': rss_samples[0][1] if rss_samples else None,
+            'peak_bytes': max((s[1] for s in rss_samples), default=None),
+            'end_bytes': rss_samples[-1][1] if rss_samples else None
+        }
+    }
+
+    for endpoint, entry in sorted(per_endpoint.items()):
+        stats = _latency_stats(entry['latencies'], entry['errors'], elapsed)
+        stats['bytes'] = entry['bytes']
+        stats['statuses'] = {str(k): v for k, v in sorted(entry['statuses'].items())}
+        report['endpoints'][endpoint] = stats
+
+    return report
+
+
+# ============================================
+# OUTPUT
+# ============================================
+def _format_bytes(value) -> str:
+    if value is None:
+        return '-'
+    return f"{value / (1024 * 1024):.1f} MB"
+
+
+def print_report(report: dict):
+    overall = report['overall']
+    rss = report['rss']
+    print(f"\n⚡ Concurrency {report['concurrency']} — {overall['requests']} requests in {report['elapsed_s']}s")
+    print(f"   Throughput: {overall['throughput_rps']} req/s | Errors: {overall['errors']} ({overall['error_rate']:.2%})")
+    print(f"   Latency p50/p95/p99: {overall['p50_ms']} / {overall['p95_ms']} / {overall['p99_ms']} ms")
+    print(f"   Server RSS start/peak/end: {_format_bytes(rss['start_bytes'])} / "
+          f"{_format_bytes(rss['peak_bytes'])} / {_format_bytes(rss['end_bytes'])}")
+
+    print(f"\n   {'Endpoint':<10} {'Reqs':>7} {'RPS':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Errors':>7}")
+    for endpoint, stats in report['endpoints'].items():
+        print(f"   {endpoint:<10} {stats['requests']:>7} {stats['throughput_rps']:>8} {stats['p50_ms']:>9} "
+              f"{stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['errors']:>7}")
+
+
+def print_ramp_summary(reports: list):
+    print("\n📈 Saturation summary")
+    print(f"   {'Conc':>5} {'RPS':>9} {'p50 ms':>9} {'p99 ms':>9} {'Err %':>7} {'Peak RSS':>10}")
+    for report in reports:
+        overall = report['overall']
+        print(f"   {report['concurrency']:>5} {overall['throughput_rps']:>9} {overall['p50_ms']:>9} "
+              f"{overall['p99_ms']:>9} {overall['error_rate'] * 100:>6.1f}% {_format_bytes(report['rss']['peak_bytes']):>10}")
+
+
+def parse_mix(value: str) -> dict:
+    """Parse ``upload=3,generate=1`` into a weight dict."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}' (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight) if weight else 1.0
+    return mix
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Load test the HOPE Messaging Tool endpoints.')
+    parser.add_argument('--url', help='Base URL of a running server (default: in-process test client)')
+    parser.add_argument('--server-pid', type=int, help='PID of the server process for RSS sampling (with --url)')
+    parser.add_argument('--concurrency', '-c', type=int, default=4, help='Concurrent sessions (default: 4)')
+    parser.add_argument('--ramp', help='Comma-separated concurrency levels to step through, e.g. 1,2,4,8')
+    parser.add_argument('--duration', '-d', type=float, default=10.0, help='Seconds per concurrency level (default: 10)')
+    parser.add_argument('--requests', '-n', type=int, help='Stop after this many requests instead of --duration')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='Endpoint weights, e.g. upload=3,generate=3,csv=1,zip=1,templates=2')
+    parser.add_argument('--rows', default=','.join(str(r) for r in DEFAULT_ROW_SIZES),
+                        help='Roster sizes used for payloads (default: 25,250,2500)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('--json', help='Write the full report (including RSS samples) to this file')
+    args = parser.parse_args(argv)
+
+    if args.url:
+        transport = HttpTransport(args.url, args.server_pid)
+    else:
+        from app import create_app
+        transport = InProcessTransport(create_app())
+
+    row_sizes = [int(r) for r in args.rows.split(',') if r.strip()]
+    print(f"\n🧪 Building payloads for roster sizes {row_sizes}...")
+    payloads = PayloadFactory(row_sizes, seed=args.seed)
+
+    levels = [int(c) for c in args.ramp.split(',')] if args.ramp else [args.concurrency]
+    runner = LoadRunner(transport, payloads, args.mix, seed=args.seed)
+
+    reports = []
+    for concurrency in levels:
+        duration = None if args.requests else args.duration
+        report = runner.run(concurrency, duration=duration, total_requests=args.requests)
+        report['transport'] = transport.name
+        print_report(report)
+        reports.append(report)
+
+    if len(reports) > 1:
+        print_ramp_summary(reports)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n📄 Report written to {args.json}")
+
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
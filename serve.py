@@ -0,0 +1,52 @@
+"""
+Production server launcher for the HOPE Messaging Tool
+Runs gunicorn (multiple worker processes x threads) where available, falling
+back to waitress (threads only) on Windows.
+
+    python serve.py
+    HSRM_WORKERS=8 HSRM_THREADS=4 HSRM_BIND=0.0.0.0:8000 python serve.py
+"""
+
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def serve_gunicorn():
+    config = os.path.join(HERE, 'gunicorn.conf.py')
+    os.execvp(sys.executable, [sys.executable, '-m', 'gunicorn', '-c', config, '--chdir', HERE, 'wsgi:app'])
+
+
+def serve_waitress():
+    from waitress import serve
+    from wsgi import app
+
+    host, _, port = os.environ.get('HSRM_BIND', '0.0.0.0:8000').rpartition(':')
+    threads = int(os.environ.get('HSRM_WORKERS', os.cpu_count() or 1)) * int(os.environ.get('HSRM_THREADS', 4))
+    print(f"\n🚀 Serving HOPE Messaging Tool with waitress on {host}:{port} ({threads} threads)\n")
+    serve(app, host=host or '0.0.0.0', port=int(port), threads=threads)
+
+
+def build_static_assets():
+    """Rebuild the fingerprinted CSS/JS bundles so workers link the current files."""
+    import build_assets
+    try:
+        build_assets.build(quiet=True)
+    except OSError as e:
+        print(f"⚠️  Could not build static assets ({e}); serving raw files")
+
+
+if __name__ == '__main__':
+    build_static_assets()
+    
+    try:
+        import gunicorn  # noqa: F401
+        has_gunicorn = os.name != 'nt'
+    except ImportError:
+        has_gunicorn = False
+
+    if has_gunicorn:
+        serve_gunicorn()
+    else:
+        serve_waitress()
@@ -0,0 +1,238 @@
+"""
+HOPE Messaging Tool SMTP Sink
+A local stand-in SMTP server for trying out and load testing email delivery.
+Accepts every message (optionally appending it to an mbox file), supports
+PIPELINING, and can inject temporary failures, rejections and dropped
+connections to exercise the mailer's retries.
+
+Examples:
+    python smtp_sink.py --port 2525
+    python smtp_sink.py --port 2525 --mbox sent.mbox --fail-rate 0.05 --reject-domain invalid.example
+    HSRM_SMTP_HOST=localhost HSRM_SMTP_PORT=2525 HSRM_SMTP_SECURITY=none python app.py
+"""
+
+import argparse
+import random
+import socket
+import socketserver
+import sys
+import threading
+import time
+from email.utils import formatdate
+
+
+class SinkStats:
+    """Counters shared by all sessions."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = 0
+        self.recipients = 0
+        self.temp_failures = 0
+        self.rejections = 0
+        self.drops = 0
+        self.bytes = 0
+
+    def add(self, **counts):
+        with self.lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {name: getattr(self, name) for name in
+                    ('connections', 'messages', 'recipients', 'temp_failures', 'rejections', 'drops', 'bytes')}
+
+
+class SMTPSession(socketserver.StreamRequestHandler):
+    """One client connection: a minimal SMTP state machine."""
+
+    def setup(self):
+        super().setup()
+        # Pipelined replies are written one by one; don't let Nagle hold them back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sink = self.server.sink
+        self.reset()
+
+    def reset(self):
+        self.sender = None
+        self.recipients = []
+
+    def reply(self, line: str):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        self.sink.stats.add(connections=1)
+        self.reply('220 hsrm-sink ESMTP ready')
+        while True:
+            line = self.rfile.readline(4096)
+            if not line:
+                return
+            command, _, argument = line.decode('utf-8', 'replace').strip().partition(' ')
+            command = command.upper()
+
+            if command == 'EHLO':
+                self.reset()
+                self.wfile.write(b'250-hsrm-sink\r\n250-PIPELINING\r\n250-8BITMIME\r\n'
+                                 b'250-AUTH PLAIN LOGIN\r\n250 SIZE 52428800\r\n')
+            elif command == 'HELO':
+                self.reset()
+                self.reply('250 hsrm-sink')
+            elif command == 'AUTH':
+                # Any credentials will do; LOGIN asks for the user and password in turn
+                if argument.upper().startswith('LOGIN'):
+                    self.reply('334 VXNlcm5hbWU6')
+                    self.rfile.readline(4096)
+                    self.reply('334 UGFzc3dvcmQ6')
+                    self.rfile.readline(4096)
+                self.reply('235 Authentication successful')
+            elif command == 'MAIL':
+                self.reset()
+                self.sender = argument.partition(':')[2].strip()
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                self.rcpt(argument.partition(':')[2].strip().strip('<>'))
+            elif command == 'DATA':
+                if not self.data():
+                    return
+            elif command == 'RSET':
+                self.reset()
+                self.reply('250 OK')
+            elif command == 'NOOP':
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+    def rcpt(self, address: str):
+        if self.sender is None:
+            self.reply('503 Need MAIL first')
+            return
+        domain = address.rpartition('@')[2].lower()
+        if domain in self.sink.reject_domains:
+            self.sink.stats.add(rejections=1)
+            self.reply('550 5.1.1 Mailbox unavailable')
+        elif self.sink.fail_rate and random.random() < self.sink.fail_rate:
+            self.sink.stats.add(temp_failures=1)
+            self.reply('451 4.3.0 Temporary failure, try again later')
+        else:
+            self.recipients.append(address)
+            self.reply('250 OK')
+
+    def data(self) -> bool:
+        """Read one message; False if the session should end."""
+        if self.sender is None or not self.recipients:
+            self.reply('554 No valid recipients')
+            return True
+        self.reply('354 End data with <CR><LF>.<CR><LF>')
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return False
+            if line in (b'.\r\n', b'.\n'):
+                break
+            lines.append(line[1:] if line.startswith(b'..') else line)
+
+        if self.sink.drop_rate and random.random() < self.sink.drop_rate:
+            # Hang up without confirming; the client can't tell whether it was delivered
+            self.sink.stats.add(drops=1)
+            return False
+
+        body = b''.join(lines)
+        self.sink.store(self.sender, self.recipients, body)
+        self.sink.stats.add(messages=1, recipients=len(self.recipients), bytes=len(body))
+        self.reset()
+        self.reply('250 OK queued')
+        return True
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """Threaded sink server that can also be started in-process."""
+
+    def __init__(self, host: str = 'localhost', port: int = 2525, mbox: str = None,
+                 fail_rate: float = 0.0, drop_rate: float = 0.0, reject_domains: list = None):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+            mbox: Optional mbox file each accepted message is appended to
+            fail_rate: Share of recipients answered with a temporary 451
+            drop_rate: Share of messages after which the connection is dropped unconfirmed
+            reject_domains: Recipient domains answered with a permanent 550
+        """
+        self.mbox = mbox
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.reject_domains = {domain.lower() for domain in (reject_domains or [])}
+        self.stats = SinkStats()
+        self._mbox_lock = threading.Lock()
+        self.server = _ThreadingServer((host, port), SMTPSession)
+        self.server.sink = self
+        self.thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='hsrm-smtp-sink', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def store(self, sender: str, recipients: list, body: bytes):
+        if not self.mbox:
+            return
+        envelope = f"From {sender.strip('<>') or 'MAILER-DAEMON'} {formatdate(usegmt=True)}\n".encode('utf-8')
+        # mboxrd: escape any line that could be taken for a separator
+        body = body.replace(b'\r\n', b'\n')
+        lines = [b'>' + line if line.lstrip(b'>').startswith(b'From ') else line for line in body.split(b'\n')]
+        with self._mbox_lock, open(self.mbox, 'ab') as f:
+            f.write(envelope + b'\n'.join(lines).rstrip(b'\n') + b'\n\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='localhost', help='Interface to listen on (default: localhost)')
+    parser.add_argument('--port', type=int, default=2525, help='Port to listen on (default: 2525)')
+    parser.add_argument('--mbox', help='Append accepted messages to this mbox file')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Share of recipients refused with 451 (0-1)')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='Share of messages followed by a dropped connection (0-1)')
+    parser.add_argument('--reject-domain', action='append', default=[], help='Refuse recipients at this domain with 550 (repeatable)')
+    parser.add_argument('--report', type=float, default=5.0, help='Seconds between throughput reports (0 for none)')
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port, args.mbox, args.fail_rate, args.drop_rate, args.reject_domain).start()
+    print(f"SMTP sink listening on {args.host}:{sink.port}", file=sys.stderr)
+
+    last, last_time = sink.stats.snapshot(), time.monotonic()
+    try:
+        while True:
+            time.sleep(args.report or 3600)
+            if not args.report:
+                continue
+            now, current = time.monotonic(), sink.stats.snapshot()
+            rate = (current['messages'] - last['messages']) / (now - last_time) * 60
+            print(f"{current['messages']} messages ({rate:,.0f}/min), {current['connections']} connections, "
+                  f"{current['temp_failures']} deferred, {current['rejections']} rejected, {current['drops']} dropped",
+                  file=sys.stderr)
+            last, last_time = current, now
+    except KeyboardInterrupt:
+        sink.stop()
+
+
+if __name__ == '__main__':
+    main()
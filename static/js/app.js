@@ -4,42 +4,114 @@
  */
 
 // ============================================
-// ENCRYPTION UTILITIES
+// BACKGROUND WORKER
 // ============================================
-const Encryption = {
-    key: 'HSRM_2024_HOPE_KEY',
-    
-    encrypt(data) {
+// Cache encoding/decoding and bulk filter/sort run in static/js/worker.js. Where
+// workers aren't available the same script is loaded into the page instead.
+const cacheWorker = {
+    worker: null,
+    fallback: null,
+    nextId: 1,
+    calls: new Map(),
+    
+    start() {
+        if (this.worker || this.fallback) return;
         try {
-            const str = JSON.stringify(data);
-            const encoded = btoa(encodeURIComponent(str).replace(/%([0-9A-F]{2})/g,
-                (match, p1) => String.fromCharCode('0x' + p1)));
-            // Simple XOR with key
-            let result = '';
-            for (let i = 0; i < encoded.length; i++) {
-                result += String.fromCharCode(encoded.charCodeAt(i) ^ this.key.charCodeAt(i % this.key.length));
-            }
-            return btoa(result);
+            this.worker = new Worker(window.WORKER_URL || '/static/js/worker.js');
+            this.worker.onmessage = (e) => {
+                const { id, result, error } = e.data;
+                const call = this.calls.get(id);
+                this.calls.delete(id);
+                if (call) error ? call.reject(new Error(error)) : call.resolve(result);
+            };
+            this.worker.onerror = (e) => {
+                e.preventDefault();
+                console.warn('Worker unavailable, running on the main thread:', e.message);
+                this.useFallback();
+            };
         } catch (e) {
-            console.error('Encryption error:', e);
-            return null;
+            this.useFallback();
         }
     },
     
-    decrypt(encrypted) {
-        try {
-            const decoded = atob(encrypted);
-            let result = '';
-            for (let i = 0; i < decoded.length; i++) {
-                result += String.fromCharCode(decoded.charCodeAt(i) ^ this.key.charCodeAt(i % this.key.length));
-            }
-            const str = decodeURIComponent(atob(result).split('').map(c => 
-                '%' + ('00' + c.charCodeAt(0).toString(16)).slice(-2)).join(''));
-            return JSON.parse(str);
-        } catch (e) {
-            console.error('Decryption error:', e);
-            return null;
+    useFallback() {
+        const pending = [...this.calls.values()];
+        this.calls.clear();
+        this.worker?.terminate();
+        this.worker = null;
+        this.fallback = new Promise((resolve, reject) => {
+            const script = document.createElement('script');
+            script.src = window.WORKER_URL || '/static/js/worker.js';
+            script.onload = () => resolve(window.HSRMWorker);
+            script.onerror = () => reject(new Error('Could not load worker script'));
+            document.head.appendChild(script);
+        });
+        pending.forEach(call => this.call(call.type, call.payload).then(call.resolve, call.reject));
+    },
+    
+    // Run a worker request; payload is copied (buffers in `transfer` are moved)
+    call(type, payload, transfer = []) {
+        this.start();
+        if (this.fallback) {
+            return this.fallback
+                .then(worker => worker.handle(type, payload))
+                .then(response => response.result);
         }
+        return new Promise((resolve, reject) => {
+            const id = this.nextId++;
+            this.calls.set(id, { resolve, reject, type, payload });
+            this.worker.postMessage({ id, type, payload }, transfer);
+        });
+    }
+};
+
+// Client cache: IndexedDB object stores (volunteers, messages, tracking, batches)
+// owned by the worker. Writes are queued and sent as one batch per task.
+const ClientCache = {
+    queue: [],
+    scheduled: false,
+    failed: false,
+    channel: typeof BroadcastChannel === 'undefined' ? null : new BroadcastChannel('hsrm-cache'),
+    
+    put(store, records, fields) {
+        this.enqueue({ type: 'put', store, records, fields });
+    },
+    
+    replace(store, records, fields) {
+        this.enqueue({ type: 'replace', store, records, fields });
+    },
+    
+    delete(store, keys) {
+        this.enqueue({ type: 'delete', store, keys });
+    },
+    
+    clear(store) {
+        this.enqueue({ type: 'clear', store });
+    },
+    
+    enqueue(op) {
+        this.queue.push(op);
+        if (!this.scheduled) {
+            this.scheduled = true;
+            setTimeout(() => this.flush(), 0);
+        }
+    },
+    
+    flush() {
+        this.scheduled = false;
+        const ops = this.queue.splice(0);
+        if (ops.length === 0) return Promise.resolve();
+        
+        return cacheWorker.call('cacheWrite', { ops })
+            .then(() => {
+                // Let other tabs pick up tracking and batch changes
+                const shared = [...new Set(ops.map(op => op.store))].filter(store => store === 'tracking' || store === 'batches');
+                if (shared.length) this.channel?.postMessage({ stores: shared });
+            })
+            .catch(e => {
+                if (!this.failed) console.error('Error saving to the client cache:', e);
+                this.failed = true;
+            });
     }
 };
 
@@ -54,10 +126,34 @@ const state = {
     currentCategory: 'initial',
     searchQuery: '',
     sortBy: 'name-asc',
-    selectedFile: null
+    selectedFile: null,
+    rosterId: null,
+    rosterSync: null,       // { version, messageVersion, messageSet, batchId } of the cached roster
+    searchSeq: 0,
+    workerMessages: null    // the message list the worker holds a copy of
+};
+
+// Decrypted tracking data and batches, loaded once at startup and saved in the background
+const storedData = {
+    tracking: {},
+    batches: []
+};
+
+// Rosters at least this large are searched and sorted server-side (/rosters/<id>/search)
+const SERVER_SEARCH_MIN = 2000;
+
+// Message lists at least this large are filtered and sorted in the worker when searched locally
+const WORKER_FILTER_MIN = 500;
+
+// Email list sort option -> server sort parameters
+const SERVER_SORTS = {
+    'name-asc': 'sort=name',
+    'name-desc': 'sort=name&order=desc',
+    'email-asc': 'sort=email',
+    'status': 'sort=status'
 };
 
-// Storage Keys
+// Storage Keys (everything but the theme moved to IndexedDB; the rest are migrated once)
 const STORAGE_KEYS = {
     TRACKING: 'hsrm_tracking_v2',
     VOLUNTEERS: 'hsrm_volunteers_cache',
@@ -66,6 +162,13 @@ const STORAGE_KEYS = {
     BATCHES: 'hsrm_batches'
 };
 
+const LEGACY_CACHE_KEYS = {
+    volunteers: STORAGE_KEYS.VOLUNTEERS,
+    messages: STORAGE_KEYS.MESSAGES,
+    tracking: STORAGE_KEYS.TRACKING,
+    batches: STORAGE_KEYS.BATCHES
+};
+
 // ============================================
 // DOM ELEMENTS
 // ============================================
@@ -88,6 +191,7 @@ const elements = {
     previewTbody: document.getElementById('preview-tbody'),
     volunteerCount: document.getElementById('volunteer-count'),
     duplicateCount: document.getElementById('duplicate-count'),
+    mergeDuplicates: document.getElementById('merge-duplicates'),
     templatesGrid: document.getElementById('templates-grid'),
     categoryTabs: document.getElementById('category-tabs'),
     
@@ -110,6 +214,11 @@ const elements = {
     emailsList: document.getElementById('emails-list'),
     downloadCsv: document.getElementById('download-csv'),
     downloadZip: document.getElementById('download-zip'),
+    downloadMbox: document.getElementById('download-mbox'),
+    downloadEml: document.getElementById('download-eml'),
+    splitRows: document.getElementById('split-rows'),
+    splitMegabytes: document.getElementById('split-megabytes'),
+    sendEmails: document.getElementById('send-emails'),
     emailSearch: document.getElementById('email-search'),
     emailSort: document.getElementById('email-sort'),
     noResultsState: document.getElementById('no-results-state'),
@@ -128,6 +237,8 @@ const elements = {
     viewDashboard: document.getElementById('view-dashboard'),
     clearTracking: document.getElementById('clear-tracking'),
     exportTracking: document.getElementById('export-tracking'),
+    checkMail: document.getElementById('check-mail'),
+    mergeTracking: document.getElementById('merge-tracking'),
     trackingModal: document.getElementById('tracking-modal'),
     trackingModalClose: document.getElementById('tracking-modal-close'),
     trackingList: document.getElementById('tracking-list'),
@@ -160,14 +271,14 @@ const elements = {
 // ============================================
 // INITIALIZATION
 // ============================================
-function init() {
+async function init() {
     setupEventListeners();
     loadTheme();
-    loadCachedData();
     selectTemplate('general');
     filterTemplatesByCategory('initial');
-    loadTrackingData();
+    await loadCachedData();
     updateTrackingDisplay();
+    syncRoster();
     setupCharacterCounters();
     setupKeyboardShortcuts();
 }
@@ -194,6 +305,9 @@ function setupEventListeners() {
         clearSelectedFile();
     });
     
+    // Merge likely duplicates found on upload
+    elements.mergeDuplicates?.addEventListener('click', mergeVolunteerDuplicates);
+    
     // Format guidelines toggle
     elements.formatToggle?.addEventListener('click', (e) => {
         e.stopPropagation();
@@ -217,13 +331,19 @@ function setupEventListeners() {
     elements.startOver?.addEventListener('click', resetApp);
     
     // Downloads
-    elements.downloadCsv?.addEventListener('click', downloadCsv);
-    elements.downloadZip?.addEventListener('click', downloadZip);
+    elements.downloadCsv?.addEventListener('click', () => downloadExport('csv'));
+    elements.downloadZip?.addEventListener('click', () => downloadExport('zip'));
+    elements.downloadMbox?.addEventListener('click', () => downloadExport('mbox'));
+    elements.downloadEml?.addEventListener('click', () => downloadExport('eml'));
+    elements.sendEmails?.addEventListener('click', sendEmails);
     
     // Search and Sort
     elements.emailSearch?.addEventListener('input', debounce(filterEmails, 300));
     elements.emailSort?.addEventListener('change', sortEmails);
     
+    // Tracking changes made in other tabs
+    ClientCache.channel?.addEventListener('message', handleCacheBroadcast);
+    
     // Template Modal
     elements.modalClose?.addEventListener('click', closeModal);
     elements.templateModal?.querySelector('.modal-overlay')?.addEventListener('click', closeModal);
@@ -233,6 +353,8 @@ function setupEventListeners() {
     elements.viewDashboard?.addEventListener('click', openDashboardModal);
     elements.clearTracking?.addEventListener('click', clearTrackingData);
     elements.exportTracking?.addEventListener('click', exportTrackingData);
+    elements.checkMail?.addEventListener('click', checkMail);
+    elements.mergeTracking?.addEventListener('click', mergeTrackingDuplicates);
     elements.trackingModalClose?.addEventListener('click', closeTrackingModal);
     elements.trackingModal?.querySelector('.modal-overlay')?.addEventListener('click', closeTrackingModal);
     
@@ -277,7 +399,7 @@ function setupKeyboardShortcuts() {
         // Ctrl+S to download CSV
         if (e.ctrlKey && e.key === 's' && state.currentStep === 3) {
             e.preventDefault();
-            downloadCsv();
+            downloadExport('csv');
         }
     });
 }
@@ -379,51 +501,81 @@ function setupCharacterCounters() {
 // ============================================
 // CACHING
 // ============================================
-function loadCachedData() {
+async function loadCachedData() {
+    // Hand any old localStorage cache to the worker to migrate into IndexedDB
+    let legacy = null;
+    Object.entries(LEGACY_CACHE_KEYS).forEach(([name, key]) => {
+        const text = localStorage.getItem(key);
+        if (text) {
+            legacy = legacy || {};
+            legacy[name] = text;
+        }
+    });
+    
     try {
-        // Load cached volunteers
-        const cachedVolunteers = localStorage.getItem(STORAGE_KEYS.VOLUNTEERS);
-        if (cachedVolunteers) {
-            const decrypted = Encryption.decrypt(cachedVolunteers);
-            if (decrypted && decrypted.volunteers && decrypted.volunteers.length > 0) {
-                state.volunteers = decrypted.volunteers;
-                showToast('Restored cached volunteer data', 'info');
-            }
+        const cached = await cacheWorker.call('cacheLoad', { legacy });
+        if (legacy) {
+            Object.values(LEGACY_CACHE_KEYS).forEach(key => localStorage.removeItem(key));
         }
         
-        // Load cached messages
-        const cachedMessages = localStorage.getItem(STORAGE_KEYS.MESSAGES);
-        if (cachedMessages) {
-            const decrypted = Encryption.decrypt(cachedMessages);
-            if (decrypted && decrypted.messages) {
-                state.generatedMessages = decrypted.messages;
-            }
+        storedData.tracking = cached.tracking;
+        storedData.batches = cached.batches;
+        
+        if (cached.volunteers.length > 0) {
+            state.volunteers = cached.volunteers;
+            validateVolunteerData();
+            showToast('Restored cached volunteer data', 'info');
+        }
+        
+        if (cached.messages.length > 0) {
+            state.generatedMessages = cached.messages;
+            state.workerMessages = cached.messages;
+        }
+        
+        const roster = cached.meta.roster;
+        if (roster && roster.id) {
+            state.rosterId = roster.id;
+            state.rosterSync = {
+                version: roster.version,
+                messageVersion: roster.messageVersion,
+                messageSet: roster.messageSet,
+                batchId: roster.batchId
+            };
         }
     } catch (e) {
-        console.error('Error loading cached data:', e);
+        console.warn('Client cache unavailable, data will not persist:', e);
+        ClientCache.failed = true;
     }
 }
 
 function cacheVolunteerData() {
-    try {
-        const encrypted = Encryption.encrypt({ volunteers: state.volunteers, timestamp: Date.now() });
-        if (encrypted) {
-            localStorage.setItem(STORAGE_KEYS.VOLUNTEERS, encrypted);
-        }
-    } catch (e) {
-        console.error('Error caching volunteer data:', e);
-    }
+    // Keys follow upload order and stay with each volunteer through edits and deletes
+    state.volunteers.forEach((volunteer, index) => { volunteer._key = index; });
+    ClientCache.replace('volunteers', state.volunteers);
 }
 
-function cacheMessageData() {
-    try {
-        const encrypted = Encryption.encrypt({ messages: state.generatedMessages, timestamp: Date.now() });
-        if (encrypted) {
-            localStorage.setItem(STORAGE_KEYS.MESSAGES, encrypted);
+function cacheVolunteer(volunteer) {
+    ClientCache.put('volunteers', [volunteer]);
+}
+
+function cacheMessageData(batchId = null) {
+    // The worker keeps a copy of the messages it caches for filtering and sorting
+    state.generatedMessages.forEach((msg, index) => { msg._key = index; });
+    ClientCache.replace('messages', state.generatedMessages, { batchId });
+    state.workerMessages = state.generatedMessages;
+}
+
+// Another tab changed tracking data or batches: pick up its copy
+function handleCacheBroadcast(e) {
+    cacheWorker.call('cacheReload', { stores: e.data.stores }).then(changed => {
+        if (changed.tracking) {
+            storedData.tracking = changed.tracking;
+            updateTrackingDisplay();
         }
-    } catch (e) {
-        console.error('Error caching message data:', e);
-    }
+        if (changed.batches) {
+            storedData.batches = changed.batches;
+        }
+    }).catch(e => console.error('Error reloading the client cache:', e));
 }
 
 // ============================================
@@ -517,6 +669,7 @@ async function processFile(file) {
             }
         } else {
             state.volunteers = data.data;
+            markDuplicateGroups(data.duplicates);
             showToast(`Successfully extracted ${data.count} contacts!`, 'success');
         }
         
@@ -550,6 +703,7 @@ async function processFile(file) {
 function validateVolunteerData() {
     const issues = [];
     const emailCounts = {};
+    const groupSizes = {};
     let missingNames = 0;
     let missingPhones = 0;
     let invalidEmails = 0;
@@ -560,6 +714,9 @@ function validateVolunteerData() {
         if (email) {
             emailCounts[email] = (emailCounts[email] || 0) + 1;
         }
+        if (v._duplicateGroup !== undefined) {
+            groupSizes[v._duplicateGroup] = (groupSizes[v._duplicateGroup] || 0) + 1;
+        }
         
         // Check for missing data
         if (!v.name || v.name.trim() === '') missingNames++;
@@ -577,6 +734,11 @@ function validateVolunteerData() {
         issues.push(`${duplicates.length} duplicate email(s) found`);
     }
     
+    const likelyGroups = Object.values(groupSizes).filter(count => count > 1).length;
+    if (likelyGroups > 0) {
+        issues.push(`${likelyGroups} person(s) listed more than once (email variants, or the same phone or email name with the same name)`);
+    }
+    
     if (missingNames > 0) {
         issues.push(`${missingNames} contact(s) missing names`);
     }
@@ -592,12 +754,44 @@ function validateVolunteerData() {
     // Mark duplicates in state
     state.volunteers.forEach(v => {
         const email = v.email?.toLowerCase();
-        v._isDuplicate = email && emailCounts[email] > 1;
+        v._isDuplicate = Boolean(email && emailCounts[email] > 1) || groupSizes[v._duplicateGroup] > 1;
     });
     
     return issues;
 }
 
+function markDuplicateGroups(groups = []) {
+    // Likely duplicates found by the server, as indexes into the uploaded volunteers
+    groups.forEach((group, n) => {
+        group.ids.forEach(index => { state.volunteers[index]._duplicateGroup = n; });
+    });
+}
+
+async function mergeVolunteerDuplicates() {
+    const button = elements.mergeDuplicates;
+    button.disabled = true;
+    try {
+        // Without the client-side marks (cache keys are reassigned below)
+        const records = state.volunteers.map(({ _key, _isDuplicate, _duplicateGroup, ...volunteer }) => volunteer);
+        const response = await postJson('/dedup', { records });
+        const data = await response.json();
+        if (!response.ok) throw new Error(data.error || 'Could not merge duplicates');
+        
+        state.volunteers = data.records;
+        showValidationWarnings(validateVolunteerData());
+        cacheVolunteerData();
+        populatePreviewTable();
+        showToast(
+            data.removed > 0 ? `Merged ${data.removed} duplicate contact(s)` : 'No contacts could be merged automatically',
+            data.removed > 0 ? 'success' : 'info'
+        );
+    } catch (e) {
+        showToast(e.message, 'error');
+    } finally {
+        button.disabled = false;
+    }
+}
+
 function showValidationWarnings(issues) {
     if (issues.length === 0) {
         hideValidationWarnings();
@@ -613,63 +807,286 @@ function hideValidationWarnings() {
 }
 
 // ============================================
-// PREVIEW TABLE WITH INLINE EDITING
+// VIRTUAL LIST
 // ============================================
-function populatePreviewTable() {
-    elements.previewTbody.innerHTML = '';
+// Row heights with O(log n) updates and offset lookups (a Fenwick tree), so a
+// virtual list costs the same to scroll at 100 rows or 100k
+class HeightIndex {
+    constructor(count, height) {
+        this.count = count;
+        this.heights = new Float64Array(count).fill(height);
+        this.tree = new Float64Array(count + 1);
+        for (let i = 1; i <= count; i++) {
+            this.tree[i] += height;
+            const parent = i + (i & -i);
+            if (parent <= count) this.tree[parent] += this.tree[i];
+        }
+        this.total = count * height;
+    }
     
-    const duplicateEmails = state.volunteers.filter(v => v._isDuplicate).length;
-    elements.volunteerCount.textContent = `${state.volunteers.length} volunteer${state.volunteers.length !== 1 ? 's' : ''} found`;
+    set(index, height) {
+        const delta = height - this.heights[index];
+        if (delta === 0) return;
+        this.heights[index] = height;
+        this.total += delta;
+        for (let i = index + 1; i <= this.count; i += i & -i) {
+            this.tree[i] += delta;
+        }
+    }
     
-    if (duplicateEmails > 0) {
-        elements.duplicateCount.textContent = `⚠️ ${duplicateEmails} duplicate(s)`;
-        elements.duplicateCount.style.display = 'inline';
-    } else {
-        elements.duplicateCount.style.display = 'none';
+    // Total height of the rows before `index`
+    offsetOf(index) {
+        let offset = 0;
+        for (let i = index; i > 0; i -= i & -i) {
+            offset += this.tree[i];
+        }
+        return offset;
     }
     
-    state.volunteers.forEach((volunteer, index) => {
-        const row = document.createElement('tr');
-        row.dataset.index = index;
+    // Row at `offset` pixels from the top
+    indexAt(offset) {
+        let index = 0;
+        let step = 1;
+        while (step * 2 <= this.count) step *= 2;
+        for (; step > 0; step >>= 1) {
+            const next = index + step;
+            if (next <= this.count && this.tree[next] <= offset) {
+                index = next;
+                offset -= this.tree[next];
+            }
+        }
+        return Math.min(index, Math.max(this.count - 1, 0));
+    }
+}
+
+// Keeps only the rows in (or near) the scroll viewport in the DOM. Rows are made
+// once by createRow(), filled by renderRow(row, item, index) and reused as they
+// scroll out of view; two spacers stand in for the rows that aren't rendered.
+class VirtualList {
+    constructor({ scroller, container, createRow, renderRow, createSpacer, estimatedHeight = 50, overscan = 6 }) {
+        this.scroller = scroller;
+        this.container = container;
+        this.createRow = createRow;
+        this.renderRow = renderRow;
+        this.estimatedHeight = estimatedHeight;
+        this.overscan = overscan;
+        
+        this.items = [];
+        this.heights = new HeightIndex(0, estimatedHeight);
+        this.rows = new Map();          // item index -> rendered row, in order
+        this.rowIndex = new WeakMap();  // rendered row -> item index
+        this.pool = [];
+        this.start = 0;
+        this.end = 0;
+        this.stale = false;
+        this.frame = null;
+        this.rowMargin = null;
+        
+        this.topSpacer = createSpacer();
+        this.bottomSpacer = createSpacer();
+        container.replaceChildren(this.topSpacer, this.bottomSpacer);
+        
+        this.resizeObserver = typeof ResizeObserver === 'undefined' ? null : new ResizeObserver(entries => {
+            entries.forEach(entry => this.measure(entry.target));
+            this.schedule();
+        });
+        scroller.addEventListener('scroll', () => this.schedule(), { passive: true });
+        window.addEventListener('resize', () => this.schedule());
+    }
+    
+    // Show a new list of items (keepScroll for edits that don't change what's listed)
+    setItems(items, { keepScroll = false } = {}) {
+        // Start from the average measured row height so the scrollbar is about right
+        const measured = this.heights.count ? this.heights.total / this.heights.count : 0;
+        this.items = items;
+        this.heights = new HeightIndex(items.length, measured || this.estimatedHeight);
+        
+        this.rows.forEach(row => this.release(row));
+        this.rows.clear();
+        this.start = this.end = 0;
+        if (!keepScroll) this.scroller.scrollTop = 0;
+        this.update();
+    }
+    
+    // Re-fill the rendered rows on the next frame (their items changed in place)
+    refresh() {
+        this.stale = true;
+        this.schedule();
+    }
+    
+    schedule() {
+        if (this.frame === null) {
+            this.frame = requestAnimationFrame(() => this.update());
+        }
+    }
+    
+    update() {
+        if (this.frame !== null) {
+            cancelAnimationFrame(this.frame);
+            this.frame = null;
+        }
+        
+        const count = this.items.length;
+        // Where the rows start within the scrolled content (below a table header, say)
+        const listTop = this.container === this.scroller ? 0 :
+            this.container.getBoundingClientRect().top - this.scroller.getBoundingClientRect().top + this.scroller.scrollTop;
+        const viewTop = Math.max(this.scroller.scrollTop - listTop, 0);
+        // A hidden list has no height yet; render a screenful so it's ready when shown
+        const viewHeight = this.scroller.clientHeight || window.innerHeight;
+        
+        const start = count ? Math.max(this.heights.indexAt(viewTop) - this.overscan, 0) : 0;
+        const end = count ? Math.min(this.heights.indexAt(viewTop + viewHeight) + 1 + this.overscan, count) : 0;
         
-        if (volunteer._isDuplicate) {
-            row.classList.add('duplicate-row');
+        // Recycle rows that left the range
+        this.rows.forEach((row, index) => {
+            if (index < start || index >= end) {
+                this.rows.delete(index);
+                this.release(row);
+            }
+        });
+        
+        if (this.stale) {
+            this.rows.forEach((row, index) => this.renderRow(row, this.items[index], index));
+            this.stale = false;
         }
         
-        row.innerHTML = `
-            <td><span class="editable-cell" data-field="name" data-index="${index}" contenteditable="true">${escapeHtml(volunteer.name || '-')}</span></td>
-            <td><span class="editable-cell" data-field="email" data-index="${index}" contenteditable="true">${escapeHtml(volunteer.email || '-')}</span></td>
-            <td><span class="editable-cell" data-field="phone" data-index="${index}" contenteditable="true">${escapeHtml(volunteer.phone || '-')}</span></td>
-            <td><span class="editable-cell" data-field="interests" data-index="${index}" contenteditable="true">${escapeHtml(volunteer.interests || '-')}</span></td>
-            <td><span class="editable-cell" data-field="location" data-index="${index}" contenteditable="true">${escapeHtml(volunteer.location || '-')}</span></td>
-            <td>
-                <button class="btn-icon delete-volunteer" data-index="${index}" data-tooltip="Remove contact">
-                    <svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                        <polyline points="3 6 5 6 21 6"></polyline>
-                        <path d="M19 6v14a2 2 0 0 1-2 2H7a2 2 0 0 1-2-2V6m3 0V4a2 2 0 0 1 2-2h4a2 2 0 0 1 2 2v2"></path>
-                    </svg>
-                </button>
-            </td>
-        `;
+        // New rows go above or below the ones kept in place
+        const keptStart = this.rows.size ? Math.max(start, this.start) : end;
+        const keptEnd = this.rows.size ? Math.min(end, this.end) : end;
+        const above = document.createDocumentFragment();
+        const below = document.createDocumentFragment();
+        for (let index = start; index < end; index++) {
+            if (index >= keptStart && index < keptEnd) continue;
+            const row = this.pool.pop() || this.newRow();
+            this.renderRow(row, this.items[index], index);
+            this.rows.set(index, row);
+            this.rowIndex.set(row, index);
+            (index < keptStart ? above : below).appendChild(row);
+        }
+        const firstKept = this.rows.get(keptStart);
+        this.container.insertBefore(above, firstKept && keptStart < keptEnd ? firstKept : this.bottomSpacer);
+        this.container.insertBefore(below, this.bottomSpacer);
         
-        elements.previewTbody.appendChild(row);
-    });
+        this.start = start;
+        this.end = end;
+        this.topSpacer.style.height = `${this.heights.offsetOf(start)}px`;
+        this.bottomSpacer.style.height = `${this.heights.total - this.heights.offsetOf(end)}px`;
+    }
+    
+    newRow() {
+        const row = this.createRow();
+        this.resizeObserver?.observe(row);
+        return row;
+    }
+    
+    release(row) {
+        // Commit an in-progress edit before the row is re-filled for another item
+        if (row.contains(document.activeElement)) {
+            document.activeElement.blur();
+        }
+        this.rowIndex.delete(row);
+        row.remove();
+        this.pool.push(row);
+    }
     
-    // Add inline editing listeners
-    document.querySelectorAll('.editable-cell').forEach(cell => {
-        cell.addEventListener('blur', handleCellEdit);
-        cell.addEventListener('keydown', (e) => {
-            if (e.key === 'Enter') {
+    measure(row) {
+        const index = this.rowIndex.get(row);
+        if (index === undefined || !row.isConnected) return;
+        if (this.rowMargin === null) {
+            const style = getComputedStyle(row);
+            this.rowMargin = (parseFloat(style.marginTop) || 0) + (parseFloat(style.marginBottom) || 0);
+        }
+        this.heights.set(index, row.offsetHeight + this.rowMargin);
+    }
+}
+
+// Element built from an HTML string once and cloned for every row
+function createRowTemplate(html) {
+    const template = document.createElement('template');
+    template.innerHTML = html.trim();
+    return template.content.firstElementChild;
+}
+
+// ============================================
+// PREVIEW TABLE WITH INLINE EDITING
+// ============================================
+const PREVIEW_FIELDS = ['name', 'email', 'phone', 'interests', 'location'];
+
+const PREVIEW_ROW_TEMPLATE = createRowTemplate(`
+    <tr>
+        ${PREVIEW_FIELDS.map(field => `<td><span class="editable-cell" data-field="${field}" contenteditable="true"></span></td>`).join('')}
+        <td>
+            <button class="btn-icon delete-volunteer" data-tooltip="Remove contact">
+                <svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+                    <polyline points="3 6 5 6 21 6"></polyline>
+                    <path d="M19 6v14a2 2 0 0 1-2 2H7a2 2 0 0 1-2-2V6m3 0V4a2 2 0 0 1 2-2h4a2 2 0 0 1 2 2v2"></path>
+                </svg>
+            </button>
+        </td>
+    </tr>
+`);
+
+let previewList = null;
+
+function getPreviewList() {
+    if (!previewList) {
+        previewList = new VirtualList({
+            scroller: elements.previewTbody.closest('.preview-table-wrapper'),
+            container: elements.previewTbody,
+            createRow: () => PREVIEW_ROW_TEMPLATE.cloneNode(true),
+            renderRow: renderPreviewRow,
+            createSpacer: () => createRowTemplate(`<tr class="virtual-spacer" aria-hidden="true"><td colspan="${PREVIEW_FIELDS.length + 1}"></td></tr>`),
+            estimatedHeight: 54
+        });
+        
+        // Rows are reused, so their listeners are delegated to the table body
+        elements.previewTbody.addEventListener('focusout', (e) => {
+            if (e.target.classList.contains('editable-cell')) handleCellEdit(e);
+        });
+        elements.previewTbody.addEventListener('keydown', (e) => {
+            if (e.key === 'Enter' && e.target.classList.contains('editable-cell')) {
                 e.preventDefault();
-                cell.blur();
+                e.target.blur();
             }
         });
-    });
+        elements.previewTbody.addEventListener('click', (e) => {
+            const button = e.target.closest('.delete-volunteer');
+            if (button) handleDeleteVolunteer({ currentTarget: button });
+        });
+    }
+    return previewList;
+}
+
+function renderPreviewRow(row, volunteer, index) {
+    row.dataset.index = index;
+    row.classList.toggle('duplicate-row', Boolean(volunteer._isDuplicate));
     
-    // Add delete listeners
-    document.querySelectorAll('.delete-volunteer').forEach(btn => {
-        btn.addEventListener('click', handleDeleteVolunteer);
+    const cells = row.querySelectorAll('.editable-cell');
+    PREVIEW_FIELDS.forEach((field, i) => {
+        cells[i].dataset.index = index;
+        cells[i].textContent = volunteer[field] || '-';
     });
+    row.querySelector('.delete-volunteer').dataset.index = index;
+}
+
+function populatePreviewTable({ keepScroll = false } = {}) {
+    updatePreviewSummary();
+    getPreviewList().setItems(state.volunteers, { keepScroll });
+}
+
+function updatePreviewSummary() {
+    const duplicateEmails = state.volunteers.filter(v => v._isDuplicate).length;
+    elements.volunteerCount.textContent = `${state.volunteers.length} volunteer${state.volunteers.length !== 1 ? 's' : ''} found`;
+    
+    if (duplicateEmails > 0) {
+        elements.duplicateCount.textContent = `⚠️ ${duplicateEmails} duplicate(s)`;
+        elements.duplicateCount.style.display = 'inline';
+    } else {
+        elements.duplicateCount.style.display = 'none';
+    }
+    if (elements.mergeDuplicates) {
+        elements.mergeDuplicates.style.display = duplicateEmails > 0 ? 'inline-flex' : 'none';
+    }
 }
 
 function handleCellEdit(e) {
@@ -693,10 +1110,11 @@ function handleCellEdit(e) {
             showValidationWarnings(issues);
             
             // Update cache
-            cacheVolunteerData();
+            cacheVolunteer(state.volunteers[index]);
             
-            // Refresh table to show duplicate highlighting
-            populatePreviewTable();
+            // Refresh rows to show duplicate highlighting
+            updatePreviewSummary();
+            getPreviewList().refresh();
             
             showToast('Data updated', 'success');
         }
@@ -707,17 +1125,17 @@ function handleDeleteVolunteer(e) {
     const index = parseInt(e.currentTarget.dataset.index);
     if (index >= 0 && index < state.volunteers.length) {
         const name = state.volunteers[index].name || 'Contact';
-        state.volunteers.splice(index, 1);
+        const [removed] = state.volunteers.splice(index, 1);
         
         // Revalidate
         const issues = validateVolunteerData();
         showValidationWarnings(issues);
         
         // Update cache
-        cacheVolunteerData();
+        ClientCache.delete('volunteers', [removed._key]);
         
         // Refresh table
-        populatePreviewTable();
+        populatePreviewTable({ keepScroll: true });
         
         showToast(`${name} removed`, 'info');
     }
@@ -785,15 +1203,44 @@ function selectTemplate(templateId) {
     });
 }
 
-function showTemplatePreview(templateId) {
-    const template = window.TEMPLATES.find(t => t.id === templateId);
-    if (!template) return;
-    
-    elements.modalTitle.textContent = template.name;
-    elements.previewSubjectText.textContent = template.subject;
-    elements.previewBodyText.textContent = template.body;
+// Full templates (subject + body) fetched on demand, keyed by template id
+const templateDetails = new Map();
+
+function fetchTemplate(templateId) {
+    if (!templateDetails.has(templateId)) {
+        // The version query makes the URL cacheable for as long as the catalog is unchanged
+        const url = `/templates/${encodeURIComponent(templateId)}?v=${encodeURIComponent(window.TEMPLATE_VERSION || '')}`;
+        const request = fetch(url).then(response => {
+            if (!response.ok) throw new Error(`Could not load template (${response.status})`);
+            return response.json();
+        });
+        templateDetails.set(templateId, request);
+        // Forget failures so the next preview retries
+        request.catch(() => templateDetails.delete(templateId));
+    }
+    return templateDetails.get(templateId);
+}
+
+async function showTemplatePreview(templateId) {
+    const summary = window.TEMPLATES.find(t => t.id === templateId);
+    if (!summary) return;
     
+    elements.modalTitle.textContent = summary.name;
+    elements.previewSubjectText.textContent = 'Loading...';
+    elements.previewBodyText.textContent = '';
     elements.templateModal.style.display = 'flex';
+    elements.templateModal.dataset.templateId = templateId;
+    
+    try {
+        const template = await fetchTemplate(templateId);
+        // Ignore responses for a preview the user has already moved away from
+        if (elements.templateModal.dataset.templateId !== templateId) return;
+        elements.previewSubjectText.textContent = template.subject;
+        elements.previewBodyText.textContent = template.body;
+    } catch (error) {
+        elements.previewSubjectText.textContent = '';
+        elements.previewBodyText.textContent = error.message;
+    }
 }
 
 function closeModal() {
@@ -805,6 +1252,26 @@ function toggleCustomFields() {
     elements.customFields.style.display = isVisible ? 'none' : 'block';
 }
 
+// ============================================
+// JSON REQUESTS
+// ============================================
+// Bodies at least this large are gzip-compressed before sending (message lists shrink ~50x)
+const COMPRESS_REQUEST_MIN_BYTES = 64 * 1024;
+
+async function postJson(url, payload) {
+    const json = JSON.stringify(payload);
+    const headers = { 'Content-Type': 'application/json' };
+    let body = json;
+    
+    if (json.length >= COMPRESS_REQUEST_MIN_BYTES && typeof CompressionStream !== 'undefined') {
+        const stream = new Blob([json]).stream().pipeThrough(new CompressionStream('gzip'));
+        body = await new Response(stream).blob();
+        headers['Content-Encoding'] = 'gzip';
+    }
+    
+    return fetch(url, { method: 'POST', headers, body });
+}
+
 // ============================================
 // EMAIL GENERATION
 // ============================================
@@ -821,15 +1288,14 @@ async function generateEmails() {
     elements.generateBtn.innerHTML = '<span class="btn-spinner"></span>';
     
     try {
-        const response = await fetch('/generate', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                volunteers: state.volunteers,
-                template_id: state.selectedTemplate,
-                custom_subject: elements.customSubject.value.trim(),
-                custom_body: elements.customBody.value.trim()
-            })
+        // The server keeps the roster so a reload can sync changes instead of regenerating
+        const response = await postJson('/generate', {
+            volunteers: state.volunteers,
+            template_id: state.selectedTemplate,
+            custom_subject: elements.customSubject.value.trim(),
+            custom_body: elements.customBody.value.trim(),
+            index_roster: true,
+            statuses: getKnownStatuses()
         });
         
         const data = await response.json();
@@ -840,12 +1306,11 @@ async function generateEmails() {
         
         state.generatedMessages = data.messages;
         
-        // Cache messages
-        cacheMessageData();
-        
-        // Create batch and add to tracking
+        // Create batch, cache messages and add to tracking
         const emails = state.generatedMessages.map(m => m.email);
         const batchId = createBatch(state.selectedFile?.name || 'Manual Entry', data.count, emails);
+        cacheMessageData(batchId);
+        rememberRoster(data, batchId);
         addToTracking(state.generatedMessages, batchId);
         
         // Show success with confetti!
@@ -865,86 +1330,138 @@ async function generateEmails() {
 }
 
 function displayGeneratedEmails() {
-    elements.emailCount.textContent = `${state.generatedMessages.length} email${state.generatedMessages.length !== 1 ? 's' : ''} generated`;
+    // Drop results of searches over the previous list
+    state.searchSeq++;
+    displayGeneratedEmailCount();
     renderEmailList(state.generatedMessages);
 }
 
-function renderEmailList(messages) {
-    elements.emailsList.innerHTML = '';
-    
-    if (messages.length === 0) {
-        elements.noResultsState.style.display = 'block';
-        return;
-    }
-    
-    elements.noResultsState.style.display = 'none';
-    
-    messages.forEach((msg, index) => {
-        const trackingStatus = getContactStatus(msg.email);
-        const statusBadge = getStatusBadge(trackingStatus);
-        
-        const emailItem = document.createElement('div');
-        emailItem.className = 'email-item collapsible';
-        emailItem.dataset.email = msg.email;
-        emailItem.dataset.name = msg.name;
-        emailItem.dataset.status = trackingStatus;
-        
-        emailItem.innerHTML = `
-            <button class="email-expand-toggle">
-                <div class="email-header-left">
-                    <div class="email-recipient">
-                        <div class="recipient-name">${escapeHtml(msg.name || 'Unknown')}</div>
-                        <div class="recipient-email">${escapeHtml(msg.email)}</div>
-                    </div>
-                    ${statusBadge}
+function displayGeneratedEmailCount() {
+    elements.emailCount.textContent = `${state.generatedMessages.length} email${state.generatedMessages.length !== 1 ? 's' : ''} generated`;
+}
+
+const EMAIL_ROW_TEMPLATE = createRowTemplate(`
+    <div class="email-item collapsible">
+        <button class="email-expand-toggle">
+            <div class="email-header-left">
+                <div class="email-recipient">
+                    <div class="recipient-name"></div>
+                    <div class="recipient-email"></div>
                 </div>
-                <svg xmlns="http://www.w3.org/2000/svg" width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                    <polyline points="6 9 12 15 18 9"></polyline>
-                </svg>
-            </button>
-            <div class="email-body-wrapper">
-                <div class="email-content-inner">
-                    <div class="email-actions">
-                        <select class="status-select" data-email="${escapeHtml(msg.email)}">
-                            <option value="pending" ${trackingStatus === 'pending' ? 'selected' : ''}>⏳ Pending</option>
-                            <option value="responded" ${trackingStatus === 'responded' ? 'selected' : ''}>💬 Responded</option>
-                            <option value="signed" ${trackingStatus === 'signed' ? 'selected' : ''}>✅ Signed Up</option>
-                            <option value="declined" ${trackingStatus === 'declined' ? 'selected' : ''}>❌ Declined</option>
-                        </select>
-                        <button class="copy-btn" data-index="${index}" data-tooltip="Copy email to clipboard">
-                            <svg xmlns="http://www.w3.org/2000/svg" width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                                <rect x="9" y="9" width="13" height="13" rx="2" ry="2"></rect>
-                                <path d="M5 15H4a2 2 0 0 1-2-2V4a2 2 0 0 1 2-2h9a2 2 0 0 1 2 2v1"></path>
-                            </svg>
-                            Copy
-                        </button>
-                    </div>
-                    <div class="email-subject">Subject: ${escapeHtml(msg.subject)}</div>
-                    <div class="email-body">${escapeHtml(msg.body)}</div>
+                <span class="status-badge"></span>
+                <span class="delivery-badge"></span>
+            </div>
+            <svg xmlns="http://www.w3.org/2000/svg" width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+                <polyline points="6 9 12 15 18 9"></polyline>
+            </svg>
+        </button>
+        <div class="email-body-wrapper">
+            <div class="email-content-inner">
+                <div class="email-actions">
+                    <select class="status-select">
+                        <option value="pending">⏳ Pending</option>
+                        <option value="responded">💬 Responded</option>
+                        <option value="signed">✅ Signed Up</option>
+                        <option value="declined">❌ Declined</option>
+                    </select>
+                    <button class="copy-btn" data-tooltip="Copy email to clipboard">
+                        <svg xmlns="http://www.w3.org/2000/svg" width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+                            <rect x="9" y="9" width="13" height="13" rx="2" ry="2"></rect>
+                            <path d="M5 15H4a2 2 0 0 1-2-2V4a2 2 0 0 1 2-2h9a2 2 0 0 1 2 2v1"></path>
+                        </svg>
+                        Copy
+                    </button>
                 </div>
+                <div class="email-subject"></div>
+                <div class="email-body"></div>
             </div>
-        `;
+        </div>
+    </div>
+`);
+
+const emailList = {
+    view: null,
+    statuses: {},               // email -> tracking status, loaded once per render
+    expanded: new WeakSet()     // messages whose card is open
+};
+
+function getEmailList() {
+    if (!emailList.view) {
+        emailList.view = new VirtualList({
+            scroller: elements.emailsList,
+            container: elements.emailsList,
+            createRow: () => EMAIL_ROW_TEMPLATE.cloneNode(true),
+            renderRow: renderEmailRow,
+            createSpacer: () => createRowTemplate('<div class="virtual-spacer" aria-hidden="true"></div>'),
+            estimatedHeight: 86
+        });
         
-        elements.emailsList.appendChild(emailItem);
-    });
-    
-    // Add event listeners
-    document.querySelectorAll('.email-expand-toggle').forEach(btn => {
-        btn.addEventListener('click', (e) => {
-            const item = e.target.closest('.email-item');
-            item.classList.toggle('expanded');
+        // Rows are reused, so their listeners are delegated to the list
+        elements.emailsList.addEventListener('click', (e) => {
+            const copyButton = e.target.closest('.copy-btn');
+            if (copyButton) {
+                handleCopyClick({ currentTarget: copyButton });
+                return;
+            }
+            const toggle = e.target.closest('.email-expand-toggle');
+            if (toggle) {
+                const item = toggle.closest('.email-item');
+                const msg = emailList.view.items[parseInt(item.dataset.index)];
+                item.classList.toggle('expanded');
+                if (item.classList.contains('expanded')) {
+                    emailList.expanded.add(msg);
+                } else {
+                    emailList.expanded.delete(msg);
+                }
+            }
         });
-    });
+        elements.emailsList.addEventListener('change', (e) => {
+            if (e.target.classList.contains('status-select')) handleStatusChange(e);
+        });
+    }
+    return emailList.view;
+}
+
+function renderEmailRow(row, msg, index) {
+    const status = emailList.statuses[msg.email]?.status || 'pending';
     
-    document.querySelectorAll('.copy-btn').forEach(btn => {
-        btn.addEventListener('click', handleCopyClick);
-    });
+    row.dataset.index = index;
+    row.dataset.email = msg.email;
+    row.dataset.name = msg.name;
+    row.dataset.status = status;
+    row.classList.toggle('expanded', emailList.expanded.has(msg));
     
-    document.querySelectorAll('.status-select').forEach(select => {
-        select.addEventListener('change', handleStatusChange);
-    });
+    row.querySelector('.recipient-name').textContent = msg.name || 'Unknown';
+    row.querySelector('.recipient-email').textContent = msg.email;
+    row.querySelector('.status-badge').outerHTML = getStatusBadge(status);
+    const delivery = emailList.statuses[msg.email]?.delivery;
+    const deliveryBadge = row.querySelector('.delivery-badge');
+    deliveryBadge.dataset.delivery = delivery || '';
+    deliveryBadge.textContent = DELIVERY_LABELS[delivery] || '';
+    const select = row.querySelector('.status-select');
+    select.dataset.email = msg.email;
+    select.value = status;
+    row.querySelector('.copy-btn').dataset.index = index;
+    row.querySelector('.email-subject').textContent = `Subject: ${msg.subject}`;
+    row.querySelector('.email-body').textContent = msg.body;
 }
 
+function renderEmailList(messages) {
+    elements.noResultsState.style.display = messages.length === 0 ? 'block' : 'none';
+    
+    emailList.statuses = loadTrackingData();
+    getEmailList().setItems(messages);
+}
+
+const DELIVERY_LABELS = {
+    queued: '🕓 Queued',
+    sent: '✉️ Sent',
+    failed: '⚠️ Not delivered',
+    cancelled: '⏹ Cancelled',
+    bounced: '↩️ Bounced',
+    undeliverable: '⚠️ Invalid address'
+};
+
 function getStatusBadge(status) {
     const badges = {
         pending: '<span class="status-badge status-badge-pending"><span class="status-badge-icon">⏳</span> Pending</span>',
@@ -962,6 +1479,30 @@ function filterEmails() {
     const query = elements.emailSearch.value.toLowerCase().trim();
     state.searchQuery = query;
     
+    if (state.rosterId && state.generatedMessages.length >= SERVER_SEARCH_MIN) {
+        filterEmailsOnServer(query);
+        return;
+    }
+    
+    filterEmailsLocally(query);
+}
+
+async function filterEmailsLocally(query) {
+    const seq = ++state.searchSeq;
+    
+    // Large lists are filtered and sorted by the worker, which already has a copy
+    if (state.workerMessages === state.generatedMessages && state.generatedMessages.length >= WORKER_FILTER_MIN) {
+        const messages = state.generatedMessages;
+        try {
+            const indices = await cacheWorker.call('filterSort', { query, sortBy: state.sortBy });
+            if (seq !== state.searchSeq) return;
+            renderEmailList(Array.from(indices, i => messages[i]));
+            return;
+        } catch (e) {
+            console.error('Worker filter failed:', e);
+        }
+    }
+    
     let filtered = state.generatedMessages;
     
     if (query) {
@@ -977,6 +1518,30 @@ function filterEmails() {
     renderEmailList(filtered);
 }
 
+async function filterEmailsOnServer(query) {
+    // Only the latest keystroke's results are rendered
+    const seq = ++state.searchSeq;
+    const params = `q=${encodeURIComponent(query)}&fields=name,email&limit=0&records=0&${SERVER_SORTS[state.sortBy] || 'sort=id'}`;
+    
+    try {
+        const response = await fetch(`/rosters/${state.rosterId}/search?${params}`);
+        if (!response.ok) {
+            throw new Error(`Search failed (${response.status})`);
+        }
+        const data = await response.json();
+        if (seq !== state.searchSeq) return;
+        
+        // Record ids are positions in generatedMessages
+        renderEmailList(data.ids.map(id => state.generatedMessages[id]).filter(Boolean));
+    } catch (error) {
+        if (seq !== state.searchSeq) return;
+        // Roster expired or server unavailable: search in the browser from now on
+        console.warn('Server-side search unavailable:', error);
+        forgetRoster();
+        filterEmailsLocally(query);
+    }
+}
+
 function sortEmails() {
     state.sortBy = elements.emailSort.value;
     filterEmails();
@@ -997,9 +1562,11 @@ function applySorting(messages) {
             break;
         case 'status':
             const statusOrder = { signed: 0, responded: 1, pending: 2, declined: 3 };
+            // Decrypt tracking data once, not on every comparison
+            const trackingData = loadTrackingData();
             sorted.sort((a, b) => {
-                const statusA = getContactStatus(a.email);
-                const statusB = getContactStatus(b.email);
+                const statusA = trackingData[a.email]?.status || 'pending';
+                const statusB = trackingData[b.email]?.status || 'pending';
                 return (statusOrder[statusA] || 2) - (statusOrder[statusB] || 2);
             });
             break;
@@ -1014,7 +1581,7 @@ function applySorting(messages) {
 function handleCopyClick(e) {
     const btn = e.currentTarget;
     const index = parseInt(btn.dataset.index);
-    const msg = state.generatedMessages[index];
+    const msg = getEmailList().items[index];
     
     const textToCopy = `To: ${msg.email}\nSubject: ${msg.subject}\n\n${msg.body}`;
     
@@ -1046,28 +1613,12 @@ function handleCopyClick(e) {
 // BATCH TRACKING
 // ============================================
 function loadBatches() {
-    try {
-        const encrypted = localStorage.getItem(STORAGE_KEYS.BATCHES);
-        if (encrypted) {
-            const data = Encryption.decrypt(encrypted);
-            return data || [];
-        }
-        return [];
-    } catch (e) {
-        console.error('Error loading batches:', e);
-        return [];
-    }
+    return storedData.batches;
 }
 
-function saveBatches(batches) {
-    try {
-        const encrypted = Encryption.encrypt(batches);
-        if (encrypted) {
-            localStorage.setItem(STORAGE_KEYS.BATCHES, encrypted);
-        }
-    } catch (e) {
-        console.error('Error saving batches:', e);
-    }
+function saveBatch(batch) {
+    storedData.batches.unshift(batch); // Add to beginning
+    ClientCache.put('batches', [batch]);
 }
 
 function createBatch(filename, contactCount, emails) {
@@ -1080,8 +1631,7 @@ function createBatch(filename, contactCount, emails) {
         contactCount: contactCount,
         emails: emails // Array of email addresses in this batch
     };
-    batches.unshift(newBatch); // Add to beginning
-    saveBatches(batches);
+    saveBatch(newBatch);
     return batchId;
 }
 
@@ -1094,39 +1644,56 @@ function getBatchById(batchId) {
 // RESPONSE TRACKING (ENCRYPTED)
 // ============================================
 function loadTrackingData() {
-    try {
-        const encrypted = localStorage.getItem(STORAGE_KEYS.TRACKING);
-        if (encrypted) {
-            const data = Encryption.decrypt(encrypted);
-            return data || {};
-        }
-        return {};
-    } catch (e) {
-        console.error('Error loading tracking data:', e);
-        return {};
+    return storedData.tracking;
+}
+
+// Save the given contacts (all of them when no emails are given)
+function saveTrackingData(data, emails = null) {
+    // The worker keeps a copy for status sorting
+    storedData.tracking = data;
+    if (emails === null) {
+        ClientCache.replace('tracking', Object.values(data));
+    } else {
+        ClientCache.put('tracking', emails.map(email => data[email]).filter(Boolean));
     }
 }
 
-function saveTrackingData(data) {
-    try {
-        const encrypted = Encryption.encrypt(data);
-        if (encrypted) {
-            localStorage.setItem(STORAGE_KEYS.TRACKING, encrypted);
-        }
-    } catch (e) {
-        console.error('Error saving tracking data:', e);
+// Same normalization as the server's dedup email key: case, +tags and Gmail dots don't count
+function emailKey(email) {
+    const address = (email || '').trim().toLowerCase();
+    const at = address.lastIndexOf('@');
+    if (at < 1) return address;
+    let local = address.slice(0, at).split('+')[0];
+    let domain = address.slice(at + 1);
+    if (domain === 'gmail.com' || domain === 'googlemail.com') {
+        domain = 'gmail.com';
+        local = local.replaceAll('.', '');
     }
+    return `${local}@${domain}`;
 }
 
 function addToTracking(messages, batchId = null) {
     const trackingData = loadTrackingData();
     const now = new Date().toISOString();
+    const added = [];
+    
+    // Contacts already tracked under another form of their address, or merged into another contact
+    const trackedKeys = new Set();
+    Object.values(trackingData).forEach(contact => {
+        [contact.email, ...(contact.merged_emails || [])].forEach(email => trackedKeys.add(emailKey(email)));
+    });
+    const phones = {};
+    state.volunteers.forEach(v => { if (v.email && v.phone) phones[v.email] = v.phone; });
     
     messages.forEach(msg => {
-        if (msg.email && !trackingData[msg.email]) {
+        const key = emailKey(msg.email);
+        if (msg.email && !trackingData[msg.email] && !trackedKeys.has(key)) {
+            added.push(msg.email);
+            trackedKeys.add(key);
             trackingData[msg.email] = {
                 name: msg.name || 'Unknown',
                 email: msg.email,
+                phone: phones[msg.email] || '',
                 status: 'pending',
                 dateAdded: now,
                 lastUpdated: now,
@@ -1135,10 +1702,149 @@ function addToTracking(messages, batchId = null) {
         }
     });
     
-    saveTrackingData(trackingData);
+    saveTrackingData(trackingData, added);
     updateTrackingDisplay();
 }
 
+function getKnownStatuses() {
+    // Statuses other than the default, to seed a server-side roster
+    const statuses = {};
+    Object.values(loadTrackingData()).forEach(contact => {
+        if (contact.status && contact.status !== 'pending') {
+            statuses[contact.email] = contact.status;
+        }
+    });
+    return statuses;
+}
+
+function syncRosterStatus(email, status) {
+    if (!state.rosterId) return;
+    
+    const updates = [];
+    state.generatedMessages.forEach((msg, id) => {
+        if (msg.email === email) updates.push({ id, status });
+    });
+    if (updates.length === 0) return;
+    
+    const cachedVersion = state.rosterSync?.version;
+    fetch(`/rosters/${state.rosterId}/records`, {
+        method: 'PATCH',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ updates })
+    }).then(async response => {
+        if (response.status === 404) {
+            forgetRoster();
+            return;
+        }
+        const data = await response.json();
+        // Our edit is the only change since the cached version: no need to sync it back
+        if (response.ok && state.rosterSync && data.version === cachedVersion + 1) {
+            state.rosterSync.version = data.version;
+            saveRosterMeta();
+        }
+    }).catch(e => console.warn('Could not update the server roster:', e));
+}
+
+// ============================================
+// ROSTER SYNC
+// ============================================
+// The server keeps generated rosters with a version per record and per message.
+// A reload restores everything from the client cache, then asks only for what
+// changed since the cached versions (usually an empty 304).
+function rememberRoster(data, batchId) {
+    if (!data.roster_id) {
+        forgetRoster();
+        return;
+    }
+    state.rosterId = data.roster_id;
+    state.rosterSync = {
+        version: data.roster_version,
+        messageVersion: data.message_version,
+        messageSet: data.message_set,
+        batchId
+    };
+    saveRosterMeta();
+}
+
+function forgetRoster() {
+    state.rosterId = null;
+    state.rosterSync = null;
+    ClientCache.delete('meta', ['roster']);
+}
+
+function saveRosterMeta() {
+    ClientCache.put('meta', [{ key: 'roster', id: state.rosterId, ...state.rosterSync }]);
+}
+
+async function syncRoster() {
+    if (!state.rosterId || !state.rosterSync || state.generatedMessages.length === 0) return;
+    
+    const params = new URLSearchParams({
+        version: state.rosterSync.version,
+        message_version: state.rosterSync.messageVersion,
+        message_set: state.rosterSync.messageSet || ''
+    });
+    try {
+        const response = await fetch(`/rosters/${state.rosterId}/sync?${params}`);
+        if (response.status === 304) return;
+        if (response.status === 404) {
+            // The server no longer has it (expired or restarted); the cache still works
+            forgetRoster();
+            return;
+        }
+        if (!response.ok) {
+            throw new Error(`Sync failed (${response.status})`);
+        }
+        applyRosterChanges(await response.json());
+    } catch (e) {
+        console.warn('Roster sync failed:', e);
+    }
+}
+
+function applyRosterChanges(data) {
+    // Statuses changed on the server since the cached version
+    const trackingData = loadTrackingData();
+    const now = new Date().toISOString();
+    const changedEmails = [];
+    data.records.forEach(record => {
+        const contact = trackingData[record.email];
+        if (!contact) return;
+        const statusChanged = contact.status !== record.status;
+        // Delivery outcomes of server-side sends
+        const deliveryChanged = record.delivery !== undefined && contact.delivery !== record.delivery;
+        if (statusChanged || deliveryChanged) {
+            contact.status = record.status;
+            if (deliveryChanged) contact.delivery = record.delivery;
+            if (statusChanged) contact.lastUpdated = now;
+            changedEmails.push(record.email);
+        }
+    });
+    if (changedEmails.length > 0) {
+        saveTrackingData(trackingData, changedEmails);
+        updateTrackingDisplay();
+    }
+    
+    // Regenerated messages replace the cached ones at the same position
+    const messages = data.messages
+        .filter(({ id }) => id < state.generatedMessages.length)
+        .map(({ id, ...msg }) => ({ ...msg, _key: id }));
+    messages.forEach(msg => { state.generatedMessages[msg._key] = msg; });
+    if (messages.length > 0) {
+        ClientCache.put('messages', messages, { batchId: state.rosterSync.batchId });
+    }
+    
+    state.rosterSync.version = data.version;
+    state.rosterSync.messageVersion = data.message_version;
+    state.rosterSync.messageSet = data.message_set;
+    saveRosterMeta();
+    
+    if (changedEmails.length > 0 || messages.length > 0) {
+        emailList.statuses = trackingData;
+        emailList.view?.refresh();
+        showToast(`Synced ${changedEmails.length + messages.length} change(s) from the server`, 'info');
+    }
+}
+
 function getContactStatus(email) {
     const trackingData = loadTrackingData();
     return trackingData[email]?.status || 'pending';
@@ -1152,17 +1858,14 @@ function handleStatusChange(e) {
     if (trackingData[email]) {
         trackingData[email].status = newStatus;
         trackingData[email].lastUpdated = new Date().toISOString();
-        saveTrackingData(trackingData);
+        saveTrackingData(trackingData, [email]);
         updateTrackingDisplay();
+        syncRosterStatus(email, newStatus);
         
-        // Update badge in the email item
-        const emailItem = document.querySelector(`.email-item[data-email="${email}"]`);
-        if (emailItem) {
-            const badge = emailItem.querySelector('.status-badge');
-            if (badge) {
-                badge.outerHTML = getStatusBadge(newStatus);
-            }
-            emailItem.dataset.status = newStatus;
+        // Update badges in the email list
+        if (emailList.view) {
+            emailList.statuses = trackingData;
+            emailList.view.refresh();
         }
         
         showToast(`Status updated to ${newStatus}`, 'success');
@@ -1325,7 +2028,8 @@ function formatDateTime(isoString) {
 
 function clearTrackingData() {
     if (confirm('Are you sure you want to clear all tracking data? This cannot be undone.')) {
-        localStorage.removeItem(STORAGE_KEYS.TRACKING);
+        storedData.tracking = {};
+        ClientCache.clear('tracking');
         updateTrackingDisplay();
         renderTrackingList('all');
         showToast('Tracking data cleared', 'info');
@@ -1352,6 +2056,120 @@ function exportTrackingData() {
     showToast('Tracking data exported!', 'success');
 }
 
+async function mergeTrackingDuplicates() {
+    const trackingData = loadTrackingData();
+    const contacts = Object.values(trackingData);
+    if (contacts.length < 2) {
+        showToast('No duplicate contacts found', 'info');
+        return;
+    }
+    
+    const button = elements.mergeTracking;
+    button.disabled = true;
+    try {
+        const response = await postJson('/dedup', { records: contacts });
+        const data = await response.json();
+        if (!response.ok) throw new Error(data.error || 'Could not merge duplicates');
+        if (data.removed === 0) {
+            showToast('No duplicate contacts found', 'info');
+            return;
+        }
+        
+        // Each group is kept under its first contact, with the most decisive status
+        const now = new Date().toISOString();
+        const merged = {};
+        data.records.forEach(contact => { merged[contact.email] = contact; });
+        const changed = data.groups.map(group => contacts[group.ids[0]].email);
+        changed.forEach(email => { merged[email].lastUpdated = now; });
+        ClientCache.delete('tracking', Object.keys(trackingData).filter(email => !merged[email]));
+        saveTrackingData(merged, changed);
+        
+        updateTrackingDisplay();
+        renderTrackingList(currentStatusFilter, currentBatchFilter);
+        if (emailList.view) {
+            emailList.statuses = merged;
+            emailList.view.refresh();
+        }
+        showToast(`Merged ${data.removed} duplicate contact(s) into ${data.groups.length}`, 'success');
+    } catch (e) {
+        showToast(e.message, 'error');
+    } finally {
+        button.disabled = false;
+    }
+}
+
+// Statuses a reply may replace (same rule as the server's mail ingestion)
+const REPLY_STATUS_UPGRADES = {
+    responded: ['pending'],
+    declined: ['pending', 'responded']
+};
+
+async function checkMail() {
+    const button = elements.checkMail;
+    button.disabled = true;
+    try {
+        const response = await fetch('/ingest/mail', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ emails: Object.keys(loadTrackingData()) })
+        });
+        const data = await response.json();
+        if (!response.ok) throw new Error(data.error || 'Could not read the mailbox');
+        
+        const changed = applyMailChanges(data.changes);
+        const totals = data.mailboxes.reduce((sum, mailbox) => ({
+            replies: sum.replies + mailbox.replies,
+            bounces: sum.bounces + mailbox.bounces
+        }), { replies: 0, bounces: 0 });
+        showToast(
+            `${totals.replies} new repl${totals.replies === 1 ? 'y' : 'ies'}, ${totals.bounces} bounce${totals.bounces === 1 ? '' : 's'} — ${changed} contact${changed === 1 ? '' : 's'} updated`,
+            changed ? 'success' : 'info'
+        );
+        if (state.rosterId) syncRoster();
+    } catch (e) {
+        showToast(e.message, 'error');
+    } finally {
+        button.disabled = false;
+    }
+}
+
+function applyMailChanges(changes) {
+    // Tracking data is keyed by the address as entered; ingested addresses are lowercased
+    const trackingData = loadTrackingData();
+    const keys = {};
+    Object.keys(trackingData).forEach(email => { keys[email.toLowerCase()] = email; });
+    
+    const now = new Date().toISOString();
+    const changedEmails = [];
+    changes.forEach(change => {
+        const email = keys[change.email];
+        const contact = email && trackingData[email];
+        if (!contact) return;
+        let changed = false;
+        if (change.status && REPLY_STATUS_UPGRADES[change.status]?.includes(contact.status || 'pending')) {
+            contact.status = change.status;
+            contact.lastUpdated = now;
+            changed = true;
+        }
+        if (change.delivery && contact.delivery !== change.delivery) {
+            contact.delivery = change.delivery;
+            changed = true;
+        }
+        if (changed) changedEmails.push(email);
+    });
+    
+    if (changedEmails.length > 0) {
+        saveTrackingData(trackingData, changedEmails);
+        updateTrackingDisplay();
+        renderTrackingList(currentStatusFilter, currentBatchFilter);
+        if (emailList.view) {
+            emailList.statuses = trackingData;
+            emailList.view.refresh();
+        }
+    }
+    return changedEmails.length;
+}
+
 // ============================================
 // DASHBOARD
 // ============================================
@@ -1469,58 +2287,127 @@ function closeHelpModal() {
 // ============================================
 // DOWNLOADS
 // ============================================
-async function downloadCsv() {
+// Export formats: button, file name when the server sends a single file, and whether
+// the split settings apply (CSV and ZIP come back as a ZIP of parts when split)
+const EXPORTS = {
+    csv: { button: 'downloadCsv', filename: 'hope_recruitment_emails.csv', label: 'CSV', split: true },
+    zip: { button: 'downloadZip', filename: 'hope_recruitment_emails.zip', label: 'ZIP', split: true },
+    mbox: { button: 'downloadMbox', filename: 'hope_recruitment_emails.mbox', label: 'Email files', split: false },
+    eml: { button: 'downloadEml', filename: 'hope_recruitment_emails_eml.zip', label: 'Email files', split: false }
+};
+
+// Rows and bytes per part from the split settings; blank fields use the server's defaults
+function exportLimits() {
+    const limits = {};
+    const rows = parseInt(elements.splitRows?.value, 10);
+    const megabytes = parseFloat(elements.splitMegabytes?.value);
+    if (rows >= 0) limits.max_rows = rows;
+    if (megabytes >= 0) limits.max_bytes = Math.floor(megabytes * 1024 * 1024);
+    return limits;
+}
+
+function responseFilename(response, fallback) {
+    const match = /filename="?([^";]+)"?/.exec(response.headers.get('Content-Disposition') || '');
+    return match ? match[1] : fallback;
+}
+
+async function downloadExport(exportFormat) {
     if (state.generatedMessages.length === 0) return;
+    const { button, filename, label, split } = EXPORTS[exportFormat];
+    const limits = split ? exportLimits() : {};
     
-    elements.downloadCsv.classList.add('loading');
-    elements.downloadCsv.disabled = true;
+    elements[button].classList.add('loading');
+    elements[button].disabled = true;
     
     try {
-        const response = await fetch('/download/csv', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ messages: state.generatedMessages })
-        });
+        // The server streams its own copy of the roster; post the messages if it has expired
+        let response = state.rosterId
+            ? await fetch(`/rosters/${state.rosterId}/download/${exportFormat}?${new URLSearchParams(limits)}`)
+            : null;
+        if (!response || response.status === 404 || response.status === 409) {
+            response = await postJson(`/download/${exportFormat}`, { messages: state.generatedMessages, ...limits });
+        }
         
-        if (!response.ok) throw new Error('Failed to download CSV');
+        if (!response.ok) {
+            const error = await response.json().catch(() => ({}));
+            throw new Error(error.error || `Failed to download ${label}`);
+        }
         
         const blob = await response.blob();
-        downloadBlob(blob, 'hope_recruitment_emails.csv');
-        showToast('CSV downloaded successfully!', 'success');
+        downloadBlob(blob, responseFilename(response, filename));
+        // Mail exports leave out messages whose address can't go in an email header
+        const skipped = parseInt(response.headers.get('X-Skipped-Messages') || '0', 10);
+        if (skipped > 0) {
+            showToast(`${label} downloaded without ${skipped} message${skipped !== 1 ? 's' : ''} with an invalid email address`, 'warning');
+        } else {
+            showToast(`${label} downloaded successfully!`, 'success');
+        }
         
     } catch (error) {
         showToast(error.message, 'error');
     } finally {
-        elements.downloadCsv.classList.remove('loading');
-        elements.downloadCsv.disabled = false;
+        elements[button].classList.remove('loading');
+        elements[button].disabled = false;
     }
 }
 
-async function downloadZip() {
+// ============================================
+// SENDING
+// ============================================
+const SEND_POLL_MS = 1000;
+const SEND_WAITING_LABELS = { sending: 'Sending', scheduled: 'Scheduled', paused: 'Paused' };
+
+async function sendEmails() {
     if (state.generatedMessages.length === 0) return;
+    if (!state.rosterId) {
+        showToast('Generate the emails again to send them from the server', 'error');
+        return;
+    }
+    
+    const trackingData = loadTrackingData();
+    const unsent = state.generatedMessages.filter(msg => msg.email && trackingData[msg.email]?.delivery !== 'sent').length;
+    if (unsent === 0) {
+        showToast('Every email has already been sent', 'info');
+        return;
+    }
+    if (!confirm(`Send ${unsent} email${unsent !== 1 ? 's' : ''} now?`)) return;
     
-    elements.downloadZip.classList.add('loading');
-    elements.downloadZip.disabled = true;
+    elements.sendEmails.classList.add('loading');
+    elements.sendEmails.disabled = true;
     
     try {
-        const response = await fetch('/download/zip', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ messages: state.generatedMessages })
-        });
-        
-        if (!response.ok) throw new Error('Failed to download ZIP');
-        
-        const blob = await response.blob();
-        downloadBlob(blob, 'hope_recruitment_emails.zip');
-        showToast('ZIP downloaded successfully!', 'success');
+        const response = await postJson(`/rosters/${state.rosterId}/send`, {});
+        const job = await response.json();
+        if (response.status === 404) {
+            forgetRoster();
+            throw new Error('The server no longer has these emails; generate them again to send');
+        }
+        // 409 while a job is already running: follow that one
+        if (!response.ok && !job.job_id) throw new Error(job.error || 'Failed to start sending');
         
+        const result = await watchSendJob(job);
+        await syncRoster();
+        showToast(`${result.sent} email${result.sent !== 1 ? 's' : ''} sent` +
+            (result.failed ? `, ${result.failed} not delivered` : ''), result.failed ? 'warning' : 'success');
     } catch (error) {
         showToast(error.message, 'error');
     } finally {
-        elements.downloadZip.classList.remove('loading');
-        elements.downloadZip.disabled = false;
+        elements.sendEmails.classList.remove('loading');
+        elements.sendEmails.disabled = false;
+        displayGeneratedEmailCount();
+    }
+}
+
+async function watchSendJob(job) {
+    // Scheduled and paused jobs (see POST /send-jobs/<id>/pause) still have mail to send
+    while (SEND_WAITING_LABELS[job.status]) {
+        elements.emailCount.textContent = `${SEND_WAITING_LABELS[job.status]}… ${job.total - job.queued} of ${job.total}`;
+        await new Promise(resolve => setTimeout(resolve, SEND_POLL_MS));
+        const response = await fetch(`/send-jobs/${job.job_id}`);
+        if (!response.ok) throw new Error('Lost track of the send job');
+        job = await response.json();
     }
+    return job;
 }
 
 function downloadBlob(blob, filename) {
@@ -1561,6 +2448,7 @@ function goToStep(step) {
 function resetApp() {
     state.volunteers = [];
     state.generatedMessages = [];
+    forgetRoster();
     state.selectedTemplate = 'general';
     state.searchQuery = '';
     state.sortBy = 'name-asc';
@@ -1573,8 +2461,8 @@ function resetApp() {
     elements.filePreview.style.display = 'none';
     
     // Clear caches
-    localStorage.removeItem(STORAGE_KEYS.VOLUNTEERS);
-    localStorage.removeItem(STORAGE_KEYS.MESSAGES);
+    ClientCache.clear('volunteers');
+    ClientCache.clear('messages');
     
     // Reset template selection
     selectTemplate('general');
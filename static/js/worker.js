@@ -0,0 +1,336 @@
+/**
+ * HOPE Smart Recruitment Messenger (HSRM) - Background Worker
+ * Owns the client cache (IndexedDB, one object store per entity) and filters
+ * and sorts large message lists, so the page's main thread only renders. Works
+ * on typed arrays and hands filter results back as transferable buffers.
+ *
+ * Also loads as a plain script where workers aren't available; it then exposes
+ * the same handlers as self.HSRMWorker.
+ */
+
+// ============================================
+// RECORD CODEC
+// ============================================
+// Record bodies are stored as UTF-8 JSON XORed with the key (obfuscated at rest,
+// like the old localStorage cache); only indexed fields are stored in the clear
+const CODEC_KEY = new TextEncoder().encode('HSRM_2024_HOPE_KEY');
+const BASE64_LOOKUP = new Uint8Array(256).fill(255);
+new TextEncoder().encode('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/')
+    .forEach((code, value) => { BASE64_LOOKUP[code] = value; });
+const BASE64_PAD = 61; // '='
+
+const textEncoder = new TextEncoder();
+const textDecoder = new TextDecoder();
+
+function xorWithKey(bytes) {
+    const keyLength = CODEC_KEY.length;
+    for (let i = 0; i < bytes.length; i++) {
+        bytes[i] ^= CODEC_KEY[i % keyLength];
+    }
+    return bytes;
+}
+
+function sealValue(value) {
+    return xorWithKey(textEncoder.encode(JSON.stringify(value)));
+}
+
+function openValue(bytes) {
+    return JSON.parse(textDecoder.decode(xorWithKey(new Uint8Array(bytes))));
+}
+
+function base64Decode(ascii) {
+    let length = ascii.length;
+    while (length && (ascii[length - 1] === BASE64_PAD || BASE64_LOOKUP[ascii[length - 1]] === 255)) length--;
+    const out = new Uint8Array(Math.floor(length * 3 / 4));
+    let o = 0;
+    let bits = 0;
+    let buffer = 0;
+    for (let i = 0; i < length; i++) {
+        const value = BASE64_LOOKUP[ascii[i]];
+        if (value === 255) throw new Error('Invalid cache data');
+        buffer = (buffer << 6) | value;
+        bits += 6;
+        if (bits >= 8) {
+            bits -= 8;
+            out[o++] = (buffer >> bits) & 255;
+        }
+    }
+    return out.subarray(0, o);
+}
+
+// Old localStorage blobs: base64( base64(utf-8 JSON) XOR key )
+function decodeLegacyValue(text) {
+    const inner = xorWithKey(base64Decode(textEncoder.encode(text)));
+    return JSON.parse(textDecoder.decode(base64Decode(inner)));
+}
+
+// ============================================
+// CLIENT CACHE (IndexedDB)
+// ============================================
+const DB_NAME = 'hsrm-cache';
+const DB_VERSION = 2;
+
+// Object stores: key path and indexed fields (copied out of the sealed body)
+const STORES = {
+    volunteers: { keyPath: '_key', indexes: ['email'] },
+    messages: { keyPath: '_key', indexes: ['email', 'batchId'] },
+    tracking: { keyPath: 'email', indexes: ['status', 'batchId'] },
+    batches: { keyPath: 'id', indexes: [] },
+    // Small named records, e.g. the server roster the cached messages belong to (v2)
+    meta: { keyPath: 'key', indexes: [] }
+};
+
+let dbPromise = null;
+
+function requestPromise(request) {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+function transactionDone(tx) {
+    return new Promise((resolve, reject) => {
+        tx.oncomplete = () => resolve();
+        tx.onerror = () => reject(tx.error);
+        tx.onabort = () => reject(tx.error || new Error('Cache transaction aborted'));
+    });
+}
+
+function openDatabase() {
+    if (!dbPromise) {
+        dbPromise = new Promise((resolve, reject) => {
+            if (typeof indexedDB === 'undefined') {
+                reject(new Error('IndexedDB is not available'));
+                return;
+            }
+            const request = indexedDB.open(DB_NAME, DB_VERSION);
+            request.onupgradeneeded = () => {
+                const db = request.result;
+                Object.entries(STORES).forEach(([name, { keyPath, indexes }]) => {
+                    if (db.objectStoreNames.contains(name)) return;
+                    const store = db.createObjectStore(name, { keyPath });
+                    indexes.forEach(field => store.createIndex(field, field));
+                });
+            };
+            request.onsuccess = () => {
+                const db = request.result;
+                // Step aside when a newer page version upgrades the schema
+                db.onversionchange = () => db.close();
+                resolve(db);
+            };
+            request.onerror = () => reject(request.error);
+            request.onblocked = () => reject(new Error('Cache database is blocked by another tab'));
+        });
+    }
+    return dbPromise;
+}
+
+function sealRecord(storeName, record, fields) {
+    const { keyPath, indexes } = STORES[storeName];
+    const sealed = { [keyPath]: record[keyPath], data: sealValue(record) };
+    indexes.forEach(field => {
+        const value = fields?.[field] ?? record[field];
+        // IndexedDB skips records whose index value isn't a valid key
+        if (value !== undefined && value !== null) sealed[field] = value;
+    });
+    return sealed;
+}
+
+function openRecords(sealed) {
+    return sealed.map(record => openValue(record.data));
+}
+
+// Apply write operations in one transaction:
+// { type: 'put' | 'replace', store, records, fields? }, { type: 'delete', store, keys }, { type: 'clear', store }
+async function applyOps(ops) {
+    const db = await openDatabase();
+    const tx = db.transaction([...new Set(ops.map(op => op.store))], 'readwrite');
+    const done = transactionDone(tx);
+    ops.forEach(op => {
+        const store = tx.objectStore(op.store);
+        if (op.type === 'clear' || op.type === 'replace') store.clear();
+        if (op.type === 'delete') op.keys.forEach(key => store.delete(key));
+        if (op.type === 'put' || op.type === 'replace') {
+            op.records.forEach(record => store.put(sealRecord(op.store, record, op.fields)));
+        }
+    });
+    await done;
+}
+
+async function readStore(db, storeName) {
+    const tx = db.transaction(storeName, 'readonly');
+    return openRecords(await requestPromise(tx.objectStore(storeName).getAll()));
+}
+
+// Old single-key localStorage blobs (decoded here) -> write operations
+function legacyOps(legacy) {
+    const ops = [];
+    const read = (name) => {
+        if (!legacy[name]) return null;
+        try {
+            return decodeLegacyValue(legacy[name]);
+        } catch (e) {
+            return null;
+        }
+    };
+    const keyed = (records) => records.map((record, i) => ({ ...record, _key: i }));
+
+    const volunteers = read('volunteers');
+    if (volunteers?.volunteers) ops.push({ type: 'replace', store: 'volunteers', records: keyed(volunteers.volunteers) });
+    const messages = read('messages');
+    if (messages?.messages) ops.push({ type: 'replace', store: 'messages', records: keyed(messages.messages) });
+    const tracking = read('tracking');
+    if (tracking) ops.push({ type: 'put', store: 'tracking', records: Object.values(tracking).filter(c => c && c.email) });
+    const batches = read('batches');
+    if (Array.isArray(batches)) ops.push({ type: 'put', store: 'batches', records: batches.filter(b => b && b.id) });
+    return ops;
+}
+
+// ============================================
+// RETAINED DATA & FILTER/SORT
+// ============================================
+// Copies of the current messages and tracking data, kept when they're cached so
+// filter/sort requests only need to send the query
+const retained = {
+    messages: [],
+    names: [],
+    emails: [],
+    tracking: {}
+};
+
+const STATUS_ORDER = { signed: 0, responded: 1, pending: 2, declined: 3 };
+const collator = new Intl.Collator();
+
+function retainMessages(messages) {
+    retained.messages = messages;
+    retained.names = messages.map(msg => msg.name || '');
+    retained.emails = messages.map(msg => msg.email || '');
+}
+
+// Keep the retained copies in step with cache writes
+function retainOps(ops) {
+    ops.forEach(op => {
+        if (op.store === 'messages' && (op.type === 'replace' || op.type === 'clear')) {
+            retainMessages(op.type === 'replace' ? op.records : []);
+        } else if (op.store === 'messages' && op.type === 'put') {
+            op.records.forEach(msg => {
+                retained.messages[msg._key] = msg;
+                retained.names[msg._key] = msg.name || '';
+                retained.emails[msg._key] = msg.email || '';
+            });
+        } else if (op.store === 'tracking') {
+            if (op.type === 'clear') retained.tracking = {};
+            if (op.type === 'delete') op.keys.forEach(email => { delete retained.tracking[email]; });
+            if (op.type === 'put' || op.type === 'replace') {
+                if (op.type === 'replace') retained.tracking = {};
+                op.records.forEach(contact => { retained.tracking[contact.email] = contact; });
+            }
+        }
+    });
+}
+
+function filterSort({ query, sortBy }) {
+    const { names, emails, tracking } = retained;
+    query = (query || '').toLowerCase();
+
+    let indices = [];
+    for (let i = 0; i < names.length; i++) {
+        if (!query || names[i].toLowerCase().includes(query) || emails[i].toLowerCase().includes(query)) {
+            indices.push(i);
+        }
+    }
+
+    switch (sortBy) {
+        case 'name-asc':
+            indices.sort((a, b) => collator.compare(names[a], names[b]));
+            break;
+        case 'name-desc':
+            indices.sort((a, b) => collator.compare(names[b], names[a]));
+            break;
+        case 'email-asc':
+            indices.sort((a, b) => collator.compare(emails[a], emails[b]));
+            break;
+        case 'status': {
+            const ranks = new Uint8Array(names.length);
+            indices.forEach(i => {
+                ranks[i] = STATUS_ORDER[tracking[emails[i]]?.status] ?? 2;
+            });
+            indices.sort((a, b) => ranks[a] - ranks[b]);
+            break;
+        }
+    }
+
+    indices = Int32Array.from(indices);
+    return { result: indices, transfer: [indices.buffer] };
+}
+
+// ============================================
+// MESSAGE HANDLING
+// ============================================
+const handlers = {
+    // { legacy?: {volunteers, messages, tracking, batches} } -> everything cached.
+    // Legacy localStorage strings are migrated into IndexedDB first.
+    async cacheLoad({ legacy }) {
+        const ops = legacy ? legacyOps(legacy) : [];
+        if (ops.length) await applyOps(ops);
+
+        const db = await openDatabase();
+        const [volunteers, messages, contacts, batches, metaRecords] = await Promise.all(
+            ['volunteers', 'messages', 'tracking', 'batches', 'meta'].map(name => readStore(db, name))
+        );
+        const tracking = {};
+        contacts.forEach(contact => { tracking[contact.email] = contact; });
+        const meta = {};
+        metaRecords.forEach(record => { meta[record.key] = record; });
+        batches.sort((a, b) => (b.timestamp || '').localeCompare(a.timestamp || ''));
+
+        retainMessages(messages);
+        retained.tracking = tracking;
+        return { result: { volunteers, messages, tracking, batches, meta, migrated: ops.length > 0 } };
+    },
+
+    // { stores } -> tracking and/or batches, re-read after another tab changed them
+    async cacheReload({ stores }) {
+        const db = await openDatabase();
+        const result = {};
+        if (stores.includes('tracking')) {
+            result.tracking = {};
+            (await readStore(db, 'tracking')).forEach(contact => { result.tracking[contact.email] = contact; });
+            retained.tracking = result.tracking;
+        }
+        if (stores.includes('batches')) {
+            result.batches = (await readStore(db, 'batches'))
+                .sort((a, b) => (b.timestamp || '').localeCompare(a.timestamp || ''));
+        }
+        return { result };
+    },
+
+    // { ops } -> applied in one transaction (see applyOps)
+    async cacheWrite({ ops }) {
+        retainOps(ops);
+        await applyOps(ops);
+        return { result: ops.length };
+    },
+
+    // { query, sortBy } -> Int32Array of indices into the retained messages
+    filterSort
+};
+
+function handle(type, payload) {
+    const handler = handlers[type];
+    if (!handler) throw new Error(`Unknown worker request: ${type}`);
+    return handler(payload || {});
+}
+
+if (typeof WorkerGlobalScope !== 'undefined' && self instanceof WorkerGlobalScope) {
+    self.onmessage = (e) => {
+        const { id, type, payload } = e.data;
+        Promise.resolve()
+            .then(() => handle(type, payload))
+            .then(({ result, transfer = [] }) => self.postMessage({ id, result }, transfer))
+            .catch(error => self.postMessage({ id, error: error.message }));
+    };
+} else {
+    self.HSRMWorker = { handle };
+}
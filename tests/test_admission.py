@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+
+from app import create_app
+from utils.admission import AdmissionLimiter, AdmissionRejected, weight_for_bytes, weight_for_rows
+
+
+def test_weights():
+    assert weight_for_bytes(0) == 1
+    assert weight_for_bytes(3 * 1024 * 1024 + 1) == 4
+    assert weight_for_rows(None) == 1
+    assert weight_for_rows(2500) == 3
+
+
+def test_limiter_queues_then_rejects():
+    limiter = AdmissionLimiter('test', capacity=2, max_queue=1, queue_timeout=0.05)
+    assert limiter.acquire(5) == 2
+    with pytest.raises(AdmissionRejected) as raised:
+        limiter.acquire(1)
+    assert raised.value.status == 503
+
+    limiter.max_queue = 0
+    with pytest.raises(AdmissionRejected) as raised:
+        limiter.acquire(1)
+    assert raised.value.status == 429
+
+    limiter.release(2)
+    with limiter.admit(1):
+        assert limiter.in_flight == 1
+    assert limiter.in_flight == 0
+
+
+def test_waiter_is_admitted_when_room_frees_up():
+    limiter = AdmissionLimiter('test', capacity=1, queue_timeout=5)
+    limiter.acquire(1)
+    admitted = threading.Event()
+    waiter = threading.Thread(target=lambda: (limiter.acquire(1), admitted.set()))
+    waiter.start()
+    assert not admitted.wait(0.05)
+    limiter.release(1)
+    waiter.join(5)
+    assert admitted.is_set() and limiter.in_flight == 1
+
+
+@pytest.fixture
+def app():
+    return create_app({'USE_BUILT_ASSETS': False})
+
+
+def messages(count):
+    return [{'name': f'Volunteer {i}', 'email': f'v{i}@example.org', 'subject': 'Hi', 'body': 'Hello'}
+            for i in range(count)]
+
+
+def test_request_is_weighed_before_its_body_is_decoded(app, monkeypatch):
+    limiter = app.extensions['hsrm_admission']['generate']
+    decoded_after = []
+    acquire = limiter.acquire
+    monkeypatch.setattr(limiter, 'acquire', lambda weight: decoded_after.append(weight) or acquire(weight))
+
+    from flask import Request
+    get_json = Request.get_json
+
+    def checked_get_json(self, *args, **kwargs):
+        assert decoded_after, 'body decoded before admission'
+        return get_json(self, *args, **kwargs)
+    monkeypatch.setattr(Request, 'get_json', checked_get_json)
+
+    response = app.test_client().post('/generate', json={'volunteers': [{'name': 'A B', 'email': 'a@b.org'}]})
+    assert response.status_code == 200
+    assert decoded_after == [1]
+
+
+def test_streamed_export_holds_its_slot_until_sent(app):
+    limiter = app.extensions['hsrm_admission']['generate']
+    response = app.test_client().post('/download/mbox', json={'messages': messages(50)}, buffered=False)
+    assert response.status_code == 200
+    assert limiter.in_flight == 1
+    assert response.get_data().count(b'\nFrom ') == 49
+    response.close()
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.parametrize('path', ['/download/csv', '/download/zip', '/download/eml'])
+def test_exports_release_their_slot(app, path):
+    limiter = app.extensions['hsrm_admission']['generate']
+    response = app.test_client().post(path, json={'messages': messages(5)})
+    response.close()
+    assert response.status_code == 200
+    assert limiter.in_flight == 0
+
+
+def test_invalid_json_is_a_client_error(app):
+    response = app.test_client().post('/generate', data='{"volunteers": [', content_type='application/json')
+    assert response.status_code == 400
+    assert app.extensions['hsrm_admission']['generate'].in_flight == 0
@@ -0,0 +1,123 @@
+import pandas as pd
+import pytest
+
+from utils.dedup import DuplicateFinder, merge_records, normalize_email, soundex
+from utils.normalizer import normalize_phones
+
+
+@pytest.mark.parametrize('email,key', [
+    ('John.Doe+hope@Gmail.com', 'johndoe@gmail.com'),
+    ('john.doe@googlemail.com', 'johndoe@gmail.com'),
+    ('John.Doe+hope@work.org', 'john.doe@work.org'),
+    ('not an address', ''),
+    (None, ''),
+])
+def test_normalize_email(email, key):
+    assert normalize_email(email) == key
+
+
+def test_phone_keys_match_normalized_phones():
+    phones = ['(817) 555-0101 x12', '1-817-555-0101', '+44 20 7946 0958', '0044 20 7946 0958', '555-0101',
+              8175550101, None]
+    numbers, _ = normalize_phones(pd.Series(phones))
+    keys = [DuplicateFinder().features({'phone': phone})[1] for phone in phones]
+    assert keys == [number if number.startswith('+') else '' for number in numbers]
+
+
+def test_soundex():
+    assert soundex('robert') == soundex('rupert') == 'r163'
+    assert soundex('ashcraft') == 'a261'
+    assert soundex('') == ''
+
+
+def ids(groups):
+    return [group['ids'] for group in groups]
+
+
+def test_finds_email_variants():
+    records = [
+        {'name': 'John Doe', 'email': 'john.doe@gmail.com'},
+        {'name': 'Mary Smith', 'email': 'mary@example.org'},
+        {'name': 'John Doe', 'email': 'JohnDoe+hope@gmail.com'},
+    ]
+    groups = DuplicateFinder().find(records)
+    assert ids(groups) == [[0, 2]]
+    assert 'email' in groups[0]['reasons']
+
+
+def test_finds_same_phone_and_name_with_a_new_email():
+    records = [
+        {'first_name': 'Maria', 'last_name': 'Garcia', 'email': 'maria@old.org', 'phone': '817-555-0101'},
+        {'first_name': 'Maria', 'last_name': 'Garcia', 'email': 'mgarcia@new.org', 'phone': '(817) 555 0101'},
+    ]
+    assert ids(DuplicateFinder().find(records)) == [[0, 1]]
+
+
+def test_shared_phone_with_a_different_name_is_not_a_duplicate():
+    records = [
+        {'name': 'Maria Garcia', 'email': 'maria@example.org', 'phone': '817-555-0101'},
+        {'name': 'Peter Garcia', 'email': 'peter@example.org', 'phone': '817-555-0101'},
+    ]
+    assert DuplicateFinder().find(records) == []
+
+
+def test_name_alone_is_not_enough():
+    records = [{'name': 'John Smith', 'email': f'john{i}@example.org'} for i in range(3)]
+    assert DuplicateFinder().find(records) == []
+
+
+def test_groups_join_through_different_keys():
+    records = [
+        {'name': 'Ann Lee', 'email': 'ann@example.org'},
+        {'name': 'Ann Lee', 'email': 'ANN@example.org', 'phone': '817-555-0199'},
+        {'name': 'Ann Lee', 'email': 'ann.lee@work.org', 'phone': '8175550199'},
+    ]
+    assert ids(DuplicateFinder().find(records)) == [[0, 1, 2]]
+
+
+def test_merge_keeps_first_record_and_fills_its_gaps():
+    records = [
+        {'name': 'John Doe', 'email': 'john.doe@gmail.com', 'phone': '', 'status': 'pending'},
+        {'name': 'Mary Smith', 'email': 'mary@example.org'},
+        {'name': 'John Doe', 'email': 'johndoe@gmail.com', 'phone': '817-555-0101', 'status': 'signed'},
+    ]
+    merged = DuplicateFinder().merge(records)
+    assert len(merged) == 2
+    assert merged[0] == {'name': 'John Doe', 'email': 'john.doe@gmail.com', 'phone': '817-555-0101',
+                         'status': 'signed', 'merged_emails': ['johndoe@gmail.com']}
+    assert merged[1] is records[1]
+
+
+def test_merge_records_accepts_non_string_fields():
+    merged = merge_records([
+        {'email': 'a@example.org', 'merged_emails': 'b@example.org'},
+        {'email': None, 'phone': 8175550101, 'merged_emails': ['c@example.org', None]},
+    ])
+    assert merged['phone'] == 8175550101
+    assert merged['merged_emails'] == ['b@example.org', 'c@example.org']
+
+
+def test_find_accepts_non_string_fields():
+    records = [
+        {'name': 'Jane Doe', 'email': 'jane@example.org', 'phone': 8175550101},
+        {'name': 'Jane Doe', 'email': 'jane@example.org', 'phone': '817-555-0101', 'first_name': 7},
+        {'name': 12, 'email': ['x'], 'last_name': None},
+    ]
+    assert ids(DuplicateFinder().find(records)) == [[0, 1]]
+
+
+@pytest.fixture
+def client():
+    from app import create_app
+    return create_app({'USE_BUILT_ASSETS': False}).test_client()
+
+
+def test_dedup_route(client):
+    response = client.post('/dedup', json={'records': [
+        {'name': 'Jane Doe', 'email': 'jane@example.org', 'phone': 8175550101},
+        {'name': 'Jane Doe', 'email': 'JANE@example.org'},
+    ]})
+    assert response.status_code == 200
+    assert response.get_json()['removed'] == 1
+    assert client.post('/dedup', json={'records': 'x'}).status_code == 400
+    assert client.post('/dedup', json={'records': [], 'threshold': 2}).status_code == 400
@@ -0,0 +1,90 @@
+import email
+import io
+import zipfile
+
+import pytest
+
+from utils.mail_export import SKIPPED_FILENAME, MailExporter
+
+
+def message(**fields):
+    return {'name': 'Jane Doe', 'email': 'jane@example.org', 'subject': 'Welcome', 'body': 'Hello', **fields}
+
+
+@pytest.fixture
+def exporter():
+    return MailExporter('HOPE Tutoring <volunteer@hopetutoring.org>', 'replies@hopetutoring.org')
+
+
+def mbox_messages(data: bytes) -> list:
+    """The messages of an mbox export, split on its separator lines."""
+    return [part.split(b'\n', 1)[1] for part in (b'\n\n' + data).split(b'\n\nFrom MAILER-DAEMON ')[1:]]
+
+
+def headers(data: bytes) -> list:
+    return data.replace(b'\r\n', b'\n').split(b'\n\n', 1)[0].split(b'\n')
+
+
+def test_message_bytes_headers(exporter):
+    data = exporter.message_bytes(message(name='José Núñez', subject='¡Hola!'), date='Mon, 19 Oct 2026 10:00:00 -0500')
+    assert data.count(b'\r\n') >= 8 and b'\n' not in data.replace(b'\r\n', b'')
+    parsed = email.message_from_bytes(data)
+    assert parsed['From'] == 'HOPE Tutoring <volunteer@hopetutoring.org>'
+    assert parsed['Reply-To'] == 'replies@hopetutoring.org'
+    assert str(email.header.make_header(email.header.decode_header(parsed['Subject']))) == '¡Hola!'
+    assert parsed['To'].endswith('<jane@example.org>')
+    assert parsed['Message-ID'].endswith('@hopetutoring.org>')
+    assert parsed.get_payload(decode=True) == b'Hello\r\n'
+
+
+def test_line_breaks_cannot_add_headers(exporter):
+    data = exporter.message_bytes(message(name='Jane\r\nBcc: x@evil.example', subject='Hi\nBcc: y@evil.example'))
+    assert not any(line.lower().startswith(b'bcc:') for line in headers(data))
+
+
+def test_long_subjects_are_folded(exporter):
+    data = exporter.message_bytes(message(subject=' '.join(['Volunteer'] * 30)), linesep=b'\n')
+    assert all(len(line) <= 78 for line in headers(data))
+    subject = email.message_from_bytes(data)['Subject']
+    assert ' '.join(subject.split()) == ' '.join(['Volunteer'] * 30)
+
+
+def test_mbox_escapes_from_lines(exporter):
+    bodies = ['From here on, thanks', 'Quoted:\n>From there\nFrom the team']
+    data = b''.join(exporter.iter_mbox(message(body=body) for body in bodies))
+    messages = mbox_messages(data)
+    assert len(messages) == 2
+    assert b'\n>From here on, thanks' in messages[0]
+    assert b'\n>>From there\n>From the team' in messages[1]
+    # Only the separators start with 'From '
+    assert sum(line.startswith(b'From ') for line in data.split(b'\n')) == 2
+
+
+def test_mbox_skips_unexportable_recipients(exporter):
+    messages = [message(), message(email='a\r\nb@example.org'), message(email='Jane <jane@example.org>'), message(email='')]
+    assert exporter.skipped_positions(m['email'] for m in messages) == [1, 2]
+    data = b''.join(exporter.iter_mbox(messages))
+    assert len(mbox_messages(data)) == 2
+    assert [position for position, _, _ in exporter.skipped] == [1, 2]
+
+
+def test_eml_zip_lists_skipped_messages(exporter):
+    messages = [message(), message(name='Jane Doe', email='bad address@example.org'), message()]
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(exporter.iter_eml_zip(messages))))
+    names = archive.namelist()
+    # Numbered, so two volunteers with the same name both get a file
+    assert names == ['00001_Jane_Doe.eml', '00003_Jane_Doe.eml', SKIPPED_FILENAME]
+    skipped = archive.read(SKIPPED_FILENAME).decode('utf-8').splitlines()
+    assert len(skipped) == 1 and skipped[0].startswith('2\tbad address@example.org\t')
+    assert email.message_from_bytes(archive.read(names[0]))['To'].endswith('<jane@example.org>')
+
+
+@pytest.mark.parametrize('export_format', ['mbox', 'eml'])
+def test_download_reports_skipped_messages(export_format):
+    from app import create_app
+    client = create_app({'USE_BUILT_ASSETS': False}).test_client()
+    response = client.post(f'/download/{export_format}',
+                           json={'messages': [message(), message(email='x\ny@example.org')]})
+    assert response.status_code == 200
+    assert response.headers['X-Skipped-Messages'] == '1'
+    response.close()
@@ -0,0 +1,176 @@
+import base64
+import os
+import time
+
+import pytest
+
+from utils import mail_ingest
+from utils.mail_ingest import BOUNCED, IngestBusy, MailIngester, parse_message
+
+
+def reply(body: bytes, sender=b'Jane Doe <Jane@Example.org>', headers=b'') -> bytes:
+    return (b'From: ' + sender + b'\r\nSubject: Re: Welcome\r\nIn-Reply-To: <msg-1@hopetutoring.org>\r\n' +
+            headers + b'\r\n' + body)
+
+
+def dsn(action: bytes, status: bytes) -> bytes:
+    return (
+        b'From: Mail Delivery System <MAILER-DAEMON@mx.example.org>\r\n'
+        b'Subject: Undelivered Mail Returned to Sender\r\n'
+        b'Content-Type: multipart/report; report-type=delivery-status; boundary="b1"\r\n\r\n'
+        b'--b1\r\nContent-Type: text/plain\r\n\r\nYour message could not be delivered.\r\n'
+        b'--b1\r\nContent-Type: message/delivery-status\r\n\r\n'
+        b'Reporting-MTA: dns; mx.example.org\r\n\r\n'
+        b'Final-Recipient: rfc822; <Gone@Example.org>\r\nAction: ' + action + b'\r\nStatus: ' + status + b'\r\n'
+        b'--b1\r\nContent-Type: text/rfc822-headers\r\n\r\nMessage-ID: <msg-2@hopetutoring.org>\r\n'
+        b'--b1--\r\n'
+    )
+
+
+def mbox_entry(message: bytes) -> bytes:
+    return b'From MAILER-DAEMON Mon Oct 19 10:00:00 2026\n' + message.replace(b'\r\n', b'\n') + b'\n'
+
+
+def no_sent(message_ids):
+    return {}
+
+
+@pytest.fixture
+def ingester(tmp_path):
+    return MailIngester(str(tmp_path / 'state.db'))
+
+
+def ingest(ingester, mailbox, known=('jane@example.org',)):
+    run = ingester.run([str(mailbox)], no_sent, set(known))
+    run.commit()
+    return run
+
+
+def test_reply_is_responded():
+    event = parse_message(reply(b'Sure, count me in!\r\n\r\nOn Mon, HOPE wrote:\r\n> not interested?\r\n'))
+    assert event == {'kind': 'reply', 'sender': 'jane@example.org',
+                     'message_ids': ['<msg-1@hopetutoring.org>'], 'status': 'responded'}
+
+
+def test_reply_that_turns_the_offer_down_is_declined():
+    assert parse_message(reply(b"Thanks, but I won't be able to volunteer this term.\r\n"))['status'] == 'declined'
+    assert parse_message(reply(b'No thanks.\r\n'))['status'] == 'declined'
+
+
+def test_auto_replies_are_skipped():
+    assert parse_message(reply(b'I am out of the office.\r\n', headers=b'Auto-Submitted: auto-replied\r\n')) is None
+
+
+def test_multipart_base64_reply():
+    text = base64.encodebytes("Désolé, I can't commit to the program.\r\n".encode('utf-8'))
+    body = (b'--outer\r\nContent-Type: multipart/alternative; boundary="Inner"\r\n\r\n'
+            b'--Inner\r\nContent-Type: text/plain; charset=utf-8\r\nContent-Transfer-Encoding: base64\r\n\r\n' +
+            text + b'--Inner\r\nContent-Type: text/html\r\n\r\n<p>Sure!</p>\r\n--Inner--\r\n--outer--\r\n')
+    event = parse_message(reply(body, headers=b'Content-Type: multipart/mixed; boundary="outer"\r\n'))
+    assert event['status'] == 'declined'
+
+
+def test_truncated_base64_reply_decodes_what_is_there():
+    text = base64.b64encode(b'Happy to help! ' * 20)
+    event = parse_message(reply(text[:-3], headers=b'Content-Transfer-Encoding: base64\r\n'))
+    assert event['status'] == 'responded'
+
+
+def test_failed_dsn_is_a_bounce():
+    event = parse_message(dsn(b'failed', b'5.1.1'))
+    assert event == {'kind': 'bounce', 'emails': ['gone@example.org'], 'message_ids': ['<msg-2@hopetutoring.org>']}
+
+
+def test_delayed_dsn_is_skipped():
+    assert parse_message(dsn(b'delayed', b'4.4.1')) is None
+
+
+def test_bounce_matched_through_the_sent_message(tmp_path, ingester):
+    message = dsn(b'failed', b'5.1.1').replace(b'Final-Recipient: rfc822; <Gone@Example.org>\r\n', b'')
+    (tmp_path / 'mbox').write_bytes(mbox_entry(message))
+    run = ingester.run([str(tmp_path / 'mbox')], lambda ids: {'<msg-2@hopetutoring.org>': 'jane@example.org'})
+    assert run.changes == {'jane@example.org': {'email': 'jane@example.org', 'delivery': BOUNCED}}
+
+
+def test_declined_beats_responded(tmp_path, ingester):
+    (tmp_path / 'mbox').write_bytes(mbox_entry(reply(b'No thank you.\r\n')) + mbox_entry(reply(b'Yes!\r\n')))
+    run = ingest(ingester, tmp_path / 'mbox')
+    assert run.changes['jane@example.org']['status'] == 'declined'
+    assert run.mailboxes[0]['replies'] == 2 and run.mailboxes[0]['matched'] == 2
+
+
+def test_appended_mbox_reads_only_new_mail(tmp_path, ingester):
+    mbox = tmp_path / 'mbox'
+    mbox.write_bytes(mbox_entry(reply(b'Yes!\r\n')))
+    assert ingest(ingester, mbox).mailboxes[0]['replies'] == 1
+    assert ingest(ingester, mbox).mailboxes[0]['replies'] == 0
+
+    with open(mbox, 'ab') as f:
+        f.write(mbox_entry(reply(b'Not interested.\r\n', sender=b'sam@example.org')))
+    run = ingest(ingester, mbox, known=('jane@example.org', 'sam@example.org'))
+    assert run.mailboxes[0]['replies'] == 1
+    assert run.changes == {'sam@example.org': {'email': 'sam@example.org', 'status': 'declined'}}
+
+
+def test_replaced_mbox_is_read_again(tmp_path, ingester):
+    mbox = tmp_path / 'mbox'
+    mbox.write_bytes(mbox_entry(reply(b'Yes!\r\n')) * 3)
+    ingest(ingester, mbox)
+    # A compacted or re-exported file: shorter, and its start no longer matches
+    mbox.write_bytes(mbox_entry(reply(b'Count me in.\r\n', sender=b'sam@example.org')))
+    run = ingest(ingester, mbox, known=('sam@example.org',))
+    assert run.mailboxes[0]['replies'] == 1 and 'sam@example.org' in run.changes
+
+
+def test_full_run_ignores_watermarks(tmp_path, ingester):
+    mbox = tmp_path / 'mbox'
+    mbox.write_bytes(mbox_entry(reply(b'Yes!\r\n')))
+    ingest(ingester, mbox)
+    assert ingester.run([str(mbox)], no_sent, {'jane@example.org'}, full=True).mailboxes[0]['replies'] == 1
+
+
+def deliver(maildir, name: str, message: bytes, age: float = 0):
+    path = maildir / 'new' / name
+    path.write_bytes(message)
+    when = time.time() - age
+    os.utime(path, (when, when))
+    return path
+
+
+def test_maildir_grace_window(tmp_path, ingester):
+    maildir = tmp_path / 'Maildir'
+    for folder in ('new', 'cur', 'tmp'):
+        (maildir / folder).mkdir(parents=True)
+    deliver(maildir, '1000.a.host', reply(b'Yes!\r\n'), age=3600)
+    deliver(maildir, '2000.b.host', reply(b'Yes!\r\n'))
+    assert ingest(ingester, maildir).mailboxes[0]['replies'] == 2
+
+    # A file still being moved in shows up late with an older time; inside the grace window it is read
+    deliver(maildir, '1990.c.host', reply(b'No thanks.\r\n'), age=10)
+    # Already-read mail moved to cur/ with flags is not counted twice
+    os.rename(maildir / 'new' / '2000.b.host', maildir / 'cur' / '2000.b.host:2,S')
+    run = ingest(ingester, maildir)
+    assert run.mailboxes[0]['replies'] == 1
+    assert run.changes['jane@example.org']['status'] == 'declined'
+
+    # Only the grace window is looked at again: mail dated before the watermark is skipped
+    deliver(maildir, '0500.d.host', reply(b'Yes!\r\n'), age=7200)
+    assert ingest(ingester, maildir).mailboxes[0]['replies'] == 0
+
+
+def test_lease_shuts_out_other_runs(ingester):
+    other = MailIngester(ingester.state_path)
+    with ingester.exclusive():
+        with pytest.raises(IngestBusy):
+            with other.exclusive():
+                pass
+    with other.exclusive():
+        pass
+
+
+def test_expired_lease_can_be_taken(ingester, monkeypatch):
+    monkeypatch.setattr(mail_ingest, 'LEASE_SECONDS', -1)
+    with ingester.exclusive():
+        # The first run crashed without releasing; its lease has already run out
+        with MailIngester(ingester.state_path).exclusive():
+            pass
@@ -0,0 +1,135 @@
+import mailbox
+import smtplib
+
+import pytest
+
+from smtp_sink import SMTPSink
+from utils.mailer import (InvalidAddress, Mailer, WIRE_POLICY, breaks_connection, build_mime,
+                          envelope_address, header_text, is_transient)
+
+
+def message(**fields):
+    return {'name': 'Jane Doe', 'email': 'jane@example.org', 'subject': 'Welcome', 'body': 'Hello', **fields}
+
+
+@pytest.mark.parametrize('address', [
+    'jane@example.org\r\nRCPT TO:<x@evil.example>',
+    'jane@example.org>\r\nDATA',
+    'Jane <jane@example.org>',
+    'jane doe@example.org',
+    'jane@example.org,x@evil.example',
+    '',
+    'jane',
+])
+def test_envelope_address_rejects_anything_but_a_plain_address(address):
+    with pytest.raises(InvalidAddress):
+        envelope_address(address)
+
+
+def test_envelope_address_encodes_non_ascii_domains():
+    assert envelope_address('jane@example.org') == 'jane@example.org'
+    assert envelope_address('jane@bücher.example') == 'jane@xn--bcher-kva.example'
+    with pytest.raises(InvalidAddress):
+        envelope_address('jäne@example.org')
+
+
+def test_header_text_keeps_values_on_one_line():
+    assert header_text('Welcome\r\nBcc: x@evil.example') == 'Welcome Bcc: x@evil.example'
+    assert header_text('Welcome') == 'Welcome'
+
+
+def test_build_mime_cannot_add_headers():
+    email = build_mime(message(name='Jane\nBcc: x@evil.example', subject='Hi\r\nBcc: y@evil.example'),
+                       'HOPE Tutoring <volunteer@hopetutoring.org>')
+    data = email.as_bytes(policy=WIRE_POLICY)
+    headers = data.split(b'\r\n\r\n', 1)[0]
+    assert not any(line.lower().startswith(b'bcc:') for line in headers.split(b'\r\n'))
+    assert email['To'].endswith('<jane@example.org>')
+    assert email['Message-ID'].endswith('@hopetutoring.org>')
+
+
+def test_build_mime_rejects_invalid_recipient():
+    with pytest.raises(InvalidAddress):
+        build_mime(message(email='jane@example.org\r\nDATA'), 'volunteer@hopetutoring.org')
+
+
+def test_error_classification():
+    assert is_transient(smtplib.SMTPResponseException(451, b'Try later'))
+    assert not is_transient(smtplib.SMTPResponseException(550, b'No such user'))
+    assert is_transient(smtplib.SMTPServerDisconnected())
+    assert not is_transient(InvalidAddress('bad'))
+    assert breaks_connection(smtplib.SMTPResponseException(421, b'Closing'))
+    assert not breaks_connection(smtplib.SMTPRecipientsRefused({'a@b.c': (550, b'No')}))
+    assert not breaks_connection(InvalidAddress('bad'))
+
+
+@pytest.fixture
+def sink(tmp_path):
+    sink = SMTPSink(port=0, mbox=str(tmp_path / 'sent.mbox'), reject_domains=['rejected.example']).start()
+    yield sink
+    sink.stop()
+
+
+def test_mailer_delivers_and_fails_invalid_recipients_without_sending(sink):
+    recipients = [
+        (1, 'jane@example.org'),
+        (2, 'x@example.org\r\nRCPT TO:<y@evil.example>'),
+        (3, 'joe@rejected.example'),
+    ]
+    emails = dict(recipients)
+    results = {}
+    mailer = Mailer('localhost', sink.port, sender='HOPE Tutoring <volunteer@hopetutoring.org>',
+                    security='none', connections=2, max_attempts=2, retry_backoff=0.01)
+    try:
+        job = mailer.submit(recipients, lambda key: message(email=emails[key]),
+                            on_result=lambda job, key, result: results.__setitem__(key, result))
+        assert job.wait(10)
+    finally:
+        mailer.close(5)
+
+    assert results[1]['status'] == 'sent'
+    assert results[2]['status'] == 'failed' and results[2]['attempts'] == 0
+    assert results[3]['status'] == 'failed' and results[3]['error'].startswith('550')
+    assert job.to_dict()['sent'] == 1 and job.to_dict()['failed'] == 2
+
+    sent = list(mailbox.mbox(sink.mbox))
+    assert [email['To'] for email in sent] == ['Jane Doe <jane@example.org>']
+    assert sink.stats.snapshot()['recipients'] == 1
+
+
+def test_roster_with_an_invalid_address_is_indexed_and_fails_only_that_record(sink, tmp_path):
+    from app import create_app
+    app = create_app({'SMTP_HOST': 'localhost', 'SMTP_PORT': sink.port, 'SMTP_SECURITY': 'none',
+                      'DELIVERY_DB': str(tmp_path / 'delivery.db'), 'USE_BUILT_ASSETS': False})
+    client = app.test_client()
+    try:
+        generated = client.post('/generate', json={'index_roster': True, 'volunteers': [
+            {'name': 'Jane Doe', 'email': 'jane@example.org'},
+            {'name': 'A B', 'email': 'a b@example.org'},
+        ]})
+        assert generated.status_code == 200
+        roster_id = generated.get_json()['roster_id']
+        records = client.get(f'/rosters/{roster_id}/sync?version=0').get_json()['records']
+        assert [record.get('delivery') for record in records] == [None, 'undeliverable']
+
+        job = client.post(f'/rosters/{roster_id}/send', json={}).get_json()
+        assert app.extensions['hsrm_mailer'].job(job['job_id']).wait(10)
+        job = client.get(f"/send-jobs/{job['job_id']}").get_json()
+        assert job['sent'] == 1 and job['failed'] == 1
+        records = client.get(f'/rosters/{roster_id}/sync?version=0').get_json()['records']
+        assert [record['delivery'] for record in records] == ['sent', 'failed']
+        assert sink.stats.snapshot()['recipients'] == 1
+
+        assert client.patch(f'/rosters/{roster_id}/records',
+                            json={'updates': [{'id': 1, 'email': 'a\r\nb@example.org'}]}).status_code == 400
+    finally:
+        app.extensions['hsrm_mailer'].close(5)
+        app.extensions['hsrm_send_store'].close()
+
+
+def test_correcting_an_undeliverable_address_clears_the_flag():
+    from utils.roster_store import UNDELIVERABLE, RosterStore
+    roster = RosterStore().create([{'name': 'A B', 'email': 'Jane <jane@example.org>'}])
+    assert roster.index.get(0)['delivery'] == UNDELIVERABLE
+    roster.update_records([{'id': 0, 'email': 'jane@example.org'}])
+    assert roster.index.get(0)['delivery'] is None
@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+from utils.normalizer import normalize_emails, normalize_names, normalize_phone, normalize_phones, normalize_records
+
+
+@pytest.mark.parametrize('name,normalized', [
+    ('MARY VAN DER BERG', 'Mary van der Berg'),
+    ('ludwig von beethoven', 'Ludwig von Beethoven'),
+    ('mary VAN DER berg', 'mary VAN DER berg'),
+    ('VAN HALEN', 'Van Halen'),
+    ('DE LA CRUZ', 'De la Cruz'),
+    ('  jane   doe ', 'Jane Doe'),
+    ('JOHN MCDONALD', 'John McDonald'),
+    ('DeShawn Jones', 'DeShawn Jones'),
+    ('José', 'José'),
+    (None, ''),
+])
+def test_normalize_names(name, normalized):
+    assert normalize_names(pd.Series([name])).tolist() == [normalized]
+
+
+def test_normalize_emails():
+    emails = pd.Series(['mailto:Jane@Example.ORG', ' <joe@example.org> ', None])
+    assert normalize_emails(emails).tolist() == ['jane@example.org', 'joe@example.org', '']
+
+
+@pytest.mark.parametrize('phone,e164,extension', [
+    ('(817) 555-0101', '+18175550101', ''),
+    ('1-817-555-0101', '+18175550101', ''),
+    ('817.555.0101 ext. 12', '+18175550101', '12'),
+    ('817-555-0101 x7', '+18175550101', '7'),
+    ('+44 20 7946 0958', '+442079460958', ''),
+    ('0044 20 7946 0958', '+442079460958', ''),
+    ('555-0101', '555-0101', ''),
+    ('call me', 'call me', ''),
+    (None, '', ''),
+])
+def test_normalize_phones(phone, e164, extension):
+    numbers, extensions = normalize_phones(pd.Series([phone]))
+    assert numbers.tolist() == [e164]
+    assert extensions.tolist() == [extension]
+
+
+@pytest.mark.parametrize('phone,country_code,normalized', [
+    ('(817) 555-0101 x12', '1', ('+18175550101', '12')),
+    ('+44 20 7946 0958', '1', ('+442079460958', '')),
+    ('020 7946 0958', '44', ('+442079460958', '')),
+    ('555-0101 x3', '1', ('', '')),
+    (8175550101, '1', ('+18175550101', '')),
+    (None, '1', ('', '')),
+])
+def test_normalize_phone(phone, country_code, normalized):
+    assert normalize_phone(phone, country_code) == normalized
+
+
+def test_normalize_phones_with_another_country_code():
+    numbers, _ = normalize_phones(pd.Series(['020 7946 0958', '+1 817 555 0101', '12']), '44')
+    assert numbers.tolist() == ['+442079460958', '+18175550101', '12']
+
+
+def test_normalize_records_updates_the_dicts():
+    records = [
+        {'name': 'JANE DOE', 'email': 'Jane@Example.org', 'phone': '817-555-0101 x3', 'location': 'Arlington'},
+        {'name': 'joe bloggs', 'email': None, 'phone': None, 'location': 'Dallas'},
+    ]
+    assert normalize_records(records) is records
+    assert records == [
+        {'name': 'Jane Doe', 'email': 'jane@example.org', 'phone': '+18175550101', 'phone_ext': '3',
+         'location': 'Arlington'},
+        {'name': 'Joe Bloggs', 'email': '', 'phone': '', 'phone_ext': '', 'location': 'Dallas'},
+    ]
+
+
+def test_normalize_records_without_contact_fields():
+    records = [{'location': 'Arlington'}]
+    assert normalize_records(records) == [{'location': 'Arlington'}]
+    assert normalize_records([]) == []
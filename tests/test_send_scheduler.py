@@ -0,0 +1,223 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils.send_scheduler import PRIORITY_NORMAL, PRIORITY_URGENT, SendScheduler, SendStore, TokenBucket
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def item(name, domain='example.org', priority=PRIORITY_NORMAL):
+    return SimpleNamespace(name=name, domain=domain, priority=priority, seq=None)
+
+
+def drain(scheduler):
+    """Names of the items that can go now, in order."""
+    names = []
+    while True:
+        popped, _ = scheduler.pop()
+        if popped is None:
+            return names
+        names.append(popped.name)
+
+
+@pytest.mark.parametrize('per_minute,burst', [(10, 1), (10, 3), (60, 10), (1, 5), (0.5, 1)])
+def test_token_bucket_never_exceeds_rate_in_any_minute(per_minute, burst):
+    bucket = TokenBucket(per_minute, burst, now=0.0)
+    now, sent = 0.0, []
+    while now < 600:
+        wait = bucket.wait_time(now)
+        if wait == 0:
+            bucket.take(now)
+            sent.append(now)
+        else:
+            now += wait
+    for i, start in enumerate(sent):
+        in_window = sum(1 for t in sent[i:] if t < start + 60)
+        assert in_window <= max(per_minute, 1)
+    # ...while not falling behind the refill rate over the long run
+    assert len(sent) >= int(bucket.refill * 600)
+
+
+def test_token_bucket_burst_is_capped_at_half_the_rate():
+    bucket = TokenBucket(10, burst=50, now=0.0)
+    assert bucket.capacity == 5
+    for _ in range(5):
+        assert bucket.wait_time(0.0) == 0
+        bucket.take(0.0)
+    assert bucket.wait_time(0.0) > 0
+
+
+def test_urgent_items_go_first():
+    scheduler = SendScheduler(clock=FakeClock())
+    for name in ('a', 'b'):
+        scheduler.push(item(name))
+    scheduler.push(item('urgent', priority=PRIORITY_URGENT))
+    assert drain(scheduler) == ['urgent', 'a', 'b']
+    assert len(scheduler) == 0
+
+
+def test_throttled_domain_does_not_hold_up_others():
+    clock = FakeClock()
+    scheduler = SendScheduler(domain_rates={'slow.org': 1}, clock=clock)
+    for name in ('slow1', 'slow2', 'slow3'):
+        scheduler.push(item(name, 'slow.org'))
+    scheduler.push(item('fast', 'fast.org'))
+
+    assert drain(scheduler) == ['slow1', 'fast']
+    popped, wait = scheduler.pop()
+    assert popped is None and 0 < wait <= 60
+    assert scheduler.status()['throttled_domains'] == 1
+
+    clock.now += wait
+    assert drain(scheduler) == ['slow2']
+
+
+def test_domain_rules_match_the_most_specific_suffix():
+    scheduler = SendScheduler(domain_rates={'edu': 120, 'cs.example.edu': 30}, default_domain_rate=600)
+    assert scheduler.rate_for('cs.example.edu') == 30
+    assert scheduler.rate_for('example.edu') == 120
+    assert scheduler.rate_for('example.org') == 600
+
+
+def test_account_limit_applies_across_domains():
+    clock = FakeClock()
+    scheduler = SendScheduler(rate_per_minute=2, clock=clock)
+    for name, domain in (('a', 'one.org'), ('b', 'two.org'), ('c', 'three.org')):
+        scheduler.push(item(name, domain))
+    assert drain(scheduler) == ['a']
+    popped, wait = scheduler.pop()
+    assert popped is None and wait > 0
+    clock.now += wait
+    assert drain(scheduler) == ['b']
+
+
+def test_scheduled_items_wait_until_due():
+    clock = FakeClock()
+    scheduler = SendScheduler(clock=clock)
+    scheduler.push(item('later'), due=clock.now + 30)
+    scheduler.push(item('now'))
+    assert drain(scheduler) == ['now']
+    assert scheduler.pop() == (None, 30)
+    clock.now += 30
+    assert drain(scheduler) == ['later']
+
+
+def test_remove_keeps_the_ready_heap_consistent():
+    clock = FakeClock()
+    scheduler = SendScheduler(clock=clock)
+    scheduler.push(item('a1', 'a.org', PRIORITY_URGENT))
+    scheduler.push(item('b1', 'b.org'))
+    scheduler.push(item('a2', 'a.org'))
+    scheduler.push(item('c1', 'c.org'))
+    scheduler.push(item('later', 'b.org'), due=clock.now + 10)
+
+    removed = scheduler.remove(lambda queued: queued.name in ('a1', 'c1', 'later'))
+    assert sorted(queued.name for queued in removed) == ['a1', 'c1', 'later']
+    assert len(scheduler) == 2
+    assert scheduler.status()['domains'] == 2
+    assert drain(scheduler) == ['b1', 'a2']
+    clock.now += 10
+    assert scheduler.pop() == (None, None)
+    assert len(scheduler) == 0
+
+
+def test_remove_leaves_throttled_domains_throttled():
+    clock = FakeClock()
+    scheduler = SendScheduler(domain_rates={'slow.org': 1}, clock=clock)
+    for name in ('s1', 's2', 's3'):
+        scheduler.push(item(name, 'slow.org'))
+    scheduler.push(item('f1', 'fast.org'))
+    assert drain(scheduler) == ['s1', 'f1']
+
+    scheduler.remove(lambda queued: queued.name == 's2')
+    scheduler.push(item('f2', 'fast.org'))
+    # s3 is still throttled: removing s2 must not put slow.org back in the ready heap
+    assert drain(scheduler) == ['f2']
+    _, wait = scheduler.pop()
+    clock.now += wait
+    assert drain(scheduler) == ['s3']
+
+
+def test_remove_nothing_returns_empty_list():
+    scheduler = SendScheduler(clock=FakeClock())
+    scheduler.push(item('a'))
+    assert scheduler.remove(lambda queued: False) == []
+    assert drain(scheduler) == ['a']
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / 'send.db')
+
+
+def test_send_store_leases_jobs_to_their_owner(store_path):
+    first, second = SendStore(store_path, lease=60), SendStore(store_path, lease=60)
+    try:
+        first.add_job('job', {'subject': 'Hi'}, [(1, {'to': 'a@example.org'}), (2, {'to': 'b@example.org'})])
+        # The owner's lease is fresh, so nobody else may take the job
+        assert second.claim_orphans() == []
+        assert second.job_status('job')['queued'] == 2
+    finally:
+        first.close()
+        second.close()
+
+
+def test_send_store_orphaned_job_is_claimed_once(store_path):
+    crashed = SendStore(store_path, lease=0.05)
+    crashed.add_job('job', {'subject': 'Hi'}, [(1, {'to': 'a@example.org'}), (2, {'to': 'b@example.org'})])
+    crashed.finished('job', 1)
+    crashed.close()
+    time.sleep(0.1)
+
+    first, second = SendStore(store_path, lease=0.05), SendStore(store_path, lease=0.05)
+    try:
+        claimed = first.claim_orphans()
+        assert [job['job_id'] for job in claimed] == ['job']
+        assert claimed[0]['info'] == {'subject': 'Hi'}
+        assert claimed[0]['items'] == [(2, {'to': 'b@example.org'})]
+        assert second.claim_orphans() == []
+        assert second.job_status('job')['owner'] == first.owner
+    finally:
+        first.close()
+        second.close()
+
+
+def test_send_store_releases_jobs_it_could_not_resume(store_path):
+    crashed = SendStore(store_path, lease=60)
+    crashed.add_job('job', {}, [(1, {})])
+    crashed.close()
+
+    first, second = SendStore(store_path, lease=60), SendStore(store_path, lease=60)
+    try:
+        with first._lock:
+            first._connection().execute('UPDATE send_jobs SET heartbeat = 0')
+            first._db.commit()
+
+        def fail(jobs):
+            raise RuntimeError('resume failed')
+
+        with pytest.raises(RuntimeError):
+            first._check(fail)
+        # Released at once, not only when first's lease would have run out
+        assert [job['job_id'] for job in second.claim_orphans()] == ['job']
+    finally:
+        first.close()
+        second.close()
+
+
+def test_send_store_removed_job_has_no_status(store_path):
+    store = SendStore(store_path)
+    try:
+        store.add_job('job', {}, [(1, {})])
+        store.remove_job('job')
+        assert store.job_status('job') is None
+    finally:
+        store.close()
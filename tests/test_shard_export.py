@@ -0,0 +1,104 @@
+import csv
+import hashlib
+import io
+import json
+import zipfile
+
+import pytest
+
+from utils.shard_export import CSV_HEADER, SHARD_BASENAME, iter_csv, iter_sharded, iter_text_zip
+
+
+def messages(count, body='Hello'):
+    return [{'name': f'Volunteer {i}', 'email': f'v{i}@example.org', 'subject': 'Hi', 'body': body}
+            for i in range(1, count + 1)]
+
+
+def sharded(export_format, items, **limits):
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(iter_sharded(export_format, iter(items), **limits))))
+    manifest = json.loads(archive.read('manifest.json'))
+    return archive, manifest
+
+
+def csv_rows(data: bytes) -> list:
+    return list(csv.reader(io.StringIO(data.decode('utf-8'))))
+
+
+def test_single_file_exports():
+    rows = csv_rows(b''.join(iter_csv(messages(3, body='Line 1\nLine 2'))))
+    assert rows[0] == CSV_HEADER
+    assert rows[1] == ['Volunteer 1', 'v1@example.org', 'Hi', 'Line 1\\nLine 2']
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(iter_text_zip(messages(2)))))
+    assert archive.namelist() == ['Volunteer_1_email.txt', 'Volunteer_2_email.txt']
+    assert archive.read('Volunteer_1_email.txt').decode('utf-8') == 'To: v1@example.org\nSubject: Hi\n\nHello'
+
+
+def test_csv_split_by_rows():
+    archive, manifest = sharded('csv', messages(25), max_rows=10)
+    assert [(part['first_row'], part['last_row'], part['rows']) for part in manifest['parts']] == [
+        (1, 10, 10), (11, 20, 10), (21, 25, 5)
+    ]
+    assert manifest['total_rows'] == 25
+    assert manifest['limits'] == {'max_rows': 10, 'max_bytes': None}
+    assert archive.namelist() == [f'{SHARD_BASENAME}_part{n:03d}.csv' for n in (1, 2, 3)] + ['manifest.json']
+    for part in manifest['parts']:
+        rows = csv_rows(archive.read(part['file']))
+        # Every part repeats the header
+        assert rows[0] == CSV_HEADER
+        assert [row[1] for row in rows[1:]] == [f'v{i}@example.org' for i in range(part['first_row'], part['last_row'] + 1)]
+
+
+@pytest.mark.parametrize('export_format', ['csv', 'zip'])
+def test_split_by_bytes(export_format):
+    max_bytes = 4000
+    archive, manifest = sharded(export_format, messages(60, body='x' * 200), max_bytes=max_bytes)
+    assert len(manifest['parts']) > 1
+    assert manifest['total_rows'] == 60
+    for part in manifest['parts']:
+        data = archive.read(part['file'])
+        assert len(data) == part['bytes'] <= max_bytes
+        assert hashlib.sha256(data).hexdigest() == part['sha256']
+        assert not part['oversized']
+    # Rows are consecutive across parts
+    assert [part['first_row'] for part in manifest['parts']][1:] == [
+        part['last_row'] + 1 for part in manifest['parts']][:-1]
+
+
+def test_zip_parts_are_complete_archives():
+    archive, manifest = sharded('zip', messages(7), max_rows=3)
+    counts = []
+    for part in manifest['parts']:
+        inner = zipfile.ZipFile(io.BytesIO(archive.read(part['file'])))
+        assert inner.testzip() is None
+        counts.append(len(inner.namelist()))
+    assert counts == [3, 3, 1]
+
+
+def test_message_larger_than_max_bytes_gets_its_own_oversized_part():
+    items = messages(3)
+    items[1]['body'] = 'x' * 5000
+    archive, manifest = sharded('csv', items, max_bytes=1000)
+    assert [(part['rows'], part['oversized']) for part in manifest['parts']] == [(1, False), (1, True), (1, False)]
+    assert manifest['parts'][1]['bytes'] > 1000
+
+
+def test_rows_and_bytes_together():
+    _, manifest = sharded('csv', messages(30, body='x' * 100), max_rows=8, max_bytes=600)
+    assert all(part['rows'] <= 8 and part['bytes'] <= 600 for part in manifest['parts'])
+    assert manifest['total_rows'] == 30
+
+
+def test_empty_export_has_only_a_manifest():
+    archive, manifest = sharded('csv', [], max_rows=10)
+    assert archive.namelist() == ['manifest.json']
+    assert manifest['parts'] == [] and manifest['total_rows'] == 0
+
+
+def test_download_route_shards_and_validates_limits():
+    from app import create_app
+    client = create_app({'USE_BUILT_ASSETS': False}).test_client()
+    response = client.post('/download/csv', json={'messages': messages(5), 'max_rows': 2})
+    archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+    assert json.loads(archive.read('manifest.json'))['total_rows'] == 5
+    assert len(archive.namelist()) == 4
+    assert client.post('/download/zip', json={'messages': messages(5), 'max_rows': -1}).status_code == 400
@@ -0,0 +1,132 @@
+import pytest
+
+from utils.tracking_events import EventBufferFull, TrackingEventLog, parse_event
+
+
+def status(event_id, record_id, value, at, roster_id='roster'):
+    return {'id': event_id, 'type': 'status', 'roster_id': roster_id, 'record_id': record_id,
+            'status': value, 'at': at}
+
+
+def opened(event_id, record_id, at, roster_id='roster'):
+    return {'id': event_id, 'type': 'open', 'roster_id': roster_id, 'record_id': record_id, 'at': at}
+
+
+@pytest.fixture
+def applied():
+    return []
+
+
+@pytest.fixture
+def log(tmp_path, applied):
+    # A long flush interval leaves writing to the tests' flush() calls
+    log = TrackingEventLog(str(tmp_path / 'events.db'), apply_statuses=applied.append,
+                           flush_interval=3600, max_pending=10)
+    yield log
+    log.close()
+
+
+@pytest.mark.parametrize('event,error', [
+    ('open', 'Event must be an object'),
+    ({'type': 'open', 'roster_id': 'r', 'record_id': 1}, 'id must be'),
+    ({'id': 'e', 'type': 'bounce', 'roster_id': 'r', 'record_id': 1}, 'type must be'),
+    ({'id': 'e', 'type': 'open', 'roster_id': 'r', 'record_id': True}, 'record_id must be'),
+    ({'id': 'e', 'type': 'status', 'roster_id': 'r', 'record_id': 1, 'status': 'sent'}, 'status must be'),
+    ({'id': 'e', 'type': 'open', 'roster_id': 'r', 'record_id': 1, 'at': 'yesterday'}, 'at must be'),
+])
+def test_parse_event_rejects_invalid_events(event, error):
+    with pytest.raises(ValueError, match=error):
+        parse_event(event, 0.0)
+
+
+def test_parse_event_reads_iso_times():
+    row = parse_event(opened('e', 1, '1970-01-01T00:01:40Z'), 0.0)
+    assert row[7] == 100.0
+
+
+def test_add_reports_rejected_events(log):
+    result = log.add([opened('e1', 1, 100), {'id': 'e2', 'type': 'open'}])
+    assert result['accepted'] == 1
+    assert result['rejected'] == [{'index': 1, 'error': 'roster_id is required'}]
+
+
+def test_duplicate_ids_are_stored_once(log):
+    assert log.add([opened('e1', 1, 100), opened('e1', 1, 100)])['duplicates'] == 1
+    # Still buffered
+    assert log.add([opened('e1', 1, 100)])['duplicates'] == 1
+    log.flush()
+    # Already written: accepted again, then ignored when written
+    assert log.add([opened('e1', 1, 100), opened('e2', 1, 150)])['accepted'] == 2
+    assert log.engagement('roster') == {1: {'opens': 2, 'clicks': 0, 'last_open': 150.0, 'last_click': None}}
+
+
+def test_latest_status_wins_whatever_order_events_arrive_in(log, applied):
+    log.add([status('e1', 1, 'signed', 200), status('e2', 1, 'responded', 150)])
+    log.flush()
+    assert applied[-1] == {'roster': {1: 'signed'}}
+
+    # Older than the stored status: it doesn't overwrite it
+    log.add([status('e3', 1, 'declined', 100), status('e4', 2, 'pending', 100)])
+    log.flush()
+    assert applied[-1] == {'roster': {1: 'signed', 2: 'pending'}}
+
+    log.add([status('e5', 1, 'declined', 300)])
+    log.flush()
+    assert applied[-1] == {'roster': {1: 'declined'}}
+
+
+def test_resent_id_keeps_its_first_payload(log, applied):
+    log.add([status('e1', 1, 'signed', 100)])
+    log.flush()
+    log.add([status('e1', 1, 'declined', 500)])
+    log.flush()
+    assert applied[-1] == {'roster': {1: 'signed'}}
+
+
+def test_full_buffer_refuses_batches(log):
+    log.add([opened(f'e{i}', i, 100) for i in range(8)])
+    with pytest.raises(EventBufferFull) as raised:
+        log.add([opened(f'f{i}', i, 100) for i in range(3)])
+    assert raised.value.retry_after >= 1
+
+
+def test_failed_write_keeps_the_batch(tmp_path):
+    applied, failures = [], [RuntimeError('roster store unavailable')]
+
+    def apply(statuses):
+        if failures:
+            raise failures.pop()
+        applied.append(statuses)
+
+    log = TrackingEventLog(str(tmp_path / 'events.db'), apply_statuses=apply, flush_interval=3600)
+    try:
+        log.add([status('e1', 1, 'signed', 100)])
+        with pytest.raises(RuntimeError):
+            log.flush()
+        # Back in the buffer, and its id still counts as buffered
+        assert log.add([status('e1', 1, 'signed', 100)])['duplicates'] == 1
+        log.flush()
+        assert applied == [{'roster': {1: 'signed'}}]
+    finally:
+        log.close()
+
+
+def test_writer_retries_after_a_failure(tmp_path):
+    applied, failures = [], [RuntimeError('roster store unavailable')]
+
+    def apply(statuses):
+        if failures:
+            raise failures.pop()
+        applied.append(statuses)
+
+    log = TrackingEventLog(str(tmp_path / 'events.db'), apply_statuses=apply, flush_interval=0.01)
+    try:
+        log.add([status('e1', 1, 'signed', 100)])
+        for _ in range(200):
+            if applied:
+                break
+            log._writer.join(0.01)
+        assert applied == [{'roster': {1: 'signed'}}]
+        assert log._writer.is_alive()
+    finally:
+        log.close()
@@ -1,6 +1,16 @@
 # HOPE Messaging Tool Utilities
-from .file_parser import FileParser
-from .message_generator import MessageGenerator
+# Exports are resolved on first access so importing one utility doesn't import the others
+import importlib
+
+_EXPORTS = {
+    'FileParser': '.file_parser',
+    'MessageGenerator': '.message_generator',
+}
 
 __all__ = ['FileParser', 'MessageGenerator']
 
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,168 @@
+"""
+Admission Control Module
+Weighted concurrency limits with a bounded wait queue for heavy endpoints, so a
+burst of large uploads is queued or turned away instead of exhausting memory.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from . import metrics
+
+IN_FLIGHT = metrics.registry.gauge(
+    'hsrm_admission_in_flight',
+    'Weight units currently admitted, by pool.'
+)
+QUEUE_DEPTH = metrics.registry.gauge(
+    'hsrm_admission_queue_depth',
+    'Requests waiting for admission, by pool.'
+)
+REJECTED_TOTAL = metrics.registry.counter(
+    'hsrm_admission_rejected_total',
+    'Requests turned away, by pool and reason (queue_full, timeout).'
+)
+WAIT_SECONDS = metrics.registry.histogram(
+    'hsrm_admission_wait_seconds',
+    'Time admitted requests waited in the queue, by pool.'
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can't be admitted; carries the HTTP status to return."""
+
+    def __init__(self, pool: str, reason: str, status: int, retry_after: int):
+        super().__init__(f"Server busy ({pool}: {reason})")
+        self.pool = pool
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """
+    Weighted semaphore with a bounded FIFO wait queue.
+
+    Each request takes ``weight`` units out of ``capacity``. When there isn't room
+    it waits in line; if the line is full it is rejected with 429 straight away,
+    and if it waits longer than ``queue_timeout`` it is rejected with 503.
+    """
+
+    def __init__(self, name: str, capacity: int, max_queue: int = 16,
+                 queue_timeout: float = 10.0, retry_after: int = 5):
+        """
+        Args:
+            name: Pool name used in metrics and error messages
+            capacity: Total weight units allowed in flight (0 disables the limit)
+            max_queue: Requests allowed to wait for admission
+            queue_timeout: Seconds a request may wait before it is rejected
+            retry_after: Seconds suggested to clients in the Retry-After header
+        """
+        self.name = name
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self._waiters = deque()
+        self._cond = threading.Condition()
+
+        IN_FLIGHT.set(0, pool=name)
+        QUEUE_DEPTH.set(0, pool=name)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def acquire(self, weight: int = 1) -> int:
+        """
+        Wait for room for ``weight`` units.
+
+        Args:
+            weight: Cost of the request; clamped to 1..capacity so oversized
+                requests still run, just on their own
+
+        Returns:
+            The weight actually taken (pass it to ``release``)
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait times out
+        """
+        if self.capacity <= 0:
+            return 0
+        weight = min(max(int(weight), 1), self.capacity)
+
+        with self._cond:
+            # Fast path: nobody waiting and there is room
+            if not self._waiters and self.in_flight + weight <= self.capacity:
+                self._admit(weight)
+                WAIT_SECONDS.observe(0.0, pool=self.name)
+                return weight
+
+            if len(self._waiters) >= self.max_queue:
+                REJECTED_TOTAL.inc(pool=self.name, reason='queue_full')
+                raise AdmissionRejected(self.name, 'queue_full', 429, self.retry_after)
+
+            ticket = object()
+            self._waiters.append(ticket)
+            QUEUE_DEPTH.set(len(self._waiters), pool=self.name)
+            start = time.monotonic()
+            deadline = start + self.queue_timeout
+            try:
+                # FIFO: only the head of the line may take capacity, so big requests aren't starved
+                while self._waiters[0] is not ticket or self.in_flight + weight > self.capacity:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        REJECTED_TOTAL.inc(pool=self.name, reason='timeout')
+                        raise AdmissionRejected(self.name, 'timeout', 503, self.retry_after)
+                    self._cond.wait(remaining)
+                self._admit(weight)
+            finally:
+                self._waiters.remove(ticket)
+                QUEUE_DEPTH.set(len(self._waiters), pool=self.name)
+                # The new head may fit now (or we left the line); let waiters re-check
+                self._cond.notify_all()
+
+            WAIT_SECONDS.observe(time.monotonic() - start, pool=self.name)
+            return weight
+
+    def release(self, weight: int):
+        """Return ``weight`` units taken by ``acquire``."""
+        if weight <= 0:
+            return
+        with self._cond:
+            self.in_flight -= weight
+            IN_FLIGHT.set(self.in_flight, pool=self.name)
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, weight: int = 1):
+        """Hold ``weight`` units for the duration of the ``with`` block."""
+        taken = self.acquire(weight)
+        try:
+            yield
+        finally:
+            self.release(taken)
+
+    def status(self) -> dict:
+        return {
+            'capacity': self.capacity,
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth,
+            'max_queue': self.max_queue
+        }
+
+    def _admit(self, weight: int):
+        self.in_flight += weight
+        IN_FLIGHT.set(self.in_flight, pool=self.name)
+
+
+def weight_for_bytes(size: int, unit: int = 1024 * 1024) -> int:
+    """Weight for a request body of ``size`` bytes (one unit per ``unit`` bytes, at least 1)."""
+    return max(1, math.ceil((size or 0) / unit))
+
+
+def weight_for_rows(count: int, unit: int = 1000) -> int:
+    """Weight for ``count`` rows (one unit per ``unit`` rows, at least 1)."""
+    return max(1, math.ceil((count or 0) / unit))
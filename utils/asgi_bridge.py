@@ -0,0 +1,316 @@
+"""
+ASGI Bridge Module
+Serves the Flask (WSGI) app from an asyncio server. Request bodies are read and
+responses are sent on the event loop; the Flask view itself runs in one of two
+bounded executors so heavy parse/generate work can't starve cheap endpoints.
+"""
+
+import asyncio
+import importlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from . import metrics
+
+# Path prefixes that parse files, generate messages or build exports
+DEFAULT_HEAVY_PATHS = ('/upload', '/generate', '/download/csv', '/download/zip', '/download/mbox', '/download/eml')
+
+# Heavy paths that leave state in the app (/generate indexes a roster that later
+# /rosters/<id>/... requests need); in process mode they run on threads in this process
+DEFAULT_LOCAL_PATHS = ('/generate',)
+
+# Response bytes collected per executor hop when streaming a body
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# WSGI app built by each heavy worker process (process mode only)
+_worker_app = None
+
+EXECUTOR_WAIT_SECONDS = metrics.registry.histogram(
+    'hsrm_executor_wait_seconds',
+    'Time requests spent queued for a worker thread, by pool.'
+)
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client goes away before its request body has been received."""
+
+
+class WsgiToAsgi:
+    """ASGI application wrapping a WSGI app with separate heavy and light executors."""
+
+    def __init__(self, wsgi_app, heavy_workers: int = None, light_workers: int = 8,
+                 heavy_paths: tuple = DEFAULT_HEAVY_PATHS, max_body_size: int = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, heavy_executor: str = 'thread',
+                 app_factory: str = None, local_paths: tuple = DEFAULT_LOCAL_PATHS):
+        """
+        Args:
+            wsgi_app: WSGI callable (the Flask app)
+            heavy_workers: Threads (or processes) for heavy endpoints (default: CPU count)
+            light_workers: Threads for everything else (pages, templates, metrics)
+            heavy_paths: Path prefixes routed to the heavy pool
+            max_body_size: Reject larger request bodies with 413 (None for no limit)
+            chunk_size: Response bytes gathered per executor hop when streaming
+            heavy_executor: 'thread', or 'process' to run heavy requests outside the GIL
+            app_factory: 'module:callable' that builds the WSGI app in each heavy
+                process (required for process mode)
+            local_paths: Heavy path prefixes that process mode still runs in this
+                process (on a 'heavy-local' thread pool), because they create state
+                such as rosters that other requests to this process need
+        """
+        if heavy_executor not in ('thread', 'process'):
+            raise ValueError(f"heavy_executor must be 'thread' or 'process', not {heavy_executor!r}")
+        if heavy_executor == 'process' and not app_factory:
+            raise ValueError("app_factory is required when heavy_executor is 'process'")
+
+        self.wsgi_app = wsgi_app
+        self.heavy_paths = tuple(heavy_paths)
+        self.max_body_size = max_body_size
+        self.chunk_size = chunk_size
+        self.heavy_executor = heavy_executor
+        self.local_paths = tuple(local_paths)
+
+        heavy_workers = heavy_workers or os.cpu_count() or 1
+        if heavy_executor == 'process':
+            heavy_pool = ProcessPoolExecutor(heavy_workers, initializer=_init_worker, initargs=(app_factory,))
+        else:
+            heavy_pool = ThreadPoolExecutor(heavy_workers, thread_name_prefix='hsrm-heavy')
+        self.pools = {
+            'heavy': heavy_pool,
+            'light': ThreadPoolExecutor(light_workers, thread_name_prefix='hsrm-light')
+        }
+        if heavy_executor == 'process':
+            self.pools['heavy-local'] = ThreadPoolExecutor(heavy_workers, thread_name_prefix='hsrm-heavy-local')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise NotImplementedError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    def pool_for(self, path: str) -> str:
+        """Name of the executor pool that handles ``path``."""
+        if not path.startswith(self.heavy_paths):
+            return 'light'
+        if self.heavy_executor == 'process' and path.startswith(self.local_paths):
+            return 'heavy-local'
+        return 'heavy'
+
+    def shutdown(self, wait: bool = True):
+        """Stop both executors, letting queued requests finish when ``wait`` is set."""
+        for pool in self.pools.values():
+            pool.shutdown(wait=wait)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Let in-flight work drain without blocking the event loop
+                await asyncio.get_running_loop().run_in_executor(None, self.shutdown)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        # Read the whole body on the loop so slow clients don't hold a worker thread
+        try:
+            body = await self._read_body(receive)
+        except ClientDisconnected:
+            # A half-received upload must not be parsed and handled as if it were whole
+            return
+        if body is None:
+            await _send_simple(send, 413, b'Request body too large')
+            return
+
+        loop = asyncio.get_running_loop()
+        pool_name = self.pool_for(scope['path'])
+        pool = self.pools[pool_name]
+        environ = _build_environ(scope, body)
+
+        if pool_name == 'heavy' and self.heavy_executor == 'process':
+            # The worker process returns the whole response; only the body chunks are streamed here
+            status, headers, content = await loop.run_in_executor(pool, _run_in_worker, _portable_environ(environ), body)
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            for start in range(0, max(len(content), 1), self.chunk_size):
+                chunk = content[start:start + self.chunk_size]
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': start + self.chunk_size < len(content)})
+            return
+
+        status, headers, chunk, iterator = await loop.run_in_executor(
+            pool, self._start, environ, pool_name, time.perf_counter()
+        )
+        try:
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            while iterator is not None:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk, iterator = await loop.run_in_executor(pool, self._next_chunk, iterator)
+            await send({'type': 'http.response.body', 'body': chunk})
+        finally:
+            if iterator is not None:
+                await loop.run_in_executor(pool, _close, iterator)
+
+    async def _read_body(self, receive):
+        """
+        Collect the request body, or return None once it exceeds max_body_size.
+
+        Raises:
+            ClientDisconnected: If the client disconnects before the body is complete
+        """
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise ClientDisconnected()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if self.max_body_size is not None and size > self.max_body_size:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                break
+        return b''.join(chunks)
+
+    def _start(self, environ: dict, pool_name: str, queued_at: float) -> tuple:
+        """Run the WSGI app in a worker thread and collect the first chunk of its body."""
+        EXECUTOR_WAIT_SECONDS.observe(time.perf_counter() - queued_at, pool=pool_name)
+
+        response_start = {}
+        iterator = _ClosingIterator(self.wsgi_app(environ, _start_response(response_start)))
+        chunk, iterator = self._next_chunk(iterator)
+        return response_start['status'], response_start['headers'], chunk, iterator
+
+    def _next_chunk(self, iterator) -> tuple:
+        """Gather up to chunk_size bytes; the iterator is returned as None once exhausted."""
+        parts = []
+        size = 0
+        for part in iterator:
+            if part:
+                parts.append(part)
+                size += len(part)
+                if size >= self.chunk_size:
+                    return b''.join(parts), iterator
+        iterator.close()
+        return b''.join(parts), None
+
+
+class _ClosingIterator:
+    """Iterator over a WSGI response that remembers to call its close()."""
+
+    def __init__(self, iterable):
+        self._iterable = iterable
+        self._iter = iter(iterable)
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iter)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            close = getattr(self._iterable, 'close', None)
+            if close is not None:
+                close()
+
+
+def _close(iterator):
+    iterator.close()
+
+
+def _start_response(response_start: dict):
+    """WSGI start_response that stores the status and ASGI-style headers in ``response_start``."""
+    def start_response(status, response_headers, exc_info=None):
+        if exc_info and response_start:
+            raise exc_info[1].with_traceback(exc_info[2])
+        response_start['status'] = int(status.split(' ', 1)[0])
+        response_start['headers'] = [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in response_headers
+        ]
+    return start_response
+
+
+def _init_worker(app_factory: str):
+    """Build the WSGI app once per heavy worker process."""
+    global _worker_app
+    module_name, _, factory_name = app_factory.partition(':')
+    factory = getattr(importlib.import_module(module_name), factory_name)
+    _worker_app = factory()
+
+
+def _portable_environ(environ: dict) -> dict:
+    """Environ without the stream objects, so it can be pickled to a worker process."""
+    return {key: value for key, value in environ.items() if key not in ('wsgi.input', 'wsgi.errors')}
+
+
+def _run_in_worker(environ: dict, body: bytes) -> tuple:
+    """Handle one request inside a heavy worker process and return the full response."""
+    environ = dict(environ, **{'wsgi.input': io.BytesIO(body), 'wsgi.errors': sys.stderr})
+    response_start = {}
+    iterator = _ClosingIterator(_worker_app(environ, _start_response(response_start)))
+    try:
+        content = b''.join(iterator)
+    finally:
+        iterator.close()
+    return response_start['status'], response_start['headers'], content
+
+
+def _build_environ(scope: dict, body: bytes) -> dict:
+    """Translate an ASGI HTTP scope into a WSGI environ (PEP 3333)."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    raw_path = scope.get('raw_path')
+    path = raw_path.split(b'?', 1)[0].decode('latin-1') if raw_path else scope['path'].encode('utf-8').decode('latin-1')
+    root_path = scope.get('root_path', '')
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path,
+        'PATH_INFO': path,
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_LENGTH':
+            continue
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+            continue
+        key = f'HTTP_{name}'
+        # Repeated headers are folded into one comma-separated value
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+    return environ
+
+
+async def _send_simple(send, status: int, body: bytes):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8'), (b'content-length', str(len(body)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,77 @@
+"""
+Assets Module
+Looks up fingerprinted bundles from the build_assets.py manifest and picks the
+best precompressed copy for a client's Accept-Encoding.
+"""
+
+import json
+import os
+
+# Preferred order when a client accepts several encodings
+ENCODING_PREFERENCE = ('br', 'gzip')
+
+
+class AssetManifest:
+    """Maps source asset paths (``js/app.js``) to their built, fingerprinted files."""
+
+    def __init__(self, dist_dir: str, url_prefix: str = '/assets'):
+        """
+        Args:
+            dist_dir: Folder holding the built files and manifest.json
+            url_prefix: URL path the built files are served under
+        """
+        self.dist_dir = dist_dir
+        self.url_prefix = url_prefix.rstrip('/')
+        self.entries = {}
+        self._by_file = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.entries)
+
+    def load(self) -> bool:
+        """Read manifest.json; returns False (and serves raw files) if there isn't one."""
+        path = os.path.join(self.dist_dir, 'manifest.json')
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        self._by_file = {entry['file']: entry for entry in self.entries.values()}
+        return self.enabled
+
+    def url(self, path: str):
+        """
+        URL of the built file for ``path``.
+
+        Args:
+            path: Source path relative to static/ (e.g. 'css/style.css')
+
+        Returns:
+            URL string, or None when the asset isn't in the manifest
+        """
+        entry = self.entries.get(path)
+        if entry is None:
+            return None
+        return f"{self.url_prefix}/{entry['file']}"
+
+    def resolve(self, filename: str, accept_encodings) -> tuple:
+        """
+        Choose which file on disk answers a request for a built asset.
+
+        Args:
+            filename: Built file name as requested (e.g. 'js/app.3f2a1b9c0d4e.js')
+            accept_encodings: Request's Accept-Encoding (werkzeug MIMEAccept-like, supports ``in``)
+
+        Returns:
+            (file_name, content_encoding) where content_encoding is None for the
+            uncompressed file, or (None, None) for an unknown asset
+        """
+        entry = self._by_file.get(filename)
+        if entry is None:
+            return None, None
+        for encoding in ENCODING_PREFERENCE:
+            variant = entry['encodings'].get(encoding)
+            if variant is not None and encoding in accept_encodings:
+                return variant['file'], encoding
+        return entry['file'], None
@@ -0,0 +1,126 @@
+"""
+Format Backends Module
+Registry of upload formats. Each backend's heavy dependencies (pandas,
+pdfplumber, python-docx) are imported on first use, and formats are detected
+by sniffing magic bytes rather than trusting the file extension.
+"""
+
+import importlib
+import threading
+import zipfile
+from types import SimpleNamespace
+from .metrics import stage
+
+# Bytes read from the start of a file for format detection
+SNIFF_BYTES = 8192
+
+
+def _sniff_pdf(head: bytes, filepath: str) -> bool:
+    # The header may be preceded by junk bytes; readers accept it within the first 1KB
+    return b'%PDF-' in head[:1024]
+
+
+def _sniff_docx(head: bytes, filepath: str) -> bool:
+    if not head.startswith(b'PK\x03\x04'):
+        return False
+    try:
+        with zipfile.ZipFile(filepath) as archive:
+            return 'word/document.xml' in archive.namelist()
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+
+def _sniff_csv(head: bytes, filepath: str) -> bool:
+    # Anything that looks like text; NUL bytes mean a binary format we don't read
+    if not head or b'\x00' in head:
+        return False
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sniff window is fine
+        if e.start < len(head) - 4:
+            return False
+    return True
+
+
+class FormatBackend:
+    """An upload format: how to recognise it and which modules it needs."""
+
+    def __init__(self, name: str, extensions: list, modules: dict, sniff):
+        """
+        Args:
+            name: Format name (also the FileParser ``_parse_<name>`` suffix)
+            extensions: File extensions normally used for the format
+            modules: Mapping of attribute name to importable module path
+            sniff: Callable(head_bytes, filepath) -> bool
+        """
+        self.name = name
+        self.extensions = extensions
+        self.modules = modules
+        self.sniff = sniff
+        self._loaded = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded is not None
+
+    def load(self) -> SimpleNamespace:
+        """Import the backend's modules (once) and return them as attributes."""
+        if self._loaded is None:
+            with self._lock:
+                if self._loaded is None:
+                    with stage(f'backend.load.{self.name}'):
+                        self._loaded = SimpleNamespace(**{
+                            alias: importlib.import_module(module)
+                            for alias, module in self.modules.items()
+                        })
+        return self._loaded
+
+
+class BackendRegistry:
+    """Registered formats, in detection order."""
+
+    def __init__(self):
+        self._backends = {}
+
+    def register(self, backend: FormatBackend):
+        self._backends[backend.name] = backend
+
+    def get(self, name: str) -> FormatBackend:
+        return self._backends[name]
+
+    def names(self) -> list:
+        return list(self._backends)
+
+    def extensions(self) -> set:
+        return {ext for backend in self._backends.values() for ext in backend.extensions}
+
+    def load(self, name: str) -> SimpleNamespace:
+        """Import and return the modules for a format."""
+        return self._backends[name].load()
+
+    def detect(self, filepath: str):
+        """
+        Detect a file's format from its content.
+
+        Args:
+            filepath: Path to the file
+
+        Returns:
+            Backend name, or None if no backend recognises the file
+        """
+        with open(filepath, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+
+        for backend in self._backends.values():
+            if backend.sniff(head, filepath):
+                return backend.name
+        return None
+
+
+# Binary formats first: the CSV sniffer accepts anything that looks like text
+registry = BackendRegistry()
+registry.register(FormatBackend('pdf', ['pdf'], {'pd': 'pandas', 'pdfplumber': 'pdfplumber'}, _sniff_pdf))
+registry.register(FormatBackend('docx', ['docx'], {'pd': 'pandas', 'docx': 'docx'}, _sniff_docx))
+registry.register(FormatBackend('csv', ['csv'], {'pd': 'pandas'}, _sniff_csv))
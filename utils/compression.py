@@ -0,0 +1,159 @@
+"""
+Compression Module
+Content-negotiated gzip/brotli compression for large responses, and a WSGI
+middleware that accepts gzip-compressed request bodies.
+"""
+
+import gzip
+import io
+import zlib
+from werkzeug.exceptions import BadRequest, LengthRequired, RequestEntityTooLarge
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Responses smaller than this aren't worth compressing
+DEFAULT_MIN_SIZE = 1024
+
+# Fastest levels: message lists are so repetitive that higher levels cost several
+# times the CPU for little extra saving (15 MB of messages -> 88 KB br / 226 KB gzip)
+GZIP_LEVEL = 1
+BROTLI_QUALITY = 1
+
+# Compressed request bytes read (and inflated) per step
+READ_CHUNK_SIZE = 64 * 1024
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/csv', 'text/plain', 'text/html')
+
+
+def choose_encoding(accept_encodings) -> str:
+    """Best encoding the client accepts ('br', 'gzip'), or None."""
+    if brotli is not None and 'br' in accept_encodings:
+        return 'br'
+    if 'gzip' in accept_encodings:
+        return 'gzip'
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response, accept_encodings, min_size: int = DEFAULT_MIN_SIZE):
+    """
+    Compress a buffered response in place when it's worth it.
+
+    Args:
+        response: Flask/werkzeug response
+        accept_encodings: The request's Accept-Encoding
+        min_size: Smallest body (bytes) to compress
+
+    Returns:
+        The same response object
+    """
+    # Streamed and file responses (send_file) are left alone, as are already-encoded ones
+    if (response.direct_passthrough or not response.is_sequence or response.status_code != 200
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    encoding = choose_encoding(accept_encodings)
+    if encoding is None:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+
+    # The compressed body is a different representation; keep the tag but mark it weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+class DecompressRequestMiddleware:
+    """Transparently inflate request bodies sent with ``Content-Encoding: gzip``."""
+
+    def __init__(self, wsgi_app, max_size: int = None):
+        """
+        Args:
+            wsgi_app: WSGI application to wrap
+            max_size: Reject bodies that inflate beyond this many bytes (None for no limit)
+        """
+        self.wsgi_app = wsgi_app
+        self.max_size = max_size
+
+    def __call__(self, environ, start_response):
+        encoding = environ.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+        if encoding not in ('gzip', 'x-gzip'):
+            return self.wsgi_app(environ, start_response)
+
+        try:
+            body = self._inflate(environ)
+        except (RequestEntityTooLarge, LengthRequired, BadRequest) as e:
+            return e(environ, start_response)
+
+        environ['wsgi.input'] = io.BytesIO(body)
+        environ['CONTENT_LENGTH'] = str(len(body))
+        del environ['HTTP_CONTENT_ENCODING']
+        return self.wsgi_app(environ, start_response)
+
+    def _inflate(self, environ) -> bytes:
+        """Read and inflate the body a chunk at a time, enforcing max_size on both sides."""
+        stream = environ['wsgi.input']
+        remaining = self._compressed_length(environ)
+        limit = self.max_size if self.max_size is not None else 0
+
+        # Inflate in bounded steps so a tiny "zip bomb" can't balloon memory
+        inflater = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        parts = []
+        size = 0
+        read = 0
+        try:
+            while remaining is None or remaining > 0:
+                data = stream.read(READ_CHUNK_SIZE if remaining is None else min(READ_CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                read += len(data)
+                if remaining is not None:
+                    remaining -= len(data)
+                elif limit and read > limit:
+                    raise RequestEntityTooLarge()
+                while data:
+                    chunk = inflater.decompress(data, 1024 * 1024)
+                    parts.append(chunk)
+                    size += len(chunk)
+                    if limit and size > limit:
+                        raise RequestEntityTooLarge()
+                    data = inflater.unconsumed_tail
+            tail = inflater.flush()
+            if limit and size + len(tail) > limit:
+                raise RequestEntityTooLarge()
+            parts.append(tail)
+        except zlib.error:
+            raise BadRequest('Request body is not valid gzip data.')
+        return b''.join(parts)
+
+    def _compressed_length(self, environ):
+        """Declared body length (None for a server-terminated chunked body), checked against max_size."""
+        length = environ.get('CONTENT_LENGTH', '').strip()
+        if not length:
+            # Servers that de-chunk the body mark the stream as ending at the body's end
+            if environ.get('wsgi.input_terminated'):
+                return None
+            raise LengthRequired()
+        if not length.isdigit():
+            raise BadRequest('Invalid Content-Length header.')
+        length = int(length)
+        if self.max_size is not None and length > self.max_size:
+            raise RequestEntityTooLarge()
+        return length
@@ -0,0 +1,311 @@
+"""
+Dedup Module
+Finds contacts that are the same person across uploads and batches: emails
+that differ only in case or Gmail dots/+tags, or a new email with the same
+phone and name. Records are grouped by blocking keys (normalized email,
+E.164 phone, Soundex of the last name plus first initial), so only records
+sharing a key are compared; the pairs are scored and the ones above the
+threshold are merged.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+from .normalizer import normalize_phone
+
+# Pair score at which two records are treated as the same person
+MERGE_THRESHOLD = 0.6
+
+# Blocks larger than this (a shared office phone, a very common name) are skipped
+MAX_BLOCK_SIZE = 100
+
+# Score for each matching signal; a clashing first name counts against the pair
+EMAIL_WEIGHT = 0.6
+EMAIL_NAME_WEIGHT = 0.2
+PHONE_WEIGHT = 0.35
+LAST_NAME_WEIGHT = 0.25
+LAST_NAME_SOUND_WEIGHT = 0.15
+FIRST_NAME_WEIGHT = 0.15
+FIRST_INITIAL_WEIGHT = 0.05
+FIRST_NAME_CLASH = -0.3
+
+# Merged records keep the most decisive tracking status
+STATUS_PRIORITY = ('signed', 'declined', 'responded', 'pending')
+
+# Shortest email name (the part before @) that counts as a signal at another domain
+MIN_EMAIL_NAME = 4
+
+# Domains whose local part ignores dots
+DOTLESS_DOMAINS = {'gmail.com': 'gmail.com', 'googlemail.com': 'gmail.com'}
+
+_NON_LETTERS = re.compile(r'[^a-z]')
+_SOUNDEX_CODES = {letter: digit for digit, letters in (
+    ('1', 'bfpv'), ('2', 'cgjkqsxz'), ('3', 'dt'), ('4', 'l'), ('5', 'mn'), ('6', 'r')
+) for letter in letters}
+
+
+def _text(value) -> str:
+    """A field as a string: '' when missing, str() of numbers and other JSON values."""
+    return '' if value is None else value if isinstance(value, str) else str(value)
+
+
+def _emails(value) -> list:
+    """The addresses in a merged_emails field (a list, or one address), as strings."""
+    values = value if isinstance(value, list) else [value]
+    return [_text(email) for email in values if email not in (None, '')]
+
+
+def normalize_email(email: str) -> str:
+    """
+    Email blocking key: lowercased, without a +tag, and without dots for Gmail.
+
+    Args:
+        email: Address as entered
+
+    Returns:
+        Normalized address, or '' if it isn't one
+    """
+    local, _, domain = _text(email).strip().lower().rpartition('@')
+    if not local or not domain:
+        return ''
+    local = local.split('+', 1)[0]
+    if domain in DOTLESS_DOMAINS:
+        domain = DOTLESS_DOMAINS[domain]
+        local = local.replace('.', '')
+    return f'{local}@{domain}'
+
+
+@lru_cache(maxsize=65536)
+def soundex(name: str) -> str:
+    """American Soundex code of a lowercase ASCII name ('' if it has no letters)."""
+    if not name:
+        return ''
+    code, last = name[0], _SOUNDEX_CODES.get(name[0], '')
+    for letter in name[1:]:
+        digit = _SOUNDEX_CODES.get(letter, '')
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        # h and w don't separate letters with the same code; vowels do
+        if letter not in 'hw':
+            last = digit
+    return code.ljust(4, '0')
+
+
+@lru_cache(maxsize=65536)
+def _name_part(value: str) -> str:
+    """Lowercase ASCII letters of a name, accents removed."""
+    value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii')
+    return _NON_LETTERS.sub('', value.lower())
+
+
+def _names(record: dict) -> tuple:
+    """(first, last) name of a record, from first_name/last_name or its full name."""
+    tokens = _text(record.get('name')).split()
+    first = _text(record.get('first_name')) or (tokens[0] if tokens else '')
+    last = _text(record.get('last_name')) or (tokens[-1] if len(tokens) > 1 else '')
+    return _name_part(first), _name_part(last)
+
+
+class DuplicateFinder:
+    """Groups and merges records that belong to the same person."""
+
+    def __init__(self, threshold: float = MERGE_THRESHOLD, country_code: str = '1',
+                 max_block: int = MAX_BLOCK_SIZE):
+        """
+        Args:
+            threshold: Pair score (0-1) from which records are merged
+            country_code: Country code assumed for phone numbers without one
+            max_block: Largest block of records sharing a key that is compared
+        """
+        self.threshold = threshold
+        self.country_code = country_code
+        self.max_block = max_block
+
+    def features(self, record: dict) -> tuple:
+        """
+        (email key, E.164 phone, first name, last name, Soundex of the last name,
+        email name without dots) of a record.
+        """
+        first, last = _names(record)
+        email = normalize_email(record.get('email'))
+        return (
+            email,
+            normalize_phone(record.get('phone'), self.country_code)[0],
+            first,
+            last,
+            soundex(last),
+            email.partition('@')[0].replace('.', '')
+        )
+
+    def find(self, records: list) -> list:
+        """
+        Find groups of duplicate records.
+
+        Args:
+            records: Contact dicts (name/first_name/last_name, email, phone)
+
+        Returns:
+            List of {'ids', 'score', 'reasons'}: the indexes of each group's records
+            (the first one is kept when merging), the lowest score that joined the
+            group and the signals that matched; groups are in order of their first record
+        """
+        features = [self.features(record) for record in records]
+        parent = list(range(len(records)))
+        scores, reasons = {}, {}
+
+        def root(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        # Most pairs from name blocks share nothing else, and names alone may not reach the threshold
+        names_suffice = LAST_NAME_WEIGHT + FIRST_NAME_WEIGHT >= self.threshold
+        for members in self._blocks(features):
+            for n, a in enumerate(members):
+                fa = features[a]
+                for b in members[n + 1:]:
+                    fb = features[b]
+                    if not names_suffice and fa[0] != fb[0] and fa[1] != fb[1] and fa[5] != fb[5]:
+                        continue
+                    ra, rb = root(a), root(b)
+                    # Already joined through another key
+                    if ra == rb:
+                        continue
+                    score, matched = _score(fa, fb)
+                    if score < self.threshold:
+                        continue
+                    # The lower index stays the root, so a group's first record is its root
+                    ra, rb = min(ra, rb), max(ra, rb)
+                    parent[rb] = ra
+                    scores[ra] = min(scores.get(ra, 1.0), scores.pop(rb, 1.0), score)
+                    reasons.setdefault(ra, set()).update(reasons.pop(rb, ()), matched)
+
+        groups = {}
+        for i in range(len(records)):
+            r = root(i)
+            if r in scores:
+                groups.setdefault(r, []).append(i)
+        return [
+            {'ids': ids, 'score': round(scores[r], 2), 'reasons': sorted(reasons[r])}
+            for r, ids in sorted(groups.items())
+        ]
+
+    def merge(self, records: list, groups: list = None) -> list:
+        """
+        Merge each group of duplicates into its first record.
+
+        Empty fields of the kept record are filled from the others, the most
+        decisive status is kept, and the other addresses are listed in
+        ``merged_emails``.
+
+        Args:
+            records: Contact dicts
+            groups: Groups from find() (found here if not given)
+
+        Returns:
+            The records with each group replaced by one merged record, in order
+        """
+        if groups is None:
+            groups = self.find(records)
+        merged, dropped = {}, set()
+        for group in groups:
+            first, *others = group['ids']
+            merged[first] = merge_records([records[i] for i in group['ids']])
+            dropped.update(others)
+        return [merged.get(i, record) for i, record in enumerate(records) if i not in dropped]
+
+    def _blocks(self, features: list):
+        """Lists of record indexes sharing a blocking key (each list has 2 to max_block records)."""
+        blocks = {}
+        for i, (email, phone, first, _, last_sound, _) in enumerate(features):
+            if email:
+                blocks.setdefault(('email', email), []).append(i)
+            if phone:
+                blocks.setdefault(('phone', phone), []).append(i)
+            if first and last_sound:
+                blocks.setdefault(('name', last_sound, first[0]), []).append(i)
+        return (members for members in blocks.values() if 1 < len(members) <= self.max_block)
+
+
+def _score(a: tuple, b: tuple) -> tuple:
+    """(score, matched signals) of two records' features."""
+    email_a, phone_a, first_a, last_a, last_sound_a, email_name_a = a
+    email_b, phone_b, first_b, last_b, last_sound_b, email_name_b = b
+    score, matched = 0.0, []
+    if email_a and email_a == email_b:
+        score += EMAIL_WEIGHT
+        matched.append('email')
+    elif len(email_name_a) >= MIN_EMAIL_NAME and email_name_a == email_name_b:
+        # The same name at another domain (john.doe@gmail.com, johndoe@work.org)
+        score += EMAIL_NAME_WEIGHT
+        matched.append('email name')
+    if phone_a and phone_a == phone_b:
+        score += PHONE_WEIGHT
+        matched.append('phone')
+    if last_a and last_b:
+        if last_a == last_b:
+            score += LAST_NAME_WEIGHT
+            matched.append('last name')
+        elif last_sound_a == last_sound_b:
+            score += LAST_NAME_SOUND_WEIGHT
+            matched.append('last name sound')
+    if first_a and first_b:
+        if first_a == first_b:
+            score += FIRST_NAME_WEIGHT
+            matched.append('first name')
+        elif first_a.startswith(first_b) or first_b.startswith(first_a) or _one_edit_apart(first_a, first_b):
+            # An initial, a short form or a spelling variant ('J', 'Jon' for 'John')
+            score += FIRST_INITIAL_WEIGHT
+            matched.append('first name variant')
+        else:
+            score += FIRST_NAME_CLASH
+    return min(score, 1.0), matched
+
+
+def _one_edit_apart(a: str, b: str) -> bool:
+    """Whether two names of 3+ letters differ by one inserted, deleted or replaced letter."""
+    if min(len(a), len(b)) < 3 or abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    # Skip the differing letter of the longer name (or of both, when the lengths match)
+    return a[i + (len(a) == len(b)):] == b[i + 1:]
+
+
+def merge_records(records: list) -> dict:
+    """
+    Merge records of one person into a copy of the first.
+
+    Args:
+        records: The duplicate records, the one to keep first
+
+    Returns:
+        Merged record with ``merged_emails`` listing the other records' addresses
+    """
+    merged = dict(records[0])
+    for record in records[1:]:
+        for field, value in record.items():
+            if value not in (None, '', '-') and merged.get(field) in (None, '', '-'):
+                merged[field] = value
+
+    statuses = [record.get('status') for record in records if record.get('status') in STATUS_PRIORITY]
+    if statuses:
+        merged['status'] = min(statuses, key=STATUS_PRIORITY.index)
+
+    aliases = _emails(merged.get('merged_emails'))
+    emails = {_text(merged.get('email')).lower(), *(email.lower() for email in aliases)}
+    for record in records[1:]:
+        for email in _emails([record.get('email'), *_emails(record.get('merged_emails'))]):
+            if email.lower() not in emails:
+                emails.add(email.lower())
+                aliases.append(email)
+    if aliases:
+        merged['merged_emails'] = aliases
+    return merged
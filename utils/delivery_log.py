@@ -0,0 +1,187 @@
+"""
+Delivery Log Module
+SQLite record of every message the mailer has finished: who it went to, its
+Message-ID, the outcome and how many attempts it took. Results are buffered
+and written in batches so logging keeps up with the senders.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    job_id TEXT NOT NULL,
+    record_key TEXT NOT NULL,
+    roster_id TEXT,
+    email TEXT,
+    message_id TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_id, record_key)
+);
+CREATE INDEX IF NOT EXISTS deliveries_message_id ON deliveries (message_id);
+CREATE INDEX IF NOT EXISTS deliveries_email ON deliveries (email);
+"""
+
+# Message-IDs per lookup query
+LOOKUP_BATCH = 500
+
+COLUMNS = ('job_id', 'record_key', 'roster_id', 'email', 'message_id', 'status', 'attempts', 'error', 'updated_at')
+
+
+class DeliveryLog:
+    """Append-mostly log of delivery results, safe to use from several threads."""
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 1.0):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            batch_size: Buffered results that trigger a write
+            flush_interval: Seconds after which buffered results are written anyway
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (call with the lock held)."""
+        if self._db is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def record(self, job_id: str, key, result: dict, roster_id: str = None):
+        """
+        Buffer one message's result (see Mailer.submit for its fields).
+
+        Args:
+            job_id: Delivery job the message belongs to
+            key: The message's key within the job (e.g. its roster record id)
+            result: Result dict with status, email, message_id, attempts and error
+            roster_id: Roster the message was generated for, if any
+        """
+        row = (job_id, str(key), roster_id, result.get('email'), result.get('message_id'),
+               result['status'], result.get('attempts', 0), result.get('error'), time.time())
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        """Write buffered results now."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        db = self._connection()
+        with db:
+            db.executemany(
+                f"INSERT OR REPLACE INTO deliveries ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows
+            )
+
+    def find(self, message_id: str = None, email: str = None, limit: int = 100) -> list:
+        """
+        Logged results for a Message-ID or a recipient, newest first.
+
+        Args:
+            message_id: Message-ID header value (with angle brackets)
+            email: Recipient address
+            limit: Maximum rows returned
+
+        Returns:
+            List of result dicts
+        """
+        clauses, params = [], []
+        if message_id:
+            clauses.append('message_id = ?')
+            params.append(message_id)
+        if email:
+            clauses.append('email = ?')
+            params.append(email)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._lock:
+            self._flush()
+            rows = self._connection().execute(
+                f"SELECT {', '.join(COLUMNS)} FROM deliveries {where} ORDER BY updated_at DESC LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def job_summary(self, job_id: str, errors: int = 20):
+        """
+        Logged outcome of one job.
+
+        Args:
+            job_id: Delivery job id
+            errors: Failures listed at most
+
+        Returns:
+            Dict with counts ({status: messages}), errors ([{key, error}]) and
+            updated_at (last result), or None if nothing is logged for the job
+        """
+        with self._lock:
+            self._flush()
+            db = self._connection()
+            counts = dict(db.execute('SELECT status, COUNT(*) FROM deliveries WHERE job_id = ? GROUP BY status',
+                                     (job_id,)).fetchall())
+            if not counts:
+                return None
+            failures = db.execute(
+                "SELECT record_key, error FROM deliveries WHERE job_id = ? AND status = 'failed' LIMIT ?",
+                (job_id, errors)
+            ).fetchall()
+            updated_at = db.execute('SELECT MAX(updated_at) FROM deliveries WHERE job_id = ?', (job_id,)).fetchone()[0]
+        return {
+            'counts': counts,
+            'errors': [{'key': key, 'error': error} for key, error in failures],
+            'updated_at': updated_at
+        }
+
+    def recipients(self, message_ids) -> dict:
+        """
+        Recipient addresses of sent messages, looked up in batches through the Message-ID index.
+
+        Args:
+            message_ids: Message-ID header values (with angle brackets)
+
+        Returns:
+            {message_id: email} for the ids that are in the log
+        """
+        message_ids = list(set(message_ids))
+        found = {}
+        with self._lock:
+            self._flush()
+            db = self._connection()
+            # Stay well under SQLite's limit on bound parameters
+            for start in range(0, len(message_ids), LOOKUP_BATCH):
+                batch = message_ids[start:start + LOOKUP_BATCH]
+                found.update(db.execute(
+                    f"SELECT message_id, email FROM deliveries WHERE message_id IN ({', '.join('?' * len(batch))})",
+                    batch
+                ).fetchall())
+        return found
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
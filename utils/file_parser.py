@@ -1,12 +1,21 @@
 """
 File Parser Module
 Handles extraction of volunteer data from CSV, DOCX, and PDF files.
+
+pandas, pdfplumber and python-docx are loaded through the backend registry on
+first use, so importing this module stays cheap.
 """
 
+from __future__ import annotations
+
 import re
-import pandas as pd
-import pdfplumber
-from docx import Document
+from typing import TYPE_CHECKING
+from .backends import registry
+from .metrics import stage, record_rows
+from .normalizer import normalize_records
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 class FileParser:
@@ -31,6 +40,16 @@ class FileParser:
     # Phone regex pattern
     PHONE_PATTERN = re.compile(r'[\+]?[(]?[0-9]{3}[)]?[-\s\.]?[0-9]{3}[-\s\.]?[0-9]{4,6}')
     
+    # Punctuation stripped from names found in free text
+    NAME_CLEANUP_PATTERN = re.compile(r'[^\w\s]')
+    
+    def __init__(self, country_code: str = '1'):
+        """
+        Args:
+            country_code: Country code for phone numbers written without one
+        """
+        self.country_code = country_code
+    
     def parse(self, filepath: str) -> list:
         """
         Parse a file and extract volunteer data.
@@ -39,23 +58,36 @@ class FileParser:
             filepath: Path to the file to parse
             
         Returns:
-            List of dictionaries containing volunteer data
+            List of dictionaries containing volunteer data, with names, emails
+            and phones (E.164, extension in phone_ext) normalized
         """
-        extension = filepath.rsplit('.', 1)[1].lower()
-        
-        if extension == 'csv':
-            return self._parse_csv(filepath)
-        elif extension == 'docx':
-            return self._parse_docx(filepath)
-        elif extension == 'pdf':
-            return self._parse_pdf(filepath)
-        else:
+        # Detect the format from the file's content, not its extension
+        file_format = registry.detect(filepath)
+        if file_format is None:
+            extension = filepath.rsplit('.', 1)[-1].lower()
             raise ValueError(f"Unsupported file format: {extension}")
+        
+        with stage(f'parse.{file_format}'):
+            if file_format == 'csv':
+                volunteers = self._parse_csv(filepath)
+            elif file_format == 'docx':
+                volunteers = self._parse_docx(filepath)
+            else:
+                volunteers = self._parse_pdf(filepath)
+        
+        # Whole columns at once, after extraction, whatever the format
+        with stage('parse.normalize'):
+            volunteers = normalize_records(volunteers, self.country_code)
+        
+        record_rows('parse', len(volunteers))
+        return volunteers
     
     def _parse_csv(self, filepath: str) -> list:
         """Parse CSV file and extract volunteer data."""
         try:
-            df = pd.read_csv(filepath)
+            pd = registry.load('csv').pd
+            with stage('parse.read_csv'):
+                df = pd.read_csv(filepath)
             return self._extract_from_dataframe(df)
         except Exception as e:
             raise ValueError(f"Error parsing CSV: {str(e)}")
@@ -63,7 +95,9 @@ class FileParser:
     def _parse_docx(self, filepath: str) -> list:
         """Parse Word document and extract volunteer data."""
         try:
-            doc = Document(filepath)
+            docx = registry.load('docx').docx
+            with stage('parse.read_docx'):
+                doc = docx.Document(filepath)
             volunteers = []
             
             # First, try to find tables
@@ -84,16 +118,19 @@ class FileParser:
     def _parse_pdf(self, filepath: str) -> list:
         """Parse PDF file and extract volunteer data."""
         try:
+            backend = registry.load('pdf')
+            pd = backend.pd
             volunteers = []
             all_tables = []
             
-            with pdfplumber.open(filepath) as pdf:
-                # Extract all tables from all pages
-                for page in pdf.pages:
-                    tables = page.extract_tables()
-                    for table in tables:
-                        if table and len(table) > 1:  # Has header + data
-                            all_tables.append(table)
+            with backend.pdfplumber.open(filepath) as pdf:
+                with stage('parse.pdf_tables'):
+                    # Extract all tables from all pages
+                    for page in pdf.pages:
+                        tables = page.extract_tables()
+                        for table in tables:
+                            if table and len(table) > 1:  # Has header + data
+                                all_tables.append(table)
                 
                 # If we have multiple tables (multi-page PDF), try to merge them
                 if len(all_tables) >= 2:
@@ -106,7 +143,8 @@ class FileParser:
                 
                 # If no tables found, try to extract from text
                 if not volunteers:
-                    text = '\n'.join([page.extract_text() or '' for page in pdf.pages])
+                    with stage('parse.pdf_text'):
+                        text = '\n'.join([page.extract_text() or '' for page in pdf.pages])
                     volunteers = self._extract_from_text(text)
             
             return volunteers
@@ -115,79 +153,83 @@ class FileParser:
     
     def _merge_pdf_tables(self, tables: list) -> list:
         """Merge multiple PDF tables (e.g., two-page layout) into one dataset."""
-        # Convert all tables to DataFrames
-        dfs = []
-        for table in tables:
-            if table and len(table) > 1:
-                headers = table[0] if table[0] else [f'col_{i}' for i in range(len(table[1]))]
-                # Clean None values in headers
-                headers = [h if h else f'col_{i}' for i, h in enumerate(headers)]
-                df = pd.DataFrame(table[1:], columns=headers)
-                if not df.empty:
-                    dfs.append(df)
-        
-        if not dfs:
-            return []
+        pd = registry.load('pdf').pd
         
-        # Find the table with email addresses (primary table)
-        primary_df = None
-        secondary_dfs = []
-        
-        for df in dfs:
-            # Normalize column names for checking
-            cols_lower = [str(col).lower() for col in df.columns]
-            has_email = any('email' in col for col in cols_lower)
+        with stage('parse.merge_tables'):
+            # Convert all tables to DataFrames
+            dfs = []
+            for table in tables:
+                if table and len(table) > 1:
+                    headers = table[0] if table[0] else [f'col_{i}' for i in range(len(table[1]))]
+                    # Clean None values in headers
+                    headers = [h if h else f'col_{i}' for i, h in enumerate(headers)]
+                    df = pd.DataFrame(table[1:], columns=headers)
+                    if not df.empty:
+                        dfs.append(df)
             
-            if has_email and primary_df is None:
-                primary_df = df
-            else:
-                secondary_dfs.append(df)
-        
-        if primary_df is None:
-            # No email column found, just use first table
-            primary_df = dfs[0]
-            secondary_dfs = dfs[1:]
-        
-        # Extract from primary table first
-        volunteers = self._extract_from_dataframe(primary_df)
-        
-        # If we have secondary tables with the same number of rows, merge data
-        for sec_df in secondary_dfs:
-            if len(sec_df) == len(volunteers):
-                # Normalize secondary columns
-                sec_df.columns = [str(col).lower().strip().replace(' ', '_') for col in sec_df.columns]
-                
-                # Find interest/site column in secondary table
-                interest_col = self._find_column(sec_df.columns, self.INTEREST_COLUMNS)
-                location_col = self._find_column(sec_df.columns, self.LOCATION_COLUMNS)
-                referral_col = self._find_column(sec_df.columns, self.REFERRAL_COLUMNS)
+            if not dfs:
+                return []
+            
+            # Find the table with email addresses (primary table)
+            primary_df = None
+            secondary_dfs = []
+            
+            for df in dfs:
+                # Normalize column names for checking
+                cols_lower = [str(col).lower() for col in df.columns]
+                has_email = any('email' in col for col in cols_lower)
                 
-                for i, volunteer in enumerate(volunteers):
-                    if i < len(sec_df):
-                        row = sec_df.iloc[i]
-                        
-                        # Add interests if found and not already set
-                        if interest_col and (not volunteer.get('interests') or volunteer['interests'] == ''):
-                            val = str(row[interest_col]).strip()
-                            if val and val != 'nan':
-                                volunteer['interests'] = val
-                        
-                        # Add location if found and not already set
-                        if location_col and (not volunteer.get('location') or volunteer['location'] == ''):
-                            val = str(row[location_col]).strip()
-                            if val and val != 'nan':
-                                volunteer['location'] = val
-                        
-                        # Add referral if found and not already set
-                        if referral_col and (not volunteer.get('referral') or volunteer['referral'] == ''):
-                            val = str(row[referral_col]).strip()
-                            if val and val != 'nan':
-                                volunteer['referral'] = val
-        
-        return volunteers
+                if has_email and primary_df is None:
+                    primary_df = df
+                else:
+                    secondary_dfs.append(df)
+            
+            if primary_df is None:
+                # No email column found, just use first table
+                primary_df = dfs[0]
+                secondary_dfs = dfs[1:]
+            
+            # Extract from primary table first
+            volunteers = self._extract_from_dataframe(primary_df)
+            
+            # If we have secondary tables with the same number of rows, merge data
+            for sec_df in secondary_dfs:
+                if len(sec_df) == len(volunteers):
+                    # Normalize secondary columns
+                    sec_df.columns = [str(col).lower().strip().replace(' ', '_') for col in sec_df.columns]
+                    
+                    # Find interest/site column in secondary table
+                    interest_col = self._find_column(sec_df.columns, self.INTEREST_COLUMNS)
+                    location_col = self._find_column(sec_df.columns, self.LOCATION_COLUMNS)
+                    referral_col = self._find_column(sec_df.columns, self.REFERRAL_COLUMNS)
+                    
+                    for i, volunteer in enumerate(volunteers):
+                        if i < len(sec_df):
+                            row = sec_df.iloc[i]
+                            
+                            # Add interests if found and not already set
+                            if interest_col and (not volunteer.get('interests') or volunteer['interests'] == ''):
+                                val = str(row[interest_col]).strip()
+                                if val and val != 'nan':
+                                    volunteer['interests'] = val
+                            
+                            # Add location if found and not already set
+                            if location_col and (not volunteer.get('location') or volunteer['location'] == ''):
+                                val = str(row[location_col]).strip()
+                                if val and val != 'nan':
+                                    volunteer['location'] = val
+                            
+                            # Add referral if found and not already set
+                            if referral_col and (not volunteer.get('referral') or volunteer['referral'] == ''):
+                                val = str(row[referral_col]).strip()
+                                if val and val != 'nan':
+                                    volunteer['referral'] = val
+            
+            return volunteers
     
     def _table_to_dataframe(self, table) -> pd.DataFrame:
         """Convert a Word table to a pandas DataFrame."""
+        pd = registry.load('docx').pd
         data = []
         headers = None
         
@@ -207,147 +249,150 @@ class FileParser:
         if df.empty:
             return []
         
-        # Normalize column names
-        df.columns = [str(col).lower().strip().replace(' ', '_') for col in df.columns]
-        
-        # Find relevant columns
-        first_name_col = self._find_column(df.columns, self.FIRST_NAME_COLUMNS)
-        last_name_col = self._find_column(df.columns, self.LAST_NAME_COLUMNS)
-        name_col = self._find_column(df.columns, self.NAME_COLUMNS)
-        email_col = self._find_column(df.columns, self.EMAIL_COLUMNS)
-        phone_col = self._find_column(df.columns, self.PHONE_COLUMNS)
-        interest_col = self._find_column(df.columns, self.INTEREST_COLUMNS)
-        location_col = self._find_column(df.columns, self.LOCATION_COLUMNS)
-        referral_col = self._find_column(df.columns, self.REFERRAL_COLUMNS)
-        
-        volunteers = []
-        
-        for _, row in df.iterrows():
-            # Try to get email - this is required
-            email = None
-            if email_col:
-                email = str(row[email_col]).strip()
-            else:
-                # Try to find email in any column
-                for col in df.columns:
-                    val = str(row[col])
-                    match = self.EMAIL_PATTERN.search(val)
-                    if match:
-                        email = match.group()
-                        break
+        with stage('parse.resolve_columns'):
+            # Normalize column names
+            df.columns = [str(col).lower().strip().replace(' ', '_') for col in df.columns]
             
-            # Skip rows without email
-            if not email or email == 'nan' or '@' not in email:
-                continue
-            
-            # Get name - handle both separate first/last name columns and combined name
-            first_name = ''
-            last_name = ''
-            name = ''
-            
-            # Check for separate first/last name columns (HOPE form format)
-            if first_name_col:
-                first_name = str(row[first_name_col]).strip()
-                if first_name == 'nan':
-                    first_name = ''
-            
-            if last_name_col:
-                last_name = str(row[last_name_col]).strip()
-                if last_name == 'nan':
-                    last_name = ''
-            
-            # If we have first/last name, combine them
-            if first_name or last_name:
-                name = f"{first_name} {last_name}".strip()
-            # Otherwise try combined name column
-            elif name_col:
-                name = str(row[name_col]).strip()
-                if name == 'nan':
-                    name = ''
-                # Extract first name from combined name
-                if name:
-                    first_name = name.split()[0]
-            
-            # If still no name, try first column that's not email
-            if not name:
-                for col in df.columns:
-                    val = str(row[col]).strip()
-                    if val and val != 'nan' and '@' not in val and not self.PHONE_PATTERN.match(val):
-                        name = val
-                        first_name = val.split()[0] if val else ''
-                        break
-            
-            volunteer = {
-                'name': name,
-                'email': email,
-                'first_name': first_name if first_name else (name.split()[0] if name else ''),
-                'last_name': last_name,
-                'phone': '',
-                'interests': '',
-                'location': '',
-                'referral': ''
-            }
-            
-            # Get optional fields
-            if phone_col and str(row[phone_col]) != 'nan':
-                volunteer['phone'] = str(row[phone_col]).strip()
-            
-            if interest_col and str(row[interest_col]) != 'nan':
-                volunteer['interests'] = str(row[interest_col]).strip()
-            
-            if location_col and str(row[location_col]) != 'nan':
-                volunteer['location'] = str(row[location_col]).strip()
+            # Find relevant columns
+            first_name_col = self._find_column(df.columns, self.FIRST_NAME_COLUMNS)
+            last_name_col = self._find_column(df.columns, self.LAST_NAME_COLUMNS)
+            name_col = self._find_column(df.columns, self.NAME_COLUMNS)
+            email_col = self._find_column(df.columns, self.EMAIL_COLUMNS)
+            phone_col = self._find_column(df.columns, self.PHONE_COLUMNS)
+            interest_col = self._find_column(df.columns, self.INTEREST_COLUMNS)
+            location_col = self._find_column(df.columns, self.LOCATION_COLUMNS)
+            referral_col = self._find_column(df.columns, self.REFERRAL_COLUMNS)
+        
+        with stage('parse.extract_rows'):
+            volunteers = []
             
-            if referral_col and str(row[referral_col]) != 'nan':
-                volunteer['referral'] = str(row[referral_col]).strip()
+            for _, row in df.iterrows():
+                # Try to get email - this is required
+                email = None
+                if email_col:
+                    email = str(row[email_col]).strip()
+                else:
+                    # Try to find email in any column
+                    for col in df.columns:
+                        val = str(row[col])
+                        match = self.EMAIL_PATTERN.search(val)
+                        if match:
+                            email = match.group()
+                            break
+                
+                # Skip rows without email
+                if not email or email == 'nan' or '@' not in email:
+                    continue
+                
+                # Get name - handle both separate first/last name columns and combined name
+                first_name = ''
+                last_name = ''
+                name = ''
+                
+                # Check for separate first/last name columns (HOPE form format)
+                if first_name_col:
+                    first_name = str(row[first_name_col]).strip()
+                    if first_name == 'nan':
+                        first_name = ''
+                
+                if last_name_col:
+                    last_name = str(row[last_name_col]).strip()
+                    if last_name == 'nan':
+                        last_name = ''
+                
+                # If we have first/last name, combine them
+                if first_name or last_name:
+                    name = f"{first_name} {last_name}".strip()
+                # Otherwise try combined name column
+                elif name_col:
+                    name = str(row[name_col]).strip()
+                    if name == 'nan':
+                        name = ''
+                    # Extract first name from combined name
+                    if name:
+                        first_name = name.split()[0]
+                
+                # If still no name, try first column that's not email
+                if not name:
+                    for col in df.columns:
+                        val = str(row[col]).strip()
+                        if val and val != 'nan' and '@' not in val and not self.PHONE_PATTERN.match(val):
+                            name = val
+                            first_name = val.split()[0] if val else ''
+                            break
+                
+                volunteer = {
+                    'name': name,
+                    'email': email,
+                    'first_name': first_name if first_name else (name.split()[0] if name else ''),
+                    'last_name': last_name,
+                    'phone': '',
+                    'interests': '',
+                    'location': '',
+                    'referral': ''
+                }
+                
+                # Get optional fields
+                if phone_col and str(row[phone_col]) != 'nan':
+                    volunteer['phone'] = str(row[phone_col]).strip()
+                
+                if interest_col and str(row[interest_col]) != 'nan':
+                    volunteer['interests'] = str(row[interest_col]).strip()
+                
+                if location_col and str(row[location_col]) != 'nan':
+                    volunteer['location'] = str(row[location_col]).strip()
+                
+                if referral_col and str(row[referral_col]) != 'nan':
+                    volunteer['referral'] = str(row[referral_col]).strip()
+                
+                volunteers.append(volunteer)
             
-            volunteers.append(volunteer)
-        
-        return volunteers
+            return volunteers
     
     def _extract_from_text(self, text: str) -> list:
         """Extract volunteer data from unstructured text."""
-        volunteers = []
-        
-        # Find all emails in the text
-        emails = self.EMAIL_PATTERN.findall(text)
-        
-        # For each email, try to find associated name
-        lines = text.split('\n')
-        
-        for email in set(emails):  # Use set to avoid duplicates
-            name = ''
+        with stage('parse.extract_text'):
+            volunteers = []
             
-            # Look for name near the email
-            for i, line in enumerate(lines):
-                if email in line:
-                    # Check current line for name before email
-                    parts = line.split(email)[0].strip()
-                    if parts:
-                        # Clean up the name
-                        name = re.sub(r'[^\w\s]', '', parts).strip()
-                    
-                    # If no name found, check previous line
-                    if not name and i > 0:
-                        prev_line = lines[i-1].strip()
-                        if prev_line and '@' not in prev_line:
-                            name = re.sub(r'[^\w\s]', '', prev_line).strip()
-                    break
+            # Find all emails in the text
+            emails = self.EMAIL_PATTERN.findall(text)
             
-            volunteer = {
-                'name': name,
-                'email': email,
-                'first_name': name.split()[0] if name else '',
-                'last_name': '',
-                'phone': '',
-                'interests': '',
-                'location': '',
-                'referral': ''
-            }
+            # For each email, try to find associated name
+            lines = text.split('\n')
             
-            volunteers.append(volunteer)
-        
-        return volunteers
+            for email in set(emails):  # Use set to avoid duplicates
+                name = ''
+                
+                # Look for name near the email
+                for i, line in enumerate(lines):
+                    if email in line:
+                        # Check current line for name before email
+                        parts = line.split(email)[0].strip()
+                        if parts:
+                            # Clean up the name
+                            name = self.NAME_CLEANUP_PATTERN.sub('', parts).strip()
+                        
+                        # If no name found, check previous line
+                        if not name and i > 0:
+                            prev_line = lines[i-1].strip()
+                            if prev_line and '@' not in prev_line:
+                                name = self.NAME_CLEANUP_PATTERN.sub('', prev_line).strip()
+                        break
+                
+                volunteer = {
+                    'name': name,
+                    'email': email,
+                    'first_name': name.split()[0] if name else '',
+                    'last_name': '',
+                    'phone': '',
+                    'interests': '',
+                    'location': '',
+                    'referral': ''
+                }
+                
+                volunteers.append(volunteer)
+            
+            return volunteers
     
     def _find_column(self, columns, possible_names: list) -> str:
         """Find a column name from a list of possible names."""
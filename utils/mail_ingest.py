@@ -0,0 +1,417 @@
+"""
+Mail Ingest Module
+Finds replies and bounces in a local Maildir or mbox export and turns them
+into contact updates: a reply marks its sender responded (or declined, when
+it says so) and a bounce marks the address's delivery as bounced. Only the
+headers and the start of each body are read, with regular expressions rather
+than the email parser, and a watermark per mailbox lets re-runs skip mail
+that was already read.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import mmap
+import os
+import quopri
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from email.utils import getaddresses, parseaddr
+
+# Bytes read from each Maildir file: the headers and the start of the body
+READ_LIMIT = 64 * 1024
+
+# Maildir files modified this recently are looked at again on the next run, in case
+# an older one is still being moved into new/ (their keys stop them counting twice)
+MAILDIR_GRACE_SECONDS = 60
+
+# Start of an mbox hashed to notice when the file is replaced rather than appended to
+MBOX_PREFIX_BYTES = 4096
+
+# Status a reply can set, and the statuses it may replace (a sign-up is never undone)
+STATUS_UPGRADES = {
+    'responded': ('pending',),
+    'declined': ('pending', 'responded')
+}
+
+BOUNCED = 'bounced'
+
+# Longest a run may hold the ingest lease; a crashed run's lease lapses after this
+LEASE_SECONDS = 600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_watermarks (
+    mailbox TEXT PRIMARY KEY,
+    watermark TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ingest_lease (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+_HEADER_END = re.compile(rb'\r?\n\r?\n')
+_HEADER = re.compile(
+    rb'^(from|subject|message-id|in-reply-to|references|content-type|content-transfer-encoding|'
+    rb'auto-submitted|x-autoreply|x-autorespond|precedence|x-failed-recipients|return-path)'
+    rb':[ \t]*(.*(?:\r?\n[ \t].*)*)',
+    re.IGNORECASE | re.MULTILINE
+)
+_MESSAGE_ID = re.compile(rb'<[^<>\s]+>')
+# The address of a plain "Name <addr>" or bare "addr" From header; anything else goes to parseaddr
+_SIMPLE_SENDER = re.compile(rb'^\s*(?:[^<>"(),;:@]*<([^<>\s"(),;:@]+@[^<>\s"(),;:@]+)>|([^<>\s"(),;:@]+@[^<>\s"(),;:@]+))\s*$')
+_BOUNCE_SENDER = re.compile(rb'mailer-daemon|postmaster', re.IGNORECASE)
+_BOUNCE_SUBJECT = re.compile(
+    rb'undeliver|returned mail|delivery (status notification|fail)|failure notice|mail delivery (failed|system)',
+    re.IGNORECASE
+)
+_AUTO_PRECEDENCE = re.compile(rb'bulk|junk|list|auto', re.IGNORECASE)
+_DSN_RECIPIENT = re.compile(rb'^final-recipient:[ \t]*rfc822;[ \t]*<?([^\s<>;]+@[^\s<>;]+?)>?\s*$',
+                            re.IGNORECASE | re.MULTILINE)
+_DSN_ACTION = re.compile(rb'^action:[ \t]*([a-z]+)', re.IGNORECASE | re.MULTILINE)
+_DSN_STATUS = re.compile(rb'^status:[ \t]*([245])\.', re.IGNORECASE | re.MULTILINE)
+_RETURNED_MESSAGE_ID = re.compile(rb'^message-id:[ \t]*(<[^<>\s]+>)', re.IGNORECASE | re.MULTILINE)
+_BOUNDARY = re.compile(rb'boundary="?([^";\s]+)"?', re.IGNORECASE)
+_PART_TYPE = re.compile(rb'^content-type:[ \t]*([^;\s]+)', re.IGNORECASE | re.MULTILINE)
+_PART_ENCODING = re.compile(rb'^content-transfer-encoding:[ \t]*([\w-]+)', re.IGNORECASE | re.MULTILINE)
+# Where the quoted original starts in a reply
+_QUOTED = re.compile(r'^(>|on\b.{0,200}\bwrote:|-+ ?original message|from:\s)', re.IGNORECASE | re.MULTILINE)
+_DECLINE = re.compile(
+    r"not interested|no,? thanks?\b|no thank you|unsubscribe|remove me|take me off|"
+    r"stop (emailing|contacting)|(can ?not|can't|unable to|won't be able to|not able to) "
+    r"(volunteer|help|commit|participate|make it|do it)|(have to|must|will) (decline|pass)",
+    re.IGNORECASE
+)
+
+
+def parse_message(data: bytes) -> dict:
+    """
+    Classify one raw message (headers plus at least the start of the body).
+
+    Args:
+        data: Message bytes; bodies may be truncated
+
+    Returns:
+        {'kind': 'bounce', 'emails', 'message_ids'}, {'kind': 'reply', 'sender',
+        'message_ids', 'status'}, or None for anything else (auto-replies, temporary
+        delivery delays, mailing lists)
+    """
+    end = _HEADER_END.search(data)
+    head, body = (data[:end.start()], data[end.end():]) if end else (data, b'')
+    headers = {}
+    for name, value in _HEADER.findall(head):
+        headers.setdefault(name.lower(), value)
+
+    content_type = headers.get(b'content-type', b'').lower()
+    subject = headers.get(b'subject', b'')
+    sender = headers.get(b'from', b'')
+    failed_recipients = headers.get(b'x-failed-recipients')
+    dsn = b'multipart/report' in content_type and b'delivery-status' in content_type
+    if dsn or failed_recipients or (_BOUNCE_SUBJECT.search(subject) and (
+            _BOUNCE_SENDER.search(sender) or headers.get(b'return-path', b'').strip() == b'<>')):
+        return _parse_bounce(headers, body)
+
+    if headers.get(b'auto-submitted', b'no').strip().lower() != b'no' or b'x-autoreply' in headers or \
+            b'x-autorespond' in headers or _AUTO_PRECEDENCE.search(headers.get(b'precedence', b'')):
+        return None
+    simple = _SIMPLE_SENDER.match(sender)
+    if simple:
+        address = (simple.group(1) or simple.group(2)).decode('utf-8', 'replace').lower()
+    else:
+        address = parseaddr(sender.decode('utf-8', 'replace'))[1].lower()
+    if not address:
+        return None
+    references = headers.get(b'in-reply-to', b'') + b' ' + headers.get(b'references', b'')
+    text = _reply_text(headers.get(b'content-type', b''), headers.get(b'content-transfer-encoding', b''), body)
+    return {
+        'kind': 'reply',
+        'sender': address,
+        'message_ids': [value.decode('ascii', 'replace') for value in _MESSAGE_ID.findall(references)],
+        'status': 'declined' if _DECLINE.search(text) else 'responded'
+    }
+
+
+def _parse_bounce(headers: dict, body: bytes):
+    """Bounce event from a delivery report, or None if delivery is only delayed."""
+    actions = {action.lower() for action in _DSN_ACTION.findall(body)}
+    statuses = set(_DSN_STATUS.findall(body))
+    if (actions and b'failed' not in actions) or (statuses and b'5' not in statuses):
+        return None
+    emails = [email.decode('utf-8', 'replace').lower() for email in _DSN_RECIPIENT.findall(body)]
+    if not emails and headers.get(b'x-failed-recipients'):
+        emails = [address.lower() for _, address in
+                  getaddresses([headers[b'x-failed-recipients'].decode('utf-8', 'replace')]) if address]
+    message_ids = _RETURNED_MESSAGE_ID.findall(body) + _MESSAGE_ID.findall(
+        headers.get(b'in-reply-to', b'') + b' ' + headers.get(b'references', b''))
+    return {
+        'kind': 'bounce',
+        'emails': emails,
+        'message_ids': [value.decode('ascii', 'replace') for value in message_ids]
+    }
+
+
+def _reply_text(content_type: bytes, encoding: bytes, body: bytes) -> str:
+    """The new (unquoted) text of a reply, from its first text/plain part."""
+    kind = content_type.lower()
+    if kind.startswith(b'multipart/'):
+        # The boundary keeps its case
+        boundary = _BOUNDARY.search(content_type)
+        if not boundary:
+            return ''
+        for part in body.split(b'--' + boundary.group(1))[1:]:
+            end = _HEADER_END.search(part)
+            if not end:
+                continue
+            part_head, part_body = part[:end.start()], part[end.end():]
+            part_type = _PART_TYPE.search(part_head)
+            part_kind = part_type.group(1).lower() if part_type else b'text/plain'
+            if part_kind.startswith(b'multipart/'):
+                inner = _BOUNDARY.search(part_head)
+                text = _reply_text(b'multipart/mixed; boundary="' + inner.group(1) + b'"', b'', part_body) if inner else ''
+                if text:
+                    return text
+            elif part_kind == b'text/plain':
+                part_encoding = _PART_ENCODING.search(part_head)
+                return _reply_text(b'text/plain', part_encoding.group(1) if part_encoding else b'', part_body)
+        return ''
+    if kind and not kind.startswith(b'text/plain'):
+        return ''
+
+    encoding = encoding.strip().lower()
+    try:
+        if encoding == b'quoted-printable':
+            body = quopri.decodestring(body)
+        elif encoding == b'base64':
+            # The body may be cut off mid-line; decode whole 4-character groups only
+            data = b''.join(body.split())
+            body = base64.b64decode(data[:len(data) // 4 * 4])
+    except (ValueError, binascii.Error):
+        return ''
+    text = body.decode('utf-8', 'replace')
+    quoted = _QUOTED.search(text)
+    return text[:quoted.start()] if quoted else text
+
+
+class IngestBusy(Exception):
+    """Another run, in this or another process, holds the ingest lease."""
+
+
+class IngestRun:
+    """Result of reading new mail: contact changes, per-mailbox counts and watermarks to save."""
+
+    def __init__(self, ingester, watermarks: dict):
+        self.ingester = ingester
+        self.watermarks = watermarks
+        self.changes = {}
+        self.mailboxes = []
+
+    def change(self, email: str, status: str = None, delivery: str = None):
+        """Merge one contact update (declined beats responded)."""
+        change = self.changes.setdefault(email, {'email': email})
+        if status and (change.get('status') is None or change['status'] in STATUS_UPGRADES[status]):
+            change['status'] = status
+        if delivery:
+            change['delivery'] = delivery
+
+    def commit(self):
+        """Save the watermarks, so the next run starts after this one's mail."""
+        self.ingester.save_watermarks(self.watermarks)
+
+
+class MailIngester:
+    """Reads new mail from Maildir folders and mbox files, remembering how far it got."""
+
+    def __init__(self, state_path: str):
+        """
+        Args:
+            state_path: SQLite database for the watermarks (created if missing)
+        """
+        self.state_path = state_path
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def exclusive(self):
+        """
+        Hold the ingest lease for the ``with`` block, so runs in other threads or
+        processes sharing the state database can't read and apply the same mail.
+
+        Raises:
+            IngestBusy: Another run holds the lease
+        """
+        owner = uuid.uuid4().hex
+        with self._lock, self._connect() as db:
+            # BEGIN IMMEDIATE so two processes can't both find the lease free
+            db.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            held = db.execute('SELECT expires_at FROM ingest_lease WHERE id = 1').fetchone()
+            if held and held[0] > now:
+                raise IngestBusy('Mail is already being read')
+            db.execute('INSERT OR REPLACE INTO ingest_lease (id, owner, expires_at) VALUES (1, ?, ?)',
+                       (owner, now + LEASE_SECONDS))
+        try:
+            yield
+        finally:
+            with self._lock, self._connect() as db:
+                db.execute('DELETE FROM ingest_lease WHERE owner = ?', (owner,))
+
+    def run(self, mailboxes: list, resolve, known=None, full: bool = False) -> IngestRun:
+        """
+        Read the mail that arrived since the last committed run.
+
+        Args:
+            mailboxes: Maildir directories and/or mbox files
+            resolve: Callable taking Message-IDs and returning {message_id: recipient email}
+                for the messages that were sent (e.g. DeliveryLog.recipients)
+            known: Optional set of contact emails; replies whose sender is in it match
+                even without a sent Message-ID
+            full: Ignore the watermarks and read everything again
+
+        Returns:
+            IngestRun with ``changes`` ({email: {email, status?, delivery?}}) and
+            ``mailboxes`` (counts per mailbox); call its commit() once applied
+        """
+        known = known or set()
+        saved = {} if full else self.load_watermarks()
+        run = IngestRun(self, {})
+        for mailbox in mailboxes:
+            started = time.perf_counter()
+            watermark = saved.get(mailbox)
+            if os.path.isdir(mailbox):
+                scanned, run.watermarks[mailbox] = _scan_maildir(mailbox, watermark)
+            else:
+                scanned, run.watermarks[mailbox] = _scan_mbox(mailbox, watermark)
+
+            events = []
+            for data in scanned:
+                event = parse_message(data)
+                if event is not None:
+                    events.append(event)
+            stats = self._match(run, events, resolve, known)
+            stats.update(mailbox=mailbox, seconds=round(time.perf_counter() - started, 3))
+            run.mailboxes.append(stats)
+        return run
+
+    def _match(self, run: IngestRun, events: list, resolve, known: set) -> dict:
+        """Resolve events to contacts, through the sent-message index first, then by address."""
+        sent = resolve({message_id for event in events for message_id in event['message_ids']}) if events else {}
+        stats = {'replies': 0, 'bounces': 0, 'matched': 0, 'unmatched': 0}
+        for event in events:
+            if event['kind'] == 'bounce':
+                stats['bounces'] += 1
+                emails = event['emails'] or [sent[m] for m in event['message_ids'] if m in sent][:1]
+                for email in emails:
+                    run.change(email, delivery=BOUNCED)
+            else:
+                stats['replies'] += 1
+                email = next((sent[m] for m in event['message_ids'] if m in sent), None)
+                if email is None and event['sender'] in known:
+                    email = event['sender']
+                if email:
+                    run.change(email, status=event['status'])
+                emails = [email] if email else []
+            stats['matched' if emails else 'unmatched'] += 1
+        return stats
+
+    def load_watermarks(self) -> dict:
+        with self._lock, self._connect() as db:
+            return {mailbox: json.loads(watermark) for mailbox, watermark in
+                    db.execute('SELECT mailbox, watermark FROM ingest_watermarks')}
+
+    def save_watermarks(self, watermarks: dict):
+        with self._lock, self._connect() as db:
+            db.executemany(
+                'INSERT OR REPLACE INTO ingest_watermarks (mailbox, watermark, updated_at) VALUES (?, ?, ?)',
+                [(mailbox, json.dumps(watermark), time.time()) for mailbox, watermark in watermarks.items()]
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        folder = os.path.dirname(self.state_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        db = sqlite3.connect(self.state_path, timeout=30)
+        db.executescript(SCHEMA)
+        return db
+
+
+def _scan_maildir(path: str, watermark: dict) -> tuple:
+    """
+    Messages in a Maildir's new/ and cur/ not read by an earlier run.
+
+    Returns:
+        (iterator of message bytes, new watermark {mtime_ns, keys})
+    """
+    since = (watermark or {}).get('mtime_ns', -1)
+    seen = set((watermark or {}).get('keys', ()))
+    # Files newer than the cutoff are kept by key and looked at again next time
+    cutoff = time.time_ns() - MAILDIR_GRACE_SECONDS * 10 ** 9
+
+    files, latest = [], since
+    for folder in ('new', 'cur'):
+        try:
+            entries = os.scandir(os.path.join(path, folder))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.is_file():
+                    continue
+                mtime = entry.stat().st_mtime_ns
+                latest = max(latest, mtime)
+                # The unique name, without the flags that change when mail is read or moved to cur/
+                files.append((mtime, entry.name.split(':', 1)[0], entry.path))
+
+    mark = min(latest, cutoff) if latest > since else since
+    new_watermark = {'mtime_ns': mark, 'keys': sorted(key for mtime, key, _ in files if mtime >= mark)}
+    pending = [file_path for mtime, key, file_path in files if mtime >= since and key not in seen]
+    return _read_files(pending), new_watermark
+
+
+def _read_files(paths: list):
+    for file_path in paths:
+        try:
+            with open(file_path, 'rb') as f:
+                yield f.read(READ_LIMIT)
+        except FileNotFoundError:
+            # Deleted or moved since the directory was listed
+            continue
+
+
+def _scan_mbox(path: str, watermark: dict) -> tuple:
+    """
+    Messages appended to an mbox since an earlier run (all of them if it was replaced).
+
+    Returns:
+        (iterator of message bytes, new watermark {offset, prefix})
+    """
+    watermark = watermark or {}
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        head = f.read(MBOX_PREFIX_BYTES)
+    # Appending keeps what was there; anything else (compaction, a new export) means reading it all
+    offset = watermark.get('offset', 0)
+    if offset > size or hashlib.sha1(head[:watermark.get('prefix_bytes', 0)]).hexdigest() != watermark.get('prefix'):
+        offset = 0
+    new_watermark = {'offset': size, 'prefix': hashlib.sha1(head).hexdigest(), 'prefix_bytes': len(head)}
+    return _read_mbox(path, offset, size), new_watermark
+
+
+def _read_mbox(path: str, offset: int, size: int):
+    if size <= offset:
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as data:
+        start = offset
+        while start < size:
+            # Messages start with a "From " line; bodies have theirs escaped as ">From "
+            following = data.find(b'\nFrom ', start)
+            end = size if following < 0 else following + 1
+            message_start = data.find(b'\n', start, end) + 1
+            if message_start > 0:
+                yield data[message_start:min(end, message_start + READ_LIMIT)]
+            start = end
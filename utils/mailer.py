@@ -0,0 +1,680 @@
+"""
+Mailer Module
+Delivers generated messages as MIME emails over a small pool of persistent
+SMTP connections. Each sender thread keeps its connection open across many
+messages and pipelines the envelope commands when the server allows it;
+transient failures are retried with exponential backoff, and every outcome is
+reported back per message.
+"""
+
+import random
+import re
+import smtplib
+import socket
+import ssl
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from email.charset import QP, Charset
+from email.header import Header
+from email.mime.text import MIMEText
+from email.policy import compat32
+from email.utils import formataddr, formatdate, make_msgid, parseaddr
+from . import metrics
+from .roster_store import is_plain_address
+from .send_scheduler import PRIORITY_NORMAL, SendScheduler
+
+SENT_TOTAL = metrics.registry.counter(
+    'hsrm_mail_messages_total',
+    'Messages finished by the mailer, by outcome (sent, failed, cancelled).'
+)
+RETRIES_TOTAL = metrics.registry.counter(
+    'hsrm_mail_retries_total',
+    'Delivery attempts that failed transiently and were rescheduled.'
+)
+CONNECTIONS_TOTAL = metrics.registry.counter(
+    'hsrm_mail_connections_total',
+    'SMTP connections opened by the mailer.'
+)
+SEND_SECONDS = metrics.registry.histogram(
+    'hsrm_mail_send_seconds',
+    'Time to hand one message to the SMTP server (excluding connection setup).'
+)
+
+# Per-message delivery states reported to ``on_result``
+DELIVERY_STATES = ('queued', 'sent', 'failed', 'cancelled')
+
+SECURITY_MODES = ('starttls', 'ssl', 'none')
+
+# Jobs kept for status queries after they finish
+FINISHED_JOBS_KEPT = 50
+
+# Bodies go out as quoted-printable UTF-8, so any server accepts them (no 8BITMIME needed)
+BODY_CHARSET = Charset('utf-8')
+BODY_CHARSET.body_encoding = QP
+
+# The compat32 builders are several times faster than the modern email policy, which
+# re-parses every header it is given (~2 ms per message vs ~0.4 ms)
+WIRE_POLICY = compat32.clone(linesep='\r\n')
+
+_LEADING_DOT = re.compile(rb'^\.', re.MULTILINE)
+_LINE_BREAKS = re.compile(r'[\r\n]+\s*')
+
+
+class InvalidAddress(ValueError):
+    """A recipient address that can't be put in an SMTP envelope (a permanent failure)."""
+
+
+def envelope_address(address: str) -> str:
+    """
+    Recipient address as it goes into RCPT TO and the To: header.
+
+    Args:
+        address: Bare address (local@domain)
+
+    Returns:
+        The address with a non-ASCII domain IDNA-encoded
+
+    Raises:
+        InvalidAddress: If it isn't a plain address, or its local part isn't ASCII
+            (that would need SMTPUTF8)
+    """
+    if not is_plain_address(address):
+        raise InvalidAddress(f"Not a plain email address: {address!r}")
+    if address.isascii():
+        return address
+    local, _, domain = address.rpartition('@')
+    if not local.isascii():
+        raise InvalidAddress(f"Non-ASCII mailbox names can't be sent: {address!r}")
+    try:
+        return f"{local}@{domain.encode('idna').decode('ascii')}"
+    except UnicodeError:
+        raise InvalidAddress(f"Invalid domain: {address!r}")
+
+
+def header_text(value: str) -> str:
+    """Header value on one line: line breaks (which would start a new header) become spaces."""
+    return _LINE_BREAKS.sub(' ', value) if '\n' in value or '\r' in value else value
+
+
+def build_mime(message: dict, sender: str, reply_to: str = None) -> MIMEText:
+    """
+    Turn a generated message into a MIME email.
+
+    Args:
+        message: Dictionary with name, email, subject and body (as from MessageGenerator)
+        sender: From address, e.g. 'HOPE Tutoring <volunteer@hopetutoring.org>'
+        reply_to: Optional Reply-To address
+
+    Returns:
+        MIMEText message with a fresh Message-ID (serialize with ``as_bytes(policy=WIRE_POLICY)``)
+
+    Raises:
+        InvalidAddress: If the recipient isn't a plain address (see envelope_address)
+    """
+    email = MIMEText(message.get('body') or '', 'plain', BODY_CHARSET)
+    email['From'] = _encode_address(sender)
+    email['To'] = formataddr((header_text(message.get('name') or ''), envelope_address(message['email'])), 'utf-8')
+    subject = header_text(message.get('subject') or '')
+    email['Subject'] = subject if subject.isascii() else Header(subject, 'utf-8')
+    email['Date'] = formatdate(localtime=True)
+    email['Message-ID'] = make_msgid(domain=parseaddr(sender)[1].rpartition('@')[2] or None)
+    if reply_to:
+        email['Reply-To'] = _encode_address(reply_to)
+    return email
+
+
+def _encode_address(address: str) -> str:
+    """'Name <addr>' with a non-ASCII display name encoded for the header."""
+    if address.isascii():
+        return address
+    return formataddr(parseaddr(address), 'utf-8')
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed attempt is worth retrying (4xx replies, dropped or refused connections)."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError))
+
+
+def breaks_connection(error: Exception) -> bool:
+    """Whether the connection should be dropped after ``error`` (refusals leave it usable)."""
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code in (421, -1)
+    # Invalid addresses are caught before anything is written to the connection
+    return not isinstance(error, (smtplib.SMTPRecipientsRefused, InvalidAddress))
+
+
+def describe_error(error: Exception) -> str:
+    """Short, user-facing description of a delivery error."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return '; '.join(f"{code} {reply.decode('utf-8', 'replace')}"
+                         for code, reply in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        reply = error.smtp_error
+        if isinstance(reply, bytes):
+            reply = reply.decode('utf-8', 'replace')
+        return f"{error.smtp_code} {reply}"
+    return str(error) or error.__class__.__name__
+
+
+class PipeliningSMTP(smtplib.SMTP):
+    """SMTP client that sends MAIL, RCPT and DATA without waiting for replies when the server supports PIPELINING."""
+
+    def send_pipelined(self, from_addr: str, to_addrs: list, data: bytes) -> dict:
+        """
+        Send one message, pipelining the envelope (RFC 2920).
+
+        Args:
+            from_addr: Envelope sender
+            to_addrs: Envelope recipients
+            data: Message bytes with CRLF line endings
+
+        Returns:
+            Refused recipients as {address: (code, reply)}, like ``sendmail``
+
+        Raises:
+            InvalidAddress: If an address isn't a plain ASCII address (checked before
+                anything is sent)
+            The same SMTP exceptions as ``sendmail``
+        """
+        for address in (from_addr, *to_addrs):
+            if not is_plain_address(address) or not address.isascii():
+                raise InvalidAddress(f"Not a plain ASCII email address: {address!r}")
+        self.ehlo_or_helo_if_needed()
+        if not self.has_extn('pipelining'):
+            return self.sendmail(from_addr, to_addrs, data)
+
+        # Written back to back without waiting for replies; putcmd also refuses line breaks
+        self.putcmd('mail', f'FROM:<{from_addr}>')
+        for address in to_addrs:
+            self.putcmd('rcpt', f'TO:<{address}>')
+        self.putcmd('data')
+
+        # Replies come back in command order
+        mail_reply = self.getreply()
+        refused = {}
+        for address in to_addrs:
+            code, reply = self.getreply()
+            if code not in (250, 251):
+                refused[address] = (code, reply)
+        data_code, data_reply = self.getreply()
+
+        if data_code == 354 and (mail_reply[0] != 250 or len(refused) == len(to_addrs)):
+            # Nothing can be delivered, but the server is waiting for data: end it empty
+            self.send(b'.\r\n')
+            self.getreply()
+            data_code = 0
+        if mail_reply[0] != 250:
+            self._reset_quietly()
+            raise smtplib.SMTPSenderRefused(mail_reply[0], mail_reply[1], from_addr)
+        if len(refused) == len(to_addrs):
+            self._reset_quietly()
+            raise smtplib.SMTPRecipientsRefused(refused)
+        if data_code != 354:
+            self._reset_quietly()
+            raise smtplib.SMTPDataError(data_code, data_reply)
+
+        body = _LEADING_DOT.sub(b'..', data)
+        if not body.endswith(b'\r\n'):
+            body += b'\r\n'
+        self.send(body + b'.\r\n')
+        code, reply = self.getreply()
+        if code != 250:
+            self._reset_quietly()
+            raise smtplib.SMTPDataError(code, reply)
+        return refused
+
+    def _reset_quietly(self):
+        """RSET so the connection can carry the next message; a failure here surfaces on the next send."""
+        try:
+            self.rset()
+        except smtplib.SMTPException:
+            pass
+
+
+class PipeliningSMTP_SSL(PipeliningSMTP, smtplib.SMTP_SSL):
+    """PipeliningSMTP over implicit TLS (port 465)."""
+
+
+class DeliveryJob:
+    """One submitted batch of messages and its running counts."""
+
+    def __init__(self, job_id: str, total: int, render, on_result=None, on_done=None, details: dict = None,
+                 priority: int = PRIORITY_NORMAL, send_at: float = None):
+        """
+        Args:
+            job_id: Unique id
+            total: Number of messages
+            render: Callable key -> message dict (name, email, subject, body); called at send time
+            on_result: Optional callable (job, key, result) invoked as each message finishes
+            on_done: Optional callable (job) invoked once, after the last on_result
+            details: Extra fields included in ``to_dict`` (e.g. the roster id)
+            priority: Scheduling priority (lower goes first)
+            send_at: Unix time before which nothing is sent (None for now)
+        """
+        self.id = job_id
+        self.total = total
+        self.render = render
+        self.on_result = on_result
+        self.on_done = on_done
+        self.details = details or {}
+        self.counts = {state: 0 for state in DELIVERY_STATES}
+        self.counts['queued'] = self.total
+        self.errors = OrderedDict()
+        self.created_at = time.time()
+        self.finished_at = None
+        self.priority = priority
+        self.send_at = send_at
+        self.cancelled = False
+        self.paused = False
+        self.parked = []
+        self.callback_error = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        if not self.total:
+            self._finish()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until every message has finished; False on timeout."""
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'job_id': self.id,
+                'status': self._status(),
+                'total': self.total,
+                'priority': self.priority,
+                'send_at': self.send_at,
+                **self.counts,
+                # A sample of failures; the delivery log has them all
+                'errors': [{'key': key, 'error': error} for key, error in list(self.errors.items())[:20]],
+                'created_at': self.created_at,
+                'finished_at': self.finished_at,
+                'callback_error': self.callback_error,
+                **self.details
+            }
+
+    def _status(self) -> str:
+        if self.cancelled:
+            return 'cancelled'
+        if self.done:
+            return 'done'
+        if self.paused:
+            return 'paused'
+        if self.send_at and self.send_at > time.time():
+            return 'scheduled'
+        return 'sending'
+
+    def _record(self, key, result: dict):
+        SENT_TOTAL.inc(status=result['status'])
+        # Report before counting, so on_done only runs after every result has been handled
+        self._call(self.on_result, key, result)
+        with self._lock:
+            self.counts['queued'] -= 1
+            self.counts[result['status']] += 1
+            if result.get('error'):
+                self.errors[key] = result['error']
+            finished = self.counts['queued'] == 0
+        if finished:
+            self._finish()
+
+    def _finish(self):
+        self.finished_at = time.time()
+        self._call(self.on_done)
+        self._done.set()
+
+    def _call(self, callback, *args):
+        if callback is None:
+            return
+        try:
+            callback(self, *args)
+        except Exception as e:
+            # Don't let a bookkeeping failure stop the sender; surface it in the job status
+            self.callback_error = str(e)
+
+
+class _Task:
+    """One message of a job, plus its attempt count and scheduling fields."""
+
+    __slots__ = ('job', 'key', 'attempts', 'email', 'message_id', 'domain', 'priority', 'seq')
+
+    def __init__(self, job: DeliveryJob, key, email: str):
+        self.job = job
+        self.key = key
+        self.attempts = 0
+        self.email = email
+        self.message_id = None
+        self.domain = email.rpartition('@')[2].lower()
+        self.priority = job.priority
+        self.seq = 0
+
+
+class Mailer:
+    """
+    Concurrent SMTP delivery with persistent connections and retries.
+
+    ``connections`` sender threads take messages from a SendScheduler, which
+    applies send-at times, priorities and rate limits; each thread keeps its
+    own SMTP connection open between messages, reconnecting after
+    ``messages_per_connection`` messages, after ``idle_timeout`` seconds
+    without work, or when the connection breaks.
+    """
+
+    def __init__(self, host: str, port: int = 587, sender: str = '', username: str = None,
+                 password: str = None, security: str = 'starttls', timeout: float = 30.0,
+                 reply_to: str = None, connections: int = 4, messages_per_connection: int = 100,
+                 max_attempts: int = 4, retry_backoff: float = 2.0, max_backoff: float = 300.0,
+                 idle_timeout: float = 30.0, scheduler: SendScheduler = None):
+        """
+        Args:
+            host: SMTP server
+            port: SMTP port
+            sender: From address (its address part is also the envelope sender)
+            username: Login user (None to skip AUTH)
+            password: Login password
+            security: 'starttls', 'ssl' (implicit TLS) or 'none'
+            timeout: Socket timeout in seconds
+            reply_to: Optional Reply-To address
+            connections: Sender threads, i.e. SMTP connections open at once
+            messages_per_connection: Messages sent before a connection is recycled (0 for no limit)
+            max_attempts: Attempts per message before a transient failure counts as failed
+            retry_backoff: Delay before the first retry, doubled for each later one
+            max_backoff: Upper bound on the retry delay
+            idle_timeout: Seconds an idle sender keeps its connection open
+            scheduler: Queue and rate limits (default: unlimited)
+        """
+        if security not in SECURITY_MODES:
+            raise ValueError(f"Unknown SMTP security mode: {security}")
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.envelope_sender = parseaddr(sender)[1] or sender
+        self.username = username
+        self.password = password
+        self.security = security
+        self.timeout = timeout
+        self.reply_to = reply_to
+        self.connections = max(connections, 1)
+        self.messages_per_connection = messages_per_connection
+        self.max_attempts = max(max_attempts, 1)
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.idle_timeout = idle_timeout
+
+        self.scheduler = scheduler if scheduler is not None else SendScheduler()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._jobs = OrderedDict()
+        self._closed = False
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+    def submit(self, recipients: list, render, on_result=None, on_done=None, details: dict = None,
+               priority: int = PRIORITY_NORMAL, send_at: float = None, job_id: str = None,
+               paused: bool = False) -> DeliveryJob:
+        """
+        Queue messages for delivery.
+
+        Args:
+            recipients: (key, email address) pairs, in send order; the address picks
+                the domain rate limit
+            render: Callable key -> message dict, called when the message is sent
+            on_result: Optional callable (job, key, result) for each finished message;
+                result has status ('sent', 'failed' or 'cancelled'), email, message_id,
+                attempts and error
+            on_done: Optional callable (job) once every message has finished
+            details: Extra fields for the job's status
+            priority: Lower goes first (see send_scheduler.PRIORITY_*)
+            send_at: Unix time to start sending (None for now)
+            job_id: Id to use (default: a new one)
+            paused: Queue the job paused (e.g. when resuming a paused job)
+
+        Returns:
+            The DeliveryJob (already running unless paused)
+        """
+        recipients = list(recipients)
+        job = DeliveryJob(job_id or uuid.uuid4().hex, len(recipients), render, on_result, on_done,
+                          details, priority, send_at)
+        tasks, invalid = [], []
+        for key, email in recipients:
+            (tasks if is_plain_address(email) else invalid).append(_Task(job, key, email or ''))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('Mailer is closed')
+            self._jobs[job.id] = job
+            self._trim_jobs()
+            if paused:
+                job.paused = True
+                job.parked = tasks
+            else:
+                for task in tasks:
+                    self.scheduler.push(task, send_at)
+            self._start_senders()
+            self._cond.notify_all()
+        # Never queued: these could inject SMTP commands or headers
+        for task in invalid:
+            self._finish(task, 'failed', f"Not a plain email address: {task.email!r}")
+        return job
+
+    def jobs(self) -> list:
+        """Status of every job still kept, oldest first."""
+        with self._cond:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in jobs]
+
+    def job(self, job_id: str):
+        """Job with ``job_id``, or None if unknown."""
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop sending a job's remaining messages; False if the job is unknown."""
+        job = self.job(job_id)
+        if job is None:
+            return False
+        with self._cond:
+            job.cancelled = True
+            dropped = self.scheduler.remove(lambda task: task.job is job) + job.parked
+            job.parked = []
+        for task in dropped:
+            self._finish(task, 'cancelled')
+        return True
+
+    def pause(self, job_id: str) -> bool:
+        """Hold a job's queued messages (those already with the server still finish); False if unknown."""
+        job = self.job(job_id)
+        if job is None:
+            return False
+        with self._cond:
+            if not job.done and not job.cancelled:
+                job.paused = True
+                job.parked.extend(self.scheduler.remove(lambda task: task.job is job))
+        return True
+
+    def resume(self, job_id: str) -> bool:
+        """Queue a paused job's messages again; False if unknown."""
+        job = self.job(job_id)
+        if job is None:
+            return False
+        with self._cond:
+            if job.paused:
+                job.paused = False
+                for task in job.parked:
+                    self.scheduler.push(task, job.send_at)
+                job.parked = []
+                self._cond.notify_all()
+        return True
+
+    def close(self, timeout: float = None):
+        """Stop the senders after the messages in flight and close their connections."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _trim_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(len(finished) - FINISHED_JOBS_KEPT, 0)]:
+            del self._jobs[job_id]
+
+    def _start_senders(self):
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.connections:
+            thread = threading.Thread(target=self._run_sender, name=f'hsrm-mailer-{len(self._threads)}', daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    # ------------------------------------------------------------------
+    # Senders
+    # ------------------------------------------------------------------
+    def _next_task(self):
+        """
+        Wait for the next due message.
+
+        Returns:
+            A _Task, None after ``idle_timeout`` without work, or False once closed
+        """
+        with self._cond:
+            idle_until = time.monotonic() + self.idle_timeout
+            while not self._closed:
+                task, wait = self.scheduler.pop()
+                if task is not None:
+                    return task
+                # Nothing allowed to go yet: sleep until the scheduler expects one (or new work)
+                remaining = idle_until - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining if wait is None else min(wait, remaining))
+            return False
+
+    def _run_sender(self):
+        connection = None
+        sent_on_connection = 0
+        try:
+            while True:
+                task = self._next_task()
+                if task is False:
+                    break
+                if task is None:
+                    # Idle: don't hold the server's connection slot
+                    connection = self._disconnect(connection)
+                    continue
+                if task.job.cancelled:
+                    self._finish(task, 'cancelled')
+                    continue
+
+                if connection is not None and self.messages_per_connection and \
+                        sent_on_connection >= self.messages_per_connection:
+                    connection = self._disconnect(connection)
+                # A failed connection counts as an attempt too, so an unreachable server gives up
+                task.attempts += 1
+                try:
+                    if connection is None:
+                        connection = self._connect()
+                        sent_on_connection = 0
+                    sent_on_connection += 1
+                    self._deliver(connection, task)
+                except Exception as error:
+                    if breaks_connection(error):
+                        # The connection itself may be unusable; start fresh next time
+                        connection = self._disconnect(connection)
+                    self._failed(task, error)
+                else:
+                    self._finish(task, 'sent')
+        finally:
+            self._disconnect(connection)
+
+    def _connect(self) -> PipeliningSMTP:
+        if self.security == 'ssl':
+            connection = PipeliningSMTP_SSL(self.host, self.port, timeout=self.timeout,
+                                            context=ssl.create_default_context())
+        else:
+            connection = PipeliningSMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            # Commands and message bodies are written whole; send them without waiting on ACKs
+            connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection.ehlo()
+            if self.security == 'starttls':
+                connection.starttls(context=ssl.create_default_context())
+                connection.ehlo()
+            if self.username:
+                connection.login(self.username, self.password or '')
+        except Exception:
+            self._disconnect(connection)
+            raise
+        CONNECTIONS_TOTAL.inc()
+        return connection
+
+    @staticmethod
+    def _disconnect(connection):
+        """Close ``connection`` (politely if possible); always returns None."""
+        if connection is not None:
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                connection.close()
+        return None
+
+    def _deliver(self, connection, task: _Task):
+        message = task.job.render(task.key)
+        task.email = message['email']
+        # Re-checked here: the record may have been edited since the job was queued
+        recipient = envelope_address(message['email'])
+        mime = build_mime(message, self.sender, self.reply_to)
+        task.message_id = mime['Message-ID']
+        data = mime.as_bytes(policy=WIRE_POLICY)
+        started = time.perf_counter()
+        refused = connection.send_pipelined(self.envelope_sender, [recipient], data)
+        SEND_SECONDS.observe(time.perf_counter() - started)
+        if refused:
+            raise smtplib.SMTPRecipientsRefused(refused)
+
+    def _failed(self, task: _Task, error: Exception):
+        if is_transient(error) and task.attempts < self.max_attempts and not task.job.cancelled:
+            delay = min(self.retry_backoff * 2 ** (task.attempts - 1), self.max_backoff)
+            # Jitter so messages that failed together don't all retry together
+            delay *= random.uniform(0.5, 1.0)
+            RETRIES_TOTAL.inc()
+            with self._cond:
+                if task.job.paused:
+                    task.job.parked.append(task)
+                else:
+                    self.scheduler.push(task, time.time() + delay)
+                    self._cond.notify()
+            return
+        self._finish(task, 'failed', describe_error(error))
+
+    def _finish(self, task: _Task, status: str, error: str = None):
+        task.job._record(task.key, {
+            'status': status,
+            'email': task.email,
+            'message_id': task.message_id,
+            'attempts': task.attempts,
+            'error': error
+        })
+
+    def status(self) -> dict:
+        """Queue depth and sender count, for diagnostics."""
+        with self._cond:
+            return {
+                'host': self.host,
+                'port': self.port,
+                **self.scheduler.status(),
+                'senders': sum(thread.is_alive() for thread in self._threads),
+                'jobs': {job_id: job.to_dict()['status'] for job_id, job in self._jobs.items()}
+            }
+
@@ -0,0 +1,135 @@
+"""
+Memory Profiler Module
+Opt-in tracemalloc profiling that records per-stage peak allocation and the
+top allocation sites for each stage.
+
+tracemalloc traces the whole process, so numbers are most meaningful with a
+single worker handling one request at a time (e.g. while replaying a slow upload).
+"""
+
+import threading
+import tracemalloc
+
+# Frames kept per traceback when tracing (1 is enough for file:line sites)
+TRACE_FRAMES = 1
+
+_state = {
+    'enabled': False,
+    'top_n': 5
+}
+_local = threading.local()
+
+# Exclude the profiler's own bookkeeping from allocation-site reports
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+
+
+def enable(top_n: int = 5):
+    """
+    Turn on memory profiling.
+
+    Args:
+        top_n: Number of allocation sites to report per stage (0 disables
+            snapshots, leaving only the cheaper peak/net numbers)
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACE_FRAMES)
+    _state['enabled'] = True
+    _state['top_n'] = max(0, int(top_n))
+
+
+def disable():
+    """Turn off memory profiling and stop tracing."""
+    _state['enabled'] = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_enabled() -> bool:
+    return _state['enabled']
+
+
+def status() -> dict:
+    """Profiler settings and current traced memory, for the diagnostics endpoint."""
+    info = {'enabled': _state['enabled'], 'top_n': _state['top_n']}
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        info['traced_current_bytes'] = current
+        info['traced_peak_bytes'] = peak
+    return info
+
+
+def _stack() -> list:
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+def enter_stage(name: str):
+    """Start measuring a stage. Stages may nest; each gets its own peak."""
+    if not _state['enabled'] or not tracemalloc.is_tracing():
+        return
+
+    stack = _stack()
+    current, peak = tracemalloc.get_traced_memory()
+
+    # Fold the peak reached so far into the enclosing stage before resetting it
+    if stack:
+        stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+    tracemalloc.reset_peak()
+
+    stack.append({
+        'name': name,
+        'start': current,
+        'peak': current,
+        'snapshot': _snapshot() if _state['top_n'] else None
+    })
+
+
+def exit_stage(name: str):
+    """
+    Finish measuring a stage.
+
+    Returns:
+        Dictionary with the stage's peak and net allocation (bytes above the
+        level at stage entry) and its top allocation sites, or None when
+        profiling is off.
+    """
+    stack = _stack()
+    if not stack or stack[-1]['name'] != name or not tracemalloc.is_tracing():
+        return None
+
+    frame = stack.pop()
+    current, peak = tracemalloc.get_traced_memory()
+    stage_peak = max(frame['peak'], peak)
+
+    if stack:
+        stack[-1]['peak'] = max(stack[-1]['peak'], stage_peak)
+
+    result = {
+        'stage': name,
+        'peak_bytes': stage_peak - frame['start'],
+        'net_bytes': current - frame['start'],
+        'top_allocations': []
+    }
+
+    if frame['snapshot'] is not None:
+        stats = _snapshot().compare_to(frame['snapshot'], 'lineno')
+        for stat in stats[:_state['top_n']]:
+            site = stat.traceback[0]
+            result['top_allocations'].append({
+                'site': f"{site.filename}:{site.lineno}",
+                'size_diff_bytes': stat.size_diff,
+                'count_diff': stat.count_diff
+            })
+
+    return result
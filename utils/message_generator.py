@@ -3,6 +3,20 @@ Message Generator Module
 Generates personalized volunteer recruitment emails using templates.
 """
 
+import re
+from functools import lru_cache
+from .metrics import stage, record_rows
+
+# Merge fields available in subjects and bodies
+MERGE_FIELDS = ('first_name', 'name', 'email', 'phone', 'interests', 'location')
+MERGE_FIELD_PATTERN = re.compile(r'\{(' + '|'.join(MERGE_FIELDS) + r')\}')
+
+
+@lru_cache(maxsize=512)
+def _compile_merge_fields(text: str) -> tuple:
+    """Split text into alternating literal and merge-field-name parts."""
+    return tuple(MERGE_FIELD_PATTERN.split(text))
+
 
 class MessageGenerator:
     """Generate personalized recruitment emails for HOPE Tutoring volunteers."""
@@ -849,6 +863,14 @@ P.S. — Summer is the perfect time to start! Sign up now and be matched with a
             for template_id, template in cls.TEMPLATES.items()
         ]
     
+    @classmethod
+    def compile_templates(cls) -> int:
+        """Pre-compile every template subject and body; returns the number compiled."""
+        for template in cls.TEMPLATES.values():
+            _compile_merge_fields(template['subject'])
+            _compile_merge_fields(template['body'])
+        return len(cls.TEMPLATES)
+    
     @classmethod
     def get_template_categories(cls) -> dict:
         """Get template category metadata."""
@@ -924,17 +946,30 @@ P.S. — Summer is the perfect time to start! Sign up now and be matched with a
         Returns:
             List of generated email dictionaries
         """
-        return [
-            self.generate_single(volunteer, template_id, custom_subject, custom_body)
-            for volunteer in volunteers
-        ]
+        with stage('generate.batch'):
+            messages = [
+                self.generate_single(volunteer, template_id, custom_subject, custom_body)
+                for volunteer in volunteers
+            ]
+        
+        record_rows('generate', len(messages))
+        return messages
     
     def _apply_merge_fields(self, text: str, fields: dict) -> str:
         """Apply merge field substitutions to text."""
-        result = text
+        parts = _compile_merge_fields(text)
+        if len(parts) == 1:
+            return text
         
-        for field_name, value in fields.items():
-            placeholder = '{' + field_name + '}'
-            result = result.replace(placeholder, str(value) if value else '')
+        # Odd positions are field names, even positions are literal text
+        result = []
+        for i, part in enumerate(parts):
+            if i % 2 == 0:
+                result.append(part)
+            elif part in fields:
+                value = fields[part]
+                result.append(str(value) if value else '')
+            else:
+                result.append('{' + part + '}')
         
-        return result
+        return ''.join(result)
@@ -0,0 +1,280 @@
+"""
+Metrics Module
+Low-overhead request and stage timing with Prometheus text-format export.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from . import memory_profiler
+
+# Latency buckets in seconds (covers quick template lookups through large PDF parses)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Number of finished request records kept for diagnostics
+RECENT_REQUESTS = 200
+
+# Request record for the request being handled in the current thread/task
+_current_record = contextvars.ContextVar('hsrm_request_record', default=None)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = [
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    ]
+    return '{' + ','.join(escaped) + '}'
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down (queue depth, work in flight)."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, plus one overflow slot for +Inf
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            items = [(key, list(s[0]), s[1], s[2]) for key, s in self._series.items()]
+
+        lines = []
+        for key, counts, total, count in items:
+            running = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                running += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', repr(float(bound))),))} {running}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together at /metrics."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._register(Gauge(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class RequestRecord:
+    """Timing record for a single request: total duration plus named stages."""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.endpoint = None
+        self.status = None
+        self.started_at = time.time()
+        self.duration = None
+        self.stages = []
+        self.counters = {}
+        self.memory = []
+        self._start = time.perf_counter()
+
+    def to_dict(self) -> dict:
+        return {
+            'method': self.method,
+            'path': self.path,
+            'endpoint': self.endpoint,
+            'status': self.status,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration * 1000, 3) if self.duration is not None else None,
+            'stages': [{'stage': name, 'duration_ms': round(seconds * 1000, 3)} for name, seconds in self.stages],
+            'counters': dict(self.counters),
+            'memory': list(self.memory)
+        }
+
+
+# Shared registry and the metrics the app reports
+registry = MetricsRegistry()
+
+REQUEST_SECONDS = registry.histogram(
+    'hsrm_request_duration_seconds',
+    'Time spent handling HTTP requests.'
+)
+STAGE_SECONDS = registry.histogram(
+    'hsrm_stage_duration_seconds',
+    'Time spent in named processing stages (parse, extract, generate, serialize, ...).'
+)
+ROWS_TOTAL = registry.counter(
+    'hsrm_rows_total',
+    'Rows processed per stage (volunteers extracted, messages generated, ...).'
+)
+BYTES_TOTAL = registry.counter(
+    'hsrm_bytes_total',
+    'Bytes received and sent, by direction and endpoint.'
+)
+
+_recent_requests = deque(maxlen=RECENT_REQUESTS)
+
+
+def current_record():
+    """Return the RequestRecord for the request in progress, if any."""
+    return _current_record.get()
+
+
+def start_request(method: str, path: str) -> RequestRecord:
+    """Begin timing a request and make its record current."""
+    record = RequestRecord(method, path)
+    _current_record.set(record)
+    if memory_profiler.is_enabled():
+        memory_profiler.enter_stage('request')
+    return record
+
+
+def finish_request(record: RequestRecord, status: int, endpoint: str = None,
+                   request_bytes: int = None, response_bytes: int = None):
+    """Close a request record and report it."""
+    if record.duration is not None:
+        return
+
+    record.duration = time.perf_counter() - record._start
+    record.status = status
+    record.endpoint = endpoint or 'unmatched'
+
+    memory = memory_profiler.exit_stage('request')
+    if memory is not None:
+        record.memory.append(memory)
+
+    REQUEST_SECONDS.observe(record.duration, method=record.method, endpoint=record.endpoint, status=status)
+    if request_bytes:
+        BYTES_TOTAL.inc(request_bytes, direction='in', endpoint=record.endpoint)
+    if response_bytes:
+        BYTES_TOTAL.inc(response_bytes, direction='out', endpoint=record.endpoint)
+
+    _recent_requests.append(record)
+    if _current_record.get() is record:
+        _current_record.set(None)
+
+
+def recent_requests() -> list:
+    """Finished request records, most recent last."""
+    return list(_recent_requests)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a block of work as a named stage.
+
+    The duration is added to the stage histogram and, when called inside a
+    request, to that request's timing record. With memory profiling enabled the
+    stage's peak allocation is attached to the record as well.
+    """
+    profiling = memory_profiler.is_enabled()
+    if profiling:
+        memory_profiler.enter_stage(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        memory = memory_profiler.exit_stage(name) if profiling else None
+        record = _current_record.get()
+        if record is not None:
+            record.stages.append((name, elapsed))
+            if memory is not None:
+                record.memory.append(memory)
+
+
+def record_rows(stage_name: str, count: int):
+    """Count rows processed by a stage."""
+    ROWS_TOTAL.inc(count, stage=stage_name)
+    record = _current_record.get()
+    if record is not None:
+        key = f"{stage_name}.rows"
+        record.counters[key] = record.counters.get(key, 0) + count
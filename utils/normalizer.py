@@ -0,0 +1,171 @@
+"""
+Normalizer Module
+Normalizes extracted contacts a whole column at a time with pandas string
+operations: names get Unicode NFC, single spaces and, when typed all in one
+case, title case that keeps particles ('van', 'de', ...) lowercase; emails
+are lowercased; phones become E.164 with any extension split into
+``phone_ext``, through the one-number rule that dedup's phone keys use too.
+pandas is loaded through the backend registry.
+"""
+
+import re
+from .backends import registry
+
+NAME_FIELDS = ('name', 'first_name', 'last_name')
+
+# Name particles kept lowercase after the first word of a name
+NAME_PARTICLES = ('da', 'das', 'de', 'del', 'della', 'den', 'der', 'di', 'do', 'dos', 'du',
+                  'la', 'le', 'ten', 'ter', 'van', 'von')
+
+_PARTICLE = re.compile(r'(?<=\s)(?:' + '|'.join(p.title() for p in NAME_PARTICLES) + r')(?=\s)')
+_MC_PREFIX = re.compile(r'\bMc([a-z])')
+_WHITESPACE = re.compile(r'\s+')
+# The number, and the digits of an extension ('x12', 'ext. 12', '#12') if there is one
+_NUMBER_AND_EXTENSION = re.compile(r'^(.*?)(?:\s*(?:ext\.?|extension|x|#)\s*(\d{1,6}))?\s*$',
+                                   re.IGNORECASE | re.DOTALL)
+_INTERNATIONAL = re.compile(r'^(?:\+|00)')
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_records(records: list, country_code: str = '1') -> list:
+    """
+    Normalize extracted contact dicts in one pass over a DataFrame of their
+    name, email and phone columns.
+
+    Args:
+        records: Contact dicts (name, first_name, last_name, email, phone, ...)
+        country_code: Country code for phone numbers written without one
+
+    Returns:
+        The same dicts, updated in place; each gets ``phone_ext`` when it has a ``phone``
+    """
+    fields = [field for field in (*NAME_FIELDS, 'email', 'phone') if records and field in records[0]]
+    if not fields:
+        return records
+    pd = registry.load('csv').pd
+    frame = normalize_frame(
+        pd.DataFrame({field: [record.get(field) for record in records] for field in fields}),
+        country_code
+    )
+    # Written back column by column; DataFrame.to_dict('records') is several times slower
+    for field in frame.columns:
+        for record, value in zip(records, frame[field].tolist()):
+            record[field] = value
+    return records
+
+
+def normalize_frame(frame, country_code: str = '1'):
+    """
+    Normalize the name, email and phone columns of a contacts DataFrame in place.
+
+    Args:
+        frame: DataFrame with any of the NAME_FIELDS, 'email' and 'phone' columns
+        country_code: Country code for phone numbers written without one
+
+    Returns:
+        The same DataFrame (with a 'phone_ext' column when it has 'phone')
+    """
+    for field in NAME_FIELDS:
+        if field in frame:
+            frame[field] = normalize_names(frame[field])
+    if 'email' in frame:
+        frame['email'] = normalize_emails(frame['email'])
+    if 'phone' in frame:
+        frame['phone'], frame['phone_ext'] = normalize_phones(frame['phone'], country_code)
+    return frame
+
+
+def normalize_names(names):
+    """
+    NFC, single-spaced names; names typed in one case are title-cased
+    ("mary VAN DER berg" stays as typed, "MARY VAN DER BERG" becomes "Mary van der Berg").
+
+    Args:
+        names: Series of names (missing values become '')
+
+    Returns:
+        Series of normalized names
+    """
+    names = _text(names).str.normalize('NFC').str.replace(_WHITESPACE, ' ', regex=True)
+    # Mixed case is taken as intended (McDonald, DeShawn)
+    one_case = names.str.isupper() | names.str.islower()
+    titled = (names[one_case].str.title()
+              .str.replace(_PARTICLE, lambda match: match.group(0).lower(), regex=True)
+              .str.replace(_MC_PREFIX, lambda match: 'Mc' + match.group(1).upper(), regex=True))
+    names[one_case] = titled
+    return names
+
+
+def normalize_emails(emails):
+    """
+    Lowercased addresses without a mailto: prefix or angle brackets.
+
+    Args:
+        emails: Series of email addresses (missing values become '')
+
+    Returns:
+        Series of normalized addresses
+    """
+    return (_text(emails)
+            .str.replace(r'^mailto:', '', regex=True, case=False)
+            .str.strip('<> ')
+            .str.lower())
+
+
+def normalize_phones(phones, country_code: str = '1') -> tuple:
+    """
+    Phone numbers in E.164 form, with extensions ('x12', 'ext. 12') split off.
+
+    Each distinct value goes through normalize_phone once; values that aren't
+    a valid number are kept as typed.
+
+    Args:
+        phones: Series of phone numbers as typed (missing values become '')
+        country_code: Country code for numbers written without one
+
+    Returns:
+        (Series of E.164 numbers, Series of extensions ('' when none))
+    """
+    raw = _text(phones)
+    numbers, extensions = {}, {}
+    for value in raw.unique():
+        numbers[value], extensions[value] = normalize_phone(value, country_code)
+    e164 = raw.map(numbers)
+    return e164.where(e164 != '', raw), raw.map(extensions)
+
+
+def normalize_phone(phone, country_code: str = '1') -> tuple:
+    """
+    One phone number in E.164 form, with its extension split off.
+
+    Numbers starting with + or 00 keep their country code; others get
+    ``country_code`` (for '1', only 10-digit numbers, or 11 digits starting
+    with 1, are valid).
+
+    Args:
+        phone: Number as typed, e.g. '(817) 555-0101 x12' or '+44 20 7946 0958'
+        country_code: Country code for numbers written without one
+
+    Returns:
+        (E.164 number, extension), or ('', '') if it isn't a valid number
+    """
+    number, extension = _NUMBER_AND_EXTENSION.match('' if phone is None else str(phone).strip()).groups()
+    digits = _NON_DIGITS.sub('', number)
+    if _INTERNATIONAL.match(number):
+        digits = digits[2:] if number.startswith('00') else digits
+        e164 = f'+{digits}' if 8 <= len(digits) <= 15 else ''
+    elif country_code == '1':
+        if len(digits) == 10:
+            e164 = f'+1{digits}'
+        else:
+            e164 = f'+{digits}' if len(digits) == 11 and digits.startswith('1') else ''
+    else:
+        # Without the trunk prefix (the leading 0 of a national number)
+        digits = digits[1:] if digits.startswith('0') else digits
+        e164 = f'+{country_code}{digits}' if 6 <= len(digits) <= 15 - len(country_code) else ''
+    return (e164, extension or '') if e164 else ('', '')
+
+
+def _text(values):
+    """Stripped strings, with missing values (NaN/None) as ''."""
+    return values.fillna('').astype(str).str.strip()
@@ -0,0 +1,252 @@
+"""
+Roster Store Module
+Keeps recently uploaded rosters in memory, each with a version number and a
+search index, so the UI can search, sort and edit large rosters server-side
+and sync only what changed since its cached copy.
+"""
+
+import hashlib
+import re
+import threading
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from .search_index import SEARCH_FIELDS, STATUS_RANK, RosterIndex
+
+# Record fields that PATCH-style edits may change
+EDITABLE_FIELDS = frozenset(SEARCH_FIELDS + ('status',))
+
+# Record field -> volunteer field it came from; edits to these change the generated message
+VOLUNTEER_FIELDS = {'name': 'name', 'email': 'email', 'site': 'location', 'referral': 'referral'}
+
+# A bare addr-spec: no display name, angle brackets, whitespace or control characters
+# (addresses go verbatim into SMTP commands and the To: header)
+_PLAIN_ADDRESS = re.compile(r'[^\s<>()\[\]\\,;:"@\x00-\x1f\x7f]+@[^\s<>()\[\]\\,;:"@\x00-\x1f\x7f]+\Z')
+
+# Delivery state of records whose email isn't a plain address
+UNDELIVERABLE = 'undeliverable'
+
+
+def is_plain_address(address) -> bool:
+    """Whether ``address`` is a bare local@domain address, safe to put in SMTP commands and headers."""
+    return isinstance(address, str) and _PLAIN_ADDRESS.match(address) is not None
+
+
+def volunteer_to_record(volunteer: dict, status: str = 'pending') -> dict:
+    """
+    Shape a parsed volunteer as an indexable roster record. One whose email is set
+    but isn't a plain address gets the delivery state 'undeliverable' (the mailer
+    refuses it if a send is attempted).
+    """
+    record = {
+        'name': volunteer.get('name', ''),
+        'email': volunteer.get('email', ''),
+        'site': volunteer.get('location', ''),
+        'referral': volunteer.get('referral', ''),
+        'status': status
+    }
+    if record['email'] and not is_plain_address(record['email']):
+        record['delivery'] = UNDELIVERABLE
+    return record
+
+
+def message_set_token(generation: dict) -> str:
+    """Short, stable id for the template settings a set of messages was generated with."""
+    key = '\x1f'.join(str(generation.get(name) or '') for name in ('template_id', 'custom_subject', 'custom_body'))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+class Roster:
+    """
+    One roster: its records (via the index) and a version bumped on every edit.
+
+    Each record remembers the version it last changed in, and separately the
+    version its generated message last changed in, so clients can fetch deltas.
+    """
+
+    def __init__(self, roster_id: str, records: list, volunteers: list = None, generation: dict = None):
+        """
+        Args:
+            roster_id: Unique id
+            records: Records to index (record id = list position)
+            volunteers: Source volunteer dicts, kept to regenerate messages after edits
+            generation: template_id, custom_subject and custom_body the messages were generated with
+        """
+        self.id = roster_id
+        self.index = RosterIndex(records)
+        self.version = 1
+        self.message_version = 1
+        self.volunteers = volunteers
+        self.generation = generation
+        self.message_set = message_set_token(generation) if generation else None
+        self.created_at = time.time()
+        self.touched_at = self.created_at
+        self._record_versions = array('l', [1]) * len(records)
+        self._message_versions = array('l', [1]) * len(records)
+        self.delivery_job = None
+        self._lock = threading.Lock()
+
+    def update_records(self, updates: list) -> int:
+        """
+        Apply edits to several records as one new version.
+
+        Args:
+            updates: List of dicts with an 'id' plus the fields to change
+
+        Returns:
+            The roster's new version
+
+        Raises:
+            KeyError: If a record id doesn't exist
+            ValueError: If a value is invalid
+        """
+        with self._lock:
+            # Validate everything first so a bad entry doesn't leave a half-applied edit
+            edits = []
+            for update in updates:
+                record_id = int(update['id'])
+                if self.index.get(record_id) is None:
+                    raise KeyError(record_id)
+                changes = {key: value for key, value in update.items() if key != 'id'}
+                unknown = set(changes) - EDITABLE_FIELDS
+                if unknown:
+                    raise ValueError(f"Fields can't be edited: {', '.join(sorted(unknown))}")
+                if 'status' in changes and changes['status'] not in STATUS_RANK:
+                    raise ValueError(f"Unknown status: {changes['status']}")
+                if changes.get('email') and not is_plain_address(changes['email']):
+                    raise ValueError(f"Not a plain email address: {changes['email']!r}")
+                edits.append((record_id, changes))
+
+            self.version += 1
+            for record_id, changes in edits:
+                # A corrected address can be sent to again
+                if changes.get('email') and self.index.get(record_id).get('delivery') == UNDELIVERABLE:
+                    changes = dict(changes, delivery=None)
+                self.index.update(record_id, changes)
+                self._record_versions[record_id] = self.version
+                if VOLUNTEER_FIELDS.keys() & changes.keys():
+                    self._update_volunteer(record_id, changes)
+                    self._message_versions[record_id] = self.version
+                    self.message_version = self.version
+            return self.version
+
+    def set_delivery(self, states: dict) -> int:
+        """
+        Record email delivery states as one new version (set by the mailer, not by edits).
+
+        Args:
+            states: {record id: delivery state ('queued', 'sent', 'failed', ...)}
+
+        Returns:
+            The roster's new version
+        """
+        with self._lock:
+            self.version += 1
+            for record_id, delivery in states.items():
+                if self.index.get(record_id) is not None:
+                    self.index.update(record_id, {'delivery': delivery})
+                    self._record_versions[record_id] = self.version
+            return self.version
+
+    def changes_since(self, version: int, message_version: int) -> tuple:
+        """
+        What changed after a client's cached versions.
+
+        Args:
+            version: Roster version the client has (0 for everything)
+            message_version: Message version the client has (0 for everything)
+
+        Returns:
+            (records changed after ``version``, ids of records whose message changed
+            after ``message_version``)
+        """
+        with self._lock:
+            records = [dict(self.index.get(record_id)) for record_id, changed in enumerate(self._record_versions)
+                       if changed > version]
+            message_ids = [record_id for record_id, changed in enumerate(self._message_versions)
+                           if changed > message_version]
+        return records, message_ids
+
+    def _update_volunteer(self, record_id: int, changes: dict):
+        """Carry record edits over to the source volunteer so regenerated messages use them."""
+        if not self.volunteers:
+            return
+        volunteer = self.volunteers[record_id]
+        for field, value in changes.items():
+            if field in VOLUNTEER_FIELDS:
+                volunteer[VOLUNTEER_FIELDS[field]] = value
+        if changes.get('name'):
+            volunteer['first_name'] = changes['name'].split(' ')[0]
+
+    def summary(self) -> dict:
+        return {
+            'roster_id': self.id,
+            'version': self.version,
+            'message_version': self.message_version,
+            'message_set': self.message_set,
+            'count': len(self.index),
+            'created_at': self.created_at
+        }
+
+
+class RosterStore:
+    """Bounded, least-recently-used collection of rosters (per process)."""
+
+    def __init__(self, max_rosters: int = 16, ttl: float = 4 * 3600):
+        """
+        Args:
+            max_rosters: Rosters kept before the least recently used is dropped
+            ttl: Seconds an untouched roster is kept
+        """
+        self.max_rosters = max_rosters
+        self.ttl = ttl
+        self._rosters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, volunteers: list, statuses: dict = None, generation: dict = None) -> Roster:
+        """
+        Store a roster built from parsed volunteers.
+
+        Args:
+            volunteers: Volunteer dicts as returned by FileParser
+            statuses: Optional {email: status} to seed contact statuses
+            generation: Template settings, when messages were generated for the roster
+
+        Returns:
+            The new Roster (records with an unusable email are marked undeliverable)
+        """
+        statuses = statuses or {}
+        records = [
+            volunteer_to_record(volunteer, statuses.get(volunteer.get('email', ''), 'pending'))
+            for volunteer in volunteers
+        ]
+        roster = Roster(uuid.uuid4().hex, records, volunteers if generation else None, generation)
+
+        with self._lock:
+            self._expire()
+            self._rosters[roster.id] = roster
+            while len(self._rosters) > self.max_rosters:
+                self._rosters.popitem(last=False)
+        return roster
+
+    def get(self, roster_id: str):
+        """Roster with ``roster_id``, or None if unknown or expired."""
+        with self._lock:
+            self._expire()
+            roster = self._rosters.get(roster_id)
+            if roster is not None:
+                roster.touched_at = time.time()
+                self._rosters.move_to_end(roster_id)
+            return roster
+
+    def all(self) -> list:
+        """Every live roster (without counting as use)."""
+        with self._lock:
+            self._expire()
+            return list(self._rosters.values())
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for roster_id in [rid for rid, roster in self._rosters.items() if roster.touched_at < cutoff]:
+            del self._rosters[roster_id]
@@ -0,0 +1,353 @@
+"""
+Search Index Module
+In-memory index over roster records: prefix and substring search on name,
+email, site and referral, status filters and sorted, paginated views. Each
+structure is built the first time a query needs it and from then on is
+updated in place by edits instead of being rebuilt.
+"""
+
+import bisect
+import re
+import threading
+from collections import defaultdict
+
+# Record fields that can be searched
+SEARCH_FIELDS = ('name', 'email', 'site', 'referral')
+
+# Contact statuses, in the order used by the 'status' sort
+STATUSES = ('signed', 'responded', 'pending', 'declined')
+STATUS_RANK = {status: rank for rank, status in enumerate(STATUSES)}
+
+# Sorted views that can be requested ('id' is upload order)
+SORT_KEYS = ('id', 'name', 'email', 'site', 'status')
+
+# Fields each sorted view's key is built from
+SORT_DEPENDS = {
+    'name': {'name'},
+    'email': {'email', 'name'},
+    'site': {'site', 'name'},
+    'status': {'status', 'name'}
+}
+
+
+def _word_start(query: str):
+    """Pattern matching ``query`` at the start of a value or of a word in it."""
+    return re.compile(r'(?<![0-9a-z])' + re.escape(query))
+
+
+class SortedKeys:
+    """Sorted list of key tuples (ending in the record id) kept in order with bisect."""
+
+    def __init__(self, items: list = None):
+        self.keys = sorted(items or [])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key):
+        bisect.insort(self.keys, key)
+
+    def remove(self, key):
+        index = bisect.bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            del self.keys[index]
+
+
+class _Postings:
+    """Map of key -> set of record ids."""
+
+    def __init__(self):
+        self.ids = defaultdict(set)
+
+    def add(self, key, record_id: int):
+        self.ids[key].add(record_id)
+
+    def discard(self, key, record_id: int):
+        """Remove an id, dropping ``key`` once it has none."""
+        bucket = self.ids.get(key)
+        if bucket is None:
+            return
+        bucket.discard(record_id)
+        if not bucket:
+            del self.ids[key]
+
+
+class RosterIndex:
+    """Searchable, sortable view over a list of roster records (record id = list position)."""
+
+    def __init__(self, records: list):
+        """
+        Args:
+            records: Record dicts with name, email, site, referral and status keys
+        """
+        self._lock = threading.RLock()
+        self._records = []
+        self._values = {field: [] for field in SEARCH_FIELDS}
+        self._status = {status: set() for status in STATUSES}
+        self._live = 0
+
+        # Built on first use: distinct value -> ids (search) and per-record sort keys
+        # plus the sorted view (sorting)
+        self._by_value = {}
+        self._keys = {}
+        self._sorted = {}
+
+        for record in records:
+            self._append(record)
+
+    def __len__(self) -> int:
+        return self._live
+
+    def get(self, record_id: int):
+        """Record with ``record_id``, or None if it doesn't exist or was removed."""
+        if 0 <= record_id < len(self._records):
+            return self._records[record_id]
+        return None
+
+    def ids(self):
+        """Ids of the records that haven't been removed, in order."""
+        with self._lock:
+            return list(self._live_ids())
+
+    # ------------------------------------------------------------------
+    # Edits
+    # ------------------------------------------------------------------
+    def add(self, record: dict) -> int:
+        """
+        Add a record and index it.
+
+        Args:
+            record: Record dict (see __init__)
+
+        Returns:
+            The new record's id
+        """
+        with self._lock:
+            record_id = self._append(record)
+            for field in SEARCH_FIELDS:
+                self._index_field(field, record_id)
+            for sort in self._sorted:
+                self._index_sort(sort, record_id)
+            return record_id
+
+    def update(self, record_id: int, changes: dict) -> dict:
+        """
+        Change fields of one record, re-indexing only what changed.
+
+        Args:
+            record_id: Record to change
+            changes: Field values to set
+
+        Returns:
+            The updated record
+
+        Raises:
+            KeyError: If the record doesn't exist
+            ValueError: If a status isn't one of STATUSES
+        """
+        with self._lock:
+            record = self.get(record_id)
+            if record is None:
+                raise KeyError(record_id)
+            if 'status' in changes and changes['status'] not in STATUS_RANK:
+                raise ValueError(f"Unknown status: {changes['status']}")
+
+            changed = {key for key, value in changes.items() if key != 'id' and record.get(key) != value}
+            if not changed:
+                return record
+
+            stale_sorts = [sort for sort in self._sorted if SORT_DEPENDS[sort] & changed]
+            for sort in stale_sorts:
+                self._sorted[sort].remove(self._keys[sort][record_id])
+            for field in SEARCH_FIELDS:
+                if field in changed:
+                    self._unindex_field(field, record_id)
+            if 'status' in changed:
+                self._status[record['status']].discard(record_id)
+
+            for key in changed:
+                record[key] = changes[key]
+
+            for field in SEARCH_FIELDS:
+                if field in changed:
+                    self._values[field][record_id] = str(record.get(field) or '').lower()
+                    self._index_field(field, record_id)
+            if 'status' in changed:
+                self._status[record['status']].add(record_id)
+            for sort in stale_sorts:
+                self._index_sort(sort, record_id)
+            return record
+
+    def remove(self, record_id: int):
+        """Remove a record; its id is not reused."""
+        with self._lock:
+            record = self.get(record_id)
+            if record is None:
+                raise KeyError(record_id)
+            for sort in self._sorted:
+                self._sorted[sort].remove(self._keys[sort][record_id])
+            for field in SEARCH_FIELDS:
+                self._unindex_field(field, record_id)
+                self._values[field][record_id] = ''
+            self._status[record['status']].discard(record_id)
+            self._records[record_id] = None
+            self._live -= 1
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def search(self, query: str = '', mode: str = 'substring', fields: list = None,
+               statuses: list = None, sort: str = 'id', descending: bool = False,
+               offset: int = 0, limit: int = 50) -> dict:
+        """
+        Find, filter, sort and paginate records.
+
+        Args:
+            query: Text to look for (case-insensitive); empty matches everything
+            mode: 'substring' (anywhere) or 'prefix' (start of a word or value)
+            fields: Fields to search (default: all of SEARCH_FIELDS)
+            statuses: Only include records with one of these statuses
+            sort: One of SORT_KEYS
+            descending: Reverse the sort order
+            offset: Number of matches to skip
+            limit: Maximum ids to return (0 for all)
+
+        Returns:
+            Dictionary with 'total' matches and the page of matching 'ids'
+        """
+        fields = [field for field in (fields or SEARCH_FIELDS) if field in self._values]
+        if mode not in ('substring', 'prefix'):
+            raise ValueError(f"Unknown search mode: {mode}")
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort: {sort}")
+
+        query = (query or '').strip().lower()
+
+        with self._lock:
+            candidates = None
+            if query:
+                candidates = self._match(query, mode, fields)
+            if statuses:
+                allowed = set()
+                for status in statuses:
+                    allowed |= self._status.get(status, set())
+                candidates = allowed if candidates is None else candidates & allowed
+
+            end = offset + limit if limit > 0 else None
+            if candidates is None:
+                ids = self._ordered_ids(sort, descending, offset, end)
+                total = self._live
+            else:
+                total = len(candidates)
+                ids = self._order(candidates, sort, descending)[offset:end]
+
+        return {'total': total, 'offset': offset, 'limit': limit, 'ids': ids}
+
+    def _match(self, query: str, mode: str, fields: list) -> set:
+        if mode == 'prefix':
+            test = _word_start(query).search
+        else:
+            def test(value):
+                return query in value
+        matches = set()
+        for field in fields:
+            # Scan distinct values only; sites and referrals repeat heavily
+            by_value = self._value_postings(field)
+            for value in [value for value in by_value if test(value)]:
+                matches |= by_value[value]
+        return matches
+
+    def _ordered_ids(self, sort: str, descending: bool, start: int, end) -> list:
+        """A page of all live records in sort order, without building the full list."""
+        if sort == 'id':
+            ids = self._live_ids()
+            if descending:
+                ids = ids[::-1]
+            return list(ids[start:end])
+
+        keys = self._sorted_view(sort).keys
+        if descending:
+            stop = max(len(keys) - start, 0)
+            begin = 0 if end is None else max(len(keys) - end, 0)
+            return [key[-1] for key in reversed(keys[begin:stop])]
+        return [key[-1] for key in keys[start:end]]
+
+    def _order(self, candidates: set, sort: str, descending: bool) -> list:
+        if sort == 'id':
+            return sorted(candidates, reverse=descending)
+
+        keys = self._sorted_view(sort).keys
+        if len(candidates) * 4 < len(keys):
+            # Few matches: sorting them by their cached keys beats walking the whole view
+            return sorted(candidates, key=self._keys[sort].__getitem__, reverse=descending)
+        ordered = [key[-1] for key in keys if key[-1] in candidates]
+        if descending:
+            ordered.reverse()
+        return ordered
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+    def _append(self, record: dict) -> int:
+        record = dict(record)
+        if record.get('status') not in STATUS_RANK:
+            record['status'] = 'pending'
+        record_id = len(self._records)
+        record['id'] = record_id
+        self._records.append(record)
+        for field in SEARCH_FIELDS:
+            self._values[field].append(str(record.get(field) or '').lower())
+        self._status[record['status']].add(record_id)
+        self._live += 1
+        return record_id
+
+    def _live_ids(self):
+        if self._live == len(self._records):
+            return range(len(self._records))
+        return [i for i, record in enumerate(self._records) if record is not None]
+
+    def _value_postings(self, field: str) -> dict:
+        """Distinct (lowercased) value -> ids for ``field``."""
+        if field not in self._by_value:
+            postings = _Postings()
+            ids = postings.ids
+            values = self._values[field]
+            for record_id in self._live_ids():
+                ids[values[record_id]].add(record_id)
+            self._by_value[field] = postings
+        return self._by_value[field].ids
+
+    def _sorted_view(self, sort: str) -> SortedKeys:
+        """Records in ``sort`` order (plus each record's key, for sorting subsets)."""
+        if sort not in self._sorted:
+            keys = [None] * len(self._records)
+            for record_id in self._live_ids():
+                keys[record_id] = self._sort_key(sort, record_id)
+            self._keys[sort] = keys
+            self._sorted[sort] = SortedKeys(key for key in keys if key is not None)
+        return self._sorted[sort]
+
+    def _index_field(self, field: str, record_id: int):
+        if field in self._by_value:
+            self._by_value[field].add(self._values[field][record_id], record_id)
+
+    def _unindex_field(self, field: str, record_id: int):
+        if field in self._by_value:
+            self._by_value[field].discard(self._values[field][record_id], record_id)
+
+    def _index_sort(self, sort: str, record_id: int):
+        key = self._sort_key(sort, record_id)
+        keys = self._keys[sort]
+        if record_id == len(keys):
+            keys.append(key)
+        else:
+            keys[record_id] = key
+        self._sorted[sort].add(key)
+
+    def _sort_key(self, sort: str, record_id: int) -> tuple:
+        name = self._values['name'][record_id]
+        if sort == 'status':
+            return (STATUS_RANK[self._records[record_id]['status']], name, record_id)
+        if sort == 'name':
+            return (name, record_id)
+        return (self._values[sort][record_id], name, record_id)
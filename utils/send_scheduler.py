@@ -0,0 +1,457 @@
+"""
+Send Scheduler Module
+Decides which queued email goes out next: messages wait on a heap of due
+times (scheduled sends and retries), then leave in priority order as fast as
+token buckets for the sending account and each recipient domain allow. A
+SQLite store keeps a copy of every queued message so interrupted jobs can be
+resumed after a restart.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# Lower sends sooner
+PRIORITY_URGENT = 0
+PRIORITY_NORMAL = 1
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Continuously refilled token bucket that never allows more than ``per_minute``
+    sends in any 60-second window.
+
+    Any window of T seconds sees at most ``capacity + refill * T`` sends, so the
+    refill rate leaves room for the burst capacity within each minute.
+    """
+
+    def __init__(self, per_minute: float, burst: int = 1, now: float = 0.0):
+        """
+        Args:
+            per_minute: Sends allowed per minute
+            burst: Sends allowed back to back (capped at half the per-minute rate)
+            now: Current time
+        """
+        self.per_minute = per_minute
+        self.capacity = max(1.0, min(float(burst), per_minute / 2))
+        if per_minute > self.capacity:
+            self.refill = (per_minute - self.capacity) / 60.0
+        else:
+            # Slower than one every 30 seconds: the first minute may see one extra
+            self.refill = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = now
+
+    def _fill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is now)."""
+        self._fill(now)
+        # Tolerate float rounding in the refill, or a due token could look a hair short forever
+        if self.tokens >= 1 - 1e-9:
+            return 0.0
+        return (1 - self.tokens) / self.refill
+
+    def take(self, now: float):
+        self._fill(now)
+        self.tokens -= 1
+
+
+class SendScheduler:
+    """
+    Priority queue of send items under rate limits (not thread-safe; the mailer locks it).
+
+    Items are any objects with ``priority``, ``domain`` and ``seq`` attributes
+    (``seq`` is assigned here). Each recipient domain has its own queue, so a
+    throttled domain never holds up mail to the others.
+    """
+
+    def __init__(self, rate_per_minute: float = 0, domain_rates: dict = None,
+                 default_domain_rate: float = 0, burst: int = 1, clock=time.time):
+        """
+        Args:
+            rate_per_minute: Limit for the sending account (0 for none)
+            domain_rates: Per-minute limits by domain suffix, e.g. {'gmail.com': 600, 'edu': 120};
+                each matching recipient domain gets its own bucket at that rate
+            default_domain_rate: Limit for each domain without a rule (0 for none)
+            burst: Sends allowed back to back by each bucket
+            clock: Time source (seconds; send-at times use the same clock)
+        """
+        self.domain_rates = {domain.lower().lstrip('.'): rate for domain, rate in (domain_rates or {}).items()}
+        self.default_domain_rate = default_domain_rate
+        self.burst = burst
+        self.clock = clock
+        self._account = TokenBucket(rate_per_minute, burst, clock()) if rate_per_minute > 0 else None
+        self._domain_buckets = {}
+
+        self._waiting = []              # (due, seq, item) not yet due
+        self._queues = {}               # domain -> heap of (priority, seq, item)
+        self._ready = []                # (priority, seq, domain) heads of unthrottled queues; may be stale
+        self._throttled = []            # (until, domain)
+        self._throttled_domains = set()
+        self._seq = itertools.count()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def rate_for(self, domain: str) -> float:
+        """Per-minute limit for a recipient domain (most specific suffix rule wins)."""
+        labels = domain.split('.')
+        for i in range(len(labels)):
+            rate = self.domain_rates.get('.'.join(labels[i:]))
+            if rate is not None:
+                return rate
+        return self.default_domain_rate
+
+    def push(self, item, due: float = None):
+        """Queue ``item``, to go no earlier than ``due`` (a clock time; None for now)."""
+        item.seq = next(self._seq)
+        self._size += 1
+        if due is not None and due > self.clock():
+            heapq.heappush(self._waiting, (due, item.seq, item))
+        else:
+            self._enqueue(item)
+
+    def pop(self) -> tuple:
+        """
+        Take the next item allowed to go now.
+
+        Returns:
+            (item, None), or (None, seconds until one may be ready; None when empty)
+        """
+        now = self.clock()
+        self._release(now)
+        if self._account is not None:
+            wait = self._account.wait_time(now)
+            if wait > 0:
+                return None, wait
+
+        while self._ready:
+            priority, seq, domain = self._ready[0]
+            queue = self._queues.get(domain)
+            if not queue or queue[0][1] != seq:
+                heapq.heappop(self._ready)
+                continue
+
+            bucket = self._domain_bucket(domain, now)
+            wait = bucket.wait_time(now) if bucket is not None else 0
+            if wait > 0:
+                heapq.heappop(self._ready)
+                self._throttled_domains.add(domain)
+                heapq.heappush(self._throttled, (now + wait, domain))
+                continue
+
+            if bucket is not None:
+                bucket.take(now)
+            if self._account is not None:
+                self._account.take(now)
+            item = heapq.heappop(queue)[2]
+            heapq.heappop(self._ready)
+            if queue:
+                heapq.heappush(self._ready, (queue[0][0], queue[0][1], domain))
+            else:
+                del self._queues[domain]
+            self._size -= 1
+            return item, None
+
+        return None, self._next_wake(now)
+
+    def remove(self, predicate) -> list:
+        """Take every queued item matching ``predicate`` out of the scheduler."""
+        removed = [entry[2] for entry in self._waiting if predicate(entry[2])]
+        for queue in self._queues.values():
+            removed.extend(entry[2] for entry in queue if predicate(entry[2]))
+        if not removed:
+            return removed
+
+        self._waiting = [entry for entry in self._waiting if not predicate(entry[2])]
+        heapq.heapify(self._waiting)
+        for domain in list(self._queues):
+            queue = [entry for entry in self._queues[domain] if not predicate(entry[2])]
+            if queue:
+                heapq.heapify(queue)
+                self._queues[domain] = queue
+            else:
+                del self._queues[domain]
+        self._ready = [(queue[0][0], queue[0][1], domain) for domain, queue in self._queues.items()
+                       if domain not in self._throttled_domains]
+        heapq.heapify(self._ready)
+        self._size -= len(removed)
+        return removed
+
+    def status(self) -> dict:
+        return {
+            'queued': self._size,
+            'scheduled': len(self._waiting),
+            'domains': len(self._queues),
+            'throttled_domains': len(self._throttled_domains)
+        }
+
+    def _enqueue(self, item):
+        queue = self._queues.setdefault(item.domain, [])
+        entry = (item.priority, item.seq, item)
+        heapq.heappush(queue, entry)
+        if queue[0] is entry and item.domain not in self._throttled_domains:
+            heapq.heappush(self._ready, (item.priority, item.seq, item.domain))
+
+    def _release(self, now: float):
+        """Move due items into their domain queues and un-throttle domains with tokens again."""
+        while self._waiting and self._waiting[0][0] <= now:
+            self._enqueue(heapq.heappop(self._waiting)[2])
+        while self._throttled and self._throttled[0][0] <= now:
+            domain = heapq.heappop(self._throttled)[1]
+            self._throttled_domains.discard(domain)
+            queue = self._queues.get(domain)
+            if queue:
+                heapq.heappush(self._ready, (queue[0][0], queue[0][1], domain))
+
+    def _domain_bucket(self, domain: str, now: float):
+        if domain not in self._domain_buckets:
+            rate = self.rate_for(domain)
+            self._domain_buckets[domain] = TokenBucket(rate, self.burst, now) if rate > 0 else None
+        return self._domain_buckets[domain]
+
+    def _next_wake(self, now: float):
+        times = [heap[0][0] for heap in (self._waiting, self._throttled) if heap]
+        if not times:
+            return None
+        return max(min(times) - now, 0.0)
+
+
+class SendStore:
+    """
+    SQLite copy of queued sends, shared by the server's processes.
+
+    Each job is owned by the process that queued it, which renews a lease on
+    it with a heartbeat. Jobs whose owner stopped renewing (the process
+    crashed or was restarted) are claimed by another process and resumed.
+    Finished messages are removed in batches, so a crash may resend the last
+    second's worth of messages but never loses one.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS send_jobs (
+        job_id TEXT PRIMARY KEY,
+        info TEXT NOT NULL,
+        paused INTEGER NOT NULL DEFAULT 0,
+        owner TEXT NOT NULL,
+        heartbeat REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS send_queue (
+        job_id TEXT NOT NULL,
+        record_key TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        PRIMARY KEY (job_id, record_key)
+    );
+    """
+
+    def __init__(self, path: str, lease: float = 60.0, batch_size: int = 500, flush_interval: float = 1.0):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            lease: Seconds without a heartbeat after which another process may take over a job
+            batch_size: Finished messages that trigger a write
+            flush_interval: Seconds after which finished messages are written anyway
+        """
+        self.path = path
+        self.lease = lease
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.owner = uuid.uuid4().hex
+        self._finished = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._db = None
+        self._heartbeat = None
+        self._stopped = threading.Event()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (call with the lock held)."""
+        if self._db is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.executescript(self.SCHEMA)
+        return self._db
+
+    def add_job(self, job_id: str, info: dict, items: list):
+        """
+        Save a new job and its messages.
+
+        Args:
+            job_id: Job id
+            info: JSON-serializable job settings needed to resume it
+            items: (key, payload) pairs; payloads must be JSON-serializable
+        """
+        rows = ((job_id, json.dumps(key), json.dumps(payload)) for key, payload in items)
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.execute('INSERT INTO send_jobs (job_id, info, owner, heartbeat) VALUES (?, ?, ?, ?)',
+                           (job_id, json.dumps(info), self.owner, time.time()))
+                db.executemany('INSERT OR REPLACE INTO send_queue (job_id, record_key, payload) VALUES (?, ?, ?)', rows)
+
+    def finished(self, job_id: str, key):
+        """Drop one message from the queue (buffered)."""
+        with self._lock:
+            self._finished.append((job_id, json.dumps(key)))
+            if len(self._finished) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def set_paused(self, job_id: str, paused: bool):
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.execute('UPDATE send_jobs SET paused = ? WHERE job_id = ?', (int(paused), job_id))
+
+    def remove_job(self, job_id: str):
+        """Forget a finished or cancelled job."""
+        with self._lock:
+            self._flush()
+            db = self._connection()
+            with db:
+                db.execute('DELETE FROM send_queue WHERE job_id = ?', (job_id,))
+                db.execute('DELETE FROM send_jobs WHERE job_id = ?', (job_id,))
+
+    def job_status(self, job_id: str):
+        """
+        A saved job as any process sees it (e.g. one that stopped and awaits resuming).
+
+        Returns:
+            Dict with info, paused, owner, heartbeat and queued (messages not yet
+            finished), or None once the job is finished or unknown
+        """
+        with self._lock:
+            self._flush()
+            db = self._connection()
+            row = db.execute('SELECT info, paused, owner, heartbeat FROM send_jobs WHERE job_id = ?',
+                             (job_id,)).fetchone()
+            if row is None:
+                return None
+            queued = db.execute('SELECT COUNT(*) FROM send_queue WHERE job_id = ?', (job_id,)).fetchone()[0]
+        info, paused, owner, heartbeat = row
+        return {'info': json.loads(info), 'paused': bool(paused), 'owner': owner, 'heartbeat': heartbeat,
+                'queued': queued}
+
+    def claim_orphans(self) -> list:
+        """
+        Take over jobs whose owner's lease has run out.
+
+        Returns:
+            List of dicts with job_id, info, paused and items ([(key, payload)])
+        """
+        with self._lock:
+            db = self._connection()
+            now = time.time()
+            with db:
+                # BEGIN IMMEDIATE so two processes can't claim the same job
+                db.execute('BEGIN IMMEDIATE')
+                jobs = db.execute(
+                    'SELECT job_id, info, paused FROM send_jobs WHERE owner != ? AND heartbeat < ?',
+                    (self.owner, now - self.lease)
+                ).fetchall()
+                db.executemany('UPDATE send_jobs SET owner = ?, heartbeat = ? WHERE job_id = ?',
+                               [(self.owner, now, job_id) for job_id, _, _ in jobs])
+
+            claimed = []
+            for job_id, info, paused in jobs:
+                items = [(json.loads(key), json.loads(payload)) for key, payload in db.execute(
+                    'SELECT record_key, payload FROM send_queue WHERE job_id = ?', (job_id,))]
+                claimed.append({'job_id': job_id, 'info': json.loads(info), 'paused': bool(paused), 'items': items})
+            return claimed
+
+    def start(self, on_orphans):
+        """
+        Claim orphaned jobs now, then renew this process's leases and look for
+        orphans in the background.
+
+        Args:
+            on_orphans: Callable receiving each list of claimed jobs (see claim_orphans)
+        """
+        if self._heartbeat is not None:
+            return
+        self._check_logged(on_orphans)
+        self._heartbeat = threading.Thread(target=self._run_heartbeat, args=(on_orphans,),
+                                           name='hsrm-send-store', daemon=True)
+        self._heartbeat.start()
+
+    def _run_heartbeat(self, on_orphans):
+        while not self._stopped.wait(self.lease / 3):
+            # One failure (a lock timeout, a resume error) must not stop the renewals, or
+            # another process would claim and resend jobs this one is still sending
+            try:
+                self._renew()
+            except Exception:
+                logger.exception('Renewing send job leases failed; retrying in %.0f s', self.lease / 3)
+            self._check_logged(on_orphans)
+
+    def _renew(self):
+        """Write finished messages and push out this process's leases."""
+        with self._lock:
+            self._flush()
+            db = self._connection()
+            with db:
+                db.execute('UPDATE send_jobs SET heartbeat = ? WHERE owner = ?', (time.time(), self.owner))
+
+    def _check_logged(self, on_orphans):
+        """_check, logging (not raising) any failure so the next round tries again."""
+        try:
+            self._check(on_orphans)
+        except Exception:
+            logger.exception('Resuming orphaned send jobs failed')
+
+    def _check(self, on_orphans):
+        jobs = self.claim_orphans()
+        if not jobs:
+            return
+        try:
+            on_orphans(jobs)
+        except Exception:
+            # Not running here after all: let the next check (in any process) claim them again
+            self._release([job['job_id'] for job in jobs])
+            raise
+
+    def _release(self, job_ids: list):
+        """Give up the lease on jobs this process claimed but couldn't resume."""
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.executemany("UPDATE send_jobs SET owner = '', heartbeat = 0 WHERE job_id = ? AND owner = ?",
+                               [(job_id, self.owner) for job_id in job_ids])
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._finished:
+            return
+        rows, self._finished = self._finished, []
+        try:
+            db = self._connection()
+            with db:
+                db.executemany('DELETE FROM send_queue WHERE job_id = ? AND record_key = ?', rows)
+        except sqlite3.Error:
+            # Kept for the next flush (until then a crash would resend them, not lose them)
+            self._finished = rows + self._finished
+            raise
+
+    def close(self):
+        self._stopped.set()
+        with self._lock:
+            self._flush()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,293 @@
+"""
+Shard Export Module
+Streams the CSV and text-file ZIP exports, optionally split into parts that
+fit mail-merge import limits (rows and/or bytes per file). Parts are written
+one after another into a single outer ZIP together with a manifest.json, so
+any number of messages is exported in constant memory.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import zipfile
+from datetime import datetime, timezone
+
+# Bytes collected before a chunk is handed to the response
+CHUNK_SIZE = 64 * 1024
+
+CSV_HEADER = ['Name', 'Email', 'Subject', 'Body']
+
+# Formats that can be sharded: (file extension, single-file mimetype, single-file download name)
+SHARD_FORMATS = {
+    'csv': ('csv', 'text/csv', 'hope_recruitment_emails.csv'),
+    'zip': ('zip', 'application/zip', 'hope_recruitment_emails.zip')
+}
+
+SHARD_BASENAME = 'hope_recruitment_emails'
+
+# ZIP overhead per member: local header (30) + data descriptor (24) + central directory entry (46)
+# and a margin for deflate expanding incompressible data; plus the end record (22)
+_ZIP_ENTRY_OVERHEAD = 110
+_ZIP_END_OVERHEAD = 22
+
+
+def csv_row(message: dict) -> list:
+    """CSV export row for a message (the body's newlines are kept as literal \\n)."""
+    return [
+        message.get('name', ''),
+        message.get('email', ''),
+        message.get('subject', ''),
+        message.get('body', '').replace('\n', '\\n')
+    ]
+
+
+def text_file(index: int, message: dict) -> tuple:
+    """(file name, UTF-8 content) of a message in the text ZIP export; ``index`` counts from 1."""
+    name = message.get('name', f'Volunteer_{index}').replace(' ', '_')
+    content = f"To: {message.get('email', '')}\n"
+    content += f"Subject: {message.get('subject', '')}\n\n"
+    content += message.get('body', '')
+    return f"{name}_email.txt", content.encode('utf-8')
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only, unseekable file that collects what's written until taken (for streaming ZIPs)."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self.size = 0
+        self.offset = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self.size += len(data)
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.offset
+
+    def take(self) -> bytes:
+        """Everything written since the last take."""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+class _CsvEncoder:
+    """Encodes one CSV row at a time to UTF-8 bytes."""
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def encode(self, row: list) -> bytes:
+        self._writer.writerow(row)
+        data = self._buffer.getvalue().encode('utf-8')
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+def iter_csv(messages):
+    """
+    Stream the CSV export as one file.
+
+    Args:
+        messages: Iterable of generated message dictionaries (consumed lazily)
+
+    Yields:
+        Chunks of the CSV file
+    """
+    encoder = _CsvEncoder()
+    chunk = [encoder.encode(CSV_HEADER)]
+    size = 0
+    for message in messages:
+        data = encoder.encode(csv_row(message))
+        chunk.append(data)
+        size += len(data)
+        if size >= CHUNK_SIZE:
+            yield b''.join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield b''.join(chunk)
+
+
+def iter_text_zip(messages):
+    """
+    Stream the text ZIP export (one .txt file per message) as one file.
+
+    Args:
+        messages: Iterable of generated message dictionaries (consumed lazily)
+
+    Yields:
+        Chunks of the ZIP file
+    """
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for i, message in enumerate(messages, 1):
+            archive.writestr(*text_file(i, message))
+            if sink.size >= CHUNK_SIZE:
+                yield sink.take()
+    yield sink.take()
+
+
+def iter_sharded(export_format: str, messages, max_rows: int = 0, max_bytes: int = 0):
+    """
+    Stream an export split into parts, as one outer ZIP with a manifest.json.
+
+    CSV parts each repeat the header row; ZIP parts are complete ZIPs of .txt
+    files. A message too large to fit ``max_bytes`` on its own gets a part of
+    its own (marked ``oversized`` in the manifest).
+
+    Args:
+        export_format: 'csv' or 'zip'
+        messages: Iterable of generated message dictionaries (consumed lazily)
+        max_rows: Most messages per part (0 for no limit)
+        max_bytes: Largest part file in bytes (0 for no limit)
+
+    Yields:
+        Chunks of the outer ZIP file
+    """
+    extension = SHARD_FORMATS[export_format][0]
+    sink = ChunkSink()
+    parts = []
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        writer = _CsvPartWriter(archive) if export_format == 'csv' else _ZipPartWriter(archive)
+        for index, message in enumerate(messages, 1):
+            item = writer.prepare(index, message)
+            if writer.rows and ((max_rows and writer.rows >= max_rows) or
+                                (max_bytes and writer.size_with(item) > max_bytes)):
+                parts.append(writer.close())
+            if not writer.rows:
+                writer.open(f"{SHARD_BASENAME}_part{len(parts) + 1:03d}.{extension}", index)
+            writer.add(item)
+            if sink.size >= CHUNK_SIZE:
+                yield sink.take()
+        if writer.rows:
+            parts.append(writer.close())
+
+        manifest = {
+            'format': export_format,
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'limits': {'max_rows': max_rows or None, 'max_bytes': max_bytes or None},
+            'total_rows': sum(part['rows'] for part in parts),
+            'parts': [{**part, 'oversized': bool(max_bytes and part['bytes'] > max_bytes)} for part in parts]
+        }
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+    yield sink.take()
+
+
+class _CsvPartWriter:
+    """Writes CSV parts into the outer ZIP, one streamed member per part."""
+
+    def __init__(self, archive: zipfile.ZipFile):
+        self.archive = archive
+        self.encoder = _CsvEncoder()
+        self.header = self.encoder.encode(CSV_HEADER)
+        self.rows = 0
+
+    def prepare(self, index: int, message: dict) -> bytes:
+        return self.encoder.encode(csv_row(message))
+
+    def size_with(self, item: bytes) -> int:
+        return self.size + len(item)
+
+    def open(self, name: str, first_row: int):
+        self.name, self.first_row = name, first_row
+        self.member = self.archive.open(name, 'w')
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self._write(self.header)
+
+    def add(self, item: bytes):
+        self._write(item)
+        self.rows += 1
+
+    def close(self) -> dict:
+        self.member.close()
+        part = _part_info(self.name, self.first_row, self.rows, self.size, self.digest)
+        self.rows = 0
+        return part
+
+    def _write(self, data: bytes):
+        self.member.write(data)
+        self.digest.update(data)
+        self.size += len(data)
+
+
+class _ZipPartWriter:
+    """Writes ZIP parts (of .txt files) into the outer ZIP, one streamed member per part."""
+
+    def __init__(self, archive: zipfile.ZipFile):
+        self.archive = archive
+        self.rows = 0
+
+    def prepare(self, index: int, message: dict) -> tuple:
+        return text_file(index, message)
+
+    def size_with(self, item: tuple) -> int:
+        # Upper bound for the part once this file and the ZIP's directory are written
+        name, content = item
+        entry = len(content) + len(content) // 1000 + 2 * len(name.encode('utf-8')) + _ZIP_ENTRY_OVERHEAD
+        return self.counter.offset + self.directory + entry + _ZIP_END_OVERHEAD
+
+    def open(self, name: str, first_row: int):
+        self.name, self.first_row = name, first_row
+        self.member = self.archive.open(name, 'w')
+        self.counter = _DigestWriter(self.member)
+        self.part = zipfile.ZipFile(self.counter, 'w', zipfile.ZIP_DEFLATED)
+        self.directory = 0
+
+    def add(self, item: tuple):
+        name, content = item
+        self.part.writestr(name, content)
+        self.directory += 46 + len(name.encode('utf-8'))
+        self.rows += 1
+
+    def close(self) -> dict:
+        self.part.close()
+        self.member.close()
+        part = _part_info(self.name, self.first_row, self.rows, self.counter.offset, self.counter.digest)
+        self.rows = 0
+        return part
+
+
+class _DigestWriter(io.RawIOBase):
+    """Unseekable pass-through writer that counts and hashes what goes through it."""
+
+    def __init__(self, target):
+        super().__init__()
+        self.target = target
+        self.digest = hashlib.sha256()
+        self.offset = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.target.write(data)
+        self.digest.update(data)
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.offset
+
+
+def _part_info(name: str, first_row: int, rows: int, size: int, digest) -> dict:
+    return {
+        'file': name,
+        'rows': rows,
+        'first_row': first_row,
+        'last_row': first_row + rows - 1,
+        'bytes': size,
+        'sha256': digest.hexdigest()
+    }
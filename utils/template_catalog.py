@@ -0,0 +1,97 @@
+"""
+Template Catalog Module
+Template listing and per-template details, built once, pre-serialized and
+versioned by content hash so clients can revalidate with ETags.
+"""
+
+import hashlib
+import json
+import threading
+from .message_generator import MessageGenerator
+
+# Characters of body text shown on template cards
+PREVIEW_LENGTH = 120
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _dumps(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class TemplateCatalog:
+    """Immutable snapshot of the message templates."""
+
+    def __init__(self, templates: dict, categories: dict):
+        """
+        Args:
+            templates: Template definitions keyed by id (MessageGenerator.TEMPLATES)
+            categories: Category metadata (MessageGenerator.TEMPLATE_CATEGORIES)
+        """
+        self.categories = categories
+        self.listing = []
+        self._details = {}
+
+        for template_id, template in templates.items():
+            body = template['body']
+            self.listing.append({
+                'id': template_id,
+                'name': template['name'],
+                'category': template.get('category', 'initial'),
+                'description': template['description'],
+                'preview': body[:PREVIEW_LENGTH]
+            })
+
+            detail = _dumps({
+                'id': template_id,
+                'name': template['name'],
+                'category': template.get('category', 'initial'),
+                'description': template['description'],
+                'subject': template['subject'],
+                'body': body
+            })
+            # Each template is versioned on its own so editing one doesn't invalidate the rest
+            self._details[template_id] = (detail, _digest(detail))
+
+        # Catalog version covers every template and the category metadata
+        hasher = hashlib.sha256(_dumps(categories))
+        for template_id in sorted(self._details):
+            hasher.update(self._details[template_id][1].encode('ascii'))
+        self.version = hasher.hexdigest()[:16]
+
+        self.listing_json = _dumps({
+            'version': self.version,
+            'categories': categories,
+            'templates': self.listing
+        })
+
+    def __contains__(self, template_id: str) -> bool:
+        return template_id in self._details
+
+    def detail_json(self, template_id: str):
+        """
+        Serialized details (including subject and body) for one template.
+
+        Args:
+            template_id: Template to look up
+
+        Returns:
+            (json_bytes, etag) tuple, or None for an unknown id
+        """
+        return self._details.get(template_id)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> TemplateCatalog:
+    """Return the process-wide catalog, building it on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = TemplateCatalog(MessageGenerator.TEMPLATES, MessageGenerator.TEMPLATE_CATEGORIES)
+    return _catalog
@@ -0,0 +1,398 @@
+"""
+Tracking Events Module
+Batched ingestion of tracking events for roster records: status changes,
+opens and clicks. Events are validated, buffered in memory and written to
+SQLite by one background writer, a batch per transaction, once enough have
+collected or the oldest has waited long enough. Event ids make ingestion
+idempotent, so a client can resend a batch it isn't sure was received.
+"""
+
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from . import metrics
+from .search_index import STATUS_RANK
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ('status', 'open', 'click')
+
+MAX_EVENT_ID_LENGTH = 128
+MAX_URL_LENGTH = 2048
+
+# Ids per lookup query
+LOOKUP_BATCH = 500
+
+# Longest wait before retrying a batch whose write failed
+MAX_RETRY_SECONDS = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracking_events (
+    event_id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    roster_id TEXT NOT NULL,
+    record_id INTEGER NOT NULL,
+    email TEXT,
+    status TEXT,
+    url TEXT,
+    occurred_at REAL NOT NULL,
+    received_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tracking_events_record ON tracking_events (type, roster_id, record_id, occurred_at);
+-- Latest status event of each record
+CREATE TABLE IF NOT EXISTS tracking_statuses (
+    roster_id TEXT NOT NULL,
+    record_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    occurred_at REAL NOT NULL,
+    event_id TEXT NOT NULL,
+    PRIMARY KEY (roster_id, record_id)
+) WITHOUT ROWID;
+"""
+
+COLUMNS = ('event_id', 'type', 'roster_id', 'record_id', 'email', 'status', 'url', 'occurred_at', 'received_at')
+
+EVENTS_TOTAL = metrics.registry.counter(
+    'hsrm_tracking_events_total',
+    'Tracking events received, by result (written, duplicate, rejected).'
+)
+PENDING = metrics.registry.gauge(
+    'hsrm_tracking_events_pending',
+    'Tracking events buffered and not yet written.'
+)
+FLUSH_SECONDS = metrics.registry.histogram(
+    'hsrm_tracking_event_flush_seconds',
+    'Time to write one batch of tracking events.'
+)
+
+
+class EventBufferFull(Exception):
+    """Raised when too many events are waiting to be written; carries the seconds to wait."""
+
+    def __init__(self, retry_after: int):
+        super().__init__('Too many tracking events are waiting to be written')
+        self.retry_after = retry_after
+
+
+def parse_event(event, received_at: float) -> tuple:
+    """
+    Validate one event.
+
+    Args:
+        event: Dict with id, type ('status', 'open' or 'click'), roster_id and record_id,
+            plus status (status events), url (clicks), email and at (when it happened:
+            Unix time or ISO 8601) where given
+        received_at: Unix time the event arrived (the default for ``at``)
+
+    Returns:
+        The event's row (see COLUMNS)
+
+    Raises:
+        ValueError: If the event is invalid
+    """
+    if not isinstance(event, dict):
+        raise ValueError('Event must be an object')
+    event_id = event.get('id')
+    if not isinstance(event_id, str) or not event_id or len(event_id) > MAX_EVENT_ID_LENGTH:
+        raise ValueError(f'id must be a string of 1 to {MAX_EVENT_ID_LENGTH} characters')
+    kind = event.get('type')
+    if kind not in EVENT_TYPES:
+        raise ValueError(f"type must be one of: {', '.join(EVENT_TYPES)}")
+    roster_id, record_id = event.get('roster_id'), event.get('record_id')
+    if not isinstance(roster_id, str) or not roster_id:
+        raise ValueError('roster_id is required')
+    if not isinstance(record_id, int) or isinstance(record_id, bool) or record_id < 0:
+        raise ValueError('record_id must be a non-negative integer')
+    email = event.get('email')
+    if email is not None and not isinstance(email, str):
+        raise ValueError('email must be a string')
+
+    status = url = None
+    if kind == 'status':
+        status = event.get('status')
+        if status not in STATUS_RANK:
+            raise ValueError(f"status must be one of: {', '.join(STATUS_RANK)}")
+    elif kind == 'click':
+        url = event.get('url')
+        if url is not None and (not isinstance(url, str) or len(url) > MAX_URL_LENGTH):
+            raise ValueError(f'url must be a string of up to {MAX_URL_LENGTH} characters')
+    return (event_id, kind, roster_id, record_id, email.lower() if email else None, status, url,
+            _timestamp(event.get('at'), received_at), received_at)
+
+
+def _timestamp(value, default: float) -> float:
+    """Unix time from a number or an ISO 8601 string (server local time without an offset)."""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            pass
+    raise ValueError('at must be a Unix time or an ISO 8601 time')
+
+
+class TrackingEventLog:
+    """Buffers tracking events and writes them in batches from a background thread."""
+
+    def __init__(self, path: str, apply_statuses=None, batch_size: int = 1000,
+                 flush_interval: float = 1.0, max_pending: int = 50000):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            apply_statuses: Optional callable receiving {roster_id: {record_id: status}}, the
+                latest status of each record a written batch changed
+            batch_size: Buffered events that trigger a write
+            flush_interval: Seconds after which buffered events are written anyway
+            max_pending: Buffered events beyond which add() refuses more
+        """
+        self.path = path
+        self.apply_statuses = apply_statuses
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = []
+        # Ids buffered or being written, so a resent event isn't buffered twice
+        self._pending_ids = set()
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._db = None
+        self._writer = None
+        self._closed = False
+
+    def add(self, events: list) -> dict:
+        """
+        Validate and buffer a batch of events (see parse_event for their fields).
+
+        Args:
+            events: List of event dicts
+
+        Returns:
+            {'accepted': events buffered, 'duplicates': events already buffered,
+            'rejected': [{'index', 'error'}, ...]}; accepted events that were written
+            by an earlier batch are dropped when written
+
+        Raises:
+            EventBufferFull: If the buffer can't take the batch
+        """
+        received_at = time.time()
+        rows, rejected = [], []
+        for index, event in enumerate(events):
+            try:
+                rows.append(parse_event(event, received_at))
+            except ValueError as e:
+                rejected.append({'index': index, 'error': str(e)})
+
+        accepted = 0
+        with self._lock:
+            if len(self._pending) + len(rows) > self.max_pending:
+                raise EventBufferFull(max(1, math.ceil(self.flush_interval)))
+            for row in rows:
+                if row[0] not in self._pending_ids:
+                    self._pending_ids.add(row[0])
+                    self._pending.append(row)
+                    accepted += 1
+            # The writer sleeps until the buffer gets its first event or fills a batch
+            if self._pending and self._oldest is None:
+                self._oldest = time.monotonic()
+                self._wake.notify()
+            elif len(self._pending) >= self.batch_size:
+                self._wake.notify()
+            self._start()
+            PENDING.set(len(self._pending))
+
+        if rejected:
+            EVENTS_TOTAL.inc(len(rejected), result='rejected')
+        if accepted < len(rows):
+            EVENTS_TOTAL.inc(len(rows) - accepted, result='duplicate')
+        return {'accepted': accepted, 'duplicates': len(rows) - accepted, 'rejected': rejected}
+
+    def flush(self):
+        """Write buffered events now."""
+        while True:
+            with self._lock:
+                batch = self._take()
+            if not batch:
+                return
+            self._write(batch)
+
+    def engagement(self, roster_id: str) -> dict:
+        """
+        Open and click counts of a roster's records.
+
+        Args:
+            roster_id: Roster the events were recorded for
+
+        Returns:
+            {record_id: {'opens', 'clicks', 'last_open', 'last_click'}} for records with any
+        """
+        self.flush()
+        records = {}
+        with self._write_lock:
+            rows = self._connection().execute(
+                "SELECT record_id, type, COUNT(*), MAX(occurred_at) FROM tracking_events "
+                "WHERE type IN ('open', 'click') AND roster_id = ? GROUP BY type, record_id",
+                (roster_id,)
+            ).fetchall()
+        for record_id, kind, count, last in rows:
+            record = records.setdefault(record_id, {'opens': 0, 'clicks': 0, 'last_open': None, 'last_click': None})
+            record[f'{kind}s'] = count
+            record[f'last_{kind}'] = last
+        return records
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._wake.notify()
+        if self._writer is not None:
+            self._writer.join()
+        try:
+            self.flush()
+        finally:
+            with self._write_lock:
+                if self._db is not None:
+                    self._db.close()
+                    self._db = None
+
+    def _start(self):
+        """Start the writer thread on first use, or again if it died (call with the lock held)."""
+        if (self._writer is None or not self._writer.is_alive()) and not self._closed:
+            self._writer = threading.Thread(target=self._run, name='hsrm-tracking-events', daemon=True)
+            self._writer.start()
+
+    def _run(self):
+        failures, retry_at = 0, 0.0
+        while True:
+            with self._lock:
+                wait = self._wait_time()
+                if failures and wait is not None:
+                    # A failed batch waits out its backoff even if more events arrive
+                    wait = max(wait, retry_at - time.monotonic(), 0.0)
+                if wait != 0 and not self._closed:
+                    self._wake.wait(wait)
+                    continue
+                if self._closed:
+                    return
+                batch = self._take()
+            # One failure (a lock timeout, an apply_statuses error) must not stop the writer,
+            # or every event accepted after it would stay buffered until the buffer fills
+            try:
+                self._write(batch)
+            except Exception:
+                failures += 1
+                delay = min(MAX_RETRY_SECONDS, self.flush_interval * 2 ** (failures - 1))
+                retry_at = time.monotonic() + delay
+                logger.exception('Writing %d tracking events failed; retrying in %.1f s', len(batch), delay)
+            else:
+                failures = 0
+
+    def _wait_time(self):
+        """Seconds until the buffer is due to be written: 0 now, None when it's empty (lock held)."""
+        if not self._pending:
+            return None
+        if len(self._pending) >= self.batch_size:
+            return 0
+        return max(0.0, self._oldest + self.flush_interval - time.monotonic())
+
+    def _take(self) -> list:
+        """Up to one batch of buffered events (call with the lock held)."""
+        batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+        self._oldest = time.monotonic() if self._pending else None
+        PENDING.set(len(self._pending))
+        return batch
+
+    def _write(self, rows: list):
+        """
+        Insert a batch in one transaction, then apply the status changes it made. A batch
+        that fails goes back to the front of the buffer; retrying it is safe, since rows
+        already written are ignored and their statuses are read back and applied again.
+        """
+        if not rows:
+            return
+        started = time.perf_counter()
+        try:
+            with self._write_lock:
+                db = self._connection()
+                with db:
+                    before = db.total_changes
+                    db.executemany(
+                        f"INSERT OR IGNORE INTO tracking_events ({', '.join(COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                        rows
+                    )
+                    written = db.total_changes - before
+                    statuses = self._latest_statuses(db, rows)
+                # Applied while holding the write lock, so batches are applied in the order written
+                if statuses and self.apply_statuses is not None:
+                    self.apply_statuses(statuses)
+        except BaseException:
+            # Ids stay pending, so a resent event isn't buffered a second time meanwhile
+            with self._lock:
+                self._pending[:0] = rows
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+                PENDING.set(len(self._pending))
+            raise
+        with self._lock:
+            self._pending_ids.difference_update(row[0] for row in rows)
+        FLUSH_SECONDS.observe(time.perf_counter() - started)
+        EVENTS_TOTAL.inc(written, result='written')
+        if written < len(rows):
+            EVENTS_TOTAL.inc(len(rows) - written, result='duplicate')
+
+    def _latest_statuses(self, db: sqlite3.Connection, rows: list) -> dict:
+        """
+        Fold a batch's status events into tracking_statuses and return
+        {roster_id: {record_id: status}}, the latest status of each record they touch.
+        """
+        event_ids = [row[0] for row in rows if row[1] == 'status']
+        records = {}
+        for row in rows:
+            if row[1] == 'status':
+                records.setdefault(row[2], set()).add(row[3])
+
+        # Events can arrive out of order: the latest by occurred_at wins, whichever batch it
+        # came in. Read back from tracking_events so a resent id keeps its first payload.
+        for start in range(0, len(event_ids), LOOKUP_BATCH):
+            batch = event_ids[start:start + LOOKUP_BATCH]
+            db.execute(
+                f"INSERT INTO tracking_statuses (roster_id, record_id, status, occurred_at, event_id) "
+                f"SELECT roster_id, record_id, status, occurred_at, event_id FROM tracking_events "
+                f"WHERE event_id IN ({', '.join('?' * len(batch))}) ORDER BY occurred_at, event_id "
+                f"ON CONFLICT (roster_id, record_id) DO UPDATE SET "
+                f"status = excluded.status, occurred_at = excluded.occurred_at, event_id = excluded.event_id "
+                f"WHERE (excluded.occurred_at, excluded.event_id) > (tracking_statuses.occurred_at, tracking_statuses.event_id)",
+                batch
+            )
+
+        statuses = {}
+        for roster_id, record_ids in records.items():
+            record_ids = list(record_ids)
+            for start in range(0, len(record_ids), LOOKUP_BATCH):
+                batch = record_ids[start:start + LOOKUP_BATCH]
+                statuses.setdefault(roster_id, {}).update(db.execute(
+                    f"SELECT record_id, status FROM tracking_statuses "
+                    f"WHERE roster_id = ? AND record_id IN ({', '.join('?' * len(batch))})",
+                    [roster_id, *batch]
+                ))
+        return statuses
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use (call with the write lock held)."""
+        if self._db is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.executescript(SCHEMA)
+        return self._db
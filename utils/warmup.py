@@ -0,0 +1,118 @@
+"""
+Warm-up Module
+Optional background warm-up run at startup so the first request of the day
+doesn't pay for backend imports, template compilation and the first page render.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from .backends import registry
+from .file_parser import FileParser
+from .message_generator import MessageGenerator
+
+# Tiny roster used to exercise the parse path end to end
+WARMUP_CSV = """First Name,Last Name,Email Address,Phone Number,Assigned Site/Session
+Warm,Up,warm.up@example.com,817-555-0100,Monday Evening - UTA
+"""
+
+
+class Warmup:
+    """Runs warm-up steps in a background thread and reports readiness."""
+
+    def __init__(self):
+        self.state = 'disabled'
+        self.started_at = None
+        self.finished_at = None
+        self.steps = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        """True once warm-up has finished (or was never enabled)."""
+        return self.state in ('disabled', 'ready', 'failed')
+
+    def start(self, app, backends: list = None):
+        """
+        Start warm-up in a daemon thread.
+
+        Args:
+            app: Flask application whose index page should be rendered
+            backends: Format backends to import (default: all registered)
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.state = 'running'
+            self.started_at = time.time()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(app, backends or registry.names()),
+                name='hsrm-warmup',
+                daemon=True
+            )
+            self._thread.start()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until warm-up finishes; returns readiness."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    def status(self) -> dict:
+        return {
+            'ready': self.ready,
+            'state': self.state,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'steps': list(self.steps)
+        }
+
+    def _run(self, app, backends: list):
+        failed = False
+
+        for name in backends:
+            failed |= not self._step(f'import {name} backend', lambda n=name: registry.load(n))
+        failed |= not self._step('compile templates', MessageGenerator.compile_templates)
+        failed |= not self._step('render index page', lambda: self._render_index(app))
+        failed |= not self._step('parse sample roster', self._parse_sample)
+
+        self.finished_at = time.time()
+        self.state = 'failed' if failed else 'ready'
+
+    def _step(self, name: str, func) -> bool:
+        start = time.perf_counter()
+        error = None
+        try:
+            func()
+        except Exception as e:
+            error = str(e)
+        self.steps.append({
+            'step': name,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+            'error': error
+        })
+        return error is None
+
+    def _render_index(self, app):
+        # Goes through the real view so its page cache (if enabled) is filled
+        response = app.test_client().get('/')
+        if response.status_code != 200:
+            raise RuntimeError(f"Index page returned {response.status_code}")
+
+    def _parse_sample(self):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(WARMUP_CSV)
+            parser = FileParser()
+            parser.parse(path)
+            parser._extract_from_text('Warm Up warm.up@example.com 817-555-0100')
+        finally:
+            os.remove(path)
+
+
+# Process-wide warm-up state
+warmup = Warmup()
@@ -0,0 +1,12 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Each worker process imports this module and builds its own application, so
+workers share no state.
+"""
+
+from app import create_app
+
+app = create_app()